@@ -0,0 +1,88 @@
+# Import-time regression check for setup_core_portal.
+#
+# Runs `python -X importtime -c "import <module>"` in fresh interpreters and
+# reports the median cumulative import time of the module. Exits non-zero
+# when the median exceeds the budget, so it can gate CI:
+#
+#   python benchmarks/bench_import.py --runs 15 --budget-ms 25
+#
+# Templates are loaded lazily (templates/*.tmpl), so importing the module must
+# not read, decode or compile any of them; a regression here usually means a
+# template or a heavy import (concurrent.futures, argparse, ...) crept back in
+# at module level.
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+HERE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEFAULT_BUDGET_MS = 25.0
+
+
+def parse_importtime(stderr):
+    # Lines look like: "import time:  self [us] | cumulative | imported package"
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        rows.append((name.rstrip(), int(self_us), int(cumulative_us)))
+    return rows
+
+
+def _env():
+    # Measure what users see: cached bytecode, not a recompile on every import
+    env = dict(os.environ)
+    env.pop("PYTHONDONTWRITEBYTECODE", None)
+    return env
+
+
+def measure(module):
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=HERE,
+        env=_env(),
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    rows = parse_importtime(proc.stderr)
+    for name, _, cumulative_us in rows:
+        if name.strip() == module:
+            return cumulative_us, rows
+    raise RuntimeError(f"{module} not found in -X importtime output")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check the median import time of setup_core_portal against a budget.")
+    parser.add_argument("--module", default="setup_core_portal")
+    parser.add_argument("--runs", type=int, default=15)
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS)
+    parser.add_argument("--top", type=int, default=8, help="show the N slowest imports of the last run")
+    args = parser.parse_args(argv)
+
+    measure(args.module)  # warm-up: populates __pycache__
+
+    samples = []
+    rows = []
+    for _ in range(args.runs):
+        cumulative_us, rows = measure(args.module)
+        samples.append(cumulative_us / 1000)
+
+    median = statistics.median(samples)
+    print(f"{args.module}: median {median:.2f} ms, min {min(samples):.2f} ms, max {max(samples):.2f} ms over {args.runs} runs")
+    print("slowest imports (self time, last run):")
+    for name, self_us, cumulative_us in sorted(rows, key=lambda r: r[1], reverse=True)[:args.top]:
+        print(f"  {self_us / 1000:>7.2f} ms self {cumulative_us / 1000:>7.2f} ms cumulative  {name.strip()}")
+
+    if median > args.budget_ms:
+        print(f"FAIL: import budget {args.budget_ms:.1f} ms exceeded by {median - args.budget_ms:.2f} ms")
+        return 1
+    print(f"OK: within import budget of {args.budget_ms:.1f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
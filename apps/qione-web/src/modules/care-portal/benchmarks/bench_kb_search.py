@@ -0,0 +1,91 @@
+# Query latency: prebuilt inverted index vs. brute-force scan of the KB pages.
+#
+#   index     - build_kb_index.search over the loaded shards
+#   scan      - substring search over page text extracted once up front
+#   scan+html - read and parse every index.html per query (what a client
+#               without an index would have to do)
+# The index is built into a temporary copy so the real public/kb is untouched.
+#
+#   python benchmarks/bench_kb_search.py --repeat 200
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from build_kb_index import analyze, build_index, extract_page, find_pages, load_index, search  # noqa: E402
+
+HERE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+QUERIES = ["oxygen", "POA", "Lisinopril", "emergency contact", "medication schedule", "power of attorney"]
+
+
+def scan_texts(texts, query, limit=10):
+    terms = [t for t in query.lower().split() if t]
+    hits = []
+    for url, text in texts:
+        count = sum(text.count(t) for t in terms)
+        if count:
+            hits.append((count, url))
+    return [url for _, url in sorted(hits, reverse=True)[:limit]]
+
+
+def scan_html(root, query, limit=10):
+    texts = []
+    for path in find_pages(root):
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            texts.append((path, extract_page(f.read())[2].lower()))
+    return scan_texts(texts, query, limit)
+
+
+def timed(label, fn, repeat, baseline=None):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for query in QUERIES:
+            fn(query)
+    per_query = (time.perf_counter() - start) / (repeat * len(QUERIES))
+    ratio = f"{per_query / baseline:8.1f}x" if baseline else "    1.0x"
+    print(f"{label:<10} {per_query * 1e6:>10.1f} us/query {ratio}")
+    return per_query
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare KB query latency of the prebuilt index with a brute-force scan.")
+    parser.add_argument("--root", default=os.path.join(HERE, "public", "kb"))
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = os.path.join(tmp, "kb")
+        shutil.copytree(args.root, root, ignore=shutil.ignore_patterns("*.gz", "*.br", "search"))
+        cache = os.path.join(tmp, "cache.json")
+
+        start = time.perf_counter()
+        report = build_index(root, cache_path=cache)
+        cold = time.perf_counter() - start
+        start = time.perf_counter()
+        build_index(root, cache_path=cache)
+        warm = time.perf_counter() - start
+        size = sum(os.path.getsize(os.path.join(root, "search", n)) for n in os.listdir(os.path.join(root, "search")))
+        print(f"{report['pages']} pages; index {size} bytes; build {cold * 1000:.1f} ms cold, {warm * 1000:.1f} ms warm")
+
+        index = load_index(root)
+        texts = []
+        for path in find_pages(root):
+            with open(path, "r", encoding="utf-8", errors="replace") as f:
+                texts.append((path, extract_page(f.read())[2].lower()))
+
+        base = timed("index", lambda q: search(index, q), args.repeat)
+        timed("scan", lambda q: scan_texts(texts, q), args.repeat, base)
+        timed("scan+html", lambda q: scan_html(root, q), max(1, args.repeat // 20), base)
+
+        for query in QUERIES:
+            hits = search(index, query, limit=3)
+            print(f"  {query!r:<22} {len(analyze(query))} term(s) -> {', '.join(url for url, _, _ in hits) or '-'}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
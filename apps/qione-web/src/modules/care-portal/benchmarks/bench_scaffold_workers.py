@@ -0,0 +1,94 @@
+# Benchmark: scaffold write throughput vs. writer thread count.
+#
+# Generates a synthetic tree of a few thousand files and writes it with
+# scaffold_backends.write_tree() at 1..N workers, each into a fresh directory.
+# Point --root at a network-mounted volume to see the latency hiding the pool
+# is for; on a local SSD the pool only adds overhead (the writes are too fast
+# for threads to overlap anything), which is why --workers defaults to 1.
+# --latency-ms adds a simulated per-file round trip (a sleep before each write,
+# which releases the GIL like network I/O does) to show the pool anywhere:
+#
+#   python benchmarks/bench_scaffold_workers.py --files 3000 --max-workers 16
+#   python benchmarks/bench_scaffold_workers.py --files 500 --latency-ms 2
+#
+# Measured on a local SSD, 500 files of ~2 KB: 2-16 workers run at 0.55x of
+# serial without latency; with --latency-ms 2 they reach 1.9x (2), 3.6x (4),
+# 6.1x (8) and 11x (16).
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import scaffold_backends  # noqa: E402
+from scaffold_backends import write_tree  # noqa: E402
+
+
+def simulate_latency(seconds):
+    # Every file write waits `seconds` first, like a round trip to remote storage
+    atomic_write = scaffold_backends._atomic_write
+
+    def slow_write(full_path, data):
+        time.sleep(seconds)
+        atomic_write(full_path, data)
+
+    scaffold_backends._atomic_write = slow_write
+
+
+def generate_tree(count, size):
+    # Spread files over nested dirs, roughly like a real multi-module portal
+    body = ("// generated\n" + "x" * 79 + "\n") * max(1, size // 80)
+    tree = {}
+    for i in range(count):
+        tree[f"src/mod{i % 20:02d}/part{(i // 20) % 10}/file{i:05d}.js"] = f"// file {i}\n{body}"
+    return tree
+
+
+def worker_counts(max_workers):
+    n = 1
+    while n < max_workers:
+        yield n
+        n *= 2
+    yield max_workers
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark scaffold write throughput against writer thread count.")
+    parser.add_argument("--files", type=int, default=3000)
+    parser.add_argument("--size", type=int, default=2048, help="approximate bytes per file")
+    parser.add_argument("--max-workers", type=int, default=16)
+    parser.add_argument("--repeat", type=int, default=3, help="runs per worker count; best is reported")
+    parser.add_argument("--root", default=None, help="directory to write into (default: system temp)")
+    parser.add_argument(
+        "--latency-ms", type=float, default=0, help="simulated latency added to every file write (default: 0)"
+    )
+    args = parser.parse_args(argv)
+
+    if args.latency_ms:
+        simulate_latency(args.latency_ms / 1000)
+    tree = generate_tree(args.files, args.size)
+    latency = f", {args.latency_ms:g} ms simulated latency per write" if args.latency_ms else ""
+    print(f"{len(tree)} files, ~{args.size} bytes each{latency}")
+    print(f"{'workers':>8} {'best s':>9} {'files/s':>10} {'speedup':>8}")
+
+    baseline = None
+    for workers in worker_counts(args.max_workers):
+        best = None
+        for _ in range(args.repeat):
+            root = tempfile.mkdtemp(prefix="scaffold-bench-", dir=args.root)
+            try:
+                start = time.perf_counter()
+                write_tree(os.path.join(root, "portal"), tree, workers=workers)
+                elapsed = time.perf_counter() - start
+            finally:
+                shutil.rmtree(root, ignore_errors=True)
+            best = elapsed if best is None else min(best, elapsed)
+        baseline = baseline or best
+        print(f"{workers:>8} {best:>9.3f} {len(tree) / best:>10.0f} {baseline / best:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+# Bytes and milliseconds per sync: full reload vs. the delta sync protocol.
+#
+#   full     - every row of the table as one JSON array (a stateless full reload)
+#   initial  - first delta sync with no cursor (pages of --page-limit rows)
+#   idle     - delta sync right after, nothing changed
+#   delta    - delta sync after 10 updates and 2 deletes
+#
+# Runs against a real Postgres (13+): the tasks table and its sync functions
+# are created in a scratch schema (sync_bench) from care_schema.py, seeded at
+# each size, and the schema is dropped afterwards unless --keep is given.
+#
+#   python benchmarks/bench_sync.py --dsn postgresql://localhost/care --sizes 1000,100000,1000000
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import care_schema  # noqa: E402
+from gen_data_layer import load_schema, render_sql  # noqa: E402
+from sync_client import PgTransport, SyncClient  # noqa: E402
+
+BENCH_SCHEMA = "sync_bench"
+
+
+def bench_ddl():
+    # tasks alone, without the foreign key to patients
+    schema, _ = load_schema()
+    spec = dict(schema["tasks"], section=None)
+    spec["columns"] = [dict(c, constraints="") if c["name"] == "patient_id" else c for c in spec["columns"]]
+    return render_sql({"tasks": spec}, BENCH_SCHEMA, sync={"tasks": care_schema.SYNC["tasks"]})
+
+
+def _select_list(items):
+    parts = []
+    for item in items:
+        alias, _, column = item.rpartition(":")
+        parts.append(f"{column} as {alias}" if alias else column)
+    return ", ".join(parts)
+
+
+def seed(cur, rows):
+    cur.execute(f"truncate {BENCH_SCHEMA}.tasks")
+    cur.execute(
+        f"insert into {BENCH_SCHEMA}.tasks (patient_id, title, due_at, recurring, status, notes) "
+        "select gen_random_uuid(), 'Task ' || g, now() + g * interval '1 minute', mod(g, 7) = 0, 'pending', "
+        "'Check supplies and log the reading before noon' from generate_series(1, %s) g",
+        (rows,),
+    )
+    # truncate fires no row triggers, so the previous size leaves no tombstones
+    cur.execute(f"analyze {BENCH_SCHEMA}.tasks")
+
+
+def full_reload(cur, items):
+    start = time.perf_counter()
+    cur.execute(
+        f"select coalesce(json_agg(t), '[]')::text from (select {_select_list(items)} from {BENCH_SCHEMA}.tasks) t"
+    )
+    payload = cur.fetchone()[0].encode("utf-8")
+    return {"bytes": len(payload), "ms": round((time.perf_counter() - start) * 1000, 3), "rows": len(json.loads(payload))}
+
+
+def change(cur, updates=10, deletes=2):
+    cur.execute(
+        f"update {BENCH_SCHEMA}.tasks set status = 'completed' "
+        f"where id in (select id from {BENCH_SCHEMA}.tasks order by random() limit %s)",
+        (updates,),
+    )
+    cur.execute(
+        f"delete from {BENCH_SCHEMA}.tasks where id in (select id from {BENCH_SCHEMA}.tasks order by random() limit %s)",
+        (deletes,),
+    )
+
+
+def _summary(stats):
+    return {key: stats[key] for key in ("bytes", "ms", "pages", "rows", "deleted")}
+
+
+def run(dsn, sizes, page_limit=1000, keep=False):
+    transport = PgTransport(dsn, BENCH_SCHEMA)
+    cur = transport.conn.cursor()
+    items = care_schema.SYNC["tasks"][1]
+    report = {}
+    try:
+        cur.execute(f"drop schema if exists {BENCH_SCHEMA} cascade")
+        cur.execute(bench_ddl())
+        for rows in sizes:
+            seed(cur, rows)
+            result = {"full": full_reload(cur, items)}
+            client = SyncClient(transport, page_limit)
+            result["initial"] = _summary(client.sync())
+            result["idle"] = _summary(client.sync())
+            change(cur)
+            result["delta"] = _summary(client.sync())
+            cur.execute(f"select count(*) from {BENCH_SCHEMA}.tasks")
+            expected = cur.fetchone()[0]
+            if len(client.tables["tasks"]) != expected:
+                raise SystemExit(f"{rows} rows: client has {len(client.tables['tasks'])} tasks, table has {expected}")
+            report[str(rows)] = result
+            print(f"{rows:>9} rows: full {result['full']['bytes']:>11,} B {result['full']['ms']:>9.1f} ms | "
+                  f"delta {result['delta']['bytes']:>7,} B {result['delta']['ms']:>7.1f} ms", file=sys.stderr)
+    finally:
+        if not keep:
+            cur.execute(f"drop schema if exists {BENCH_SCHEMA} cascade")
+        cur.close()
+        transport.close()
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare full reload and delta sync sizes and latencies.")
+    parser.add_argument("--dsn", required=True, help="Postgres DSN (a scratch database is fine)")
+    parser.add_argument("--sizes", default="1000,100000,1000000", help="comma-separated row counts")
+    parser.add_argument("--page-limit", type=int, default=1000)
+    parser.add_argument("--keep", action="store_true", help=f"leave the {BENCH_SCHEMA} schema in place")
+    args = parser.parse_args(argv)
+
+    sizes = [int(size) for size in args.sizes.split(",") if size]
+    print(json.dumps(run(args.dsn, sizes, args.page_limit, args.keep), indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
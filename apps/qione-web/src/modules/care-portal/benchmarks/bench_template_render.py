@@ -0,0 +1,79 @@
+# Microbenchmark: compiled templates vs. naive str.replace / str.format.
+#
+# Renders the src/App.jsx template (the largest one) for N tenant variants:
+#   compiled  - template_engine.compile_template, parsed once, "".join per render
+#   replace   - re-scan the source and str.replace every placeholder per render
+#   format    - str.format on a pre-converted copy of the template
+# All three produce identical output; the check at the end asserts it.
+#
+#   python benchmarks/bench_template_render.py --tenants 10000
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from setup_core_portal import files, normalize_tenant  # noqa: E402
+from template_engine import FILTERS, PLACEHOLDER, compile_template  # noqa: E402
+
+
+def make_tenants(count):
+    return [
+        normalize_tenant({"tenant": f"Family {i}", "patient_name": f"Patient {i}", "caregiver_name": f"Carer {i}"})
+        for i in range(count)
+    ]
+
+
+def render_replace(source, ctx):
+    out = source
+    for m in PLACEHOLDER.finditer(source):
+        out = out.replace(m.group(0), FILTERS[m.group(2)](ctx[m.group(1)]))
+    return out
+
+
+def to_format_string(source):
+    # Escape literal braces, then turn each placeholder into a {name__type} field
+    pieces = []
+    pos = 0
+    for m in PLACEHOLDER.finditer(source):
+        pieces.append(source[pos:m.start()].replace("{", "{{").replace("}", "}}"))
+        pieces.append("{%s__%s}" % (m.group(1), m.group(2)))
+        pos = m.end()
+    pieces.append(source[pos:].replace("{", "{{").replace("}", "}}"))
+    return "".join(pieces)
+
+
+def render_format(fmt, fields, ctx):
+    return fmt.format(**{f"{name}__{kind}": FILTERS[kind](ctx[name]) for name, kind in fields})
+
+
+def timed(label, fn, tenants, baseline=None):
+    start = time.perf_counter()
+    out = [fn(t) for t in tenants]
+    elapsed = time.perf_counter() - start
+    ratio = f"{elapsed / baseline:6.2f}x" if baseline else "  1.00x"
+    print(f"{label:<10} {elapsed * 1000:>9.1f} ms {len(tenants) / elapsed:>10.0f}/s {ratio}")
+    return elapsed, out
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare compiled template rendering with str.replace and str.format.")
+    parser.add_argument("--tenants", type=int, default=10000)
+    parser.add_argument("--template", default="src/App.jsx")
+    args = parser.parse_args(argv)
+
+    source = files[args.template]
+    tenants = make_tenants(args.tenants)
+    render = compile_template(source)
+    fmt = to_format_string(source)
+
+    print(f"{args.template}: {len(source)} chars, {len(render.fields)} placeholders, {len(tenants)} tenants")
+    base, compiled = timed("compiled", render, tenants)
+    _, replaced = timed("replace", lambda t: render_replace(source, t), tenants, base)
+    _, formatted = timed("format", lambda t: render_format(fmt, render.fields, t), tenants, base)
+    assert compiled == replaced == formatted, "renderers disagree"
+
+
+if __name__ == "__main__":
+    main()
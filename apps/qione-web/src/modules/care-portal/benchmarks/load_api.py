@@ -0,0 +1,361 @@
+# Load and latency harness for the Railway API in server/index.js.
+#
+# Runs a scenario (benchmarks/scenarios/*.json) against a running server and
+# prints one JSON report: p50/p95/p99/max latency, throughput, bytes and error
+# rate per endpoint, per phase and overall. Reports have stable keys, so two
+# runs diff cleanly; --compare prints the change against a saved report.
+#
+#   python benchmarks/load_api.py benchmarks/scenarios/morning_rush.json \
+#       --url http://localhost:3000 > run.json
+#   python benchmarks/load_api.py ... --start-server --database-url postgresql://localhost/care
+#   python benchmarks/load_api.py ... --compare baseline.json
+#
+# A scenario is a list of phases that may overlap in time. A phase either
+# keeps `concurrency` requests in flight (closed loop, e.g. a sync burst when
+# every phone opens the app) or issues `rate` requests per second (open loop,
+# e.g. a steady stream of event posts). Open-loop latency is measured from
+# the scheduled send time, so a stalled server cannot hide its queueing delay.
+#
+# Strings in paths and bodies may use {task_id} / {med_id} (drawn from ids the
+# setup request returns) and {int:LO:HI}. The HTTP/1.1 client is stdlib
+# asyncio with keep-alive connections; no third-party packages are needed.
+# The exit status is 1 when any request failed.
+import argparse
+import asyncio
+import json
+import os
+import random
+import re
+import subprocess
+import sys
+import time
+import urllib.parse
+
+HERE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PLACEHOLDER = re.compile(r"\{(task_id|med_id|int:(-?\d+):(-?\d+))\}")
+
+
+# =========
+# HTTP client
+# =========
+
+class Connection:
+    def __init__(self, host, port):
+        self.host, self.port = host, port
+        self.reader = self.writer = None
+
+    async def request(self, method, path, body=None):
+        # Returns (status, body bytes); reconnects once if a kept-alive socket was closed
+        payload = b"" if body is None else json.dumps(body).encode("utf-8")
+        head = (
+            f"{method} {path} HTTP/1.1\r\nHost: {self.host}:{self.port}\r\n"
+            f"Content-Length: {len(payload)}\r\nConnection: keep-alive\r\n"
+            + ("Content-Type: application/json\r\n" if body is not None else "")
+            + "\r\n"
+        ).encode("ascii")
+        for attempt in (0, 1):
+            if self.writer is None:
+                self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+            try:
+                self.writer.write(head + payload)
+                await self.writer.drain()
+                return await self._response()
+            except (ConnectionError, asyncio.IncompleteReadError):
+                self.close()
+                if attempt:
+                    raise
+
+    async def _response(self):
+        status_line = await self.reader.readuntil(b"\r\n")
+        status = int(status_line.split()[1])
+        headers = {}
+        while True:
+            line = await self.reader.readuntil(b"\r\n")
+            if line == b"\r\n":
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        if headers.get("transfer-encoding", "").lower() == "chunked":
+            chunks = []
+            while True:
+                size = int((await self.reader.readuntil(b"\r\n")).split(b";")[0], 16)
+                if size == 0:
+                    await self.reader.readuntil(b"\r\n")
+                    break
+                chunks.append(await self.reader.readexactly(size))
+                await self.reader.readexactly(2)
+            data = b"".join(chunks)
+        else:
+            data = await self.reader.readexactly(int(headers.get("content-length", 0)))
+        if headers.get("connection", "").lower() == "close":
+            self.close()
+        return status, data
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+        self.reader = self.writer = None
+
+
+class Pool:
+    def __init__(self, host, port, size):
+        self.host, self.port = host, port
+        self.idle = []
+        self.slots = asyncio.Semaphore(size)
+
+    async def request(self, method, path, body=None):
+        async with self.slots:
+            conn = self.idle.pop() if self.idle else Connection(self.host, self.port)
+            try:
+                result = await conn.request(method, path, body)
+            except BaseException:
+                conn.close()
+                raise
+            self.idle.append(conn)
+            return result
+
+    def close(self):
+        for conn in self.idle:
+            conn.close()
+
+
+# =========
+# Scenario
+# =========
+
+def _fill(value, ids, rng):
+    if isinstance(value, str):
+        def sub(m):
+            if m.group(2) is not None:
+                return str(rng.randint(int(m.group(2)), int(m.group(3))))
+            pool = ids.get(m.group(1))
+            if not pool:
+                raise LookupError(f"scenario uses {{{m.group(1)}}} but setup found none")
+            return str(rng.choice(pool))
+
+        whole = PLACEHOLDER.fullmatch(value)
+        if whole and whole.group(2) is not None:
+            return int(sub(whole))  # keep numbers numeric in JSON bodies
+        return PLACEHOLDER.sub(sub, value)
+    if isinstance(value, dict):
+        return {k: _fill(v, ids, rng) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_fill(v, ids, rng) for v in value]
+    return value
+
+
+class Recorder:
+    def __init__(self):
+        self.samples = {}  # (phase, endpoint) -> [(latency s, ok, bytes)]
+        self.start = self.end = None
+
+    def add(self, phase, endpoint, latency, ok, size):
+        self.samples.setdefault((phase, endpoint), []).append((latency, ok, size))
+
+
+async def _send(pool, recorder, phase, req, ids, rng, scheduled):
+    endpoint = f"{req['method']} {req['path']}"
+    try:
+        path = _fill(req["path"], ids, rng)
+        body = _fill(req.get("body"), ids, rng)
+        status, data = await pool.request(req["method"], path, body)
+        ok, size = status < 400, len(data)
+    except (OSError, asyncio.IncompleteReadError, LookupError, ValueError):
+        ok, size = False, 0
+    recorder.add(phase, endpoint, time.perf_counter() - scheduled, ok, size)
+
+
+def _picker(requests, rng):
+    weights = [r.get("weight", 1) for r in requests]
+    return lambda: rng.choices(requests, weights)[0]
+
+
+async def run_phase(pool, recorder, phase, ids, seed, t0):
+    rng = random.Random(f"{seed}:{phase['name']}")
+    pick = _picker(phase["requests"], rng)
+    await asyncio.sleep(max(0.0, t0 + phase.get("start", 0) - time.perf_counter()))
+    stop = time.perf_counter() + phase["duration"]
+
+    if "rate" in phase:
+        interval = 1.0 / phase["rate"]
+        next_at = time.perf_counter()
+        tasks = set()
+        while next_at < stop:
+            await asyncio.sleep(max(0.0, next_at - time.perf_counter()))
+            task = asyncio.ensure_future(_send(pool, recorder, phase["name"], pick(), ids, rng, next_at))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+            next_at += interval
+        await asyncio.gather(*tasks)
+        return
+
+    async def user():
+        while time.perf_counter() < stop:
+            await _send(pool, recorder, phase["name"], pick(), ids, rng, time.perf_counter())
+            if phase.get("think"):
+                await asyncio.sleep(phase["think"])
+
+    await asyncio.gather(*(user() for _ in range(phase["concurrency"])))
+
+
+async def _setup(pool, setup):
+    # Collect ids for {task_id} / {med_id} from one request, e.g. GET /api/sync
+    if not setup:
+        return {}
+    status, data = await pool.request(setup.get("method", "GET"), setup["path"])
+    if status >= 400:
+        raise SystemExit(f"setup {setup['path']} failed with HTTP {status}: {data[:200]!r}")
+    doc = json.loads(data)
+    return {name: [row["id"] for row in doc.get(key) or []] for name, key in setup.get("ids", {}).items()}
+
+
+async def run_scenario(scenario, url, connections, seed):
+    parsed = urllib.parse.urlsplit(url)
+    pool = Pool(parsed.hostname, parsed.port or 80, connections)
+    recorder = Recorder()
+    try:
+        ids = await _setup(pool, scenario.get("setup"))
+        t0 = time.perf_counter()
+        recorder.start = t0
+        await asyncio.gather(*(run_phase(pool, recorder, phase, ids, seed, t0) for phase in scenario["phases"]))
+        recorder.end = time.perf_counter()
+    finally:
+        pool.close()
+    return recorder
+
+
+# =========
+# Report
+# =========
+
+def _percentile(sorted_values, pct):
+    if not sorted_values:
+        return None
+    rank = max(1, -(-len(sorted_values) * pct // 100))  # nearest-rank
+    return sorted_values[int(rank) - 1]
+
+
+def summarize(samples, seconds):
+    latencies = sorted(s[0] for s in samples)
+    errors = sum(1 for s in samples if not s[1])
+    ms = lambda v: None if v is None else round(v * 1000, 2)  # noqa: E731
+    return {
+        "requests": len(samples),
+        "errors": errors,
+        "error_rate": round(errors / len(samples), 4) if samples else 0.0,
+        "throughput_rps": round(len(samples) / seconds, 2) if seconds else 0.0,
+        "bytes": sum(s[2] for s in samples),
+        "p50_ms": ms(_percentile(latencies, 50)),
+        "p95_ms": ms(_percentile(latencies, 95)),
+        "p99_ms": ms(_percentile(latencies, 99)),
+        "max_ms": ms(latencies[-1] if latencies else None),
+        "mean_ms": ms(sum(latencies) / len(latencies) if latencies else None),
+    }
+
+
+def build_report(scenario, recorder, url):
+    seconds = recorder.end - recorder.start
+    endpoints, phases = {}, {}
+    for (phase, endpoint), samples in recorder.samples.items():
+        endpoints.setdefault(endpoint, []).extend(samples)
+        phases.setdefault(phase, []).extend(samples)
+    durations = {p["name"]: p["duration"] for p in scenario["phases"]}
+    return {
+        "scenario": scenario["name"],
+        "target": url,
+        "duration_s": round(seconds, 2),
+        "total": summarize([s for v in recorder.samples.values() for s in v], seconds),
+        "endpoints": {name: summarize(s, seconds) for name, s in sorted(endpoints.items())},
+        "phases": {name: summarize(s, durations.get(name, seconds)) for name, s in sorted(phases.items())},
+    }
+
+
+def compare(baseline, report):
+    # One line per endpoint and metric: old -> new (change)
+    lines = []
+    for section in ("total", "endpoints"):
+        old_items = {"total": baseline["total"]} if section == "total" else baseline.get("endpoints", {})
+        new_items = {"total": report["total"]} if section == "total" else report["endpoints"]
+        for name in sorted(set(old_items) | set(new_items)):
+            old, new = old_items.get(name), new_items.get(name)
+            if not old or not new:
+                lines.append(f"{name}: {'added' if new else 'removed'}")
+                continue
+            for key in ("p50_ms", "p95_ms", "p99_ms", "throughput_rps", "error_rate"):
+                a, b = old.get(key), new.get(key)
+                change = f"{(b - a) / a * 100:+.1f}%" if a and b is not None else "n/a"
+                lines.append(f"{name:<36} {key:<15} {a} -> {b} ({change})")
+    return "\n".join(lines)
+
+
+# =========
+# Local server
+# =========
+
+def start_server(url, database_url):
+    # Starts `node server/index.js` on the URL's port and waits for GET / to answer
+    port = urllib.parse.urlsplit(url).port or 3000
+    env = dict(os.environ, PORT=str(port))
+    if database_url:
+        env["DATABASE_URL"] = database_url
+    env.setdefault("PGSSLMODE", "disable")  # a local Postgres has no TLS
+    proc = subprocess.Popen(["node", "index.js"], cwd=os.path.join(HERE, "server"), env=env)
+
+    async def wait():
+        deadline = time.perf_counter() + 15
+        while time.perf_counter() < deadline:
+            if proc.poll() is not None:
+                raise SystemExit(f"server exited with code {proc.returncode}")
+            try:
+                status, _ = await Connection("127.0.0.1", port).request("GET", "/")
+                if status == 200:
+                    return
+            except OSError:
+                pass
+            await asyncio.sleep(0.2)
+        proc.terminate()
+        raise SystemExit("server did not come up within 15s")
+
+    asyncio.run(wait())
+    return proc
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load-test the care-portal API and report latency as JSON.")
+    parser.add_argument("scenario", help="scenario JSON file")
+    parser.add_argument("--url", default="http://127.0.0.1:3000", help="server base URL")
+    parser.add_argument("--connections", type=int, default=64, help="max concurrent connections")
+    parser.add_argument("--seed", type=int, default=1, help="seed for request mix and placeholder values")
+    parser.add_argument("--scale", type=float, default=1.0, help="multiply every phase's duration")
+    parser.add_argument("--start-server", action="store_true", help="start server/index.js locally for the run")
+    parser.add_argument("--database-url", default=None, help="DATABASE_URL for --start-server")
+    parser.add_argument("--compare", metavar="REPORT", help="print the change against a saved report on stderr")
+    args = parser.parse_args(argv)
+
+    with open(args.scenario, "r", encoding="utf-8") as f:
+        scenario = json.load(f)
+    for phase in scenario["phases"]:
+        phase["duration"] *= args.scale
+        phase["start"] = phase.get("start", 0) * args.scale
+
+    server = start_server(args.url, args.database_url) if args.start_server else None
+    try:
+        recorder = asyncio.run(run_scenario(scenario, args.url, args.connections, args.seed))
+    finally:
+        if server:
+            server.terminate()
+            server.wait()
+
+    report = build_report(scenario, recorder, args.url)
+    json.dump(report, sys.stdout, indent=2)
+    print()
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            print(compare(json.load(f), report), file=sys.stderr)
+    return 1 if report["total"]["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
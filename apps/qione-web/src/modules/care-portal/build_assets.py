@@ -0,0 +1,321 @@
+# Static asset pipeline for public/assets.
+#
+#   python build_assets.py [--public public] [--force] [--update-manifest]
+#
+# - Generates the PWA icon set (favicon, apple-touch, 192/512 and a maskable
+#   512) from public/assets/QiBPAppIcon.png and writes a copy of
+#   public/manifest.json listing it to public/assets/build/manifest.webmanifest,
+#   the manifest index.html links (`npm run build` runs this script first).
+#   The tracked public/manifest.json is rewritten only with --update-manifest.
+# - Recompresses every PNG losslessly: IDAT is re-deflated at maximum level and
+#   chunks that do not affect rendering (pHYs, tEXt, tIME, ...) are dropped.
+# - Emits content-hashed copies of every asset into public/assets/build/ plus
+#   asset-manifest.json mapping logical names to hashed URLs.
+#
+# Results are cached by source hash in .cache/assets.json, so an unchanged
+# source is never decoded or recompressed again. Other formats (the intro
+# video) are hashed and copied as-is; transcoding is out of scope here.
+#
+# Icon resizing needs Pillow (pip install pillow); without it the icon set is
+# skipped with a warning. PNG recompression and hashing use the standard
+# library only.
+import argparse
+import hashlib
+import io
+import json
+import os
+import shutil
+import struct
+import sys
+import zlib
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# Bump when the outputs for an unchanged source would differ (new sizes, new
+# compression settings) so cached results are invalidated.
+PIPELINE_VERSION = 1
+
+ICON_SOURCE = "QiBPAppIcon.png"
+
+# (logical name, pixel size, manifest purpose or None if not listed in manifest.json)
+ICONS = [
+    ("favicon-32.png", 32, None),
+    ("apple-touch-icon.png", 180, None),
+    ("icon-192.png", 192, "any"),
+    ("icon-512.png", 512, "any"),
+    ("icon-maskable-512.png", 512, "maskable"),
+]
+
+# Maskable icons must keep their content inside the central 80% safe zone
+MASKABLE_SAFE_ZONE = 0.8
+
+BUILD_DIR = "build"
+BUILD_MANIFEST = "manifest.webmanifest"
+CACHE_PATH = os.path.join(".cache", "assets.json")
+
+# Chunks that change how the image is decoded or displayed; everything else is dropped
+PNG_KEEP = {b"IHDR", b"PLTE", b"tRNS", b"sRGB", b"gAMA", b"cHRM", b"iCCP", b"sBIT", b"acTL", b"fcTL", b"fdAT"}
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+
+def _sha256(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def hashed_name(name, data):
+    stem, ext = os.path.splitext(name)
+    return f"{stem}.{_sha256(data)[:10]}{ext}"
+
+
+# =========
+# PNG recompression (lossless, stdlib only)
+# =========
+
+def _png_chunks(data):
+    if not data.startswith(PNG_SIGNATURE):
+        raise ValueError("not a PNG file")
+    pos = len(PNG_SIGNATURE)
+    while pos < len(data):
+        length, = struct.unpack(">I", data[pos:pos + 4])
+        kind = data[pos + 4:pos + 8]
+        yield kind, data[pos + 8:pos + 8 + length]
+        pos += 12 + length
+        if kind == b"IEND":
+            break
+
+
+def _png_chunk(kind, body):
+    return struct.pack(">I", len(body)) + kind + body + struct.pack(">I", zlib.crc32(kind + body) & 0xFFFFFFFF)
+
+
+def recompress_png(data):
+    # Returns the smaller of `data` and a lossless rewrite of it
+    before, idat, after = [], [], []
+    for kind, body in _png_chunks(data):
+        if kind == b"IDAT":
+            idat.append(body)
+        elif kind == b"IEND":
+            continue
+        elif kind in PNG_KEEP:
+            (after if idat else before).append((kind, body))
+
+    # APNG frame data is not in IDAT; leave animated images alone
+    if any(kind in (b"acTL", b"fdAT") for kind, _ in before + after):
+        return data
+
+    raw = zlib.decompress(b"".join(idat))
+    best = None
+    for strategy in (zlib.Z_DEFAULT_STRATEGY, zlib.Z_FILTERED):
+        compressor = zlib.compressobj(9, zlib.DEFLATED, 15, 9, strategy)
+        candidate = compressor.compress(raw) + compressor.flush()
+        if best is None or len(candidate) < len(best):
+            best = candidate
+
+    out = [PNG_SIGNATURE]
+    out.extend(_png_chunk(kind, body) for kind, body in before)
+    out.append(_png_chunk(b"IDAT", best))
+    out.extend(_png_chunk(kind, body) for kind, body in after)
+    out.append(_png_chunk(b"IEND", b""))
+    rewritten = b"".join(out)
+    return rewritten if len(rewritten) < len(data) else data
+
+
+# =========
+# Icons
+# =========
+
+def _hex_to_rgba(color):
+    color = color.lstrip("#")
+    return tuple(int(color[i:i + 2], 16) for i in (0, 2, 4)) + (255,)
+
+
+def render_icons(source_data, background):
+    # Returns {logical name: PNG bytes}, or None without Pillow
+    try:
+        from PIL import Image
+    except ImportError:
+        print("warning: icon set skipped; generating it needs Pillow (pip install pillow)", file=sys.stderr)
+        return None
+
+    icon = Image.open(io.BytesIO(source_data)).convert("RGBA")
+    outputs = {}
+    for name, size, purpose in ICONS:
+        if purpose == "maskable":
+            inner = round(size * MASKABLE_SAFE_ZONE)
+            image = Image.new("RGBA", (size, size), _hex_to_rgba(background))
+            offset = (size - inner) // 2
+            scaled = icon.resize((inner, inner), Image.LANCZOS)
+            image.alpha_composite(scaled, (offset, offset))
+        else:
+            image = icon.resize((size, size), Image.LANCZOS)
+        buf = io.BytesIO()
+        image.save(buf, format="PNG", optimize=True)
+        outputs[name] = recompress_png(buf.getvalue())
+    return outputs
+
+
+def web_manifest(path, mapping):
+    # manifest.json with the hashed icons listed after its own (hand-made ones
+    # such as favicon.ico are kept, with root-relative URLs so the copy in the
+    # build dir resolves them the same way)
+    with open(path, "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+
+    icons = []
+    for icon in manifest.get("icons", []):
+        src = icon.get("src", "")
+        if src.startswith(f"/assets/{BUILD_DIR}/"):
+            continue
+        if src and "://" not in src and not src.startswith("/"):
+            icon = {**icon, "src": "/" + src}
+        icons.append(icon)
+    icons += [
+        {"src": mapping[name], "sizes": f"{size}x{size}", "type": "image/png", "purpose": purpose}
+        for name, size, purpose in ICONS
+        if purpose and name in mapping
+    ]
+    manifest["icons"] = icons
+    return json.dumps(manifest, indent=2, ensure_ascii=False) + "\n"
+
+
+def _write_if_changed(path, text):
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            if f.read() == text:
+                return False
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+    return True
+
+
+# =========
+# Pipeline
+# =========
+
+def _load_cache(path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return cache if cache.get("version") == PIPELINE_VERSION else {}
+
+
+def _save_cache(path, cache):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    cache["version"] = PIPELINE_VERSION
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(cache, f, indent=2, sort_keys=True)
+
+
+def _process(name, data, background):
+    # Returns {logical name: bytes} for one source asset
+    if name == ICON_SOURCE:
+        outputs = render_icons(data, background)
+        if outputs is None:
+            return {name: recompress_png(data)}, False
+        outputs[name] = recompress_png(data)
+        return outputs, True
+    if name.lower().endswith(".png"):
+        return {name: recompress_png(data)}, True
+    return {name: data}, True
+
+
+def build_assets(public_dir, force=False, cache_path=None, update_manifest=False):
+    assets_dir = os.path.join(public_dir, "assets")
+    build_dir = os.path.join(assets_dir, BUILD_DIR)
+    cache_path = cache_path or os.path.join(os.path.dirname(os.path.abspath(public_dir)), CACHE_PATH)
+    manifest_path = os.path.join(public_dir, "manifest.json")
+
+    background = "#020617"
+    if os.path.exists(manifest_path):
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            background = json.load(f).get("background_color", background)
+
+    cache = {} if force else _load_cache(cache_path)
+    sources = cache.setdefault("sources", {})
+    os.makedirs(build_dir, exist_ok=True)
+
+    mapping = {}
+    report = {"processed": 0, "cached": 0, "bytes_in": 0, "bytes_out": 0}
+    for name in sorted(os.listdir(assets_dir)):
+        path = os.path.join(assets_dir, name)
+        if not os.path.isfile(path) or name.startswith("."):
+            continue
+        with open(path, "rb") as f:
+            data = f.read()
+        digest = _sha256(data)
+
+        entry = sources.get(name)
+        if (
+            entry
+            and entry["sha256"] == digest
+            and entry.get("background") == background
+            and entry.get("complete", True)
+            and all(os.path.exists(os.path.join(build_dir, h)) for h in entry["outputs"].values())
+        ):
+            report["cached"] += 1
+            outputs = entry["outputs"]
+        else:
+            report["processed"] += 1
+            outputs = {}
+            processed, complete = _process(name, data, background)
+            for logical, out in processed.items():
+                hashed = hashed_name(logical, out)
+                out_path = os.path.join(build_dir, hashed)
+                if not os.path.exists(out_path):
+                    if out is data:
+                        shutil.copyfile(path, out_path)
+                    else:
+                        with open(out_path, "wb") as f:
+                            f.write(out)
+                outputs[logical] = hashed
+            sources[name] = {"sha256": digest, "background": background, "outputs": outputs, "complete": complete}
+
+        report["bytes_in"] += len(data)
+        report["bytes_out"] += os.path.getsize(os.path.join(build_dir, outputs[name]))
+        for logical, hashed in outputs.items():
+            mapping[logical] = f"/assets/{BUILD_DIR}/{hashed}"
+
+    # Drop outputs no source refers to any more
+    live = {os.path.basename(url) for url in mapping.values()}
+    for name in os.listdir(build_dir):
+        if name not in live and name not in ("asset-manifest.json", BUILD_MANIFEST):
+            os.unlink(os.path.join(build_dir, name))
+    for name in list(sources):
+        if not os.path.exists(os.path.join(assets_dir, name)):
+            del sources[name]
+
+    with open(os.path.join(build_dir, "asset-manifest.json"), "w", encoding="utf-8") as f:
+        json.dump(mapping, f, indent=2, sort_keys=True)
+    if os.path.exists(manifest_path):
+        text = web_manifest(manifest_path, mapping)
+        _write_if_changed(os.path.join(build_dir, BUILD_MANIFEST), text)
+        report["manifest_updated"] = update_manifest and _write_if_changed(manifest_path, text)
+    _save_cache(cache_path, cache)
+    report["mapping"] = mapping
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Optimize public/assets and generate the PWA icon set.")
+    parser.add_argument("--public", default=os.path.join(HERE, "public"), help="public/ directory to process")
+    parser.add_argument("--force", action="store_true", help="ignore the cache and reprocess every asset")
+    parser.add_argument(
+        "--update-manifest", action="store_true", help="also point public/manifest.json at the hashed icons"
+    )
+    args = parser.parse_args(argv)
+
+    report = build_assets(args.public, force=args.force, update_manifest=args.update_manifest)
+    for logical, url in sorted(report["mapping"].items()):
+        print(f"  {logical:<28} -> {url}")
+    saved = report["bytes_in"] - report["bytes_out"]
+    print(
+        f"{report['processed']} processed, {report['cached']} cached; "
+        f"sources {report['bytes_in']} bytes -> {report['bytes_out']} bytes ({saved} saved)"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
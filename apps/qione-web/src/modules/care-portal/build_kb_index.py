@@ -0,0 +1,345 @@
+# Full-text search index for the care knowledge base.
+#
+#   python build_kb_index.py [--root public/kb] [--force]
+#
+# Parses every index.html under public/kb (the 01_medical ... 08_caregiver wiki
+# pages and the binder sections), tokenizes and stems the visible text and
+# writes a compact prebuilt inverted index to public/kb/search/:
+#
+#   index.json        version, stemmer, stopwords, doc count and shard hashes
+#   docs.json         [[url, title], ...]; postings refer to docs by position
+#   terms-<k>.json    {term: [doc, tf, doc, tf, ...]} for terms starting with k
+#                     (a-z, or 0 for digits), so a query loads only the shards
+#                     its terms need
+#
+# src/lib/kbSearch.js reads this format and must stay in sync with analyze()
+# and stem() below; bump STEMMER_VERSION whenever either changes.
+#
+# Rebuilds are incremental: per-page term frequencies are cached by content
+# hash in .cache/kb-index.json, so only changed pages are re-parsed, and shard
+# files are rewritten only when their content changes.
+import argparse
+import hashlib
+import json
+import math
+import os
+import re
+import sys
+from html.parser import HTMLParser
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+INDEX_VERSION = 1
+STEMMER_VERSION = 2
+
+OUTPUT_DIR = "search"
+CACHE_PATH = os.path.join(".cache", "kb-index.json")
+
+STOPWORDS = frozenset("""
+a an and are as at be but by can do for from has have he her his if in into is it its
+may must not of on or our she should so that the their them then there these they this
+to was we were what when where which who will with you your
+""".split())
+
+TOKEN = re.compile(r"[a-z0-9]+")
+
+# Elements whose text is never indexed: code, styling, and the navigation
+# chrome repeated on every wiki page (it would match every query).
+SKIP_TAGS = {"script", "style", "nav", "noscript", "template", "svg"}
+SKIP_IDS = {"sidebar", "nav-links", "ai-drawer"}
+VOID_TAGS = {"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "source", "track", "wbr"}
+
+
+# =========
+# Text analysis (mirrored in src/lib/kbSearch.js)
+# =========
+
+# Words that must share a stem; checked before every build
+STEM_PAIRS = (
+    ("medications", "medication"),
+    ("taking", "take"),
+    ("takes", "take"),
+    ("caring", "care"),
+    ("cared", "care"),
+    ("using", "use"),
+    ("used", "use"),
+    ("doses", "dose"),
+    ("dosing", "dose"),
+    ("changes", "change"),
+    ("changing", "change"),
+    ("supplies", "supply"),
+    ("agreed", "agree"),
+    ("agreeing", "agree"),
+)
+
+
+def stem(word):
+    # Deliberately light suffix stripping: enough to match "medications" with
+    # "medication" or "taking" with "take", cheap to mirror exactly in JS.
+    # Final "e"s are always dropped, so base forms meet their -ing/-ed forms;
+    # a two-letter vowel-consonant stem left by -ing/-ed ("us", "ag") is the
+    # three-letter word it came from.
+    if len(word) <= 3 or not word.isalpha():
+        return word
+    if word.endswith("ies") and len(word) > 4:
+        word = word[:-3] + "y"
+    elif word.endswith("sses"):
+        word = word[:-2]
+    elif word.endswith(("ches", "shes", "xes")):
+        word = word[:-2]
+    elif word.endswith("s") and not word.endswith(("ss", "us", "is")):
+        word = word[:-1]
+    for suffix in ("ing", "ed"):
+        rest = word[:-len(suffix)]
+        if word.endswith(suffix) and len(rest) >= 3:
+            word = rest
+            break
+        if word.endswith(suffix) and len(rest) == 2 and rest[0] in "aeiou" and rest[1] not in "aeiou":
+            return rest + "e"
+    while word.endswith("e") and len(word) > 3:
+        word = word[:-1]
+    return word
+
+
+def check_stemmer():
+    bad = [(a, b, stem(a), stem(b)) for a, b in STEM_PAIRS if stem(a) != stem(b)]
+    if bad:
+        raise SystemExit("stem() splits: " + ", ".join(f"{a}->{sa} vs {b}->{sb}" for a, b, sa, sb in bad))
+
+
+def analyze(text):
+    return [stem(t) for t in TOKEN.findall(text.lower()) if len(t) > 1 and t not in STOPWORDS]
+
+
+# =========
+# HTML extraction
+# =========
+
+class _TextExtractor(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.title = ""
+        self.headings = {"h1": "", "h2": ""}
+        self.chunks = []
+        self._skip = None  # (tag, depth) while inside a skipped element
+        self._in = None  # "title", "h1" or "h2" while capturing the first of each
+
+    def handle_starttag(self, tag, attrs):
+        if tag in VOID_TAGS:
+            return
+        if self._skip:
+            if tag == self._skip[0]:
+                self._skip = (tag, self._skip[1] + 1)
+            return
+        if tag in SKIP_TAGS or dict(attrs).get("id") in SKIP_IDS:
+            self._skip = (tag, 1)
+            return
+        if tag == "title" or (tag in self.headings and not self.headings[tag]):
+            self._in = tag
+
+    def handle_endtag(self, tag):
+        if self._skip:
+            if tag == self._skip[0]:
+                depth = self._skip[1] - 1
+                self._skip = (tag, depth) if depth else None
+            return
+        if tag == self._in:
+            self._in = None
+
+    def handle_data(self, data):
+        if self._skip:
+            return
+        if self._in == "title":
+            self.title += data
+            return
+        if self._in in self.headings:
+            self.headings[self._in] += data
+        self.chunks.append(data)
+
+
+def extract_page(html_text):
+    parser = _TextExtractor()
+    parser.feed(html_text)
+    parser.close()
+    text = " ".join(" ".join(parser.chunks).split())
+    # The wiki pages share one <title> and <h1>; the first <h2> names the section
+    heading = parser.headings["h2"] or parser.headings["h1"]
+    return " ".join(parser.title.split()), " ".join(heading.split()), text
+
+
+def page_url(root, path):
+    rel = os.path.relpath(os.path.dirname(path), root).replace(os.sep, "/")
+    return "/kb/" if rel == "." else f"/kb/{rel}/"
+
+
+def find_pages(root):
+    pages = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = sorted(d for d in dirnames if d != OUTPUT_DIR)
+        if "index.html" in filenames:
+            pages.append(os.path.join(dirpath, "index.html"))
+    return sorted(pages)
+
+
+# =========
+# Index build
+# =========
+
+def _load_cache(path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return cache if cache.get("stemmer") == STEMMER_VERSION else {}
+
+
+def _shard_key(term):
+    return term[0] if term[0].isalpha() else "0"
+
+
+def _write_if_changed(path, text):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            if f.read() == text:
+                return False
+    except FileNotFoundError:
+        pass
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+    return True
+
+
+def _dumps(data):
+    return json.dumps(data, separators=(",", ":"), sort_keys=True, ensure_ascii=False)
+
+
+def build_index(root, force=False, cache_path=None):
+    cache_path = cache_path or os.path.join(HERE, CACHE_PATH)
+    cache = {} if force else _load_cache(cache_path)
+    pages = cache.get("pages", {})
+
+    report = {"pages": 0, "parsed": 0, "reused": 0, "shards_written": 0}
+    current = {}
+    for path in find_pages(root):
+        rel = os.path.relpath(path, root)
+        with open(path, "rb") as f:
+            data = f.read()
+        digest = hashlib.sha256(data).hexdigest()
+        entry = pages.get(rel)
+        if entry and entry["sha256"] == digest:
+            report["reused"] += 1
+        else:
+            title, heading, text = extract_page(data.decode("utf-8", errors="replace"))
+            terms = {}
+            for term in analyze(text):
+                terms[term] = terms.get(term, 0) + 1
+            entry = {"sha256": digest, "url": page_url(root, path), "title": title, "heading": heading, "terms": terms}
+            report["parsed"] += 1
+        current[rel] = entry
+    report["pages"] = len(current)
+
+    # Pages sharing a generic <title> (the wiki pages) are named by their first heading
+    title_counts = {}
+    for entry in current.values():
+        title_counts[entry["title"]] = title_counts.get(entry["title"], 0) + 1
+    docs = []
+    for rel in sorted(current):
+        entry = current[rel]
+        title = entry["title"]
+        if (title_counts[title] > 1 or not title) and entry["heading"]:
+            title = entry["heading"]
+        docs.append([entry["url"], title])
+
+    # Postings are rebuilt from cached term frequencies; no page is re-read for this
+    shards = {}
+    for doc_id, rel in enumerate(sorted(current)):
+        for term, tf in current[rel]["terms"].items():
+            shards.setdefault(_shard_key(term), {}).setdefault(term, []).extend((doc_id, tf))
+
+    out_dir = os.path.join(root, OUTPUT_DIR)
+    os.makedirs(out_dir, exist_ok=True)
+    shard_hashes = {}
+    for key, terms in sorted(shards.items()):
+        text = _dumps(terms)
+        shard_hashes[key] = hashlib.sha256(text.encode("utf-8")).hexdigest()[:10]
+        report["shards_written"] += _write_if_changed(os.path.join(out_dir, f"terms-{key}.json"), text)
+    for name in os.listdir(out_dir):
+        m = re.fullmatch(r"terms-(\w)\.json", name)
+        if m and m.group(1) not in shards:
+            os.unlink(os.path.join(out_dir, name))
+
+    docs_text = _dumps(docs)
+    meta = {
+        "version": INDEX_VERSION,
+        "stemmer": STEMMER_VERSION,
+        "stopwords": sorted(STOPWORDS),
+        "doc_count": len(docs),
+        "docs": hashlib.sha256(docs_text.encode("utf-8")).hexdigest()[:10],
+        "shards": shard_hashes,
+    }
+    _write_if_changed(os.path.join(out_dir, "docs.json"), docs_text)
+    _write_if_changed(os.path.join(out_dir, "index.json"), _dumps(meta))
+
+    os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+    with open(cache_path, "w", encoding="utf-8") as f:
+        json.dump({"stemmer": STEMMER_VERSION, "pages": current}, f, sort_keys=True)
+    return report
+
+
+# =========
+# Query (reference implementation of the client search)
+# =========
+
+def load_index(root):
+    out_dir = os.path.join(root, OUTPUT_DIR)
+    with open(os.path.join(out_dir, "index.json"), "r", encoding="utf-8") as f:
+        meta = json.load(f)
+    with open(os.path.join(out_dir, "docs.json"), "r", encoding="utf-8") as f:
+        docs = json.load(f)
+    terms = {}
+    for key in meta["shards"]:
+        with open(os.path.join(out_dir, f"terms-{key}.json"), "r", encoding="utf-8") as f:
+            terms.update(json.load(f))
+    return {"meta": meta, "docs": docs, "terms": terms}
+
+
+def search(index, query, limit=10):
+    # Ranks by number of matched query terms, then tf-idf
+    n = index["meta"]["doc_count"]
+    scores = {}
+    matched = {}
+    for term in set(analyze(query)):
+        postings = index["terms"].get(term)
+        if not postings:
+            continue
+        idf = math.log(1 + n / (len(postings) // 2))
+        for i in range(0, len(postings), 2):
+            doc, tf = postings[i], postings[i + 1]
+            scores[doc] = scores.get(doc, 0.0) + (1 + math.log(tf)) * idf
+            matched[doc] = matched.get(doc, 0) + 1
+    ranked = sorted(scores, key=lambda d: (-matched[d], -scores[d], d))[:limit]
+    return [(index["docs"][d][0], index["docs"][d][1], round(scores[d], 3)) for d in ranked]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build the offline search index for public/kb.")
+    parser.add_argument("--root", default=os.path.join(HERE, "public", "kb"), help="knowledge base root")
+    parser.add_argument("--force", action="store_true", help="re-parse every page, ignoring the cache")
+    parser.add_argument("--query", help="after building, run a query against the index and print the hits")
+    args = parser.parse_args(argv)
+
+    check_stemmer()
+    report = build_index(args.root, force=args.force)
+    print(
+        f"{report['pages']} pages: {report['parsed']} parsed, {report['reused']} unchanged; "
+        f"{report['shards_written']} shard(s) written"
+    )
+    if args.query:
+        for url, title, score in search(load_index(args.root), args.query):
+            print(f"  {score:>7.3f}  {url}  {title}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
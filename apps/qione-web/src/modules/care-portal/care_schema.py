@@ -0,0 +1,315 @@
+# Single definition of the qihealth schema and of the queries the portal runs
+# against it. gen_data_layer.py turns this into supabase/schema.sql and
+# src/lib/queries.js; edit this file, not the generated ones.
+#
+# Columns are (name, sql type[, constraints[, comment]]); "section" starts a
+# commented group in the DDL and "primary_key" declares a composite key. A
+# column listed in a table's "added" tuple was introduced after the first
+# deployment and is also emitted as `alter table ... add column if not
+# exists`, so re-running schema.sql upgrades an existing database in place.
+#
+# Queries are lists of PostgREST select items: "column" or "alias:column". The
+# alias is the field name the UI reads (src/App.jsx), so rows arrive in the
+# shape the screens expect and only the listed columns cross the wire.
+
+SCHEMA = "qihealth"
+
+TABLES = {
+    "patients": {
+        "section": "Core table",
+        "columns": [
+            ("id", "uuid", "primary key default gen_random_uuid()"),
+            ("tenant_id", "uuid", "", "qione.tenants(id) when the portal runs inside QiOne"),
+            ("full_name", "text"),
+            ("dob", "date"),
+            ("notes", "text"),
+            ("created_at", "timestamp", "default now()"),
+        ],
+        "added": ("tenant_id",),
+        "indexes": [("tenant_id",)],
+    },
+    "conditions": {
+        "section": "MEDICAL",
+        "columns": [
+            ("id", "uuid", "primary key default gen_random_uuid()"),
+            ("patient_id", "uuid", "references qihealth.patients(id) on delete cascade"),
+            ("name", "text"),
+            ("status", "text", "", "active, resolved"),
+            ("notes", "text"),
+            ("created_at", "timestamp", "default now()"),
+        ],
+        "indexes": [("patient_id",)],
+    },
+    "medications": {
+        "columns": [
+            ("id", "uuid", "primary key default gen_random_uuid()"),
+            ("patient_id", "uuid", "references qihealth.patients(id) on delete cascade"),
+            ("name", "text"),
+            ("dose", "text"),
+            ("frequency", "text"),
+            ("route", "text"),
+            ("prescriber", "text"),
+            ("active", "boolean", "default true"),
+            ("stock_current", "int", "not null default 0"),
+            ("stock_threshold", "int", "not null default 5"),
+            ("notes", "text"),
+            ("created_at", "timestamp", "default now()"),
+        ],
+        "added": ("stock_current", "stock_threshold"),
+        "indexes": [("patient_id",)],
+    },
+    "medication_logs": {
+        "columns": [
+            ("id", "uuid", "primary key default gen_random_uuid()"),
+            ("medication_id", "uuid", "references qihealth.medications(id) on delete cascade"),
+            ("given_at", "timestamp"),
+            ("given_by", "text"),
+            ("status", "text", "", "given / skipped / refused"),
+            ("notes", "text"),
+        ],
+        "indexes": [("medication_id", "given_at desc")],
+    },
+    "vitals": {
+        "columns": [
+            ("id", "uuid", "primary key default gen_random_uuid()"),
+            ("patient_id", "uuid", "references qihealth.patients(id) on delete cascade"),
+            ("type", "text", "", "BP, oxygen, glucose"),
+            ("value", "text", "", "as entered; parsed into the typed columns below"),
+            ("recorded_at", "timestamp", "default now()"),
+            ("notes", "text"),
+            # Set from `value` by the vitals_parse trigger, or by vitals_convert.py
+            # for rows written before it; null when the reading did not parse
+            ("systolic", "numeric(5,1)"),
+            ("diastolic", "numeric(5,1)"),
+            ("hr", "numeric(5,1)"),
+            ("spo2", "numeric(5,1)"),
+            ("glucose", "numeric(5,1)"),
+        ],
+        "added": ("systolic", "diastolic", "hr", "spo2", "glucose"),
+        # BPTracker reads one patient's readings of one type, newest first;
+        # the typed indexes serve range filters such as spo2 < 88
+        "indexes": [
+            ("patient_id", "type", "recorded_at desc"),
+            ("recorded_at",),
+            ("patient_id", "systolic"),
+            ("patient_id", "spo2"),
+        ],
+    },
+    "vitals_quarantine": {
+        # Readings vitals_convert.py could not parse; the vitals row is kept as is
+        "columns": [
+            ("vital_id", "uuid", "primary key references qihealth.vitals(id) on delete cascade"),
+            ("type", "text"),
+            ("value", "text"),
+            ("reason", "text", "not null", "empty, unknown type, unparseable, out of range"),
+            ("quarantined_at", "timestamptz", "not null default now()"),
+        ],
+    },
+    "vitals_rollups": {
+        # Maintained from vitals by the rollup triggers; rebuild with rollup_backfill.py
+        "columns": [
+            ("patient_id", "uuid", "not null"),
+            ("type", "text", "not null"),
+            ("metric", "text", "not null", "systolic, diastolic, hr, spo2, glucose"),
+            ("resolution", "text", "not null", "hour, day, week"),
+            ("bucket", "timestamp", "not null", "start of the hour, day or week"),
+            ("n", "int", "not null"),
+            ("total", "numeric", "not null"),
+            ("min_value", "numeric", "not null"),
+            ("max_value", "numeric", "not null"),
+        ],
+        "primary_key": ("patient_id", "type", "metric", "resolution", "bucket"),
+        # Backfill chunks and trigger refreshes delete by time range
+        "indexes": [("resolution", "bucket")],
+    },
+    "appointments": {
+        "columns": [
+            ("id", "uuid", "primary key default gen_random_uuid()"),
+            ("patient_id", "uuid", "references qihealth.patients(id) on delete cascade"),
+            ("provider", "text"),
+            ("location", "text"),
+            ("appointment_time", "timestamp"),
+            ("reason", "text"),
+            ("outcome", "text"),
+            ("next_steps", "text"),
+        ],
+        "indexes": [("patient_id", "appointment_time")],
+    },
+    "tasks": {
+        "section": "OPERATIONS",
+        "columns": [
+            ("id", "uuid", "primary key default gen_random_uuid()"),
+            ("patient_id", "uuid", "references qihealth.patients(id) on delete cascade"),
+            ("title", "text"),
+            ("due_at", "timestamp"),
+            ("recurring", "boolean"),
+            ("status", "text", "default 'pending'"),
+            ("notes", "text"),
+        ],
+        "indexes": [("patient_id", "status")],
+    },
+    "incidents": {
+        "columns": [
+            ("id", "uuid", "primary key default gen_random_uuid()"),
+            ("patient_id", "uuid", "references qihealth.patients(id)"),
+            ("incident_time", "timestamp"),
+            ("type", "text"),
+            ("description", "text"),
+        ],
+        "indexes": [("patient_id", "incident_time desc")],
+    },
+    "care_timeline": {
+        # The audit log the Railway API (server/index.js) serves as `events`
+        "columns": [
+            ("id", "uuid", "primary key default gen_random_uuid()"),
+            ("patient_id", "uuid", "references qihealth.patients(id) on delete cascade"),
+            ("event_type", "text", "not null"),
+            ("title", "text", "not null"),
+            ("description", "text"),
+            ("value_numeric", "numeric"),
+            ("value_sub", "numeric"),
+            ("performed_at", "timestamp", "default now()"),
+            ("logged_by", "uuid", "references auth.users(id)"),
+        ],
+        "indexes": [("patient_id", "performed_at desc"), ("performed_at",)],
+    },
+    "inventory_items": {
+        "columns": [
+            ("id", "uuid", "primary key default gen_random_uuid()"),
+            ("patient_id", "uuid", "references qihealth.patients(id)"),
+            ("name", "text"),
+            ("quantity", "int"),
+            ("reorder_threshold", "int"),
+            ("notes", "text"),
+        ],
+        "indexes": [("patient_id",)],
+    },
+    "contacts": {
+        "section": "CONTACTS",
+        "columns": [
+            ("id", "uuid", "primary key default gen_random_uuid()"),
+            ("name", "text"),
+            ("role", "text", "", "doctor, pharmacy, caseworker"),
+            ("phone", "text"),
+            ("email", "text"),
+            ("address", "text"),
+            ("notes", "text"),
+        ],
+    },
+    "documents": {
+        "section": "DOCUMENT VAULT (Drive bridge)",
+        "columns": [
+            ("id", "uuid", "primary key default gen_random_uuid()"),
+            ("patient_id", "uuid", "references qihealth.patients(id)"),
+            ("title", "text"),
+            ("category", "text", "", "legal, insurance, medical"),
+            ("drive_file_id", "text"),
+            ("drive_link", "text"),
+            ("notes", "text"),
+            ("uploaded_at", "timestamp", "default now()"),
+        ],
+        "indexes": [("patient_id",)],
+    },
+}
+
+# Vital types whose readings are numbers, and the metric each number is: a
+# blood pressure "128/82" is systolic then diastolic. Each metric is a typed
+# column of vitals; a reading parses only if it has exactly that many numbers
+# (a trailing unit such as "%" or "bpm" is allowed) and all are in range.
+VITAL_METRICS = {
+    "Blood Pressure": ("systolic", "diastolic"),
+    "Pulse": ("hr",),
+    "Oxygen": ("spo2",),
+    "Glucose": ("glucose",),
+}
+
+# metric -> (lowest, highest) plausible value
+VITAL_RANGES = {
+    "systolic": (50, 300),
+    "diastolic": (20, 200),
+    "hr": (20, 300),
+    "spo2": (50, 100),
+    "glucose": (10, 1000),
+}
+
+# Number pattern shared by the SQL parser (vital_metrics) and vitals_convert.py;
+# matched case-insensitively. Group 2 is the second number of a pair.
+VITAL_VALUE_PATTERN = r"^\s*(\d+(?:\.\d+)?)\s*(?:/\s*(\d+(?:\.\d+)?))?\s*(?:%|bpm|mmhg|mg/dl)?\s*$"
+
+# vitals_rollups resolutions, finest first; each is a date_trunc() field, and
+# every bucket lies inside one week so a week-aligned range can be rebuilt alone.
+ROLLUP_RESOLUTIONS = ("hour", "day", "week")
+
+# name -> (table, select items). Names become exported functions in queries.js.
+QUERIES = {
+    "selectPatientId": ("patients", ["id"]),
+    "selectPatientStatus": ("patients", ["id", "full_name", "dob", "notes"]),
+    "selectMedications": (
+        "medications",
+        [
+            "id",
+            "name",
+            "dosage:dose",
+            "instructions:notes",
+            "schedule_time:frequency",
+            "stock_current",
+            "stock_threshold",
+            "active",
+        ],
+    ),
+    "selectMedicalHistory": ("conditions", ["id", "condition_name:name", "created_at"]),
+    "selectAppointments": (
+        "appointments",
+        ["id", "title:reason", "location", "appointment_at:appointment_time", "provider_name:provider"],
+    ),
+    "selectTasks": ("tasks", ["id", "task_name:title", "description:notes", "due_at", "status"]),
+    "selectEvents": ("incidents", ["id", "event_type:type", "title:description", "performed_at:incident_time"]),
+    "selectVitals": ("vitals", ["value", "systolic", "diastolic", "recorded_at", "notes"]),
+}
+
+# Delta sync (see sync.sql in gen_data_layer.py). Every table listed here gets
+# `updated_at`/`version` columns, a version index and delete tombstones, and
+# <schema>.sync_changes(cursors) returns its changed rows under the given key.
+# Entries are (table, select items, initial window): the window, if any, is
+# (order column, row count) and limits a client's first sync to the newest rows.
+SYNC = {
+    "meds": (*QUERIES["selectMedications"], None),
+    "patientStatus": (*QUERIES["selectPatientStatus"], None),
+    "medicalHistory": (*QUERIES["selectMedicalHistory"], None),
+    "appointments": (*QUERIES["selectAppointments"], None),
+    "tasks": (*QUERIES["selectTasks"], None),
+    "events": (*QUERIES["selectEvents"], ("incident_time", 50)),
+}
+
+# The same protocol for the Railway API (server/index.js), which serves the
+# public.* tables from supabase_schema.sql; generated into server/sync.sql.
+LEGACY_SCHEMA = "public"
+LEGACY_SYNC = {
+    "meds": (
+        "medications",
+        ["id", "name", "dosage", "instructions", "schedule_time", "stock_current", "stock_threshold", "is_active"],
+        None,
+    ),
+    "supplies": (
+        "inventory_supplies",
+        ["id", "item_type", "quantity_full", "quantity_empty", "threshold_alert", "supplier_contact"],
+        None,
+    ),
+    "patientStatus": (
+        "patient_status",
+        ["id", "first_name", "last_name", "dob", "blood_type", "baseline_o2", "emergency_instructions", "dnr_status"],
+        None,
+    ),
+    "medicalHistory": ("medical_history", ["id", "condition_name", "diagnosed_year", "notes", "is_active"], None),
+    "appointments": (
+        "appointments",
+        ["id", "title", "location", "appointment_at", "provider_name", "notes", "status"],
+        None,
+    ),
+    "tasks": ("care_tasks", ["id", "task_name", "description", "due_at", "completed_at", "priority"], None),
+    "events": (
+        "care_timeline",
+        ["id", "event_type", "title", "description", "value_numeric", "value_sub", "performed_at"],
+        ("performed_at", 20),
+    ),
+}
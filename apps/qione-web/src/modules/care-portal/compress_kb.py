@@ -0,0 +1,165 @@
+# Precompress the static knowledge base and binder pages.
+#
+#   python compress_kb.py [--root public/kb] [--processes N] [--force]
+#
+# Writes .gz (gzip -9) and .br (brotli quality 11) siblings next to every
+# compressible file under public/kb, so the edge can serve them as-is instead
+# of compressing on each request. Files whose content hash is unchanged since
+# the last run (and whose siblings still exist) are skipped; the rest are
+# compressed in parallel across cores. The cache (.cache/compress.json) keeps
+# one section per absolute --root, so trees with the same relative paths never
+# share entries.
+#
+# Brotli output needs the `brotli` package (pip install brotli); without it
+# only .gz siblings are written.
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+COMPRESSIBLE = (".html", ".css", ".js", ".json", ".svg", ".txt", ".xml")
+
+# Not worth a sibling below this size: headers and framing eat the savings
+MIN_SIZE = 256
+
+CACHE_PATH = os.path.join(".cache", "compress.json")
+CACHE_VERSION = 2
+
+
+def _brotli():
+    try:
+        import brotli
+    except ImportError:
+        return None
+    return brotli
+
+
+def find_sources(root):
+    for dirpath, _, filenames in os.walk(root):
+        for filename in filenames:
+            if filename.endswith(COMPRESSIBLE):
+                path = os.path.join(dirpath, filename)
+                if os.path.getsize(path) >= MIN_SIZE:
+                    yield path
+
+
+def _write_if_smaller(path, data, original_size):
+    # A sibling that is not smaller than the original is useless; remove stale ones
+    if len(data) >= original_size:
+        if os.path.exists(path):
+            os.unlink(path)
+        return 0
+    with open(path, "wb") as f:
+        f.write(data)
+    return len(data)
+
+
+def compress_file(path, with_brotli=True):
+    # Runs in a worker process. Returns (path, sha256, {format: compressed size})
+    with open(path, "rb") as f:
+        data = f.read()
+
+    sizes = {}
+    # mtime=0 keeps the .gz byte-identical across runs for unchanged input
+    sizes["gz"] = _write_if_smaller(path + ".gz", gzip.compress(data, compresslevel=9, mtime=0), len(data))
+
+    brotli = _brotli() if with_brotli else None
+    if brotli is not None:
+        sizes["br"] = _write_if_smaller(path + ".br", brotli.compress(data, quality=11), len(data))
+    return path, hashlib.sha256(data).hexdigest(), sizes
+
+
+def _load_cache(path):
+    # {"version", "roots": {absolute root: {relative path: entry}}}; anything
+    # else (including the old flat format) starts over
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        data = None
+    if not isinstance(data, dict) or data.get("version") != CACHE_VERSION:
+        return {"version": CACHE_VERSION, "roots": {}}
+    return data
+
+
+def _is_fresh(path, entry, formats):
+    # Cheap check first: the cache entry must cover every format we produce now
+    if not entry or any(fmt not in entry["sizes"] for fmt in formats):
+        return False
+    for fmt in formats:
+        if entry["sizes"][fmt] and not os.path.exists(f"{path}.{fmt}"):
+            return False
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest() == entry["sha256"]
+
+
+def compress_tree(root, processes=None, force=False, cache_path=None):
+    cache_path = cache_path or os.path.join(HERE, CACHE_PATH)
+    stored = _load_cache(cache_path)
+    root_key = os.path.realpath(root)
+    cache = {} if force else stored["roots"].get(root_key, {})
+    with_brotli = _brotli() is not None
+    formats = ("gz", "br") if with_brotli else ("gz",)
+
+    sources = sorted(find_sources(root))
+    todo = []
+    for path in sources:
+        rel = os.path.relpath(path, root)
+        if not _is_fresh(path, cache.get(rel), formats):
+            todo.append(path)
+
+    if todo:
+        if processes == 1 or len(todo) == 1:
+            results = [compress_file(path, with_brotli) for path in todo]
+        else:
+            from concurrent.futures import ProcessPoolExecutor
+
+            with ProcessPoolExecutor(max_workers=processes) as pool:
+                results = list(pool.map(compress_file, todo, [with_brotli] * len(todo), chunksize=4))
+        for path, digest, sizes in results:
+            cache[os.path.relpath(path, root)] = {"sha256": digest, "size": os.path.getsize(path), "sizes": sizes}
+
+    # Forget files that no longer exist
+    live = {os.path.relpath(p, root) for p in sources}
+    cache = {rel: entry for rel, entry in cache.items() if rel in live}
+    stored["roots"][root_key] = cache
+    os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+    with open(cache_path, "w", encoding="utf-8") as f:
+        json.dump(stored, f, indent=2, sort_keys=True)
+
+    report = {"files": len(sources), "compressed": len(todo), "skipped": len(sources) - len(todo), "formats": {}}
+    for fmt in formats:
+        original = sum(e["size"] for e in cache.values() if e["sizes"].get(fmt))
+        compressed = sum(e["sizes"].get(fmt, 0) for e in cache.values())
+        report["formats"][fmt] = {"original": original, "compressed": compressed, "saved": original - compressed}
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Write .gz/.br siblings for the static KB pages.")
+    parser.add_argument("--root", default=os.path.join(HERE, "public", "kb"), help="directory to walk")
+    parser.add_argument("--processes", type=int, default=None, help="worker processes (default: one per core)")
+    parser.add_argument("--force", action="store_true", help="recompress everything, ignoring the cache")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args(argv)
+
+    report = compress_tree(args.root, args.processes, args.force)
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return 0
+
+    if "br" not in report["formats"]:
+        print("brotli not installed: wrote .gz only (pip install brotli)", file=sys.stderr)
+    print(f"{report['files']} files: {report['compressed']} compressed, {report['skipped']} unchanged")
+    for fmt, sizes in report["formats"].items():
+        pct = 100 * sizes["saved"] / sizes["original"] if sizes["original"] else 0
+        print(f"  .{fmt}: {sizes['original']} -> {sizes['compressed']} bytes, {sizes['saved']} saved ({pct:.1f}%)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,454 @@
+# Deterministic bulk fixtures for load-testing the qihealth schema.
+#
+#   python fixtures.py generate --out fixtures --patients 5000 \
+#       --vitals 10000000 --medication-logs 10000000 [--processes N] [--gzip]
+#   python fixtures.py load --dir fixtures [--dsn postgresql://...] [--schema] [--truncate]
+#
+# `generate` streams PostgreSQL COPY text files (one per table per part) plus
+# fixtures.json describing them; nothing is held in memory beyond one row.
+# Every patient draws from its own RNG seeded with (seed, patient number), so
+# the output is identical for a given seed whatever --processes is.
+#
+# `load` feeds the files to COPY ... FROM STDIN through psycopg (3) or
+# psycopg2 when installed, otherwise through `psql \copy`. With --schema it
+# first applies supabase/schema.sql (plus a stub auth.users table on a plain
+# local Postgres); --defer-indexes drops the schema's secondary indexes for the
+# load and rebuilds them afterwards, which is much faster at this scale.
+import argparse
+import calendar
+import gzip
+import json
+import math
+import os
+import random
+import shutil
+import subprocess
+import sys
+import time
+
+import care_schema
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+MANIFEST_NAME = "fixtures.json"
+
+# Table -> COPY columns, in load order (parents before children)
+COPY_COLUMNS = {
+    "patients": ["id", "tenant_id", "full_name", "dob", "notes", "created_at"],
+    "medications": [
+        "id", "patient_id", "name", "dose", "frequency", "route", "active",
+        "stock_current", "stock_threshold", "notes", "created_at",
+    ],
+    "vitals": ["id", "patient_id", "type", "value", "recorded_at", "notes"],
+    "medication_logs": ["id", "medication_id", "given_at", "given_by", "status", "notes"],
+    "care_timeline": ["id", "patient_id", "event_type", "title", "description", "value_numeric", "value_sub", "performed_at"],
+}
+
+# (name, dose, frequency, doses per day, notes); PRN entries get a dose every few days
+MED_CATALOG = [
+    ("Famotidine", "20 mg", "Once Daily", 1, "Acid reducer"),
+    ("Lisinopril/HCTZ", "20-25 mg", "Once Daily", 1, "Blood pressure"),
+    ("Metoprolol ER", "100 mg", "Once Daily", 1, "Heart/Blood pressure"),
+    ("Omeprazole", "40 mg", "Once Daily", 1, "GERD/Stomach"),
+    ("Atorvastatin", "20 mg", "Once Daily", 1, "Cholesterol"),
+    ("Metformin", "500 mg", "Twice Daily", 2, "Diabetes"),
+    ("Vitamin D", "Supplement", "Once Daily", 1, ""),
+    ("Baby Aspirin", "81 mg", "Once Daily", 1, "CV Protection"),
+    ("Cyclobenzaprine", "5 mg", "Bedtime", 1, "Muscle relaxer"),
+    ("Roflumilast (Daliresp)", "500 mcg", "Daily", 1, "COPD prevention"),
+    ("Azithromycin", "250 mg", "Mon/Wed/Fri", 0.43, "Long-term for COPD"),
+    ("Budesonide/Formoterol", "160/4.5 mcg", "Twice Daily", 2, "Inhaler"),
+    ("Gabapentin", "600 mg", "Three Times Daily", 3, "Nerve Pain"),
+    ("Furosemide", "20 mg", "Once Daily", 1, "Fluid"),
+    ("Acetaminophen", "500 mg", "PRN", 0.3, "Pain"),
+    ("Albuterol", "90 mcg", "PRN", 0.5, "Rescue inhaler"),
+]
+
+FIRST_NAMES = ["Eleanor", "Margaret", "Ruth", "Harold", "Walter", "Dorothy", "Frank", "Alice", "George", "Betty", "Arthur", "Joan"]
+LAST_NAMES = ["Parker", "Nguyen", "Garcia", "Okafor", "Schmidt", "Rossi", "Kim", "Walsh", "Haddad", "Silva", "Cohen", "Patel"]
+CAREGIVERS = ["Sarah", "Michael", "Aunt Rose", "Night nurse", "Home aide", "David"]
+CONDITION_NOTES = ["COPD, oxygen dependent", "Hypertension, Type 2 Diabetes", "CHF, fall risk", "Post-stroke, limited mobility"]
+
+# Hand-typed values the type conversion has to cope with
+DIRTY_VALUES = ["n/a", "--", "see notes", "128 / 82", "94%", "72 bpm", "", "1O2"]
+
+TIMELINE_EVENTS = [
+    ("vitals", "O2 Check", "Spot check"),
+    ("med_taken", "Morning meds", "Pillbox"),
+    ("note", "Daily note", "Ate well, good spirits"),
+    ("supply", "Oxygen Tank Swapped", "Full tanks remaining"),
+    ("incident", "Fall", "Assisted back to chair, no injury"),
+]
+
+# Generated text only ever comes from the fixed catalogs above, so no value
+# needs COPY escaping; keep it that way.
+for _text in [*FIRST_NAMES, *LAST_NAMES, *CAREGIVERS, *CONDITION_NOTES, *DIRTY_VALUES,
+              *(f for m in MED_CATALOG for f in m if isinstance(f, str)),
+              *(f for e in TIMELINE_EVENTS for f in e)]:
+    assert not any(c in _text for c in "\\\t\n\r"), f"catalog value needs COPY escaping: {_text!r}"
+
+
+def copy_line(row):
+    # One row in COPY text format; None is NULL
+    return "\t".join(["\\N" if v is None else str(v) for v in row]) + "\n"
+
+
+def _ts(seconds):
+    return "%04d-%02d-%02d %02d:%02d:%02d" % time.gmtime(seconds)[:6]
+
+
+_UUID_CLEAR = ~((0xF000 << 64) | (0xC000 << 48))
+_UUID_SET = (0x4000 << 64) | (0x8000 << 48)
+
+
+def _uuid(rng):
+    # Same value as str(uuid.UUID(int=..., version=4)) without the object overhead
+    h = "%032x" % (rng.getrandbits(128) & _UUID_CLEAR | _UUID_SET)
+    return f"{h[:8]}-{h[8:12]}-{h[12:16]}-{h[16:20]}-{h[20:]}"
+
+
+def _share(total, count, index):
+    # Split `total` rows over `count` patients as evenly as possible
+    base, extra = divmod(total, count)
+    return base + (1 if index < extra else 0)
+
+
+# =========
+# Generation
+# =========
+
+def _patient(seed, number, opts, writers):
+    rng = random.Random(f"{seed}:patient:{number}")
+    end = opts["end"]
+    span = opts["years"] * 365 * 86400
+    start = end - span
+
+    patient_id = _uuid(rng)
+    tenant = random.Random(f"{seed}:tenant:{number % opts['tenants']}")
+    writers["patients"]((
+        patient_id,
+        _uuid(tenant),
+        f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+        "%04d-%02d-%02d" % (rng.randint(1930, 1960), rng.randint(1, 12), rng.randint(1, 28)),
+        rng.choice(CONDITION_NOTES),
+        _ts(start - rng.randint(0, 86400 * 30)),
+    ))
+
+    # Medications, then their administration logs spread over the same span
+    meds = rng.sample(MED_CATALOG, rng.randint(4, 12))
+    med_ids = []
+    for name, dose, frequency, _, notes in meds:
+        med_ids.append(_uuid(rng))
+        writers["medications"]((
+            med_ids[-1], patient_id, name, dose, frequency, "Oral", "t",
+            rng.randint(0, 60), rng.choice((3, 5, 7)), notes, _ts(start),
+        ))
+    logs = _share(opts["medication_logs"], opts["patients"], number)
+    weights = [m[3] for m in meds]
+    total_weight = sum(weights)
+    for med_id, weight in zip(med_ids, weights):
+        count = round(logs * weight / total_weight)
+        step = span / max(count, 1)
+        for i in range(count):
+            roll = rng.random()
+            status = "given" if roll < 0.93 else "skipped" if roll < 0.98 else "refused"
+            writers["medication_logs"]((
+                _uuid(rng), med_id, _ts(start + int(i * step) + rng.randint(-900, 900)),
+                rng.choice(CAREGIVERS), status, "" if status == "given" else "Asleep",
+            ))
+
+    # Vitals around per-patient baselines, with a daily rhythm and noise
+    systolic, diastolic = rng.gauss(132, 12), rng.gauss(80, 7)
+    pulse, oxygen, glucose = rng.gauss(76, 8), min(99.0, rng.gauss(93, 2.5)), rng.gauss(125, 20)
+    readings = _share(opts["vitals"], opts["patients"], number)
+    step = span / max(readings, 1)
+    dirty = opts["dirty"]
+    for i in range(readings):
+        at = start + int(i * step) + rng.randint(-600, 600)
+        daily = math.sin((at % 86400) / 86400 * 2 * math.pi)
+        # 40% blood pressure, 25% pulse, 25% oxygen, 10% glucose
+        roll = rng.random()
+        if roll < 0.4:
+            kind = "Blood Pressure"
+            value = f"{round(systolic + 6 * daily + rng.gauss(0, 8))}/{round(diastolic + 3 * daily + rng.gauss(0, 5))}"
+        elif roll < 0.65:
+            kind, value = "Pulse", str(round(pulse + 5 * daily + rng.gauss(0, 6)))
+        elif roll < 0.9:
+            kind, value = "Oxygen", str(min(100, round(oxygen + rng.gauss(0, 1.8))))
+        else:
+            kind, value = "Glucose", str(round(glucose + rng.gauss(0, 25)))
+        if dirty and rng.random() < dirty:
+            value = rng.choice(DIRTY_VALUES)
+        writers["vitals"]((_uuid(rng), patient_id, kind, value, _ts(at), None))
+
+    events = _share(opts["timeline"], opts["patients"], number)
+    step = span / max(events, 1)
+    for i in range(events):
+        event_type, title, description = rng.choice(TIMELINE_EVENTS)
+        value = round(oxygen + rng.gauss(0, 2), 1) if event_type == "vitals" else None
+        writers["care_timeline"]((
+            _uuid(rng), patient_id, event_type, title, description, value, None,
+            _ts(start + int(i * step) + rng.randint(0, 3600)),
+        ))
+
+
+def _part_path(out_dir, table, part, compress):
+    return os.path.join(out_dir, f"{table}.{part:03d}.copy" + (".gz" if compress else ""))
+
+
+def generate_part(seed, first, last, part, out_dir, opts):
+    # Runs in a worker process: writes patients [first, last) into one file per table
+    handles, counts, writers = {}, {}, {}
+    try:
+        for table in COPY_COLUMNS:
+            path = _part_path(out_dir, table, part, opts["gzip"])
+            # compresslevel 1: the files are transient and the CPU is better spent generating
+            f = gzip.open(path, "wt", compresslevel=1, encoding="utf-8", newline="") if opts["gzip"] else open(
+                path, "w", encoding="utf-8", newline="", buffering=1 << 20
+            )
+            handles[table] = f
+            counts[table] = 0
+
+            def write(row, f=f, table=table):
+                f.write(copy_line(row))
+                counts[table] += 1
+
+            writers[table] = write
+        for number in range(first, last):
+            _patient(seed, number, opts, writers)
+    finally:
+        for f in handles.values():
+            f.close()
+    return part, counts
+
+
+def generate(out_dir, seed=42, patients=5000, vitals=10_000_000, medication_logs=10_000_000, timeline=500_000,
+             years=3, tenants=None, end="2026-01-01", dirty=0.001, processes=None, compress=False):
+    for table, columns in COPY_COLUMNS.items():
+        defined = {c[0] for c in care_schema.TABLES[table]["columns"]}
+        missing = [c for c in columns if c not in defined]
+        if missing:
+            raise ValueError(f"{table}: care_schema.py has no column(s) {', '.join(missing)}")
+
+    os.makedirs(out_dir, exist_ok=True)
+    opts = {
+        "patients": patients,
+        "vitals": vitals,
+        "medication_logs": medication_logs,
+        "timeline": timeline,
+        "years": years,
+        "tenants": tenants or max(1, patients // 2),
+        "end": calendar.timegm(time.strptime(end, "%Y-%m-%d")),
+        "dirty": dirty,
+        "gzip": compress,
+    }
+    processes = processes or os.cpu_count() or 1
+    parts = max(1, min(patients, processes * 4))
+    bounds = [(i * patients // parts, (i + 1) * patients // parts) for i in range(parts)]
+
+    start = time.perf_counter()
+    if processes == 1:
+        results = [generate_part(seed, a, b, i, out_dir, opts) for i, (a, b) in enumerate(bounds)]
+    else:
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(max_workers=processes) as pool:
+            futures = [pool.submit(generate_part, seed, a, b, i, out_dir, opts) for i, (a, b) in enumerate(bounds)]
+            results = [f.result() for f in futures]
+
+    tables = {t: {"columns": cols, "files": [], "rows": 0} for t, cols in COPY_COLUMNS.items()}
+    for part, counts in sorted(results):
+        for table, rows in counts.items():
+            tables[table]["files"].append(os.path.basename(_part_path(out_dir, table, part, compress)))
+            tables[table]["rows"] += rows
+    manifest = {
+        "schema": care_schema.SCHEMA,
+        "seed": seed,
+        "options": {k: v for k, v in opts.items() if k != "gzip"},
+        "tables": tables,
+    }
+    with open(os.path.join(out_dir, MANIFEST_NAME), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    manifest["elapsed"] = time.perf_counter() - start
+    return manifest
+
+
+# =========
+# Loading
+# =========
+
+AUTH_STUB = "create schema if not exists auth; create table if not exists auth.users (id uuid primary key);"
+
+
+def _open_copy_file(path):
+    return gzip.open(path, "rb") if path.endswith(".gz") else open(path, "rb")
+
+
+def _secondary_indexes():
+    from gen_data_layer import index_name, load_schema
+
+    schema, _ = load_schema()
+    return [
+        (index_name(table, index), f"{care_schema.SCHEMA}.{table} ({', '.join(index)})")
+        for table, spec in schema.items()
+        for index in spec["indexes"]
+    ]
+
+
+class _PsycopgLoader:
+    def __init__(self, dsn):
+        try:
+            import psycopg
+        except ImportError:
+            psycopg = None
+        if psycopg is not None:
+            self.conn = psycopg.connect(dsn, autocommit=True)
+            self.v3 = True
+        else:
+            import psycopg2
+
+            self.conn = psycopg2.connect(dsn)
+            self.conn.autocommit = True
+            self.v3 = False
+
+    def execute(self, sql):
+        with self.conn.cursor() as cur:
+            cur.execute(sql)
+
+    def copy(self, statement, path):
+        with self.conn.cursor() as cur, _open_copy_file(path) as f:
+            if self.v3:
+                with cur.copy(statement) as copy:
+                    for block in iter(lambda: f.read(1 << 20), b""):
+                        copy.write(block)
+            else:
+                cur.copy_expert(statement, f, size=1 << 20)
+
+    def close(self):
+        self.conn.close()
+
+
+class _PsqlLoader:
+    def __init__(self, dsn):
+        self.psql = shutil.which("psql")
+        if not self.psql:
+            raise SystemExit("load needs psycopg, psycopg2 or the psql client on PATH")
+        self.dsn = dsn
+
+    def _run(self, args, stdin=None):
+        subprocess.run(self._cmd(args), stdin=stdin, check=True)
+
+    def _cmd(self, args):
+        return [self.psql, "-X", "-q", "-v", "ON_ERROR_STOP=1"] + (["-d", self.dsn] if self.dsn else []) + args
+
+    def execute(self, sql):
+        self._run(["-c", sql])
+
+    def copy(self, statement, path):
+        # \copy ... from pstdin reads psql's own stdin, so the file streams straight through
+        meta = statement.replace("COPY ", "\\copy ", 1).replace("FROM STDIN", "FROM pstdin")
+        if path.endswith(".gz"):
+            with gzip.open(path, "rb") as f:
+                proc = subprocess.Popen(self._cmd(["-c", meta]), stdin=subprocess.PIPE)
+                shutil.copyfileobj(f, proc.stdin, 1 << 20)
+                proc.stdin.close()
+                if proc.wait():
+                    raise subprocess.CalledProcessError(proc.returncode, "psql")
+        else:
+            with open(path, "rb") as f:
+                self._run(["-c", meta], stdin=f)
+
+    def close(self):
+        pass
+
+
+def _loader(dsn):
+    try:
+        return _PsycopgLoader(dsn)
+    except ImportError:
+        return _PsqlLoader(dsn)
+
+
+def load(fixtures_dir, dsn=None, apply_schema=False, truncate=False, defer_indexes=False):
+    with open(os.path.join(fixtures_dir, MANIFEST_NAME), "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+    schema = manifest["schema"]
+    db = _loader(dsn or os.environ.get("DATABASE_URL"))
+    report = {}
+    try:
+        if apply_schema:
+            db.execute(AUTH_STUB)
+            with open(os.path.join(HERE, "supabase", "schema.sql"), "r", encoding="utf-8") as f:
+                db.execute(f.read())
+        if truncate:
+            db.execute(f"truncate {', '.join(f'{schema}.{t}' for t in manifest['tables'])} cascade")
+        indexes = _secondary_indexes() if defer_indexes else []
+        for name, _ in indexes:
+            db.execute(f"drop index if exists {schema}.{name}")
+
+        for table, spec in manifest["tables"].items():
+            statement = f"COPY {schema}.{table} ({', '.join(spec['columns'])}) FROM STDIN"
+            start = time.perf_counter()
+            for filename in spec["files"]:
+                db.copy(statement, os.path.join(fixtures_dir, filename))
+            report[table] = {"rows": spec["rows"], "seconds": round(time.perf_counter() - start, 2)}
+
+        start = time.perf_counter()
+        for name, target in indexes:
+            db.execute(f"create index if not exists {name} on {target}")
+        if indexes:
+            report["indexes"] = {"count": len(indexes), "seconds": round(time.perf_counter() - start, 2)}
+        db.execute(f"analyze {', '.join(f'{schema}.{t}' for t in manifest['tables'])}")
+    finally:
+        db.close()
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate and load bulk qihealth fixtures.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    gen = sub.add_parser("generate", help="write COPY files and fixtures.json")
+    gen.add_argument("--out", default="fixtures", help="output directory (default: fixtures)")
+    gen.add_argument("--seed", type=int, default=42)
+    gen.add_argument("--patients", type=int, default=5000)
+    gen.add_argument("--vitals", type=int, default=10_000_000)
+    gen.add_argument("--medication-logs", type=int, default=10_000_000)
+    gen.add_argument("--timeline", type=int, default=500_000, help="care_timeline events")
+    gen.add_argument("--years", type=int, default=3, help="history length per patient")
+    gen.add_argument("--tenants", type=int, default=None, help="tenants the patients belong to (default: patients/2)")
+    gen.add_argument("--end", default="2026-01-01", help="date the history runs up to (UTC)")
+    gen.add_argument("--dirty", type=float, default=0.001, help="share of vitals with hand-typed, unparseable values")
+    gen.add_argument("--processes", type=int, default=None, help="worker processes (default: one per core)")
+    gen.add_argument("--gzip", action="store_true", help="gzip the COPY files")
+
+    ld = sub.add_parser("load", help="COPY a generated fixture set into Postgres")
+    ld.add_argument("--dir", default="fixtures", help="directory holding fixtures.json")
+    ld.add_argument("--dsn", default=None, help="connection string (default: $DATABASE_URL)")
+    ld.add_argument("--schema", action="store_true", help="apply supabase/schema.sql first")
+    ld.add_argument("--truncate", action="store_true", help="empty the fixture tables first")
+    ld.add_argument("--defer-indexes", action="store_true", help="drop secondary indexes during the load")
+    args = parser.parse_args(argv)
+
+    if args.command == "generate":
+        manifest = generate(
+            args.out, args.seed, args.patients, args.vitals, args.medication_logs, args.timeline,
+            args.years, args.tenants, args.end, args.dirty, args.processes, args.gzip,
+        )
+        total = sum(t["rows"] for t in manifest["tables"].values())
+        for table, spec in manifest["tables"].items():
+            print(f"  {table:<16} {spec['rows']:>11,} rows in {len(spec['files'])} file(s)")
+        print(f"{total:,} rows in {manifest['elapsed']:.1f}s ({total / manifest['elapsed']:,.0f} rows/s) -> {args.out}")
+        return 0
+
+    report = load(args.dir, args.dsn, args.schema, args.truncate, args.defer_indexes)
+    for table, stats in report.items():
+        if table == "indexes":
+            print(f"  rebuilt {stats['count']} index(es) in {stats['seconds']}s")
+        else:
+            print(f"  {table:<16} {stats['rows']:>11,} rows in {stats['seconds']}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
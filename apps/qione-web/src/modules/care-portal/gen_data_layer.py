@@ -0,0 +1,656 @@
+# Generate the qihealth DDL and the JS data-access module from care_schema.py.
+#
+#   python gen_data_layer.py           # rewrite supabase/schema.sql, src/lib/queries.js and server/sync.sql
+#   python gen_data_layer.py --check   # exit 1 if either is out of date (for CI)
+#
+# Every query in queries.js selects an explicit column list, validated here
+# against the table definition, so a renamed or dropped column fails the
+# generator instead of silently coming back undefined in the UI.
+import argparse
+import os
+import sys
+
+import care_schema
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+SQL_PATH = os.path.join("supabase", "schema.sql")
+JS_PATH = os.path.join("src", "lib", "queries.js")
+LEGACY_SQL_PATH = os.path.join("server", "sync.sql")
+
+JS_TYPES = {
+    "uuid": "string",
+    "text": "string",
+    "date": "string",
+    "timestamp": "string",
+    "timestamptz": "string",
+    "int": "number",
+    "bigint": "number",
+    "numeric": "number",
+    "boolean": "boolean",
+}
+
+
+def _column(spec):
+    name, sql_type, constraints, comment = (tuple(spec) + ("", ""))[:4]
+    return {"name": name, "type": sql_type, "constraints": constraints, "comment": comment}
+
+
+def _pascal(name):
+    return "".join(part[:1].upper() + part[1:] for part in name.split("_"))
+
+
+def load_schema(tables=None, queries=None):
+    # Returns {table: {"section", "columns": [column dicts], "added", "primary_key", "indexes"}}, queries
+    tables = care_schema.TABLES if tables is None else tables
+    queries = care_schema.QUERIES if queries is None else queries
+
+    schema = {}
+    for table, spec in tables.items():
+        columns = [_column(c) for c in spec["columns"]]
+        names = {c["name"] for c in columns}
+        for name in spec.get("added", ()):
+            if name not in names:
+                raise ValueError(f"{table}: added column {name!r} is not defined")
+        for index in [spec.get("primary_key", ())] + list(spec.get("indexes", ())):
+            for item in index:
+                if item.split()[0] not in names:
+                    raise ValueError(f"{table}: index column {item!r} is not defined")
+        schema[table] = {
+            "section": spec.get("section"),
+            "columns": columns,
+            "added": tuple(spec.get("added", ())),
+            "primary_key": tuple(spec.get("primary_key", ())),
+            "indexes": list(spec.get("indexes", ())),
+        }
+
+    for name, (table, items) in queries.items():
+        if table not in schema:
+            raise ValueError(f"query {name}: unknown table {table!r}")
+        names = {c["name"] for c in schema[table]["columns"]}
+        for item in items:
+            column = item.split(":")[-1]
+            if column not in names:
+                raise ValueError(f"query {name}: {table} has no column {column!r}")
+
+    for key, (table, items, window) in care_schema.SYNC.items():
+        names = {c["name"] for c in schema[table]["columns"]}
+        for column in [item.split(":")[-1] for item in items] + list(window[:1] if window else []):
+            if column not in names:
+                raise ValueError(f"sync {key}: {table} has no column {column!r}")
+    return schema, queries
+
+
+# =========
+# SQL
+# =========
+
+def _column_sql(column):
+    return " ".join(part for part in (column["name"], column["type"], column["constraints"]) if part)
+
+
+def index_name(table, index):
+    return "_".join([table] + [item.split()[0] for item in index] + ["idx"])
+
+
+def render_sql(schema, schema_name=care_schema.SCHEMA, sync=None, rollups=False):
+    out = [
+        "-- Generated by gen_data_layer.py from care_schema.py; edit the definition, not this file.",
+        "-- Safe to re-run: tables, added columns and indexes are created only if missing.",
+        "",
+        "-- Create the schema",
+        f"CREATE SCHEMA IF NOT EXISTS {schema_name};",
+    ]
+    for table, spec in schema.items():
+        if spec["section"]:
+            out += ["", f"-- {spec['section']}"]
+        out += ["", f"create table if not exists {schema_name}.{table} ("]
+        columns = spec["columns"]
+        primary_key = spec.get("primary_key")
+        for i, column in enumerate(columns):
+            line = "  " + _column_sql(column) + ("," if i < len(columns) - 1 or primary_key else "")
+            if column["comment"]:
+                line += f" -- {column['comment']}"
+            out.append(line)
+        if primary_key:
+            out.append(f"  primary key ({', '.join(primary_key)})")
+        out.append(");")
+        for column in columns:
+            if column["name"] in spec["added"]:
+                out.append(f"alter table {schema_name}.{table} add column if not exists {_column_sql(column)};")
+        for index in spec["indexes"]:
+            out.append(
+                f"create index if not exists {index_name(table, index)} on {schema_name}.{table} ({', '.join(index)});"
+            )
+    if rollups:
+        out += [""] + render_rollup_sql(schema_name)
+    if sync:
+        out += [""] + render_sync_sql(sync, schema_name)
+    return "\n".join(out) + "\n"
+
+
+# =========
+# Vitals parsing and rollups
+# =========
+#
+# vital_metrics() parses a reading's text `value` by VITAL_METRICS and
+# VITAL_RANGES; the vitals_parse trigger stores the result in the typed
+# columns (systolic, diastolic, hr, spo2, glucose) on every write.
+#
+# vitals_rollups holds count/sum/min/max per patient, type, metric and
+# ROLLUP_RESOLUTIONS bucket, read from the typed columns. Inserts merge into
+# it from a statement-level trigger (one aggregate per statement, so COPY and
+# bulk inserts stay cheap); updates and deletes cannot un-merge a min or max,
+# so they rebuild the touched weeks from raw rows instead. A transaction that
+# sets qihealth.skip_rollups = 'on' (vitals_convert.py) skips both the merge and
+# the rebuild and is expected to run rollup_backfill.py afterwards.
+#
+# Merges and rebuilds of the same (patient, type, week) are serialized by a
+# transaction advisory lock, so a rebuild never deletes a merge it did not see
+# or re-reads rows a merge already counted. A rebuild across all patients or
+# types locks the whole week instead; single-group writers hold it shared.
+
+def vital_metric_names():
+    return list(dict.fromkeys(m for metrics in care_schema.VITAL_METRICS.values() for m in metrics))
+
+
+def _metrics_case(column):
+    cases = " ".join(
+        f"when '{vital_type}' then array[{', '.join(repr(m) for m in metrics)}]"
+        for vital_type, metrics in care_schema.VITAL_METRICS.items()
+    )
+    return f"case {column} {cases} end"
+
+
+def _ranges_case(metric, reading):
+    cases = " ".join(
+        f"when '{name}' then {reading} between {lo} and {hi}" for name, (lo, hi) in care_schema.VITAL_RANGES.items()
+    )
+    return f"case {metric} {cases} else false end"
+
+
+def render_rollup_sql(schema_name):
+    s = schema_name
+    metrics = vital_metric_names()
+    resolutions = "array[" + ", ".join(f"'{r}'" for r in care_schema.ROLLUP_RESOLUTIONS) + "]"
+    readings = ", ".join(f"('{m}', v.{m})" for m in metrics)
+    aggregate = [
+        "select v.patient_id, v.type, m.metric, res.resolution, date_trunc(res.resolution, v.recorded_at),",
+        "       count(*), sum(m.reading), min(m.reading), max(m.reading)",
+    ]
+    typed = [
+        f"    cross join lateral (values {readings}) as m(metric, reading)",
+        f"    cross join unnest({resolutions}) as res(resolution)",
+    ]
+    merge = [
+        "on conflict (patient_id, type, metric, resolution, bucket) do update set",
+        "  n = r.n + excluded.n,",
+        "  total = r.total + excluded.total,",
+        "  min_value = least(r.min_value, excluded.min_value),",
+        "  max_value = greatest(r.max_value, excluded.max_value);",
+    ]
+    columns = "(patient_id, type, metric, resolution, bucket, n, total, min_value, max_value)"
+    pattern = care_schema.VITAL_VALUE_PATTERN.replace("'", "''")
+    return [
+        "-- Vitals: typed readings and hourly, daily and weekly min/max/avg rollups",
+        "",
+        "-- The numbers in one reading, named by VITAL_METRICS; nothing unless it has",
+        "-- exactly one number per metric and all are in VITAL_RANGES",
+        f"create or replace function {s}.vital_metrics(p_type text, p_value text)",
+        "returns table (metric text, reading numeric) language sql immutable as $$",
+        "  with p as (",
+        f"    select {_metrics_case('p_type')} as names,",
+        f"           regexp_match(p_value, '{pattern}', 'i') as parts",
+        "  ), m as (",
+        "    select x.metric, x.reading::numeric as reading",
+        # regexp_match returns every group; a one-number metric must not pair
+        # with the unmatched second group (bool_and would see a null metric)
+        "      from p, unnest(p.names, p.parts[1:cardinality(p.names)]) as x(metric, reading)",
+        "     where cardinality(array_remove(p.parts, null)) = cardinality(p.names)",
+        "  )",
+        "  select m.metric, m.reading from m",
+        f"   where (select bool_and({_ranges_case('metric', 'reading')}) from m)",
+        "$$;",
+        "",
+        f"create or replace function {s}.vitals_parse() returns trigger language plpgsql as $$",
+        "declare",
+        "  parsed record;",
+        "begin",
+        *[f"  new.{m} := null;" for m in metrics],
+        f"  for parsed in select * from {s}.vital_metrics(new.type, new.value) loop",
+        "    case parsed.metric",
+        *[f"      when '{m}' then new.{m} := parsed.reading;" for m in metrics],
+        "      else null;",
+        "    end case;",
+        "  end loop;",
+        "  return new;",
+        "end $$;",
+        "",
+        f"drop trigger if exists vitals_parse on {s}.vitals;",
+        f"create trigger vitals_parse before insert or update of type, value on {s}.vitals",
+        f"  for each row execute function {s}.vitals_parse();",
+        "",
+        "-- Locks one (patient, type, week) of vitals_rollups, or the whole week when",
+        "-- patient or type is null, until the end of the transaction",
+        f"create or replace function {s}.lock_vitals_rollups(p_week timestamp, p_patient uuid default null, p_type text default null)",
+        "returns void language plpgsql as $$",
+        "declare",
+        "  week_key bigint := hashtextextended('vitals_rollups:' || date_trunc('week', p_week)::text, 0);",
+        "begin",
+        "  if p_patient is null or p_type is null then",
+        "    perform pg_advisory_xact_lock(week_key);",
+        "  else",
+        "    perform pg_advisory_xact_lock_shared(week_key);",
+        "    perform pg_advisory_xact_lock(hashtextextended(",
+        "      'vitals_rollups:' || date_trunc('week', p_week)::text || ':' || p_patient::text || ':' || p_type, 0));",
+        "  end if;",
+        "end $$;",
+        "",
+        f"create or replace function {s}.vitals_rollup_insert() returns trigger language plpgsql as $$",
+        "begin",
+        "  if current_setting('qihealth.skip_rollups', true) = 'on' then",
+        "    return null;",
+        "  end if;",
+        # Sorted, so concurrent writers take their locks in one global order
+        f"  perform {s}.lock_vitals_rollups(g.week, g.patient_id, g.type)",
+        "     from (select distinct date_trunc('week', recorded_at) as week, patient_id, type from new_rows",
+        "            where patient_id is not null and type is not null and recorded_at is not null) g",
+        "    order by g.week, g.patient_id, g.type;",
+        f"  insert into {s}.vitals_rollups as r {columns}",
+        *["  " + line for line in aggregate],
+        "    from new_rows v",
+        *typed,
+        "   where v.patient_id is not null and v.recorded_at is not null and m.reading is not null",
+        "   group by 1, 2, 3, 4, 5",
+        "   order by 1, 2, 3, 4, 5",
+        *["  " + line for line in merge],
+        "  return null;",
+        "end $$;",
+        "",
+        "-- Rebuilds every bucket in the weeks overlapping [p_from, p_to] from raw rows,",
+        "-- optionally for one patient and type; returns the rollup rows written.",
+        "-- Ranges that share no week can be rebuilt in parallel (rollup_backfill.py).",
+        f"create or replace function {s}.refresh_vitals_rollups(",
+        "  p_from timestamp, p_to timestamp, p_patient uuid default null, p_type text default null",
+        ") returns bigint language plpgsql as $$",
+        "declare",
+        "  lo timestamp := date_trunc('week', p_from);",
+        "  hi timestamp := date_trunc('week', p_to) + interval '1 week';",
+        "  written bigint;",
+        "begin",
+        f"  perform {s}.lock_vitals_rollups(w, p_patient, p_type)",
+        "     from generate_series(lo, hi - interval '1 week', interval '1 week') as w",
+        "    order by w;",
+        f"  delete from {s}.vitals_rollups",
+        "   where bucket >= lo and bucket < hi",
+        "     and (p_patient is null or patient_id = p_patient) and (p_type is null or type = p_type);",
+        f"  insert into {s}.vitals_rollups {columns}",
+        *["  " + line for line in aggregate],
+        f"    from {s}.vitals v",
+        *typed,
+        "   where v.recorded_at >= lo and v.recorded_at < hi and v.patient_id is not null and m.reading is not null",
+        "     and (p_patient is null or v.patient_id = p_patient) and (p_type is null or v.type = p_type)",
+        "   group by 1, 2, 3, 4, 5;",
+        "  get diagnostics written = row_count;",
+        "  return written;",
+        "end $$;",
+        "",
+        f"create or replace function {s}.vitals_rollup_change() returns trigger language plpgsql as $$",
+        "declare",
+        "  touched record;",
+        "begin",
+        "  if current_setting('qihealth.skip_rollups', true) = 'on' then",
+        "    return null;",
+        "  end if;",
+        # One sorted pass (old and new weeks together for an update), so the
+        # refreshes take their locks in the same order as the insert trigger
+        "  if tg_op = 'UPDATE' then",
+        "    for touched in",
+        "      select patient_id, type, date_trunc('week', recorded_at) as week from old_rows",
+        "       where patient_id is not null and type is not null and recorded_at is not null",
+        "      union",
+        "      select patient_id, type, date_trunc('week', recorded_at) from new_rows",
+        "       where patient_id is not null and type is not null and recorded_at is not null",
+        "      order by 3, 1, 2",
+        "    loop",
+        f"      perform {s}.refresh_vitals_rollups(touched.week, touched.week, touched.patient_id, touched.type);",
+        "    end loop;",
+        "  else",
+        "    for touched in",
+        "      select distinct patient_id, type, date_trunc('week', recorded_at) as week from old_rows",
+        "       where patient_id is not null and type is not null and recorded_at is not null",
+        "       order by 3, 1, 2",
+        "    loop",
+        f"      perform {s}.refresh_vitals_rollups(touched.week, touched.week, touched.patient_id, touched.type);",
+        "    end loop;",
+        "  end if;",
+        "  return null;",
+        "end $$;",
+        "",
+        f"drop trigger if exists vitals_rollup_insert on {s}.vitals;",
+        f"create trigger vitals_rollup_insert after insert on {s}.vitals",
+        f"  referencing new table as new_rows for each statement execute function {s}.vitals_rollup_insert();",
+        f"drop trigger if exists vitals_rollup_update on {s}.vitals;",
+        f"create trigger vitals_rollup_update after update on {s}.vitals",
+        "  referencing old table as old_rows new table as new_rows",
+        f"  for each statement execute function {s}.vitals_rollup_change();",
+        f"drop trigger if exists vitals_rollup_delete on {s}.vitals;",
+        f"create trigger vitals_rollup_delete after delete on {s}.vitals",
+        f"  referencing old table as old_rows for each statement execute function {s}.vitals_rollup_change();",
+        "",
+        "-- One patient's series of one vital type over [p_from, p_to), at the finest",
+        "-- resolution that fits in max_points buckets.",
+        f"create or replace function {s}.vitals_series(",
+        "  p_patient uuid, p_type text, p_from timestamp, p_to timestamp default now(), max_points int default 400",
+        ") returns table (",
+        "  resolution text, bucket timestamp, metric text, n int, avg_value numeric, min_value numeric, max_value numeric",
+        ") language sql stable as $$",
+        "  with pick as (",
+        "    select coalesce(",
+        f"      (select u.r from unnest({resolutions}) with ordinality as u(r, i)",
+        "        where extract(epoch from p_to - p_from) / extract(epoch from ('1 ' || u.r)::interval) <= max_points",
+        "        order by u.i limit 1),",
+        f"      '{care_schema.ROLLUP_RESOLUTIONS[-1]}') as r",
+        "  )",
+        "  select pick.r, v.bucket, v.metric, v.n, round(v.total / v.n, 1), v.min_value, v.max_value",
+        f"    from pick join {s}.vitals_rollups v on v.resolution = pick.r",
+        "   where v.patient_id = p_patient and v.type = p_type",
+        "     and v.bucket >= date_trunc(pick.r, p_from) and v.bucket < p_to",
+        "   order by v.bucket, v.metric",
+        "$$;",
+    ]
+
+
+# =========
+# Delta sync
+# =========
+#
+# Every synced row carries `version`, the id of the transaction that last wrote
+# it (set by a trigger), and deletes leave a row in sync_tombstones. A cursor
+# is "<version>" or "<version>:<id>"; sync_changes returns rows past it in
+# (version, id) order, but only below the snapshot watermark (the oldest
+# transaction still running), so a row committed late by a long transaction is
+# never skipped. Tombstones older than sync_horizon have been purged; a cursor
+# that old, or one that is not a cursor at all, gets `reset: true` and a full
+# reload of that table.
+
+def _sync_prelude(s):
+    return [
+        "-- Delta sync: row versions, tombstones and sync_changes(cursors)",
+        "",
+        f"create or replace function {s}.sync_txid() returns bigint language sql volatile as $$",
+        "  select pg_current_xact_id()::text::bigint",
+        "$$;",
+        "",
+        "-- Versions below this are final: no running transaction can still write one",
+        f"create or replace function {s}.sync_watermark() returns bigint language sql stable as $$",
+        "  select pg_snapshot_xmin(pg_current_snapshot())::text::bigint",
+        "$$;",
+        "",
+        f"create or replace function {s}.sync_touch() returns trigger language plpgsql as $$",
+        "begin",
+        f"  new.version := {s}.sync_txid();",
+        "  new.updated_at := now();",
+        "  return new;",
+        "end $$;",
+        "",
+        f"create table if not exists {s}.sync_tombstones (",
+        "  table_name text not null,",
+        "  row_id text not null,",
+        f"  version bigint not null default {s}.sync_txid(),",
+        "  deleted_at timestamptz not null default now()",
+        ");",
+        f"create index if not exists sync_tombstones_table_name_version_idx on {s}.sync_tombstones (table_name, version);",
+        f"create index if not exists sync_tombstones_deleted_at_idx on {s}.sync_tombstones (deleted_at);",
+        "",
+        f"create or replace function {s}.sync_tombstone() returns trigger language plpgsql as $$",
+        "begin",
+        f"  insert into {s}.sync_tombstones (table_name, row_id) values (tg_table_name, old.id::text);",
+        "  return old;",
+        "end $$;",
+        "",
+        "-- Cursors below horizon may have missed purged tombstones and must reset",
+        f"create table if not exists {s}.sync_horizon (",
+        "  id int primary key default 1 check (id = 1),",
+        "  version bigint not null default 0",
+        ");",
+        f"insert into {s}.sync_horizon (id) values (1) on conflict do nothing;",
+        "",
+        f"create or replace function {s}.purge_sync_tombstones(keep interval default interval '30 days')",
+        "returns bigint language plpgsql as $$",
+        "declare",
+        "  purged bigint;",
+        "begin",
+        f"  with gone as (delete from {s}.sync_tombstones where deleted_at < now() - keep returning version)",
+        "  select max(version) into purged from gone;",
+        "  if purged is not null then",
+        f"    update {s}.sync_horizon set version = greatest(version, purged + 1);",
+        "  end if;",
+        "  return purged;",
+        "end $$;",
+    ]
+
+
+def _sync_table(s, table):
+    return [
+        "",
+        f"alter table {s}.{table} add column if not exists updated_at timestamptz not null default now();",
+        f"alter table {s}.{table} add column if not exists version bigint not null default {s}.sync_txid();",
+        f"create index if not exists {table}_version_idx on {s}.{table} (version, (id::text));",
+        f"drop trigger if exists {table}_sync_touch on {s}.{table};",
+        f"create trigger {table}_sync_touch before insert or update on {s}.{table}",
+        f"  for each row execute function {s}.sync_touch();",
+        f"drop trigger if exists {table}_sync_tombstone on {s}.{table};",
+        f"create trigger {table}_sync_tombstone after delete on {s}.{table}",
+        f"  for each row execute function {s}.sync_tombstone();",
+    ]
+
+
+def _row_object(items):
+    pairs = []
+    for item in items:
+        alias, _, column = item.rpartition(":")
+        pairs.append(f"'{alias or column}', t.{column}")
+    pairs.append("'version', t.version")
+    return "jsonb_build_object(" + ", ".join(pairs) + ")"
+
+
+def _sync_block(s, key, table, items, window):
+    row = _row_object(items)
+    out = [
+        "",
+        f"  -- {key}: {s}.{table}",
+        f"  cur := cursors ->> '{key}';",
+        # case, unlike or, guarantees the cast only runs on a well-formed cursor
+        "  is_reset := case when cur is null or cur !~ '^[0-9]{1,18}(:|$)' then true",
+        "                   else split_part(cur, ':', 1)::bigint < horizon end;",
+        "  after_v := case when is_reset then 0 else split_part(cur, ':', 1)::bigint end;",
+        "  after_k := case when is_reset or strpos(cur, ':') = 0 then '' else substr(cur, strpos(cur, ':') + 1) end;",
+    ]
+    page = [
+        "select coalesce(jsonb_agg(p.r order by p.n) filter (where p.n <= page_limit), '[]'::jsonb),",
+        "       count(*) > page_limit,",
+        "       max(p.version) filter (where p.n = page_limit),",
+        "       max(p.k) filter (where p.n = page_limit)",
+        "  into page_rows, has_more, last_v, last_k",
+        "  from (",
+        "    select q.*, row_number() over (order by q.version, q.k) as n",
+        "      from (",
+        f"        select t.version, t.id::text as k, {row} as r",
+        f"          from {s}.{table} t",
+        "         where (t.version, t.id::text) > (after_v, after_k) and t.version < watermark",
+        "         order by t.version, t.id::text",
+        "         limit page_limit + 1",
+        "      ) q",
+        "  ) p;",
+    ]
+    if window:
+        column, count = window
+        out += [
+            "  if is_reset then",
+            "    -- First sync: only the newest rows; older ones are never backfilled",
+            "    select coalesce(jsonb_agg(p.r), '[]'::jsonb), false into page_rows, has_more",
+            f"      from (select {row} as r from {s}.{table} t order by t.{column} desc nulls last limit {count}) p;",
+            "  else",
+        ]
+        out += ["    " + line for line in page]
+        out.append("  end if;")
+    else:
+        out += ["  " + line for line in page]
+    out += [
+        "  if is_reset then",
+        "    deleted := '[]'::jsonb;",
+        "  else",
+        "    select coalesce(jsonb_agg(d.row_id), '[]'::jsonb) into deleted",
+        f"      from {s}.sync_tombstones d",
+        f"     where d.table_name = '{table}' and d.version >= after_v",
+        "       and d.version < case when has_more then last_v else watermark end;",
+        "  end if;",
+        f"  result := result || jsonb_build_object('{key}', jsonb_build_object(",
+        "    'rows', page_rows, 'deleted', deleted, 'reset', is_reset, 'has_more', has_more,",
+        "    'cursor', case when has_more then last_v::text || ':' || last_k else watermark::text end));",
+    ]
+    return out
+
+
+def render_sync_sql(sync, schema_name):
+    s = schema_name
+    out = _sync_prelude(s)
+    for table in dict.fromkeys(table for table, _, _ in sync.values()):
+        out += _sync_table(s, table)
+    out += [
+        "",
+        "-- cursors: {key: cursor} from the previous response (omit a key for a full load).",
+        "-- Returns {watermark, key: {rows, deleted, cursor, has_more, reset}}; call again",
+        "-- with the new cursors while any has_more is true.",
+        f"create or replace function {s}.sync_changes(cursors jsonb default '{{}}', page_limit int default 1000)",
+        "returns jsonb language plpgsql stable as $$",
+        "declare",
+        f"  watermark bigint := {s}.sync_watermark();",
+        f"  horizon bigint := (select version from {s}.sync_horizon where id = 1);",
+        "  result jsonb := jsonb_build_object('watermark', watermark);",
+        "  cur text;",
+        "  is_reset boolean;",
+        "  after_v bigint;",
+        "  after_k text;",
+        "  page_rows jsonb;",
+        "  deleted jsonb;",
+        "  has_more boolean;",
+        "  last_v bigint;",
+        "  last_k text;",
+        "begin",
+        "  horizon := coalesce(horizon, 0);",
+    ]
+    for key, (table, items, window) in sync.items():
+        out += _sync_block(s, key, table, items, window)
+    out += [
+        "",
+        "  return result;",
+        "end $$;",
+    ]
+    return out
+
+
+def render_legacy_sync_sql():
+    out = [
+        "-- Generated by gen_data_layer.py from care_schema.py; edit the definition, not this file.",
+        "-- Delta sync for the Railway API (POST /api/sync in index.js); run after",
+        "-- supabase_schema.sql. Safe to re-run.",
+        "",
+    ]
+    out += render_sync_sql(care_schema.LEGACY_SYNC, care_schema.LEGACY_SCHEMA)
+    return "\n".join(out) + "\n"
+
+
+# =========
+# JS
+# =========
+
+def _js_type(column):
+    js = JS_TYPES.get(column["type"].split("(")[0].lower(), "unknown")
+    constraints = column["constraints"].lower()
+    nullable = "primary key" not in constraints and "not null" not in constraints
+    return f"{js}|null" if nullable else js
+
+
+def _typedef(name, fields, description):
+    lines = ["/**", f" * {description}", f" * @typedef {{Object}} {name}"]
+    lines += [f" * @property {{{js_type}}} {field}" for field, js_type in fields]
+    lines.append(" */")
+    return lines
+
+
+def render_js(schema, queries):
+    out = [
+        "// Generated by gen_data_layer.py from care_schema.py; edit the definition, not this file.",
+        "// Each query selects an explicit column list; aliases map columns to the",
+        "// field names the screens read.",
+        "import { supabase } from './supabase';",
+        "",
+    ]
+    for table, spec in schema.items():
+        fields = [(c["name"], _js_type(c)) for c in spec["columns"]]
+        out += _typedef(f"{_pascal(table)}Record", fields, f"Row of {care_schema.SCHEMA}.{table}.")
+        out.append("")
+
+    for name, (table, items) in queries.items():
+        columns = {c["name"]: c for c in schema[table]["columns"]}
+        fields = []
+        for item in items:
+            alias, _, column = item.rpartition(":")
+            fields.append((alias or column, _js_type(columns[column])))
+        row = _pascal(name[len("select"):] if name.startswith("select") else name) + "Row"
+        out += _typedef(row, fields, f"Row returned by {name}() from {table}.")
+        out.append("")
+
+    out.append("export const COLUMNS = {")
+    for name, (_, items) in queries.items():
+        out.append(f"  {name}: '{','.join(items)}',")
+    out += ["};", ""]
+
+    for name, (table, _) in queries.items():
+        row = _pascal(name[len("select"):] if name.startswith("select") else name) + "Row"
+        out.append(f"/** Query builder for {row} rows; chain filters and ordering as with supabase.from(). */")
+        out.append(f"export const {name} = () => supabase.from('{table}').select(COLUMNS.{name});")
+        out.append("")
+    return "\n".join(out)
+
+
+def generate(root=HERE):
+    schema, queries = load_schema()
+    return {
+        os.path.join(root, SQL_PATH): render_sql(schema, sync=care_schema.SYNC, rollups=True),
+        os.path.join(root, JS_PATH): render_js(schema, queries),
+        os.path.join(root, LEGACY_SQL_PATH): render_legacy_sync_sql(),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate schema.sql, queries.js and sync.sql from care_schema.py.")
+    parser.add_argument("--check", action="store_true", help="exit 1 if the generated files are out of date")
+    args = parser.parse_args(argv)
+
+    stale = 0
+    for path, text in generate().items():
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                current = f.read()
+        except FileNotFoundError:
+            current = None
+        if current == text:
+            continue
+        stale += 1
+        if args.check:
+            print(f"out of date: {os.path.relpath(path, HERE)}")
+        else:
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(text)
+            print(f"wrote {os.path.relpath(path, HERE)}")
+    if args.check and stale:
+        print("run: python gen_data_layer.py", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,128 @@
+# Precache manifest for the offline-first service worker (templates/public/sw.js).
+#
+# Lists every file the portal needs offline as [url, content hash] pairs: the
+# built app shell (dist/index.html and dist/assets/*), public/kb/** and
+# public/assets/** (including the hashed icons and media build_assets.py writes
+# to public/assets/build/). The manifest version is a hash over all entries,
+# so it only changes when some file does; the service worker then re-downloads
+# just the entries whose hash changed.
+#
+# Hashes are cached by (size, mtime) in .cache/precache.json next to the site
+# root, so unchanged files (the intro video, the KB pages) are not re-read on
+# every build.
+import fnmatch
+import hashlib
+import json
+import os
+
+MANIFEST_NAME = "precache-manifest.json"
+CACHE_PATH = os.path.join(".cache", "precache.json")
+
+# Relative to the site root (dist/ after `vite build`, which copies public/ in)
+PRECACHE_PATTERNS = ("index.html", "manifest.json", "favicon.ico", "kb/**", "assets/**")
+
+# Served compressed variants, the worker itself and its own manifest never go in the list
+PRECACHE_EXCLUDE = ("*.gz", "*.br", "*.map", "sw.js", MANIFEST_NAME)
+
+
+def site_root(project_dir):
+    # Prefer the built shell; fall back to public/ before the first build
+    dist = os.path.join(project_dir, "dist")
+    return dist if os.path.isfile(os.path.join(dist, "index.html")) else os.path.join(project_dir, "public")
+
+
+def _matches(rel):
+    if any(fnmatch.fnmatch(os.path.basename(rel), pattern) for pattern in PRECACHE_EXCLUDE):
+        return False
+    for pattern in PRECACHE_PATTERNS:
+        if pattern.endswith("/**"):
+            if rel.startswith(pattern[:-2]):
+                return True
+        elif fnmatch.fnmatch(rel, pattern) and "/" not in rel[len(pattern.split("*")[0]):]:
+            return True
+    return False
+
+
+def entry_url(rel):
+    # index.html is served at its directory URL (/, /kb/01_medical/)
+    if rel == "index.html":
+        return "/"
+    if rel.endswith("/index.html"):
+        return "/" + rel[: -len("index.html")]
+    return "/" + rel
+
+
+def _load_cache(path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def collect_entries(root, cache=None):
+    # Returns sorted [url, hash] pairs; `cache` ({rel: [size, mtime_ns, hash]}) is updated in place
+    cache = {} if cache is None else cache
+    entries = []
+    seen = set()
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        for filename in sorted(filenames):
+            path = os.path.join(dirpath, filename)
+            rel = os.path.relpath(path, root).replace(os.sep, "/")
+            if not _matches(rel):
+                continue
+            st = os.stat(path)
+            cached = cache.get(rel)
+            if cached and cached[0] == st.st_size and cached[1] == st.st_mtime_ns:
+                digest = cached[2]
+            else:
+                h = hashlib.sha256()
+                with open(path, "rb") as f:
+                    for block in iter(lambda: f.read(1 << 20), b""):
+                        h.update(block)
+                digest = h.hexdigest()[:16]
+                cache[rel] = [st.st_size, st.st_mtime_ns, digest]
+            seen.add(rel)
+            entries.append([entry_url(rel), digest])
+    for rel in set(cache) - seen:
+        del cache[rel]
+    return sorted(entries)
+
+
+def manifest_version(entries):
+    return hashlib.sha256(json.dumps(entries, separators=(",", ":")).encode("utf-8")).hexdigest()[:16]
+
+
+def write_precache_manifest(project_dir, root=None):
+    # Writes <root>/precache-manifest.json; returns a report with the entry
+    # count, total bytes and the entries that changed since the last manifest
+    root = root or site_root(project_dir)
+    cache_path = os.path.join(project_dir, CACHE_PATH)
+    cache = _load_cache(cache_path)
+    entries = collect_entries(root, cache)
+    manifest = {"version": manifest_version(entries), "entries": entries}
+
+    manifest_path = os.path.join(root, MANIFEST_NAME)
+    try:
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            previous = dict(map(tuple, json.load(f).get("entries", [])))
+    except (OSError, ValueError):
+        previous = {}
+    text = json.dumps(manifest, separators=(",", ":"))
+    with open(manifest_path, "w", encoding="utf-8") as f:
+        f.write(text)
+
+    os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+    with open(cache_path, "w", encoding="utf-8") as f:
+        json.dump(cache, f, sort_keys=True)
+
+    current = dict(map(tuple, entries))
+    return {
+        "path": manifest_path,
+        "version": manifest["version"],
+        "entries": len(entries),
+        "bytes": sum(cache[rel][0] for rel in cache),
+        "changed": sorted(url for url, digest in current.items() if previous.get(url) != digest),
+        "removed": sorted(set(previous) - set(current)),
+    }
@@ -0,0 +1,122 @@
+# Rebuild qihealth.vitals_rollups from raw vitals in parallel chunks.
+#
+#   python rollup_backfill.py --dsn postgresql://localhost/care
+#   python rollup_backfill.py --from 2025-01-01 --to 2025-03-31 --jobs 4
+#
+# The triggers in schema.sql keep the rollups current as readings arrive; this
+# is for the history that predates them, a bulk load with the triggers
+# disabled, or a change to VITAL_METRICS. The range is split on week
+# boundaries (date_trunc('week') starts on Monday) so no two chunks share a
+# bucket, and each chunk is one refresh_vitals_rollups() call on its own
+# connection. Needs psycopg (3) or psycopg2.
+import argparse
+import datetime
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import care_schema
+
+
+def _connect(dsn):
+    try:
+        import psycopg
+    except ImportError:
+        try:
+            import psycopg2 as psycopg
+        except ImportError:
+            raise SystemExit("rollup_backfill needs psycopg or psycopg2") from None
+    conn = psycopg.connect(dsn)
+    conn.autocommit = True
+    return conn
+
+
+def _monday(value):
+    day = value.date() if isinstance(value, datetime.datetime) else value
+    return datetime.datetime.combine(day - datetime.timedelta(days=day.weekday()), datetime.time())
+
+
+def week_chunks(start, end, weeks):
+    # [(from, to)] covering start..end; every boundary is a Monday 00:00
+    chunks = []
+    lo = _monday(start)
+    stop = _monday(end) + datetime.timedelta(weeks=1)
+    step = datetime.timedelta(weeks=weeks)
+    while lo < stop:
+        chunks.append((lo, min(lo + step, stop)))
+        lo += step
+    return chunks
+
+
+def history_range(conn, schema=care_schema.SCHEMA):
+    with conn.cursor() as cur:
+        cur.execute(f"select min(recorded_at), max(recorded_at) from {schema}.vitals")
+        return cur.fetchone()
+
+
+def refresh_chunk(dsn, lo, hi, schema=care_schema.SCHEMA):
+    # refresh_vitals_rollups rebuilds whole weeks up to and including hi's, so
+    # pass the last instant before hi to stay inside this chunk
+    conn = _connect(dsn)
+    try:
+        start = time.perf_counter()
+        with conn.cursor() as cur:
+            cur.execute(
+                f"select {schema}.refresh_vitals_rollups(%s, %s)",
+                (lo, hi - datetime.timedelta(microseconds=1)),
+            )
+            written = cur.fetchone()[0]
+        return written, time.perf_counter() - start
+    finally:
+        conn.close()
+
+
+def backfill(dsn, start=None, end=None, weeks=4, jobs=4, progress=None):
+    conn = _connect(dsn)
+    try:
+        first, last = history_range(conn)
+    finally:
+        conn.close()
+    start = start or first
+    end = end or last
+    if start is None or end is None:
+        return {"chunks": 0, "rollup_rows": 0, "seconds": 0.0}
+
+    chunks = week_chunks(start, end, weeks)
+    began = time.perf_counter()
+    written = 0
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        futures = {pool.submit(refresh_chunk, dsn, lo, hi): (lo, hi) for lo, hi in chunks}
+        for done, future in enumerate(as_completed(futures), 1):
+            rows, seconds = future.result()
+            written += rows
+            if progress:
+                lo, hi = futures[future]
+                progress(f"  [{done}/{len(chunks)}] {lo:%Y-%m-%d}..{hi:%Y-%m-%d}: {rows:,} rollup rows in {seconds:.1f}s")
+    return {"chunks": len(chunks), "rollup_rows": written, "seconds": round(time.perf_counter() - began, 2)}
+
+
+def _date(text):
+    return datetime.datetime.fromisoformat(text)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Rebuild vitals_rollups from raw vitals in parallel week-aligned chunks.")
+    parser.add_argument("--dsn", default=None, help="connection string (default: $DATABASE_URL)")
+    parser.add_argument("--from", dest="start", type=_date, default=None, help="first reading to include (default: oldest)")
+    parser.add_argument("--to", dest="end", type=_date, default=None, help="last reading to include (default: newest)")
+    parser.add_argument("--chunk-weeks", type=int, default=4, help="weeks per chunk (default: 4)")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 4, help="chunks refreshed at once (default: one per core)")
+    args = parser.parse_args(argv)
+
+    dsn = args.dsn or os.environ.get("DATABASE_URL")
+    if not dsn:
+        parser.error("--dsn or DATABASE_URL is required")
+    report = backfill(dsn, args.start, args.end, args.chunk_weeks, args.jobs, progress=print)
+    print(f"{report['rollup_rows']:,} rollup rows from {report['chunks']} chunk(s) in {report['seconds']}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
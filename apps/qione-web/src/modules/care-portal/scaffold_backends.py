@@ -0,0 +1,340 @@
+# Output backends for the scaffolder.
+#
+# Every backend takes rendered trees - (root, dirs, [(relative path, content)])
+# - through write_tree() and returns a small report dict:
+#
+#   DiskBackend     real files, with the hash manifest, incremental skips,
+#                   atomic renames and an optional writer thread pool
+#   MemoryBackend   {path: bytes} in memory; used by `plan` to diff without writing
+#   ArchiveBackend  streams a tar.gz or zip onto any (even unseekable) file object
+#
+# Content is either a str (stripped and UTF-8 encoded here) or bytes that are
+# already stripped and encoded, e.g. shared templates reused across tenants.
+import hashlib
+import io
+import json
+import os
+
+
+def encode_content(content):
+    return content if isinstance(content, bytes) else content.strip().encode("utf-8")
+
+
+# Scaffold manifest: records the hash, size and mtime of every file we wrote so
+# re-runs can skip unchanged files without rewriting (and re-timestamping) them.
+MANIFEST_NAME = ".scaffold-manifest.json"
+
+
+def _sha256(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def load_manifest(project_dir):
+    path = os.path.join(project_dir, MANIFEST_NAME)
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f).get("files", {})
+    except (OSError, ValueError):
+        return {}
+
+
+def save_manifest(project_dir, entries):
+    path = os.path.join(project_dir, MANIFEST_NAME)
+    _atomic_write(path, json.dumps({"version": 1, "files": entries}, indent=2, sort_keys=True).encode("utf-8"))
+
+
+def _manifest_entry(digest, st):
+    return {"sha256": digest, "size": st.st_size, "mtime_ns": st.st_mtime_ns}
+
+
+def matches_disk(full_path, data, digest, entry):
+    # Returns the stat result when the file on disk already holds `data`, else None
+    try:
+        st = os.stat(full_path)
+    except FileNotFoundError:
+        return None
+
+    if st.st_size != len(data):
+        return None
+
+    # Fast path: the manifest says we wrote exactly this and nobody touched it since
+    if entry and entry.get("sha256") == digest and entry.get("mtime_ns") == st.st_mtime_ns:
+        return st
+
+    # Slow path: compare against the actual bytes (file edited or no manifest yet)
+    with open(full_path, "rb") as f:
+        if _sha256(f.read()) == digest:
+            return st
+    return None
+
+
+def _current_umask():
+    mask = os.umask(0)
+    os.umask(mask)
+    return mask
+
+
+_FILE_MODE = 0o666 & ~_current_umask()
+
+
+def _atomic_write(full_path, data):
+    # Write to a sibling temp file and rename over the target so readers (and
+    # Vite's watcher) never observe a half-written file.
+    import tempfile
+
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(full_path) or ".", prefix=".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.chmod(tmp_path, _FILE_MODE)
+        os.replace(tmp_path, full_path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except FileNotFoundError:
+            pass
+        raise
+
+
+def make_dirs(project_dir, dirs, filepaths=()):
+    # Create every directory the tree needs in one pass: the explicit `dirs`
+    # plus the parents of each file, deduplicated so each makedirs runs once.
+    needed = set(dirs)
+    for filepath in filepaths:
+        parent = os.path.dirname(filepath)
+        if parent:
+            needed.add(parent)
+
+    # Skip paths that are a prefix of a deeper one; makedirs creates parents anyway
+    leaves = sorted(needed)
+    leaves = [d for i, d in enumerate(leaves) if not (i + 1 < len(leaves) and leaves[i + 1].startswith(d + "/"))]
+
+    created = []
+    for d in leaves:
+        path = os.path.join(project_dir, d)
+        if not os.path.isdir(path):
+            os.makedirs(path, exist_ok=True)
+            created.append(path)
+    return created
+
+
+def _write_entry(project_dir, filepath, content, incremental, previous_entry):
+    full_path = os.path.join(project_dir, filepath)
+    data = encode_content(content)
+    digest = _sha256(data)
+
+    if incremental:
+        st = matches_disk(full_path, data, digest, previous_entry)
+        if st is not None:
+            return filepath, _manifest_entry(digest, st), False
+
+    _atomic_write(full_path, data)
+    return filepath, _manifest_entry(digest, os.stat(full_path)), True
+
+
+def write_tree(project_dir, tree, dirs=(), incremental=False, workers=1, on_write=None):
+    # Materialize `tree` ({relative path: content} or (path, content) pairs) under project_dir.
+    # workers > 1 fans the writes out over a bounded thread pool; file I/O
+    # releases the GIL, so this mostly helps on high-latency (network) volumes.
+    tree = dict(tree)
+    os.makedirs(project_dir, exist_ok=True)
+    make_dirs(project_dir, dirs, tree)
+
+    # Always read for stale detection; only used to skip writes when incremental
+    previous = load_manifest(project_dir)
+    manifest = {}
+    report = {"written": 0, "skipped": 0, "stale": []}
+
+    def record(result):
+        filepath, entry, written = result
+        manifest[filepath] = entry
+        if written:
+            report["written"] += 1
+            if on_write:
+                on_write(filepath)
+        else:
+            report["skipped"] += 1
+
+    if workers <= 1:
+        for filepath, content in tree.items():
+            record(_write_entry(project_dir, filepath, content, incremental, previous.get(filepath)))
+    else:
+        # Hand each worker a contiguous batch rather than one task per file;
+        # per-future overhead otherwise dominates for small files.
+        items = list(tree.items())
+        batch = max(1, min(64, len(items) // (workers * 4) or 1))
+
+        def write_batch(chunk):
+            return [
+                _write_entry(project_dir, filepath, content, incremental, previous.get(filepath))
+                for filepath, content in chunk
+            ]
+
+        from concurrent.futures import ThreadPoolExecutor
+
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            chunks = (items[i:i + batch] for i in range(0, len(items), batch))
+            for results in pool.map(write_batch, chunks):
+                for result in results:
+                    record(result)
+
+    # Files we generated on an earlier run that are no longer part of the scaffold.
+    # They are reported, not deleted: the user may have adopted them. Their
+    # entries stay in the manifest, so later runs keep reporting them, until the
+    # file is gone from disk.
+    for filepath in previous:
+        if filepath not in tree and os.path.exists(os.path.join(project_dir, filepath)):
+            report["stale"].append(filepath)
+            manifest[filepath] = previous[filepath]
+    report["stale"].sort()
+    save_manifest(project_dir, manifest)
+    return report
+
+
+# =========
+# Backends
+# =========
+
+class DiskBackend:
+    def __init__(self, incremental=False, workers=1, on_write=None):
+        self.incremental = incremental
+        self.workers = workers
+        self.on_write = on_write
+
+    def write_tree(self, root, tree, dirs=()):
+        return write_tree(root, tree, dirs, self.incremental, self.workers, self.on_write)
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class MemoryBackend:
+    def __init__(self):
+        self.files = {}
+        self.dirs = set()
+
+    def write_tree(self, root, tree, dirs=()):
+        report = {"written": 0, "skipped": 0, "stale": []}
+        self.dirs.update(os.path.join(root, d) for d in dirs)
+        for filepath, content in (tree.items() if isinstance(tree, dict) else tree):
+            self.files[os.path.join(root, filepath)] = encode_content(content)
+            report["written"] += 1
+        return report
+
+    def tree(self, root):
+        # {relative path: bytes} for everything written under `root`
+        prefix = os.path.join(root, "")
+        return {path[len(prefix):]: data for path, data in self.files.items() if path.startswith(prefix)}
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# =========
+# Archive output
+# =========
+
+ARCHIVE_FORMATS = ("tar.gz", "zip")
+
+
+def archive_format(path, fmt=None):
+    if fmt:
+        if fmt not in ARCHIVE_FORMATS:
+            raise ValueError(f"Unknown archive format {fmt!r} (expected one of {', '.join(ARCHIVE_FORMATS)})")
+        return fmt
+    if path.endswith((".tar.gz", ".tgz")):
+        return "tar.gz"
+    if path.endswith(".zip"):
+        return "zip"
+    raise ValueError(f"Cannot infer archive format from {path!r}; pass --format")
+
+
+def _archive_mtime():
+    import time
+
+    # Honour SOURCE_DATE_EPOCH so identical scaffolds produce identical archives
+    epoch = os.environ.get("SOURCE_DATE_EPOCH")
+    return int(epoch) if epoch else int(time.time())
+
+
+class ArchiveBackend:
+    # Streams trees into a tar.gz or zip on `fileobj`, which may be unseekable
+    # (stdout, a pipe). Each entry is encoded and written as soon as it is
+    # produced, so memory use is bounded by the largest single file rather
+    # than the whole scaffold.
+
+    def __init__(self, fileobj, fmt):
+        if fmt not in ARCHIVE_FORMATS:
+            raise ValueError(f"Unknown archive format {fmt!r} (expected one of {', '.join(ARCHIVE_FORMATS)})")
+        self.fmt = fmt
+        self.mtime = _archive_mtime()
+        self.report = {"files": 0, "bytes": 0}
+
+        if fmt == "tar.gz":
+            import tarfile
+
+            self._tarfile = tarfile
+            self._archive = tarfile.open(fileobj=fileobj, mode="w|gz")
+        else:
+            import time
+            import zipfile
+
+            self._zipfile = zipfile
+            self._date_time = time.gmtime(max(self.mtime, 315532800))[:6]  # zip can't represent dates before 1980
+            self._archive = zipfile.ZipFile(fileobj, "w", compression=zipfile.ZIP_DEFLATED, compresslevel=9)
+
+    def _add_dir(self, name):
+        if self.fmt == "tar.gz":
+            info = self._tarfile.TarInfo(name)
+            info.type, info.mode, info.mtime = self._tarfile.DIRTYPE, 0o755, self.mtime
+            self._archive.addfile(info)
+        else:
+            info = self._zipfile.ZipInfo(name + "/", self._date_time)
+            info.external_attr = (0o40755 << 16) | 0x10
+            self._archive.writestr(info, b"")
+
+    def _add_file(self, name, data):
+        if self.fmt == "tar.gz":
+            info = self._tarfile.TarInfo(name)
+            info.size, info.mode, info.mtime = len(data), 0o644, self.mtime
+            self._archive.addfile(info, io.BytesIO(data))
+        else:
+            info = self._zipfile.ZipInfo(name, self._date_time)
+            info.compress_type = self._zipfile.ZIP_DEFLATED
+            info.external_attr = 0o644 << 16
+            self._archive.writestr(info, data)
+
+    def write_tree(self, root, tree, dirs=()):
+        report = {"written": 0, "skipped": 0, "stale": []}
+        for d in [""] + sorted(dirs):
+            self._add_dir(f"{root}/{d}".rstrip("/"))
+        for filepath, content in (tree.items() if isinstance(tree, dict) else tree):
+            data = encode_content(content)
+            self._add_file(f"{root}/{filepath}", data)
+            report["written"] += 1
+            self.report["files"] += 1
+            self.report["bytes"] += len(data)
+        return report
+
+    def close(self):
+        if self._archive is not None:
+            self._archive.close()
+            self._archive = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
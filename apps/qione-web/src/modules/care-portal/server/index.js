@@ -15,7 +15,8 @@ app.get('/', (c) => c.text('Care Portal API is Live!'))
 // Database Connection
 const pool = new pg.Pool({
   connectionString: process.env.DATABASE_URL,
-  ssl: { rejectUnauthorized: false } // Required for Railway/External Postgres
+  // Required for Railway/External Postgres; PGSSLMODE=disable for a local one
+  ssl: process.env.PGSSLMODE === 'disable' ? false : { rejectUnauthorized: false }
 })
 
 // --- N8N WEBHOOK HELPER ---
@@ -36,33 +37,75 @@ const triggerN8n = async (event, data) => {
 
 // --- ENDPOINTS ---
 
-// GET: All Data (Initial Load)
+// Runs sync_changes (sync.sql) from empty cursors until no table has more,
+// returning {key: [row, ...]}. GET /api/sync reads through it, so it serves
+// the same rows POST /api/sync delivers.
+const SYNC_PAGE_LIMIT = 5000;
+
+const fullSync = async () => {
+  const tables = {};
+  const cursors = {};
+  let more = true;
+  while (more) {
+    const res = await pool.query('SELECT sync_changes($1::jsonb, $2) AS sync', [JSON.stringify(cursors), SYNC_PAGE_LIMIT]);
+    more = false;
+    for (const [key, change] of Object.entries(res.rows[0].sync)) {
+      if (key === 'watermark') continue;
+      const rows = tables[key] || (tables[key] = new Map());
+      for (const id of change.deleted) rows.delete(String(id));
+      for (const row of change.rows) rows.set(String(row.id), row);
+      cursors[key] = change.cursor;
+      more = more || change.has_more;
+    }
+  }
+  return Object.fromEntries(Object.entries(tables).map(([key, rows]) => [key, [...rows.values()]]));
+};
+
+// Ascending, nulls last; flip the arguments for descending
+const byField = (field) => (a, b) =>
+  a[field] == null ? (b[field] == null ? 0 : 1) : b[field] == null ? -1 : a[field] < b[field] ? -1 : a[field] > b[field] ? 1 : 0;
+
+// GET: All Data (full reload for clients that keep no state; they get the
+// synced columns with the old filters and order applied). Clients that keep
+// state use POST /api/sync.
 app.get('/api/sync', async (c) => {
   try {
-    const [meds, supplies, status, history, appts, tasks, timeline] = await Promise.all([
-      pool.query('SELECT * FROM medications WHERE is_active = true'),
-      pool.query('SELECT * FROM inventory_supplies'),
-      pool.query('SELECT * FROM patient_status WHERE id = 1'),
-      pool.query('SELECT * FROM medical_history WHERE is_active = true'),
-      pool.query("SELECT * FROM appointments WHERE status = 'scheduled' ORDER BY appointment_at ASC"),
-      pool.query('SELECT * FROM care_tasks WHERE completed_at IS NULL ORDER BY priority DESC'),
-      pool.query('SELECT * FROM care_timeline ORDER BY performed_at DESC LIMIT 20')
-    ]);
-
+    const t = await fullSync();
     return c.json({
-      meds: meds.rows,
-      supplies: supplies.rows,
-      patientStatus: status.rows[0],
-      medicalHistory: history.rows,
-      appointments: appts.rows,
-      tasks: tasks.rows,
-      events: timeline.rows
+      meds: t.meds.filter(m => m.is_active),
+      supplies: t.supplies,
+      patientStatus: t.patientStatus.find(p => p.id === 1),
+      medicalHistory: t.medicalHistory.filter(h => h.is_active),
+      appointments: t.appointments.filter(a => a.status === 'scheduled').sort(byField('appointment_at')),
+      tasks: t.tasks.filter(task => task.completed_at == null).sort((a, b) => byField('priority')(b, a)),
+      events: t.events.sort((a, b) => byField('performed_at')(b, a)).slice(0, 20)
     });
   } catch (err) {
     return c.json({ error: err.message }, 500);
   }
 });
 
+// POST: Delta Sync. Body: { cursors: { meds: "<cursor>", ... }, limit }.
+// Returns only rows changed since each cursor plus deleted ids (sync.sql);
+// a table with no cursor, or one the server cannot read, is loaded in full
+// (reset: true). Repeat while any has_more.
+app.post('/api/sync', async (c) => {
+  const { cursors = {}, limit = 1000 } = await c.req.json().catch(() => ({}));
+  if (typeof cursors !== 'object' || cursors === null || Array.isArray(cursors)) {
+    return c.json({ error: 'cursors must be an object' }, 400);
+  }
+  try {
+    const res = await pool.query(
+      'SELECT sync_changes($1::jsonb, $2)::text AS sync',
+      [JSON.stringify(cursors), Math.min(Math.max(parseInt(limit, 10) || 1000, 1), SYNC_PAGE_LIMIT)]
+    );
+    // Already JSON; pass it through instead of parsing and re-serializing
+    return c.body(res.rows[0].sync, 200, { 'Content-Type': 'application/json' });
+  } catch (err) {
+    return c.json({ error: err.message }, 500);
+  }
+});
+
 // POST: Add Event
 app.post('/api/events', async (c) => {
   const body = await c.req.json();
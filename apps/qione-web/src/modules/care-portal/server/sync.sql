@@ -0,0 +1,387 @@
+-- Generated by gen_data_layer.py from care_schema.py; edit the definition, not this file.
+-- Delta sync for the Railway API (POST /api/sync in index.js); run after
+-- supabase_schema.sql. Safe to re-run.
+
+-- Delta sync: row versions, tombstones and sync_changes(cursors)
+
+create or replace function public.sync_txid() returns bigint language sql volatile as $$
+  select pg_current_xact_id()::text::bigint
+$$;
+
+-- Versions below this are final: no running transaction can still write one
+create or replace function public.sync_watermark() returns bigint language sql stable as $$
+  select pg_snapshot_xmin(pg_current_snapshot())::text::bigint
+$$;
+
+create or replace function public.sync_touch() returns trigger language plpgsql as $$
+begin
+  new.version := public.sync_txid();
+  new.updated_at := now();
+  return new;
+end $$;
+
+create table if not exists public.sync_tombstones (
+  table_name text not null,
+  row_id text not null,
+  version bigint not null default public.sync_txid(),
+  deleted_at timestamptz not null default now()
+);
+create index if not exists sync_tombstones_table_name_version_idx on public.sync_tombstones (table_name, version);
+create index if not exists sync_tombstones_deleted_at_idx on public.sync_tombstones (deleted_at);
+
+create or replace function public.sync_tombstone() returns trigger language plpgsql as $$
+begin
+  insert into public.sync_tombstones (table_name, row_id) values (tg_table_name, old.id::text);
+  return old;
+end $$;
+
+-- Cursors below horizon may have missed purged tombstones and must reset
+create table if not exists public.sync_horizon (
+  id int primary key default 1 check (id = 1),
+  version bigint not null default 0
+);
+insert into public.sync_horizon (id) values (1) on conflict do nothing;
+
+create or replace function public.purge_sync_tombstones(keep interval default interval '30 days')
+returns bigint language plpgsql as $$
+declare
+  purged bigint;
+begin
+  with gone as (delete from public.sync_tombstones where deleted_at < now() - keep returning version)
+  select max(version) into purged from gone;
+  if purged is not null then
+    update public.sync_horizon set version = greatest(version, purged + 1);
+  end if;
+  return purged;
+end $$;
+
+alter table public.medications add column if not exists updated_at timestamptz not null default now();
+alter table public.medications add column if not exists version bigint not null default public.sync_txid();
+create index if not exists medications_version_idx on public.medications (version, (id::text));
+drop trigger if exists medications_sync_touch on public.medications;
+create trigger medications_sync_touch before insert or update on public.medications
+  for each row execute function public.sync_touch();
+drop trigger if exists medications_sync_tombstone on public.medications;
+create trigger medications_sync_tombstone after delete on public.medications
+  for each row execute function public.sync_tombstone();
+
+alter table public.inventory_supplies add column if not exists updated_at timestamptz not null default now();
+alter table public.inventory_supplies add column if not exists version bigint not null default public.sync_txid();
+create index if not exists inventory_supplies_version_idx on public.inventory_supplies (version, (id::text));
+drop trigger if exists inventory_supplies_sync_touch on public.inventory_supplies;
+create trigger inventory_supplies_sync_touch before insert or update on public.inventory_supplies
+  for each row execute function public.sync_touch();
+drop trigger if exists inventory_supplies_sync_tombstone on public.inventory_supplies;
+create trigger inventory_supplies_sync_tombstone after delete on public.inventory_supplies
+  for each row execute function public.sync_tombstone();
+
+alter table public.patient_status add column if not exists updated_at timestamptz not null default now();
+alter table public.patient_status add column if not exists version bigint not null default public.sync_txid();
+create index if not exists patient_status_version_idx on public.patient_status (version, (id::text));
+drop trigger if exists patient_status_sync_touch on public.patient_status;
+create trigger patient_status_sync_touch before insert or update on public.patient_status
+  for each row execute function public.sync_touch();
+drop trigger if exists patient_status_sync_tombstone on public.patient_status;
+create trigger patient_status_sync_tombstone after delete on public.patient_status
+  for each row execute function public.sync_tombstone();
+
+alter table public.medical_history add column if not exists updated_at timestamptz not null default now();
+alter table public.medical_history add column if not exists version bigint not null default public.sync_txid();
+create index if not exists medical_history_version_idx on public.medical_history (version, (id::text));
+drop trigger if exists medical_history_sync_touch on public.medical_history;
+create trigger medical_history_sync_touch before insert or update on public.medical_history
+  for each row execute function public.sync_touch();
+drop trigger if exists medical_history_sync_tombstone on public.medical_history;
+create trigger medical_history_sync_tombstone after delete on public.medical_history
+  for each row execute function public.sync_tombstone();
+
+alter table public.appointments add column if not exists updated_at timestamptz not null default now();
+alter table public.appointments add column if not exists version bigint not null default public.sync_txid();
+create index if not exists appointments_version_idx on public.appointments (version, (id::text));
+drop trigger if exists appointments_sync_touch on public.appointments;
+create trigger appointments_sync_touch before insert or update on public.appointments
+  for each row execute function public.sync_touch();
+drop trigger if exists appointments_sync_tombstone on public.appointments;
+create trigger appointments_sync_tombstone after delete on public.appointments
+  for each row execute function public.sync_tombstone();
+
+alter table public.care_tasks add column if not exists updated_at timestamptz not null default now();
+alter table public.care_tasks add column if not exists version bigint not null default public.sync_txid();
+create index if not exists care_tasks_version_idx on public.care_tasks (version, (id::text));
+drop trigger if exists care_tasks_sync_touch on public.care_tasks;
+create trigger care_tasks_sync_touch before insert or update on public.care_tasks
+  for each row execute function public.sync_touch();
+drop trigger if exists care_tasks_sync_tombstone on public.care_tasks;
+create trigger care_tasks_sync_tombstone after delete on public.care_tasks
+  for each row execute function public.sync_tombstone();
+
+alter table public.care_timeline add column if not exists updated_at timestamptz not null default now();
+alter table public.care_timeline add column if not exists version bigint not null default public.sync_txid();
+create index if not exists care_timeline_version_idx on public.care_timeline (version, (id::text));
+drop trigger if exists care_timeline_sync_touch on public.care_timeline;
+create trigger care_timeline_sync_touch before insert or update on public.care_timeline
+  for each row execute function public.sync_touch();
+drop trigger if exists care_timeline_sync_tombstone on public.care_timeline;
+create trigger care_timeline_sync_tombstone after delete on public.care_timeline
+  for each row execute function public.sync_tombstone();
+
+-- cursors: {key: cursor} from the previous response (omit a key for a full load).
+-- Returns {watermark, key: {rows, deleted, cursor, has_more, reset}}; call again
+-- with the new cursors while any has_more is true.
+create or replace function public.sync_changes(cursors jsonb default '{}', page_limit int default 1000)
+returns jsonb language plpgsql stable as $$
+declare
+  watermark bigint := public.sync_watermark();
+  horizon bigint := (select version from public.sync_horizon where id = 1);
+  result jsonb := jsonb_build_object('watermark', watermark);
+  cur text;
+  is_reset boolean;
+  after_v bigint;
+  after_k text;
+  page_rows jsonb;
+  deleted jsonb;
+  has_more boolean;
+  last_v bigint;
+  last_k text;
+begin
+  horizon := coalesce(horizon, 0);
+
+  -- meds: public.medications
+  cur := cursors ->> 'meds';
+  is_reset := case when cur is null or cur !~ '^[0-9]{1,18}(:|$)' then true
+                   else split_part(cur, ':', 1)::bigint < horizon end;
+  after_v := case when is_reset then 0 else split_part(cur, ':', 1)::bigint end;
+  after_k := case when is_reset or strpos(cur, ':') = 0 then '' else substr(cur, strpos(cur, ':') + 1) end;
+  select coalesce(jsonb_agg(p.r order by p.n) filter (where p.n <= page_limit), '[]'::jsonb),
+         count(*) > page_limit,
+         max(p.version) filter (where p.n = page_limit),
+         max(p.k) filter (where p.n = page_limit)
+    into page_rows, has_more, last_v, last_k
+    from (
+      select q.*, row_number() over (order by q.version, q.k) as n
+        from (
+          select t.version, t.id::text as k, jsonb_build_object('id', t.id, 'name', t.name, 'dosage', t.dosage, 'instructions', t.instructions, 'schedule_time', t.schedule_time, 'stock_current', t.stock_current, 'stock_threshold', t.stock_threshold, 'is_active', t.is_active, 'version', t.version) as r
+            from public.medications t
+           where (t.version, t.id::text) > (after_v, after_k) and t.version < watermark
+           order by t.version, t.id::text
+           limit page_limit + 1
+        ) q
+    ) p;
+  if is_reset then
+    deleted := '[]'::jsonb;
+  else
+    select coalesce(jsonb_agg(d.row_id), '[]'::jsonb) into deleted
+      from public.sync_tombstones d
+     where d.table_name = 'medications' and d.version >= after_v
+       and d.version < case when has_more then last_v else watermark end;
+  end if;
+  result := result || jsonb_build_object('meds', jsonb_build_object(
+    'rows', page_rows, 'deleted', deleted, 'reset', is_reset, 'has_more', has_more,
+    'cursor', case when has_more then last_v::text || ':' || last_k else watermark::text end));
+
+  -- supplies: public.inventory_supplies
+  cur := cursors ->> 'supplies';
+  is_reset := case when cur is null or cur !~ '^[0-9]{1,18}(:|$)' then true
+                   else split_part(cur, ':', 1)::bigint < horizon end;
+  after_v := case when is_reset then 0 else split_part(cur, ':', 1)::bigint end;
+  after_k := case when is_reset or strpos(cur, ':') = 0 then '' else substr(cur, strpos(cur, ':') + 1) end;
+  select coalesce(jsonb_agg(p.r order by p.n) filter (where p.n <= page_limit), '[]'::jsonb),
+         count(*) > page_limit,
+         max(p.version) filter (where p.n = page_limit),
+         max(p.k) filter (where p.n = page_limit)
+    into page_rows, has_more, last_v, last_k
+    from (
+      select q.*, row_number() over (order by q.version, q.k) as n
+        from (
+          select t.version, t.id::text as k, jsonb_build_object('id', t.id, 'item_type', t.item_type, 'quantity_full', t.quantity_full, 'quantity_empty', t.quantity_empty, 'threshold_alert', t.threshold_alert, 'supplier_contact', t.supplier_contact, 'version', t.version) as r
+            from public.inventory_supplies t
+           where (t.version, t.id::text) > (after_v, after_k) and t.version < watermark
+           order by t.version, t.id::text
+           limit page_limit + 1
+        ) q
+    ) p;
+  if is_reset then
+    deleted := '[]'::jsonb;
+  else
+    select coalesce(jsonb_agg(d.row_id), '[]'::jsonb) into deleted
+      from public.sync_tombstones d
+     where d.table_name = 'inventory_supplies' and d.version >= after_v
+       and d.version < case when has_more then last_v else watermark end;
+  end if;
+  result := result || jsonb_build_object('supplies', jsonb_build_object(
+    'rows', page_rows, 'deleted', deleted, 'reset', is_reset, 'has_more', has_more,
+    'cursor', case when has_more then last_v::text || ':' || last_k else watermark::text end));
+
+  -- patientStatus: public.patient_status
+  cur := cursors ->> 'patientStatus';
+  is_reset := case when cur is null or cur !~ '^[0-9]{1,18}(:|$)' then true
+                   else split_part(cur, ':', 1)::bigint < horizon end;
+  after_v := case when is_reset then 0 else split_part(cur, ':', 1)::bigint end;
+  after_k := case when is_reset or strpos(cur, ':') = 0 then '' else substr(cur, strpos(cur, ':') + 1) end;
+  select coalesce(jsonb_agg(p.r order by p.n) filter (where p.n <= page_limit), '[]'::jsonb),
+         count(*) > page_limit,
+         max(p.version) filter (where p.n = page_limit),
+         max(p.k) filter (where p.n = page_limit)
+    into page_rows, has_more, last_v, last_k
+    from (
+      select q.*, row_number() over (order by q.version, q.k) as n
+        from (
+          select t.version, t.id::text as k, jsonb_build_object('id', t.id, 'first_name', t.first_name, 'last_name', t.last_name, 'dob', t.dob, 'blood_type', t.blood_type, 'baseline_o2', t.baseline_o2, 'emergency_instructions', t.emergency_instructions, 'dnr_status', t.dnr_status, 'version', t.version) as r
+            from public.patient_status t
+           where (t.version, t.id::text) > (after_v, after_k) and t.version < watermark
+           order by t.version, t.id::text
+           limit page_limit + 1
+        ) q
+    ) p;
+  if is_reset then
+    deleted := '[]'::jsonb;
+  else
+    select coalesce(jsonb_agg(d.row_id), '[]'::jsonb) into deleted
+      from public.sync_tombstones d
+     where d.table_name = 'patient_status' and d.version >= after_v
+       and d.version < case when has_more then last_v else watermark end;
+  end if;
+  result := result || jsonb_build_object('patientStatus', jsonb_build_object(
+    'rows', page_rows, 'deleted', deleted, 'reset', is_reset, 'has_more', has_more,
+    'cursor', case when has_more then last_v::text || ':' || last_k else watermark::text end));
+
+  -- medicalHistory: public.medical_history
+  cur := cursors ->> 'medicalHistory';
+  is_reset := case when cur is null or cur !~ '^[0-9]{1,18}(:|$)' then true
+                   else split_part(cur, ':', 1)::bigint < horizon end;
+  after_v := case when is_reset then 0 else split_part(cur, ':', 1)::bigint end;
+  after_k := case when is_reset or strpos(cur, ':') = 0 then '' else substr(cur, strpos(cur, ':') + 1) end;
+  select coalesce(jsonb_agg(p.r order by p.n) filter (where p.n <= page_limit), '[]'::jsonb),
+         count(*) > page_limit,
+         max(p.version) filter (where p.n = page_limit),
+         max(p.k) filter (where p.n = page_limit)
+    into page_rows, has_more, last_v, last_k
+    from (
+      select q.*, row_number() over (order by q.version, q.k) as n
+        from (
+          select t.version, t.id::text as k, jsonb_build_object('id', t.id, 'condition_name', t.condition_name, 'diagnosed_year', t.diagnosed_year, 'notes', t.notes, 'is_active', t.is_active, 'version', t.version) as r
+            from public.medical_history t
+           where (t.version, t.id::text) > (after_v, after_k) and t.version < watermark
+           order by t.version, t.id::text
+           limit page_limit + 1
+        ) q
+    ) p;
+  if is_reset then
+    deleted := '[]'::jsonb;
+  else
+    select coalesce(jsonb_agg(d.row_id), '[]'::jsonb) into deleted
+      from public.sync_tombstones d
+     where d.table_name = 'medical_history' and d.version >= after_v
+       and d.version < case when has_more then last_v else watermark end;
+  end if;
+  result := result || jsonb_build_object('medicalHistory', jsonb_build_object(
+    'rows', page_rows, 'deleted', deleted, 'reset', is_reset, 'has_more', has_more,
+    'cursor', case when has_more then last_v::text || ':' || last_k else watermark::text end));
+
+  -- appointments: public.appointments
+  cur := cursors ->> 'appointments';
+  is_reset := case when cur is null or cur !~ '^[0-9]{1,18}(:|$)' then true
+                   else split_part(cur, ':', 1)::bigint < horizon end;
+  after_v := case when is_reset then 0 else split_part(cur, ':', 1)::bigint end;
+  after_k := case when is_reset or strpos(cur, ':') = 0 then '' else substr(cur, strpos(cur, ':') + 1) end;
+  select coalesce(jsonb_agg(p.r order by p.n) filter (where p.n <= page_limit), '[]'::jsonb),
+         count(*) > page_limit,
+         max(p.version) filter (where p.n = page_limit),
+         max(p.k) filter (where p.n = page_limit)
+    into page_rows, has_more, last_v, last_k
+    from (
+      select q.*, row_number() over (order by q.version, q.k) as n
+        from (
+          select t.version, t.id::text as k, jsonb_build_object('id', t.id, 'title', t.title, 'location', t.location, 'appointment_at', t.appointment_at, 'provider_name', t.provider_name, 'notes', t.notes, 'status', t.status, 'version', t.version) as r
+            from public.appointments t
+           where (t.version, t.id::text) > (after_v, after_k) and t.version < watermark
+           order by t.version, t.id::text
+           limit page_limit + 1
+        ) q
+    ) p;
+  if is_reset then
+    deleted := '[]'::jsonb;
+  else
+    select coalesce(jsonb_agg(d.row_id), '[]'::jsonb) into deleted
+      from public.sync_tombstones d
+     where d.table_name = 'appointments' and d.version >= after_v
+       and d.version < case when has_more then last_v else watermark end;
+  end if;
+  result := result || jsonb_build_object('appointments', jsonb_build_object(
+    'rows', page_rows, 'deleted', deleted, 'reset', is_reset, 'has_more', has_more,
+    'cursor', case when has_more then last_v::text || ':' || last_k else watermark::text end));
+
+  -- tasks: public.care_tasks
+  cur := cursors ->> 'tasks';
+  is_reset := case when cur is null or cur !~ '^[0-9]{1,18}(:|$)' then true
+                   else split_part(cur, ':', 1)::bigint < horizon end;
+  after_v := case when is_reset then 0 else split_part(cur, ':', 1)::bigint end;
+  after_k := case when is_reset or strpos(cur, ':') = 0 then '' else substr(cur, strpos(cur, ':') + 1) end;
+  select coalesce(jsonb_agg(p.r order by p.n) filter (where p.n <= page_limit), '[]'::jsonb),
+         count(*) > page_limit,
+         max(p.version) filter (where p.n = page_limit),
+         max(p.k) filter (where p.n = page_limit)
+    into page_rows, has_more, last_v, last_k
+    from (
+      select q.*, row_number() over (order by q.version, q.k) as n
+        from (
+          select t.version, t.id::text as k, jsonb_build_object('id', t.id, 'task_name', t.task_name, 'description', t.description, 'due_at', t.due_at, 'completed_at', t.completed_at, 'priority', t.priority, 'version', t.version) as r
+            from public.care_tasks t
+           where (t.version, t.id::text) > (after_v, after_k) and t.version < watermark
+           order by t.version, t.id::text
+           limit page_limit + 1
+        ) q
+    ) p;
+  if is_reset then
+    deleted := '[]'::jsonb;
+  else
+    select coalesce(jsonb_agg(d.row_id), '[]'::jsonb) into deleted
+      from public.sync_tombstones d
+     where d.table_name = 'care_tasks' and d.version >= after_v
+       and d.version < case when has_more then last_v else watermark end;
+  end if;
+  result := result || jsonb_build_object('tasks', jsonb_build_object(
+    'rows', page_rows, 'deleted', deleted, 'reset', is_reset, 'has_more', has_more,
+    'cursor', case when has_more then last_v::text || ':' || last_k else watermark::text end));
+
+  -- events: public.care_timeline
+  cur := cursors ->> 'events';
+  is_reset := case when cur is null or cur !~ '^[0-9]{1,18}(:|$)' then true
+                   else split_part(cur, ':', 1)::bigint < horizon end;
+  after_v := case when is_reset then 0 else split_part(cur, ':', 1)::bigint end;
+  after_k := case when is_reset or strpos(cur, ':') = 0 then '' else substr(cur, strpos(cur, ':') + 1) end;
+  if is_reset then
+    -- First sync: only the newest rows; older ones are never backfilled
+    select coalesce(jsonb_agg(p.r), '[]'::jsonb), false into page_rows, has_more
+      from (select jsonb_build_object('id', t.id, 'event_type', t.event_type, 'title', t.title, 'description', t.description, 'value_numeric', t.value_numeric, 'value_sub', t.value_sub, 'performed_at', t.performed_at, 'version', t.version) as r from public.care_timeline t order by t.performed_at desc nulls last limit 20) p;
+  else
+    select coalesce(jsonb_agg(p.r order by p.n) filter (where p.n <= page_limit), '[]'::jsonb),
+           count(*) > page_limit,
+           max(p.version) filter (where p.n = page_limit),
+           max(p.k) filter (where p.n = page_limit)
+      into page_rows, has_more, last_v, last_k
+      from (
+        select q.*, row_number() over (order by q.version, q.k) as n
+          from (
+            select t.version, t.id::text as k, jsonb_build_object('id', t.id, 'event_type', t.event_type, 'title', t.title, 'description', t.description, 'value_numeric', t.value_numeric, 'value_sub', t.value_sub, 'performed_at', t.performed_at, 'version', t.version) as r
+              from public.care_timeline t
+             where (t.version, t.id::text) > (after_v, after_k) and t.version < watermark
+             order by t.version, t.id::text
+             limit page_limit + 1
+          ) q
+      ) p;
+  end if;
+  if is_reset then
+    deleted := '[]'::jsonb;
+  else
+    select coalesce(jsonb_agg(d.row_id), '[]'::jsonb) into deleted
+      from public.sync_tombstones d
+     where d.table_name = 'care_timeline' and d.version >= after_v
+       and d.version < case when has_more then last_v else watermark end;
+  end if;
+  result := result || jsonb_build_object('events', jsonb_build_object(
+    'rows', page_rows, 'deleted', deleted, 'reset', is_reset, 'has_more', has_more,
+    'cursor', case when has_more then last_v::text || ':' || last_k else watermark::text end));
+
+  return result;
+end $$;
@@ -1,4 +1,4 @@
-import React, { useState } from 'react';
+import React, { useEffect, useState } from 'react';
 import {
   Shield,
   FileText,
@@ -9,8 +9,10 @@ import {
   UserCheck,
   Files,
   Info,
-  ChevronRight
+  ChevronRight,
+  Search
 } from 'lucide-react';
+import { searchKb } from './lib/kbSearch';
 import { Card } from './App'; // Assuming Card is exported or I will need to redefine/import it. 
 // Note: In App.jsx Card was defined locally. I should probably just redefine a simple Card here or ask to export it. 
 // For now, I'll redefine a simple version to avoid breaking if App.jsx doesn't export it.
@@ -37,6 +39,60 @@ const SectionButton = ({ active, icon: Icon, label, onClick }) => (
   </button>
 );
 
+// Offline search over the care wiki (public/kb/search, built by build_kb_index.py)
+const KbSearch = () => {
+  const [query, setQuery] = useState('');
+  const [hits, setHits] = useState([]);
+  const [searched, setSearched] = useState('');
+  const [error, setError] = useState(null);
+
+  useEffect(() => {
+    if (!query.trim()) {
+      setHits([]);
+      return;
+    }
+    let stale = false;
+    const timer = setTimeout(() => {
+      searchKb(query, 8)
+        .then(results => { if (!stale) { setHits(results); setSearched(query); setError(null); } })
+        .catch(err => { if (!stale) setError(err.message); });
+    }, 150);
+    return () => { stale = true; clearTimeout(timer); };
+  }, [query]);
+
+  return (
+    <SimpleCard>
+      <div className="flex items-center gap-2">
+        <Search className="w-5 h-5 text-slate-400 shrink-0" />
+        <input
+          value={query}
+          onChange={e => setQuery(e.target.value)}
+          placeholder="Search the care wiki"
+          className="bg-transparent text-white w-full outline-none placeholder:text-slate-500"
+        />
+      </div>
+      {error && <p className="text-red-400 text-sm mt-2">{error}</p>}
+      {hits.length > 0 && (
+        <ul className="mt-3 space-y-1">
+          {hits.map(hit => (
+            <li key={hit.url}>
+              <a
+                href={hit.url}
+                target="_blank"
+                className="flex items-center justify-between p-2 rounded-lg text-slate-300 hover:bg-slate-700"
+              >
+                <span className="text-sm">{hit.title}</span>
+                <ChevronRight className="w-4 h-4 text-slate-500" />
+              </a>
+            </li>
+          ))}
+        </ul>
+      )}
+      {query.trim() && searched === query && !error && !hits.length && <p className="text-slate-500 text-sm mt-2">No matching pages.</p>}
+    </SimpleCard>
+  );
+};
+
 export default function BinderScreen() {
   const [section, setSection] = useState('quick_start'); // quick_start, medical, legal, advance, logs, contacts, signs, zones
 
@@ -56,6 +112,8 @@ export default function BinderScreen() {
         </a>
       </div>
 
+      <KbSearch />
+
       {/* Navigation Tabs (Scrollable) */}
       <div className="flex gap-2 overflow-x-auto pb-2 no-scrollbar px-1 -mx-1 snap-x">
         <div className="min-w-[140px] snap-start">
@@ -1,10 +1,25 @@
 import React, { useState, useEffect, useRef } from 'react';
 import { Activity, Send, Settings, History, Trash2, CheckCircle, AlertCircle, Heart, RefreshCw, BarChart3, HelpCircle, Link as LinkIcon, Pill, Droplet, Minus, Plus } from 'lucide-react';
 import { supabase } from '../lib/supabase';
+import { selectPatientId, selectVitals } from '../lib/queries';
 
 // Hard-coded webhook URL from text.py - cannot be changed
 const WEBHOOK_URL = 'https://flow.zoho.com/886846795/flow/webhook/incoming?zapikey=1001.a155e174ee504cc1062405e2f9288592.fcd9d6cb84d59e610895da5144f2fc65&isdebug=false';
 
+const RECENT_READINGS = 15;
+const AVERAGE_DAYS = 90;
+
+// Count-weighted mean per metric over vitals_series buckets
+const averageSeries = (series) => {
+    const sums = {};
+    for (const { metric, n, avg_value } of series) {
+        const s = sums[metric] || (sums[metric] = { n: 0, total: 0 });
+        s.n += n;
+        s.total += n * Number(avg_value);
+    }
+    return Object.fromEntries(Object.entries(sums).map(([metric, s]) => [metric, Math.round(s.total / s.n)]));
+};
+
 export default function BPTracker() {
     const [systolic, setSystolic] = useState('');
     const [diastolic, setDiastolic] = useState('');
@@ -17,6 +32,7 @@ export default function BPTracker() {
     const [logs, setLogs] = useState([]); // Local logs
     const [sheetData, setSheetData] = useState([]); // Data from Google Sheet
     const [patientId, setPatientId] = useState(null);
+    const [averages, setAverages] = useState(null); // 90-day averages from vitals_rollups
 
     const [view, setView] = useState('track'); // 'track', 'history', 'dashboard', 'settings'
     const [status, setStatus] = useState('idle'); // 'idle', 'sending', 'success', 'error'
@@ -33,7 +49,7 @@ export default function BPTracker() {
     // Load settings and data from Supabase/Local
     useEffect(() => {
         const init = async () => {
-            const { data: patient } = await supabase.from('patients').select('id').limit(1).single();
+            const { data: patient } = await selectPatientId().limit(1).single();
             if (patient) {
                 setPatientId(patient.id);
                 fetchSupabaseVitals(patient.id);
@@ -55,25 +71,29 @@ export default function BPTracker() {
 
         setIsLoadingSheet(true);
         try {
-            const { data, error } = await supabase
-                .from('vitals')
-                .select('*')
-                .eq('patient_id', id)
-                .eq('type', 'Blood Pressure')
-                .order('recorded_at', { ascending: false });
+            // Raw rows only for the chart and list; averages come from the rollups
+            const since = new Date(Date.now() - AVERAGE_DAYS * 86400000).toISOString();
+            const [{ data, error }, { data: series }] = await Promise.all([
+                selectVitals()
+                    .eq('patient_id', id)
+                    .eq('type', 'Blood Pressure')
+                    .not('systolic', 'is', null)
+                    .order('recorded_at', { ascending: false })
+                    .limit(RECENT_READINGS),
+                supabase.rpc('vitals_series', { p_patient: id, p_type: 'Blood Pressure', p_from: since })
+            ]);
 
             if (error) throw error;
+            setAverages(series && series.length ? averageSeries(series) : null);
 
             if (data && data.length > 0) {
-                const formatted = data.map(v => {
-                    const [sys, dia] = v.value.split('/');
-                    return {
-                        systolic: parseInt(sys),
-                        diastolic: parseInt(dia),
-                        timestamp: new Date(v.recorded_at).toLocaleString(),
-                        notes: v.notes
-                    };
-                });
+                // Typed columns are filled on write, so no string parsing here
+                const formatted = data.map(v => ({
+                    systolic: Number(v.systolic),
+                    diastolic: Number(v.diastolic),
+                    timestamp: new Date(v.recorded_at).toLocaleString(),
+                    notes: v.notes
+                }));
                 setSheetData(formatted);
             }
         } catch (err) {
@@ -531,13 +551,13 @@ export default function BPTracker() {
                                     <div className="bg-white p-4 rounded-xl shadow-sm border border-slate-100">
                                         <div className="text-xs text-slate-400 mb-1">Avg Systolic</div>
                                         <div className="text-2xl font-bold text-slate-700">
-                                            {sheetData.length ? Math.round(sheetData.reduce((acc, curr) => acc + curr.systolic, 0) / sheetData.length) : '-'}
+                                            {averages?.systolic ?? (sheetData.length ? Math.round(sheetData.reduce((acc, curr) => acc + curr.systolic, 0) / sheetData.length) : '-')}
                                         </div>
                                     </div>
                                     <div className="bg-white p-4 rounded-xl shadow-sm border border-slate-100">
                                         <div className="text-xs text-slate-400 mb-1">Avg Diastolic</div>
                                         <div className="text-2xl font-bold text-slate-700">
-                                            {sheetData.length ? Math.round(sheetData.reduce((acc, curr) => acc + curr.diastolic, 0) / sheetData.length) : '-'}
+                                            {averages?.diastolic ?? (sheetData.length ? Math.round(sheetData.reduce((acc, curr) => acc + curr.diastolic, 0) / sheetData.length) : '-')}
                                         </div>
                                     </div>
                                 </div>
@@ -1,55 +1,82 @@
 import { supabase } from './supabase';
 
+// Delta sync (sync_changes in schema.sql): the client keeps every synced row
+// and one cursor per table, and each sync fetches only what changed since.
+const STORE_KEY = 'care-sync-v1';
+const PAGE_LIMIT = 1000;
+const EVENTS_KEPT = 50;
+
+const loadStore = () => {
+  try {
+    const store = JSON.parse(localStorage.getItem(STORE_KEY));
+    if (store && store.cursors && store.tables) return store;
+  } catch {
+    // Unreadable or unavailable storage: start over with a full load
+  }
+  return { cursors: {}, tables: {} };
+};
+
+const saveStore = (store) => {
+  try {
+    localStorage.setItem(STORE_KEY, JSON.stringify(store));
+  } catch {
+    // Quota or private mode: the next sync is a full load again
+  }
+};
+
+const applyChanges = (store, changes) => {
+  for (const [key, change] of Object.entries(changes)) {
+    if (key === 'watermark') continue;
+    const rows = change.reset ? {} : (store.tables[key] || {});
+    for (const id of change.deleted) delete rows[id];
+    for (const row of change.rows) rows[row.id] = row;
+    store.tables[key] = rows;
+    store.cursors[key] = change.cursor;
+  }
+  return Object.values(changes).some(change => change.has_more);
+};
+
+const newest = (rows, field, count) =>
+  rows.sort((a, b) => (b[field] || '').localeCompare(a[field] || '')).slice(0, count);
+
 export const db = {
-  // Sync all data
+  // Sync all data. Row shapes come from care_schema.py (SYNC), already
+  // aliased to the field names App.jsx reads.
   async sync() {
-    const [
-      { data: meds },
-      { data: patients },
-      { data: conditions },
-      { data: appointments },
-      { data: tasks },
-      { data: incidents }
-    ] = await Promise.all([
-      supabase.from('medications').select('*'),
-      supabase.from('patients').select('*').limit(1).single(),
-      supabase.from('conditions').select('*'),
-      supabase.from('appointments').select('*'),
-      supabase.from('tasks').select('*'),
-      supabase.from('incidents').select('*')
-    ]);
+    const store = loadStore();
+    let more = true;
+    while (more) {
+      const { data, error } = await supabase.rpc('sync_changes', {
+        cursors: store.cursors,
+        page_limit: PAGE_LIMIT
+      });
+      if (error) throw error;
+      more = applyChanges(store, data);
+    }
 
+    // Only the newest events are kept; older ones never come back on their own
+    const events = newest(Object.values(store.tables.events || {}), 'performed_at', EVENTS_KEPT);
+    store.tables.events = Object.fromEntries(events.map(e => [e.id, e]));
+    saveStore(store);
+
+    const rows = (key) => Object.values(store.tables[key] || {});
+    const [patient] = rows('patientStatus');
     return {
-      meds: meds?.map(m => ({
-        id: m.id,
-        name: m.name,
-        dosage: m.dose,
-        instructions: m.notes,
-        time: m.frequency,
-        stock: 10, // Default or fetch from inventory_items
-        threshold: 2,
-        takenToday: false
-      })) || [],
-      patientStatus: patients ? {
-        first_name: patients.full_name.split(' ')[0],
-        last_name: patients.full_name.split(' ')[1] || '',
-        dob: patients.dob,
-        notes: patients.notes
+      meds: rows('meds').filter(m => m.active),
+      patientStatus: patient ? {
+        first_name: patient.full_name.split(' ')[0],
+        last_name: patient.full_name.split(' ')[1] || '',
+        dob: patient.dob,
+        notes: patient.notes
       } : null,
-      medicalHistory: conditions?.map(c => ({
+      medicalHistory: rows('medicalHistory').map(c => ({
         id: c.id,
-        condition_name: c.name,
+        condition_name: c.condition_name,
         diagnosed_year: c.created_at.split('-')[0]
-      })) || [],
-      appointments: appointments || [],
-      tasks: tasks || [],
-      events: incidents?.map(i => ({
-        id: i.id,
-        type: i.type,
-        title: i.description,
-        time: i.incident_time,
-        user: 'System'
-      })) || []
+      })),
+      appointments: rows('appointments'),
+      tasks: rows('tasks'),
+      events
     };
   },
 
@@ -77,9 +104,11 @@ export const db = {
 
   // Update medication stock
   async updateMedStock(id, newStock) {
-    // Note: The medications table doesn't have stock currently.
-    // For now, we'll just return a success or log the change.
-    console.log(`Updating stock for ${id} to ${newStock}`);
+    const { error } = await supabase.from('medications').update({
+      stock_current: newStock
+    }).eq('id', id);
+
+    if (error) throw error;
     return { success: true };
   }
 };
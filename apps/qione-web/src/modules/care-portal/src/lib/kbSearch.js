@@ -0,0 +1,98 @@
+// Offline search over the prebuilt knowledge base index (build_kb_index.py).
+// Only index.json and docs.json are fetched up front; term shards are loaded
+// on demand for the first letters a query actually uses, then kept in memory.
+// stem() and analyze() must match build_kb_index.py exactly.
+
+const BASE = '/kb/search/';
+const STEMMER_VERSION = 2;
+
+let metaPromise = null;
+const shards = new Map();
+
+export function stem(word) {
+  if (word.length <= 3 || !/^[a-z]+$/.test(word)) return word;
+  if (word.endsWith('ies') && word.length > 4) word = word.slice(0, -3) + 'y';
+  else if (word.endsWith('sses')) word = word.slice(0, -2);
+  else if (['ches', 'shes', 'xes'].some(s => word.endsWith(s))) word = word.slice(0, -2);
+  else if (word.endsWith('s') && !['ss', 'us', 'is'].some(s => word.endsWith(s))) word = word.slice(0, -1);
+  for (const suffix of ['ing', 'ed']) {
+    if (!word.endsWith(suffix)) continue;
+    const rest = word.slice(0, -suffix.length);
+    if (rest.length >= 3) {
+      word = rest;
+      break;
+    }
+    if (rest.length === 2 && 'aeiou'.includes(rest[0]) && !'aeiou'.includes(rest[1])) return rest + 'e';
+  }
+  while (word.endsWith('e') && word.length > 3) word = word.slice(0, -1);
+  return word;
+}
+
+export function analyze(text, stopwords) {
+  const tokens = text.toLowerCase().match(/[a-z0-9]+/g) || [];
+  return tokens.filter(t => t.length > 1 && !stopwords.has(t)).map(stem);
+}
+
+async function fetchJson(name, version) {
+  const res = await fetch(`${BASE}${name}?v=${version}`);
+  if (!res.ok) throw new Error(`KB index: ${name} returned ${res.status}`);
+  return res.json();
+}
+
+function loadMeta() {
+  if (!metaPromise) {
+    metaPromise = (async () => {
+      const res = await fetch(`${BASE}index.json`, { cache: 'no-cache' });
+      if (!res.ok) throw new Error(`KB index: index.json returned ${res.status}`);
+      const meta = await res.json();
+      if (meta.stemmer !== STEMMER_VERSION) {
+        throw new Error(`KB index built with stemmer v${meta.stemmer}, client expects v${STEMMER_VERSION}`);
+      }
+      const docs = await fetchJson('docs.json', meta.docs);
+      return { ...meta, stopwords: new Set(meta.stopwords), docList: docs };
+    })();
+    metaPromise.catch(() => { metaPromise = null; });
+  }
+  return metaPromise;
+}
+
+function loadShard(meta, key) {
+  const version = meta.shards[key];
+  if (!version) return Promise.resolve({});
+  const cacheKey = `${key}:${version}`;
+  if (!shards.has(cacheKey)) {
+    const promise = fetchJson(`terms-${key}.json`, version);
+    promise.catch(() => shards.delete(cacheKey));
+    shards.set(cacheKey, promise);
+  }
+  return shards.get(cacheKey);
+}
+
+const shardKey = term => (/[a-z]/.test(term[0]) ? term[0] : '0');
+
+// Returns [{ url, title, score }], best first: pages matching more query terms
+// rank above pages matching fewer, ties broken by tf-idf.
+export async function searchKb(query, limit = 10) {
+  const meta = await loadMeta();
+  const terms = [...new Set(analyze(query, meta.stopwords))];
+  if (!terms.length) return [];
+
+  const loaded = await Promise.all(terms.map(t => loadShard(meta, shardKey(t))));
+  const scores = new Map();
+  const matched = new Map();
+  terms.forEach((term, i) => {
+    const postings = loaded[i][term];
+    if (!postings) return;
+    const idf = Math.log(1 + meta.doc_count / (postings.length / 2));
+    for (let p = 0; p < postings.length; p += 2) {
+      const doc = postings[p];
+      scores.set(doc, (scores.get(doc) || 0) + (1 + Math.log(postings[p + 1])) * idf);
+      matched.set(doc, (matched.get(doc) || 0) + 1);
+    }
+  });
+
+  return [...scores.keys()]
+    .sort((a, b) => matched.get(b) - matched.get(a) || scores.get(b) - scores.get(a) || a - b)
+    .slice(0, limit)
+    .map(doc => ({ url: meta.docList[doc][0], title: meta.docList[doc][1], score: scores.get(doc) }));
+}
@@ -0,0 +1,289 @@
+// Generated by gen_data_layer.py from care_schema.py; edit the definition, not this file.
+// Each query selects an explicit column list; aliases map columns to the
+// field names the screens read.
+import { supabase } from './supabase';
+
+/**
+ * Row of qihealth.patients.
+ * @typedef {Object} PatientsRecord
+ * @property {string} id
+ * @property {string|null} tenant_id
+ * @property {string|null} full_name
+ * @property {string|null} dob
+ * @property {string|null} notes
+ * @property {string|null} created_at
+ */
+
+/**
+ * Row of qihealth.conditions.
+ * @typedef {Object} ConditionsRecord
+ * @property {string} id
+ * @property {string|null} patient_id
+ * @property {string|null} name
+ * @property {string|null} status
+ * @property {string|null} notes
+ * @property {string|null} created_at
+ */
+
+/**
+ * Row of qihealth.medications.
+ * @typedef {Object} MedicationsRecord
+ * @property {string} id
+ * @property {string|null} patient_id
+ * @property {string|null} name
+ * @property {string|null} dose
+ * @property {string|null} frequency
+ * @property {string|null} route
+ * @property {string|null} prescriber
+ * @property {boolean|null} active
+ * @property {number} stock_current
+ * @property {number} stock_threshold
+ * @property {string|null} notes
+ * @property {string|null} created_at
+ */
+
+/**
+ * Row of qihealth.medication_logs.
+ * @typedef {Object} MedicationLogsRecord
+ * @property {string} id
+ * @property {string|null} medication_id
+ * @property {string|null} given_at
+ * @property {string|null} given_by
+ * @property {string|null} status
+ * @property {string|null} notes
+ */
+
+/**
+ * Row of qihealth.vitals.
+ * @typedef {Object} VitalsRecord
+ * @property {string} id
+ * @property {string|null} patient_id
+ * @property {string|null} type
+ * @property {string|null} value
+ * @property {string|null} recorded_at
+ * @property {string|null} notes
+ * @property {number|null} systolic
+ * @property {number|null} diastolic
+ * @property {number|null} hr
+ * @property {number|null} spo2
+ * @property {number|null} glucose
+ */
+
+/**
+ * Row of qihealth.vitals_quarantine.
+ * @typedef {Object} VitalsQuarantineRecord
+ * @property {string} vital_id
+ * @property {string|null} type
+ * @property {string|null} value
+ * @property {string} reason
+ * @property {string} quarantined_at
+ */
+
+/**
+ * Row of qihealth.vitals_rollups.
+ * @typedef {Object} VitalsRollupsRecord
+ * @property {string} patient_id
+ * @property {string} type
+ * @property {string} metric
+ * @property {string} resolution
+ * @property {string} bucket
+ * @property {number} n
+ * @property {number} total
+ * @property {number} min_value
+ * @property {number} max_value
+ */
+
+/**
+ * Row of qihealth.appointments.
+ * @typedef {Object} AppointmentsRecord
+ * @property {string} id
+ * @property {string|null} patient_id
+ * @property {string|null} provider
+ * @property {string|null} location
+ * @property {string|null} appointment_time
+ * @property {string|null} reason
+ * @property {string|null} outcome
+ * @property {string|null} next_steps
+ */
+
+/**
+ * Row of qihealth.tasks.
+ * @typedef {Object} TasksRecord
+ * @property {string} id
+ * @property {string|null} patient_id
+ * @property {string|null} title
+ * @property {string|null} due_at
+ * @property {boolean|null} recurring
+ * @property {string|null} status
+ * @property {string|null} notes
+ */
+
+/**
+ * Row of qihealth.incidents.
+ * @typedef {Object} IncidentsRecord
+ * @property {string} id
+ * @property {string|null} patient_id
+ * @property {string|null} incident_time
+ * @property {string|null} type
+ * @property {string|null} description
+ */
+
+/**
+ * Row of qihealth.care_timeline.
+ * @typedef {Object} CareTimelineRecord
+ * @property {string} id
+ * @property {string|null} patient_id
+ * @property {string} event_type
+ * @property {string} title
+ * @property {string|null} description
+ * @property {number|null} value_numeric
+ * @property {number|null} value_sub
+ * @property {string|null} performed_at
+ * @property {string|null} logged_by
+ */
+
+/**
+ * Row of qihealth.inventory_items.
+ * @typedef {Object} InventoryItemsRecord
+ * @property {string} id
+ * @property {string|null} patient_id
+ * @property {string|null} name
+ * @property {number|null} quantity
+ * @property {number|null} reorder_threshold
+ * @property {string|null} notes
+ */
+
+/**
+ * Row of qihealth.contacts.
+ * @typedef {Object} ContactsRecord
+ * @property {string} id
+ * @property {string|null} name
+ * @property {string|null} role
+ * @property {string|null} phone
+ * @property {string|null} email
+ * @property {string|null} address
+ * @property {string|null} notes
+ */
+
+/**
+ * Row of qihealth.documents.
+ * @typedef {Object} DocumentsRecord
+ * @property {string} id
+ * @property {string|null} patient_id
+ * @property {string|null} title
+ * @property {string|null} category
+ * @property {string|null} drive_file_id
+ * @property {string|null} drive_link
+ * @property {string|null} notes
+ * @property {string|null} uploaded_at
+ */
+
+/**
+ * Row returned by selectPatientId() from patients.
+ * @typedef {Object} PatientIdRow
+ * @property {string} id
+ */
+
+/**
+ * Row returned by selectPatientStatus() from patients.
+ * @typedef {Object} PatientStatusRow
+ * @property {string} id
+ * @property {string|null} full_name
+ * @property {string|null} dob
+ * @property {string|null} notes
+ */
+
+/**
+ * Row returned by selectMedications() from medications.
+ * @typedef {Object} MedicationsRow
+ * @property {string} id
+ * @property {string|null} name
+ * @property {string|null} dosage
+ * @property {string|null} instructions
+ * @property {string|null} schedule_time
+ * @property {number} stock_current
+ * @property {number} stock_threshold
+ * @property {boolean|null} active
+ */
+
+/**
+ * Row returned by selectMedicalHistory() from conditions.
+ * @typedef {Object} MedicalHistoryRow
+ * @property {string} id
+ * @property {string|null} condition_name
+ * @property {string|null} created_at
+ */
+
+/**
+ * Row returned by selectAppointments() from appointments.
+ * @typedef {Object} AppointmentsRow
+ * @property {string} id
+ * @property {string|null} title
+ * @property {string|null} location
+ * @property {string|null} appointment_at
+ * @property {string|null} provider_name
+ */
+
+/**
+ * Row returned by selectTasks() from tasks.
+ * @typedef {Object} TasksRow
+ * @property {string} id
+ * @property {string|null} task_name
+ * @property {string|null} description
+ * @property {string|null} due_at
+ * @property {string|null} status
+ */
+
+/**
+ * Row returned by selectEvents() from incidents.
+ * @typedef {Object} EventsRow
+ * @property {string} id
+ * @property {string|null} event_type
+ * @property {string|null} title
+ * @property {string|null} performed_at
+ */
+
+/**
+ * Row returned by selectVitals() from vitals.
+ * @typedef {Object} VitalsRow
+ * @property {string|null} value
+ * @property {number|null} systolic
+ * @property {number|null} diastolic
+ * @property {string|null} recorded_at
+ * @property {string|null} notes
+ */
+
+export const COLUMNS = {
+  selectPatientId: 'id',
+  selectPatientStatus: 'id,full_name,dob,notes',
+  selectMedications: 'id,name,dosage:dose,instructions:notes,schedule_time:frequency,stock_current,stock_threshold,active',
+  selectMedicalHistory: 'id,condition_name:name,created_at',
+  selectAppointments: 'id,title:reason,location,appointment_at:appointment_time,provider_name:provider',
+  selectTasks: 'id,task_name:title,description:notes,due_at,status',
+  selectEvents: 'id,event_type:type,title:description,performed_at:incident_time',
+  selectVitals: 'value,systolic,diastolic,recorded_at,notes',
+};
+
+/** Query builder for PatientIdRow rows; chain filters and ordering as with supabase.from(). */
+export const selectPatientId = () => supabase.from('patients').select(COLUMNS.selectPatientId);
+
+/** Query builder for PatientStatusRow rows; chain filters and ordering as with supabase.from(). */
+export const selectPatientStatus = () => supabase.from('patients').select(COLUMNS.selectPatientStatus);
+
+/** Query builder for MedicationsRow rows; chain filters and ordering as with supabase.from(). */
+export const selectMedications = () => supabase.from('medications').select(COLUMNS.selectMedications);
+
+/** Query builder for MedicalHistoryRow rows; chain filters and ordering as with supabase.from(). */
+export const selectMedicalHistory = () => supabase.from('conditions').select(COLUMNS.selectMedicalHistory);
+
+/** Query builder for AppointmentsRow rows; chain filters and ordering as with supabase.from(). */
+export const selectAppointments = () => supabase.from('appointments').select(COLUMNS.selectAppointments);
+
+/** Query builder for TasksRow rows; chain filters and ordering as with supabase.from(). */
+export const selectTasks = () => supabase.from('tasks').select(COLUMNS.selectTasks);
+
+/** Query builder for EventsRow rows; chain filters and ordering as with supabase.from(). */
+export const selectEvents = () => supabase.from('incidents').select(COLUMNS.selectEvents);
+
+/** Query builder for VitalsRow rows; chain filters and ordering as with supabase.from(). */
+export const selectVitals = () => supabase.from('vitals').select(COLUMNS.selectVitals);
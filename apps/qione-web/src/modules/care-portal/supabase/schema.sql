@@ -1,18 +1,25 @@
+-- Generated by gen_data_layer.py from care_schema.py; edit the definition, not this file.
+-- Safe to re-run: tables, added columns and indexes are created only if missing.
+
 -- Create the schema
 CREATE SCHEMA IF NOT EXISTS qihealth;
 
 -- Core table
-create table qihealth.patients (
+
+create table if not exists qihealth.patients (
   id uuid primary key default gen_random_uuid(),
+  tenant_id uuid, -- qione.tenants(id) when the portal runs inside QiOne
   full_name text,
   dob date,
   notes text,
   created_at timestamp default now()
 );
+alter table qihealth.patients add column if not exists tenant_id uuid;
+create index if not exists patients_tenant_id_idx on qihealth.patients (tenant_id);
 
 -- MEDICAL
 
-create table qihealth.conditions (
+create table if not exists qihealth.conditions (
   id uuid primary key default gen_random_uuid(),
   patient_id uuid references qihealth.patients(id) on delete cascade,
   name text,
@@ -20,8 +27,9 @@ create table qihealth.conditions (
   notes text,
   created_at timestamp default now()
 );
+create index if not exists conditions_patient_id_idx on qihealth.conditions (patient_id);
 
-create table qihealth.medications (
+create table if not exists qihealth.medications (
   id uuid primary key default gen_random_uuid(),
   patient_id uuid references qihealth.patients(id) on delete cascade,
   name text,
@@ -30,11 +38,16 @@ create table qihealth.medications (
   route text,
   prescriber text,
   active boolean default true,
+  stock_current int not null default 0,
+  stock_threshold int not null default 5,
   notes text,
   created_at timestamp default now()
 );
+alter table qihealth.medications add column if not exists stock_current int not null default 0;
+alter table qihealth.medications add column if not exists stock_threshold int not null default 5;
+create index if not exists medications_patient_id_idx on qihealth.medications (patient_id);
 
-create table qihealth.medication_logs (
+create table if not exists qihealth.medication_logs (
   id uuid primary key default gen_random_uuid(),
   medication_id uuid references qihealth.medications(id) on delete cascade,
   given_at timestamp,
@@ -42,17 +55,54 @@ create table qihealth.medication_logs (
   status text, -- given / skipped / refused
   notes text
 );
+create index if not exists medication_logs_medication_id_given_at_idx on qihealth.medication_logs (medication_id, given_at desc);
 
-create table qihealth.vitals (
+create table if not exists qihealth.vitals (
   id uuid primary key default gen_random_uuid(),
   patient_id uuid references qihealth.patients(id) on delete cascade,
   type text, -- BP, oxygen, glucose
-  value text,
+  value text, -- as entered; parsed into the typed columns below
   recorded_at timestamp default now(),
-  notes text
+  notes text,
+  systolic numeric(5,1),
+  diastolic numeric(5,1),
+  hr numeric(5,1),
+  spo2 numeric(5,1),
+  glucose numeric(5,1)
 );
+alter table qihealth.vitals add column if not exists systolic numeric(5,1);
+alter table qihealth.vitals add column if not exists diastolic numeric(5,1);
+alter table qihealth.vitals add column if not exists hr numeric(5,1);
+alter table qihealth.vitals add column if not exists spo2 numeric(5,1);
+alter table qihealth.vitals add column if not exists glucose numeric(5,1);
+create index if not exists vitals_patient_id_type_recorded_at_idx on qihealth.vitals (patient_id, type, recorded_at desc);
+create index if not exists vitals_recorded_at_idx on qihealth.vitals (recorded_at);
+create index if not exists vitals_patient_id_systolic_idx on qihealth.vitals (patient_id, systolic);
+create index if not exists vitals_patient_id_spo2_idx on qihealth.vitals (patient_id, spo2);
 
-create table qihealth.appointments (
+create table if not exists qihealth.vitals_quarantine (
+  vital_id uuid primary key references qihealth.vitals(id) on delete cascade,
+  type text,
+  value text,
+  reason text not null, -- empty, unknown type, unparseable, out of range
+  quarantined_at timestamptz not null default now()
+);
+
+create table if not exists qihealth.vitals_rollups (
+  patient_id uuid not null,
+  type text not null,
+  metric text not null, -- systolic, diastolic, hr, spo2, glucose
+  resolution text not null, -- hour, day, week
+  bucket timestamp not null, -- start of the hour, day or week
+  n int not null,
+  total numeric not null,
+  min_value numeric not null,
+  max_value numeric not null,
+  primary key (patient_id, type, metric, resolution, bucket)
+);
+create index if not exists vitals_rollups_resolution_bucket_idx on qihealth.vitals_rollups (resolution, bucket);
+
+create table if not exists qihealth.appointments (
   id uuid primary key default gen_random_uuid(),
   patient_id uuid references qihealth.patients(id) on delete cascade,
   provider text,
@@ -62,10 +112,11 @@ create table qihealth.appointments (
   outcome text,
   next_steps text
 );
+create index if not exists appointments_patient_id_appointment_time_idx on qihealth.appointments (patient_id, appointment_time);
 
 -- OPERATIONS
 
-create table qihealth.tasks (
+create table if not exists qihealth.tasks (
   id uuid primary key default gen_random_uuid(),
   patient_id uuid references qihealth.patients(id) on delete cascade,
   title text,
@@ -74,16 +125,32 @@ create table qihealth.tasks (
   status text default 'pending',
   notes text
 );
+create index if not exists tasks_patient_id_status_idx on qihealth.tasks (patient_id, status);
 
-create table qihealth.incidents (
+create table if not exists qihealth.incidents (
   id uuid primary key default gen_random_uuid(),
   patient_id uuid references qihealth.patients(id),
   incident_time timestamp,
   type text,
   description text
 );
+create index if not exists incidents_patient_id_incident_time_idx on qihealth.incidents (patient_id, incident_time desc);
 
-create table qihealth.inventory_items (
+create table if not exists qihealth.care_timeline (
+  id uuid primary key default gen_random_uuid(),
+  patient_id uuid references qihealth.patients(id) on delete cascade,
+  event_type text not null,
+  title text not null,
+  description text,
+  value_numeric numeric,
+  value_sub numeric,
+  performed_at timestamp default now(),
+  logged_by uuid references auth.users(id)
+);
+create index if not exists care_timeline_patient_id_performed_at_idx on qihealth.care_timeline (patient_id, performed_at desc);
+create index if not exists care_timeline_performed_at_idx on qihealth.care_timeline (performed_at);
+
+create table if not exists qihealth.inventory_items (
   id uuid primary key default gen_random_uuid(),
   patient_id uuid references qihealth.patients(id),
   name text,
@@ -91,10 +158,11 @@ create table qihealth.inventory_items (
   reorder_threshold int,
   notes text
 );
+create index if not exists inventory_items_patient_id_idx on qihealth.inventory_items (patient_id);
 
 -- CONTACTS
 
-create table qihealth.contacts (
+create table if not exists qihealth.contacts (
   id uuid primary key default gen_random_uuid(),
   name text,
   role text, -- doctor, pharmacy, caseworker
@@ -106,7 +174,7 @@ create table qihealth.contacts (
 
 -- DOCUMENT VAULT (Drive bridge)
 
-create table qihealth.documents (
+create table if not exists qihealth.documents (
   id uuid primary key default gen_random_uuid(),
   patient_id uuid references qihealth.patients(id),
   title text,
@@ -116,3 +184,523 @@ create table qihealth.documents (
   notes text,
   uploaded_at timestamp default now()
 );
+create index if not exists documents_patient_id_idx on qihealth.documents (patient_id);
+
+-- Vitals: typed readings and hourly, daily and weekly min/max/avg rollups
+
+-- The numbers in one reading, named by VITAL_METRICS; nothing unless it has
+-- exactly one number per metric and all are in VITAL_RANGES
+create or replace function qihealth.vital_metrics(p_type text, p_value text)
+returns table (metric text, reading numeric) language sql immutable as $$
+  with p as (
+    select case p_type when 'Blood Pressure' then array['systolic', 'diastolic'] when 'Pulse' then array['hr'] when 'Oxygen' then array['spo2'] when 'Glucose' then array['glucose'] end as names,
+           regexp_match(p_value, '^\s*(\d+(?:\.\d+)?)\s*(?:/\s*(\d+(?:\.\d+)?))?\s*(?:%|bpm|mmhg|mg/dl)?\s*$', 'i') as parts
+  ), m as (
+    select x.metric, x.reading::numeric as reading
+      from p, unnest(p.names, p.parts[1:cardinality(p.names)]) as x(metric, reading)
+     where cardinality(array_remove(p.parts, null)) = cardinality(p.names)
+  )
+  select m.metric, m.reading from m
+   where (select bool_and(case metric when 'systolic' then reading between 50 and 300 when 'diastolic' then reading between 20 and 200 when 'hr' then reading between 20 and 300 when 'spo2' then reading between 50 and 100 when 'glucose' then reading between 10 and 1000 else false end) from m)
+$$;
+
+create or replace function qihealth.vitals_parse() returns trigger language plpgsql as $$
+declare
+  parsed record;
+begin
+  new.systolic := null;
+  new.diastolic := null;
+  new.hr := null;
+  new.spo2 := null;
+  new.glucose := null;
+  for parsed in select * from qihealth.vital_metrics(new.type, new.value) loop
+    case parsed.metric
+      when 'systolic' then new.systolic := parsed.reading;
+      when 'diastolic' then new.diastolic := parsed.reading;
+      when 'hr' then new.hr := parsed.reading;
+      when 'spo2' then new.spo2 := parsed.reading;
+      when 'glucose' then new.glucose := parsed.reading;
+      else null;
+    end case;
+  end loop;
+  return new;
+end $$;
+
+drop trigger if exists vitals_parse on qihealth.vitals;
+create trigger vitals_parse before insert or update of type, value on qihealth.vitals
+  for each row execute function qihealth.vitals_parse();
+
+-- Locks one (patient, type, week) of vitals_rollups, or the whole week when
+-- patient or type is null, until the end of the transaction
+create or replace function qihealth.lock_vitals_rollups(p_week timestamp, p_patient uuid default null, p_type text default null)
+returns void language plpgsql as $$
+declare
+  week_key bigint := hashtextextended('vitals_rollups:' || date_trunc('week', p_week)::text, 0);
+begin
+  if p_patient is null or p_type is null then
+    perform pg_advisory_xact_lock(week_key);
+  else
+    perform pg_advisory_xact_lock_shared(week_key);
+    perform pg_advisory_xact_lock(hashtextextended(
+      'vitals_rollups:' || date_trunc('week', p_week)::text || ':' || p_patient::text || ':' || p_type, 0));
+  end if;
+end $$;
+
+create or replace function qihealth.vitals_rollup_insert() returns trigger language plpgsql as $$
+begin
+  if current_setting('qihealth.skip_rollups', true) = 'on' then
+    return null;
+  end if;
+  perform qihealth.lock_vitals_rollups(g.week, g.patient_id, g.type)
+     from (select distinct date_trunc('week', recorded_at) as week, patient_id, type from new_rows
+            where patient_id is not null and type is not null and recorded_at is not null) g
+    order by g.week, g.patient_id, g.type;
+  insert into qihealth.vitals_rollups as r (patient_id, type, metric, resolution, bucket, n, total, min_value, max_value)
+  select v.patient_id, v.type, m.metric, res.resolution, date_trunc(res.resolution, v.recorded_at),
+         count(*), sum(m.reading), min(m.reading), max(m.reading)
+    from new_rows v
+    cross join lateral (values ('systolic', v.systolic), ('diastolic', v.diastolic), ('hr', v.hr), ('spo2', v.spo2), ('glucose', v.glucose)) as m(metric, reading)
+    cross join unnest(array['hour', 'day', 'week']) as res(resolution)
+   where v.patient_id is not null and v.recorded_at is not null and m.reading is not null
+   group by 1, 2, 3, 4, 5
+   order by 1, 2, 3, 4, 5
+  on conflict (patient_id, type, metric, resolution, bucket) do update set
+    n = r.n + excluded.n,
+    total = r.total + excluded.total,
+    min_value = least(r.min_value, excluded.min_value),
+    max_value = greatest(r.max_value, excluded.max_value);
+  return null;
+end $$;
+
+-- Rebuilds every bucket in the weeks overlapping [p_from, p_to] from raw rows,
+-- optionally for one patient and type; returns the rollup rows written.
+-- Ranges that share no week can be rebuilt in parallel (rollup_backfill.py).
+create or replace function qihealth.refresh_vitals_rollups(
+  p_from timestamp, p_to timestamp, p_patient uuid default null, p_type text default null
+) returns bigint language plpgsql as $$
+declare
+  lo timestamp := date_trunc('week', p_from);
+  hi timestamp := date_trunc('week', p_to) + interval '1 week';
+  written bigint;
+begin
+  perform qihealth.lock_vitals_rollups(w, p_patient, p_type)
+     from generate_series(lo, hi - interval '1 week', interval '1 week') as w
+    order by w;
+  delete from qihealth.vitals_rollups
+   where bucket >= lo and bucket < hi
+     and (p_patient is null or patient_id = p_patient) and (p_type is null or type = p_type);
+  insert into qihealth.vitals_rollups (patient_id, type, metric, resolution, bucket, n, total, min_value, max_value)
+  select v.patient_id, v.type, m.metric, res.resolution, date_trunc(res.resolution, v.recorded_at),
+         count(*), sum(m.reading), min(m.reading), max(m.reading)
+    from qihealth.vitals v
+    cross join lateral (values ('systolic', v.systolic), ('diastolic', v.diastolic), ('hr', v.hr), ('spo2', v.spo2), ('glucose', v.glucose)) as m(metric, reading)
+    cross join unnest(array['hour', 'day', 'week']) as res(resolution)
+   where v.recorded_at >= lo and v.recorded_at < hi and v.patient_id is not null and m.reading is not null
+     and (p_patient is null or v.patient_id = p_patient) and (p_type is null or v.type = p_type)
+   group by 1, 2, 3, 4, 5;
+  get diagnostics written = row_count;
+  return written;
+end $$;
+
+create or replace function qihealth.vitals_rollup_change() returns trigger language plpgsql as $$
+declare
+  touched record;
+begin
+  if current_setting('qihealth.skip_rollups', true) = 'on' then
+    return null;
+  end if;
+  if tg_op = 'UPDATE' then
+    for touched in
+      select patient_id, type, date_trunc('week', recorded_at) as week from old_rows
+       where patient_id is not null and type is not null and recorded_at is not null
+      union
+      select patient_id, type, date_trunc('week', recorded_at) from new_rows
+       where patient_id is not null and type is not null and recorded_at is not null
+      order by 3, 1, 2
+    loop
+      perform qihealth.refresh_vitals_rollups(touched.week, touched.week, touched.patient_id, touched.type);
+    end loop;
+  else
+    for touched in
+      select distinct patient_id, type, date_trunc('week', recorded_at) as week from old_rows
+       where patient_id is not null and type is not null and recorded_at is not null
+       order by 3, 1, 2
+    loop
+      perform qihealth.refresh_vitals_rollups(touched.week, touched.week, touched.patient_id, touched.type);
+    end loop;
+  end if;
+  return null;
+end $$;
+
+drop trigger if exists vitals_rollup_insert on qihealth.vitals;
+create trigger vitals_rollup_insert after insert on qihealth.vitals
+  referencing new table as new_rows for each statement execute function qihealth.vitals_rollup_insert();
+drop trigger if exists vitals_rollup_update on qihealth.vitals;
+create trigger vitals_rollup_update after update on qihealth.vitals
+  referencing old table as old_rows new table as new_rows
+  for each statement execute function qihealth.vitals_rollup_change();
+drop trigger if exists vitals_rollup_delete on qihealth.vitals;
+create trigger vitals_rollup_delete after delete on qihealth.vitals
+  referencing old table as old_rows for each statement execute function qihealth.vitals_rollup_change();
+
+-- One patient's series of one vital type over [p_from, p_to), at the finest
+-- resolution that fits in max_points buckets.
+create or replace function qihealth.vitals_series(
+  p_patient uuid, p_type text, p_from timestamp, p_to timestamp default now(), max_points int default 400
+) returns table (
+  resolution text, bucket timestamp, metric text, n int, avg_value numeric, min_value numeric, max_value numeric
+) language sql stable as $$
+  with pick as (
+    select coalesce(
+      (select u.r from unnest(array['hour', 'day', 'week']) with ordinality as u(r, i)
+        where extract(epoch from p_to - p_from) / extract(epoch from ('1 ' || u.r)::interval) <= max_points
+        order by u.i limit 1),
+      'week') as r
+  )
+  select pick.r, v.bucket, v.metric, v.n, round(v.total / v.n, 1), v.min_value, v.max_value
+    from pick join qihealth.vitals_rollups v on v.resolution = pick.r
+   where v.patient_id = p_patient and v.type = p_type
+     and v.bucket >= date_trunc(pick.r, p_from) and v.bucket < p_to
+   order by v.bucket, v.metric
+$$;
+
+-- Delta sync: row versions, tombstones and sync_changes(cursors)
+
+create or replace function qihealth.sync_txid() returns bigint language sql volatile as $$
+  select pg_current_xact_id()::text::bigint
+$$;
+
+-- Versions below this are final: no running transaction can still write one
+create or replace function qihealth.sync_watermark() returns bigint language sql stable as $$
+  select pg_snapshot_xmin(pg_current_snapshot())::text::bigint
+$$;
+
+create or replace function qihealth.sync_touch() returns trigger language plpgsql as $$
+begin
+  new.version := qihealth.sync_txid();
+  new.updated_at := now();
+  return new;
+end $$;
+
+create table if not exists qihealth.sync_tombstones (
+  table_name text not null,
+  row_id text not null,
+  version bigint not null default qihealth.sync_txid(),
+  deleted_at timestamptz not null default now()
+);
+create index if not exists sync_tombstones_table_name_version_idx on qihealth.sync_tombstones (table_name, version);
+create index if not exists sync_tombstones_deleted_at_idx on qihealth.sync_tombstones (deleted_at);
+
+create or replace function qihealth.sync_tombstone() returns trigger language plpgsql as $$
+begin
+  insert into qihealth.sync_tombstones (table_name, row_id) values (tg_table_name, old.id::text);
+  return old;
+end $$;
+
+-- Cursors below horizon may have missed purged tombstones and must reset
+create table if not exists qihealth.sync_horizon (
+  id int primary key default 1 check (id = 1),
+  version bigint not null default 0
+);
+insert into qihealth.sync_horizon (id) values (1) on conflict do nothing;
+
+create or replace function qihealth.purge_sync_tombstones(keep interval default interval '30 days')
+returns bigint language plpgsql as $$
+declare
+  purged bigint;
+begin
+  with gone as (delete from qihealth.sync_tombstones where deleted_at < now() - keep returning version)
+  select max(version) into purged from gone;
+  if purged is not null then
+    update qihealth.sync_horizon set version = greatest(version, purged + 1);
+  end if;
+  return purged;
+end $$;
+
+alter table qihealth.medications add column if not exists updated_at timestamptz not null default now();
+alter table qihealth.medications add column if not exists version bigint not null default qihealth.sync_txid();
+create index if not exists medications_version_idx on qihealth.medications (version, (id::text));
+drop trigger if exists medications_sync_touch on qihealth.medications;
+create trigger medications_sync_touch before insert or update on qihealth.medications
+  for each row execute function qihealth.sync_touch();
+drop trigger if exists medications_sync_tombstone on qihealth.medications;
+create trigger medications_sync_tombstone after delete on qihealth.medications
+  for each row execute function qihealth.sync_tombstone();
+
+alter table qihealth.patients add column if not exists updated_at timestamptz not null default now();
+alter table qihealth.patients add column if not exists version bigint not null default qihealth.sync_txid();
+create index if not exists patients_version_idx on qihealth.patients (version, (id::text));
+drop trigger if exists patients_sync_touch on qihealth.patients;
+create trigger patients_sync_touch before insert or update on qihealth.patients
+  for each row execute function qihealth.sync_touch();
+drop trigger if exists patients_sync_tombstone on qihealth.patients;
+create trigger patients_sync_tombstone after delete on qihealth.patients
+  for each row execute function qihealth.sync_tombstone();
+
+alter table qihealth.conditions add column if not exists updated_at timestamptz not null default now();
+alter table qihealth.conditions add column if not exists version bigint not null default qihealth.sync_txid();
+create index if not exists conditions_version_idx on qihealth.conditions (version, (id::text));
+drop trigger if exists conditions_sync_touch on qihealth.conditions;
+create trigger conditions_sync_touch before insert or update on qihealth.conditions
+  for each row execute function qihealth.sync_touch();
+drop trigger if exists conditions_sync_tombstone on qihealth.conditions;
+create trigger conditions_sync_tombstone after delete on qihealth.conditions
+  for each row execute function qihealth.sync_tombstone();
+
+alter table qihealth.appointments add column if not exists updated_at timestamptz not null default now();
+alter table qihealth.appointments add column if not exists version bigint not null default qihealth.sync_txid();
+create index if not exists appointments_version_idx on qihealth.appointments (version, (id::text));
+drop trigger if exists appointments_sync_touch on qihealth.appointments;
+create trigger appointments_sync_touch before insert or update on qihealth.appointments
+  for each row execute function qihealth.sync_touch();
+drop trigger if exists appointments_sync_tombstone on qihealth.appointments;
+create trigger appointments_sync_tombstone after delete on qihealth.appointments
+  for each row execute function qihealth.sync_tombstone();
+
+alter table qihealth.tasks add column if not exists updated_at timestamptz not null default now();
+alter table qihealth.tasks add column if not exists version bigint not null default qihealth.sync_txid();
+create index if not exists tasks_version_idx on qihealth.tasks (version, (id::text));
+drop trigger if exists tasks_sync_touch on qihealth.tasks;
+create trigger tasks_sync_touch before insert or update on qihealth.tasks
+  for each row execute function qihealth.sync_touch();
+drop trigger if exists tasks_sync_tombstone on qihealth.tasks;
+create trigger tasks_sync_tombstone after delete on qihealth.tasks
+  for each row execute function qihealth.sync_tombstone();
+
+alter table qihealth.incidents add column if not exists updated_at timestamptz not null default now();
+alter table qihealth.incidents add column if not exists version bigint not null default qihealth.sync_txid();
+create index if not exists incidents_version_idx on qihealth.incidents (version, (id::text));
+drop trigger if exists incidents_sync_touch on qihealth.incidents;
+create trigger incidents_sync_touch before insert or update on qihealth.incidents
+  for each row execute function qihealth.sync_touch();
+drop trigger if exists incidents_sync_tombstone on qihealth.incidents;
+create trigger incidents_sync_tombstone after delete on qihealth.incidents
+  for each row execute function qihealth.sync_tombstone();
+
+-- cursors: {key: cursor} from the previous response (omit a key for a full load).
+-- Returns {watermark, key: {rows, deleted, cursor, has_more, reset}}; call again
+-- with the new cursors while any has_more is true.
+create or replace function qihealth.sync_changes(cursors jsonb default '{}', page_limit int default 1000)
+returns jsonb language plpgsql stable as $$
+declare
+  watermark bigint := qihealth.sync_watermark();
+  horizon bigint := (select version from qihealth.sync_horizon where id = 1);
+  result jsonb := jsonb_build_object('watermark', watermark);
+  cur text;
+  is_reset boolean;
+  after_v bigint;
+  after_k text;
+  page_rows jsonb;
+  deleted jsonb;
+  has_more boolean;
+  last_v bigint;
+  last_k text;
+begin
+  horizon := coalesce(horizon, 0);
+
+  -- meds: qihealth.medications
+  cur := cursors ->> 'meds';
+  is_reset := case when cur is null or cur !~ '^[0-9]{1,18}(:|$)' then true
+                   else split_part(cur, ':', 1)::bigint < horizon end;
+  after_v := case when is_reset then 0 else split_part(cur, ':', 1)::bigint end;
+  after_k := case when is_reset or strpos(cur, ':') = 0 then '' else substr(cur, strpos(cur, ':') + 1) end;
+  select coalesce(jsonb_agg(p.r order by p.n) filter (where p.n <= page_limit), '[]'::jsonb),
+         count(*) > page_limit,
+         max(p.version) filter (where p.n = page_limit),
+         max(p.k) filter (where p.n = page_limit)
+    into page_rows, has_more, last_v, last_k
+    from (
+      select q.*, row_number() over (order by q.version, q.k) as n
+        from (
+          select t.version, t.id::text as k, jsonb_build_object('id', t.id, 'name', t.name, 'dosage', t.dose, 'instructions', t.notes, 'schedule_time', t.frequency, 'stock_current', t.stock_current, 'stock_threshold', t.stock_threshold, 'active', t.active, 'version', t.version) as r
+            from qihealth.medications t
+           where (t.version, t.id::text) > (after_v, after_k) and t.version < watermark
+           order by t.version, t.id::text
+           limit page_limit + 1
+        ) q
+    ) p;
+  if is_reset then
+    deleted := '[]'::jsonb;
+  else
+    select coalesce(jsonb_agg(d.row_id), '[]'::jsonb) into deleted
+      from qihealth.sync_tombstones d
+     where d.table_name = 'medications' and d.version >= after_v
+       and d.version < case when has_more then last_v else watermark end;
+  end if;
+  result := result || jsonb_build_object('meds', jsonb_build_object(
+    'rows', page_rows, 'deleted', deleted, 'reset', is_reset, 'has_more', has_more,
+    'cursor', case when has_more then last_v::text || ':' || last_k else watermark::text end));
+
+  -- patientStatus: qihealth.patients
+  cur := cursors ->> 'patientStatus';
+  is_reset := case when cur is null or cur !~ '^[0-9]{1,18}(:|$)' then true
+                   else split_part(cur, ':', 1)::bigint < horizon end;
+  after_v := case when is_reset then 0 else split_part(cur, ':', 1)::bigint end;
+  after_k := case when is_reset or strpos(cur, ':') = 0 then '' else substr(cur, strpos(cur, ':') + 1) end;
+  select coalesce(jsonb_agg(p.r order by p.n) filter (where p.n <= page_limit), '[]'::jsonb),
+         count(*) > page_limit,
+         max(p.version) filter (where p.n = page_limit),
+         max(p.k) filter (where p.n = page_limit)
+    into page_rows, has_more, last_v, last_k
+    from (
+      select q.*, row_number() over (order by q.version, q.k) as n
+        from (
+          select t.version, t.id::text as k, jsonb_build_object('id', t.id, 'full_name', t.full_name, 'dob', t.dob, 'notes', t.notes, 'version', t.version) as r
+            from qihealth.patients t
+           where (t.version, t.id::text) > (after_v, after_k) and t.version < watermark
+           order by t.version, t.id::text
+           limit page_limit + 1
+        ) q
+    ) p;
+  if is_reset then
+    deleted := '[]'::jsonb;
+  else
+    select coalesce(jsonb_agg(d.row_id), '[]'::jsonb) into deleted
+      from qihealth.sync_tombstones d
+     where d.table_name = 'patients' and d.version >= after_v
+       and d.version < case when has_more then last_v else watermark end;
+  end if;
+  result := result || jsonb_build_object('patientStatus', jsonb_build_object(
+    'rows', page_rows, 'deleted', deleted, 'reset', is_reset, 'has_more', has_more,
+    'cursor', case when has_more then last_v::text || ':' || last_k else watermark::text end));
+
+  -- medicalHistory: qihealth.conditions
+  cur := cursors ->> 'medicalHistory';
+  is_reset := case when cur is null or cur !~ '^[0-9]{1,18}(:|$)' then true
+                   else split_part(cur, ':', 1)::bigint < horizon end;
+  after_v := case when is_reset then 0 else split_part(cur, ':', 1)::bigint end;
+  after_k := case when is_reset or strpos(cur, ':') = 0 then '' else substr(cur, strpos(cur, ':') + 1) end;
+  select coalesce(jsonb_agg(p.r order by p.n) filter (where p.n <= page_limit), '[]'::jsonb),
+         count(*) > page_limit,
+         max(p.version) filter (where p.n = page_limit),
+         max(p.k) filter (where p.n = page_limit)
+    into page_rows, has_more, last_v, last_k
+    from (
+      select q.*, row_number() over (order by q.version, q.k) as n
+        from (
+          select t.version, t.id::text as k, jsonb_build_object('id', t.id, 'condition_name', t.name, 'created_at', t.created_at, 'version', t.version) as r
+            from qihealth.conditions t
+           where (t.version, t.id::text) > (after_v, after_k) and t.version < watermark
+           order by t.version, t.id::text
+           limit page_limit + 1
+        ) q
+    ) p;
+  if is_reset then
+    deleted := '[]'::jsonb;
+  else
+    select coalesce(jsonb_agg(d.row_id), '[]'::jsonb) into deleted
+      from qihealth.sync_tombstones d
+     where d.table_name = 'conditions' and d.version >= after_v
+       and d.version < case when has_more then last_v else watermark end;
+  end if;
+  result := result || jsonb_build_object('medicalHistory', jsonb_build_object(
+    'rows', page_rows, 'deleted', deleted, 'reset', is_reset, 'has_more', has_more,
+    'cursor', case when has_more then last_v::text || ':' || last_k else watermark::text end));
+
+  -- appointments: qihealth.appointments
+  cur := cursors ->> 'appointments';
+  is_reset := case when cur is null or cur !~ '^[0-9]{1,18}(:|$)' then true
+                   else split_part(cur, ':', 1)::bigint < horizon end;
+  after_v := case when is_reset then 0 else split_part(cur, ':', 1)::bigint end;
+  after_k := case when is_reset or strpos(cur, ':') = 0 then '' else substr(cur, strpos(cur, ':') + 1) end;
+  select coalesce(jsonb_agg(p.r order by p.n) filter (where p.n <= page_limit), '[]'::jsonb),
+         count(*) > page_limit,
+         max(p.version) filter (where p.n = page_limit),
+         max(p.k) filter (where p.n = page_limit)
+    into page_rows, has_more, last_v, last_k
+    from (
+      select q.*, row_number() over (order by q.version, q.k) as n
+        from (
+          select t.version, t.id::text as k, jsonb_build_object('id', t.id, 'title', t.reason, 'location', t.location, 'appointment_at', t.appointment_time, 'provider_name', t.provider, 'version', t.version) as r
+            from qihealth.appointments t
+           where (t.version, t.id::text) > (after_v, after_k) and t.version < watermark
+           order by t.version, t.id::text
+           limit page_limit + 1
+        ) q
+    ) p;
+  if is_reset then
+    deleted := '[]'::jsonb;
+  else
+    select coalesce(jsonb_agg(d.row_id), '[]'::jsonb) into deleted
+      from qihealth.sync_tombstones d
+     where d.table_name = 'appointments' and d.version >= after_v
+       and d.version < case when has_more then last_v else watermark end;
+  end if;
+  result := result || jsonb_build_object('appointments', jsonb_build_object(
+    'rows', page_rows, 'deleted', deleted, 'reset', is_reset, 'has_more', has_more,
+    'cursor', case when has_more then last_v::text || ':' || last_k else watermark::text end));
+
+  -- tasks: qihealth.tasks
+  cur := cursors ->> 'tasks';
+  is_reset := case when cur is null or cur !~ '^[0-9]{1,18}(:|$)' then true
+                   else split_part(cur, ':', 1)::bigint < horizon end;
+  after_v := case when is_reset then 0 else split_part(cur, ':', 1)::bigint end;
+  after_k := case when is_reset or strpos(cur, ':') = 0 then '' else substr(cur, strpos(cur, ':') + 1) end;
+  select coalesce(jsonb_agg(p.r order by p.n) filter (where p.n <= page_limit), '[]'::jsonb),
+         count(*) > page_limit,
+         max(p.version) filter (where p.n = page_limit),
+         max(p.k) filter (where p.n = page_limit)
+    into page_rows, has_more, last_v, last_k
+    from (
+      select q.*, row_number() over (order by q.version, q.k) as n
+        from (
+          select t.version, t.id::text as k, jsonb_build_object('id', t.id, 'task_name', t.title, 'description', t.notes, 'due_at', t.due_at, 'status', t.status, 'version', t.version) as r
+            from qihealth.tasks t
+           where (t.version, t.id::text) > (after_v, after_k) and t.version < watermark
+           order by t.version, t.id::text
+           limit page_limit + 1
+        ) q
+    ) p;
+  if is_reset then
+    deleted := '[]'::jsonb;
+  else
+    select coalesce(jsonb_agg(d.row_id), '[]'::jsonb) into deleted
+      from qihealth.sync_tombstones d
+     where d.table_name = 'tasks' and d.version >= after_v
+       and d.version < case when has_more then last_v else watermark end;
+  end if;
+  result := result || jsonb_build_object('tasks', jsonb_build_object(
+    'rows', page_rows, 'deleted', deleted, 'reset', is_reset, 'has_more', has_more,
+    'cursor', case when has_more then last_v::text || ':' || last_k else watermark::text end));
+
+  -- events: qihealth.incidents
+  cur := cursors ->> 'events';
+  is_reset := case when cur is null or cur !~ '^[0-9]{1,18}(:|$)' then true
+                   else split_part(cur, ':', 1)::bigint < horizon end;
+  after_v := case when is_reset then 0 else split_part(cur, ':', 1)::bigint end;
+  after_k := case when is_reset or strpos(cur, ':') = 0 then '' else substr(cur, strpos(cur, ':') + 1) end;
+  if is_reset then
+    -- First sync: only the newest rows; older ones are never backfilled
+    select coalesce(jsonb_agg(p.r), '[]'::jsonb), false into page_rows, has_more
+      from (select jsonb_build_object('id', t.id, 'event_type', t.type, 'title', t.description, 'performed_at', t.incident_time, 'version', t.version) as r from qihealth.incidents t order by t.incident_time desc nulls last limit 50) p;
+  else
+    select coalesce(jsonb_agg(p.r order by p.n) filter (where p.n <= page_limit), '[]'::jsonb),
+           count(*) > page_limit,
+           max(p.version) filter (where p.n = page_limit),
+           max(p.k) filter (where p.n = page_limit)
+      into page_rows, has_more, last_v, last_k
+      from (
+        select q.*, row_number() over (order by q.version, q.k) as n
+          from (
+            select t.version, t.id::text as k, jsonb_build_object('id', t.id, 'event_type', t.type, 'title', t.description, 'performed_at', t.incident_time, 'version', t.version) as r
+              from qihealth.incidents t
+             where (t.version, t.id::text) > (after_v, after_k) and t.version < watermark
+             order by t.version, t.id::text
+             limit page_limit + 1
+          ) q
+      ) p;
+  end if;
+  if is_reset then
+    deleted := '[]'::jsonb;
+  else
+    select coalesce(jsonb_agg(d.row_id), '[]'::jsonb) into deleted
+      from qihealth.sync_tombstones d
+     where d.table_name = 'incidents' and d.version >= after_v
+       and d.version < case when has_more then last_v else watermark end;
+  end if;
+  result := result || jsonb_build_object('events', jsonb_build_object(
+    'rows', page_rows, 'deleted', deleted, 'reset', is_reset, 'has_more', has_more,
+    'cursor', case when has_more then last_v::text || ':' || last_k else watermark::text end));
+
+  return result;
+end $$;
@@ -0,0 +1,146 @@
+# Reference client for the delta sync protocol (sync_changes in
+# supabase/schema.sql and server/sync.sql, generated by gen_data_layer.py).
+#
+#   python sync_client.py --url http://localhost:3000 --state .cache/sync-state.json
+#   python sync_client.py --dsn postgresql://localhost/care
+#
+# The client keeps every synced row by table key and id plus one cursor per
+# table, sends the cursors, and applies what comes back: a `reset` table is
+# replaced, `deleted` ids are dropped, `rows` are upserted. It asks again while
+# any table reports `has_more`. This is the same loop as db.sync() in
+# src/lib/db.js; the benchmark (benchmarks/bench_sync.py) drives it to measure
+# bytes and milliseconds per sync.
+import argparse
+import json
+import os
+import sys
+import time
+import urllib.request
+
+import care_schema
+
+
+class HttpTransport:
+    # POST /api/sync on the Railway API (server/index.js)
+    def __init__(self, url, timeout=60):
+        self.url = url.rstrip("/") + "/api/sync"
+        self.timeout = timeout
+
+    def fetch(self, cursors, page_limit):
+        body = json.dumps({"cursors": cursors, "limit": page_limit}).encode("utf-8")
+        request = urllib.request.Request(self.url, data=body, headers={"Content-Type": "application/json"})
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            return response.read()
+
+    def close(self):
+        pass
+
+
+class PgTransport:
+    # Calls <schema>.sync_changes directly; needs psycopg (3) or psycopg2
+    def __init__(self, dsn, schema=care_schema.SCHEMA):
+        try:
+            import psycopg
+        except ImportError:
+            try:
+                import psycopg2 as psycopg
+            except ImportError:
+                raise SystemExit("--dsn needs psycopg or psycopg2") from None
+        self.conn = psycopg.connect(dsn)
+        self.conn.autocommit = True
+        self.sql = f"select {schema}.sync_changes(%s::jsonb, %s)::text"
+
+    def fetch(self, cursors, page_limit):
+        with self.conn.cursor() as cur:
+            cur.execute(self.sql, (json.dumps(cursors), page_limit))
+            return cur.fetchone()[0].encode("utf-8")
+
+    def close(self):
+        self.conn.close()
+
+
+class SyncClient:
+    def __init__(self, transport, page_limit=1000, state=None):
+        self.transport = transport
+        self.page_limit = page_limit
+        self.cursors = {}
+        self.tables = {}
+        if state:
+            self.cursors = dict(state.get("cursors", {}))
+            self.tables = {key: dict(rows) for key, rows in state.get("tables", {}).items()}
+
+    def apply(self, changes):
+        # Returns True while some table has another page
+        more = False
+        for key, change in changes.items():
+            if key == "watermark":
+                continue
+            rows = {} if change["reset"] else self.tables.get(key, {})
+            for row_id in change["deleted"]:
+                rows.pop(str(row_id), None)
+            for row in change["rows"]:
+                rows[str(row["id"])] = row
+            self.tables[key] = rows
+            self.cursors[key] = change["cursor"]
+            more = more or change["has_more"]
+        return more
+
+    def sync(self):
+        # One full sync; returns {pages, bytes, ms, rows, deleted, reset}
+        stats = {"pages": 0, "bytes": 0, "ms": 0.0, "rows": 0, "deleted": 0, "reset": []}
+        start = time.perf_counter()
+        more = True
+        while more:
+            payload = self.transport.fetch(self.cursors, self.page_limit)
+            changes = json.loads(payload)
+            if "error" in changes:
+                raise RuntimeError(changes["error"])
+            stats["pages"] += 1
+            stats["bytes"] += len(payload)
+            for key, change in changes.items():
+                if key != "watermark":
+                    stats["rows"] += len(change["rows"])
+                    stats["deleted"] += len(change["deleted"])
+                    if change["reset"] and key not in stats["reset"]:
+                        stats["reset"].append(key)
+            more = self.apply(changes)
+        stats["ms"] = round((time.perf_counter() - start) * 1000, 3)
+        return stats
+
+    def state(self):
+        return {"cursors": self.cursors, "tables": self.tables}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run one delta sync and print what it transferred.")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--url", help="Railway API base URL (POST /api/sync)")
+    source.add_argument("--dsn", help="Postgres DSN; calls sync_changes directly")
+    parser.add_argument("--schema", default=care_schema.SCHEMA, help="schema holding sync_changes (with --dsn)")
+    parser.add_argument("--state", help="JSON file with the rows and cursors of the previous sync; updated in place")
+    parser.add_argument("--page-limit", type=int, default=1000)
+    args = parser.parse_args(argv)
+
+    state = None
+    if args.state and os.path.exists(args.state):
+        with open(args.state, "r", encoding="utf-8") as f:
+            state = json.load(f)
+
+    transport = HttpTransport(args.url) if args.url else PgTransport(args.dsn, args.schema)
+    try:
+        client = SyncClient(transport, args.page_limit, state)
+        stats = client.sync()
+    finally:
+        transport.close()
+
+    if args.state:
+        os.makedirs(os.path.dirname(os.path.abspath(args.state)), exist_ok=True)
+        with open(args.state, "w", encoding="utf-8") as f:
+            json.dump(client.state(), f, separators=(",", ":"))
+    stats["tables"] = {key: len(rows) for key, rows in sorted(client.tables.items())}
+    print(json.dumps(stats, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,201 @@
+# Minimal compiled template engine for the scaffolder.
+#
+# Placeholders look like {{ name|type }}. The type picks the escaping for the
+# context the value lands in, so a tenant name can never break out of a JSON
+# string or inject markup. Anything else - including JSX's own `{{ ... }}` -
+# is literal text.
+#
+# Each template is parsed once and compiled into a render function that does a
+# single "".join over precomputed literal chunks; compiled functions are cached
+# by the SHA-1 of the template source. Template sources live as *.tmpl files and
+# are loaded on demand through TemplateRegistry.
+import hashlib
+import html
+import json
+import os
+import re
+from collections.abc import Mapping
+
+PLACEHOLDER = re.compile(r"\{\{\s*([A-Za-z_][A-Za-z0-9_]*)\s*\|\s*([a-z]+)\s*\}\}")
+
+
+def _require_str(kind, value):
+    if not isinstance(value, str):
+        raise TypeError(f"{kind} placeholder expects str, got {type(value).__name__}")
+    return value
+
+
+def _raw(value):
+    return _require_str("raw", value)
+
+
+def _html(value):
+    return html.escape(_require_str("html", value), quote=False)
+
+
+def _attr(value):
+    return html.escape(_require_str("attr", value), quote=True)
+
+
+def _jsx(value):
+    # JSX text accepts HTML entities, but braces would open an expression
+    return _html(value).replace("{", "&#123;").replace("}", "&#125;")
+
+
+def _json(value):
+    # Any JSON value; a str renders as a double-quoted literal valid in JSON and JS
+    return json.dumps(value)
+
+
+FILTERS = {
+    "raw": _raw,
+    "html": _html,
+    "attr": _attr,
+    "jsx": _jsx,
+    "json": _json,
+}
+
+_compiled = {}
+
+
+def template_digest(source):
+    return hashlib.sha1(source.encode("utf-8")).hexdigest()
+
+
+def parse_template(source):
+    # Returns a list of str literals and (name, type) placeholder tuples
+    parts = []
+    pos = 0
+    for m in PLACEHOLDER.finditer(source):
+        name, kind = m.group(1), m.group(2)
+        if kind not in FILTERS:
+            raise ValueError(f"Unknown placeholder type {kind!r} in {{{{ {name}|{kind} }}}}")
+        if m.start() > pos:
+            parts.append(source[pos:m.start()])
+        parts.append((name, kind))
+        pos = m.end()
+    if pos < len(source):
+        parts.append(source[pos:])
+    return parts
+
+
+def compile_template(source):
+    digest = template_digest(source)
+    render = _compiled.get(digest)
+    if render is not None:
+        return render
+
+    parts = parse_template(source)
+    namespace = {}
+    exprs = []
+    fields = []
+    for i, part in enumerate(parts):
+        if isinstance(part, str):
+            namespace[f"_l{i}"] = part
+            exprs.append(f"_l{i}")
+        else:
+            name, kind = part
+            namespace[f"_f{i}"] = FILTERS[kind]
+            exprs.append(f"_f{i}(ctx[{name!r}])")
+            fields.append(part)
+
+    if not fields:
+        # Constant template: nothing to substitute, return the source as-is
+        def render(ctx=None):
+            return source
+    else:
+        code = "def render(ctx):\n    return ''.join((" + ", ".join(exprs) + ",))\n"
+        exec(compile(code, f"<template {digest[:12]}>", "exec"), namespace)
+        render = namespace["render"]
+
+    render.digest = digest
+    render.fields = tuple(fields)
+    _compiled[digest] = render
+    return render
+
+
+def render_template(source, context):
+    return compile_template(source)(context)
+
+
+# =========
+# Lazy template registry
+# =========
+
+TEMPLATE_SUFFIX = ".tmpl"
+
+
+class TemplateRegistry(Mapping):
+    # Read-only {relative path: template source} mapping over a directory or a
+    # .zip of *.tmpl files. Construction is free; the listing is read on first
+    # use and each template is read, decoded and compiled only when first asked for.
+
+    def __init__(self, source):
+        self.source = source
+        self._names = None
+        self._sources = {}
+        self._compiled = {}
+        self._encoded = {}
+        self._zip = None
+
+    def _list(self):
+        if self._names is not None:
+            return self._names
+
+        if os.path.isdir(self.source):
+            names = []
+            for root, _, filenames in os.walk(self.source):
+                for filename in filenames:
+                    if filename.endswith(TEMPLATE_SUFFIX):
+                        rel = os.path.relpath(os.path.join(root, filename), self.source)
+                        names.append(rel.replace(os.sep, "/")[:-len(TEMPLATE_SUFFIX)])
+            self._paths = {name: name + TEMPLATE_SUFFIX for name in names}
+        else:
+            import zipfile
+
+            self._zip = zipfile.ZipFile(self.source)
+            entries = [e for e in self._zip.namelist() if e.endswith(TEMPLATE_SUFFIX)]
+            # Accept archives built from inside or from above the templates/ directory
+            prefix = "templates/" if entries and all(e.startswith("templates/") for e in entries) else ""
+            self._paths = {e[len(prefix):-len(TEMPLATE_SUFFIX)]: e for e in entries}
+            names = list(self._paths)
+
+        self._names = sorted(names)
+        return self._names
+
+    def __iter__(self):
+        return iter(self._list())
+
+    def __len__(self):
+        return len(self._list())
+
+    def __contains__(self, name):
+        return name in self._list()
+
+    def __getitem__(self, name):
+        text = self._sources.get(name)
+        if text is not None:
+            return text
+        if name not in self._list():
+            raise KeyError(name)
+
+        if self._zip is not None:
+            data = self._zip.read(self._paths[name])
+        else:
+            with open(os.path.join(self.source, self._paths[name]), "rb") as f:
+                data = f.read()
+        text = self._sources[name] = data.decode("utf-8")
+        return text
+
+    def compiled(self, name):
+        render = self._compiled.get(name)
+        if render is None:
+            render = self._compiled[name] = compile_template(self[name])
+        return render
+
+    def encoded(self, name):
+        # Stripped UTF-8 bytes of a placeholder-free template, cached for reuse across tenants
+        data = self._encoded.get(name)
+        if data is None:
+            data = self._encoded[name] = self[name].strip().encode("utf-8")
+        return data
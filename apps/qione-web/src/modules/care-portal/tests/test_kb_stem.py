@@ -0,0 +1,62 @@
+# stem() in build_kb_index.py and src/lib/kbSearch.js must agree word for word.
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+
+import pytest
+
+HERE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, HERE)
+
+from build_kb_index import STEM_PAIRS, stem  # noqa: E402
+
+KB_SEARCH_JS = os.path.join(HERE, "src", "lib", "kbSearch.js")
+
+
+def kb_words():
+    # Every word in the KB pages, plus the pairs and a few edge cases
+    words = {w for pair in STEM_PAIRS for w in pair}
+    words.update(["", "a", "use", "ease", "eyes", "bus", "this", "glasses", "watches", "ties", "ring", "bed", "x1"])
+    for root, _, filenames in os.walk(os.path.join(HERE, "public", "kb")):
+        for filename in filenames:
+            if filename.endswith((".html", ".md", ".txt")):
+                with open(os.path.join(root, filename), "r", encoding="utf-8", errors="replace") as f:
+                    words.update(re.findall(r"[a-z]+", f.read().lower()))
+    return sorted(words)
+
+
+@pytest.mark.parametrize("a, b", STEM_PAIRS)
+def test_pairs_share_a_stem(a, b):
+    assert stem(a) == stem(b)
+
+
+def test_short_and_non_alpha_words_are_kept():
+    assert stem("use") == "use"
+    assert stem("x1") == "x1"
+
+
+@pytest.mark.skipif(shutil.which("node") is None, reason="needs node")
+def test_js_stem_matches_python(tmp_path):
+    words = kb_words()
+    # kbSearch.js is an ES module; a .mjs copy imports without a package.json
+    module = tmp_path / "kbSearch.mjs"
+    shutil.copyfile(KB_SEARCH_JS, module)
+    script = (
+        f"import {{ stem }} from {json.dumps(module.as_uri())};\n"
+        "let data = '';\n"
+        "process.stdin.on('data', c => data += c);\n"
+        "process.stdin.on('end', () => console.log(JSON.stringify(JSON.parse(data).map(stem))));\n"
+    )
+    out = subprocess.run(
+        ["node", "--input-type=module", "-e", script],
+        input=json.dumps(words),
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    js = json.loads(out.stdout)
+    mismatches = [(w, stem(w), s) for w, s in zip(words, js) if stem(w) != s]
+    assert not mismatches, mismatches[:20]
@@ -0,0 +1,77 @@
+# Scaffold manifest: incremental skips and stale files (scaffold_backends.py).
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scaffold_backends import MANIFEST_NAME, load_manifest, write_tree  # noqa: E402
+
+
+@pytest.fixture
+def project(tmp_path):
+    return str(tmp_path / "portal")
+
+
+def read(project, path):
+    with open(os.path.join(project, path), "rb") as f:
+        return f.read()
+
+
+def test_incremental_run_skips_unchanged_files(project):
+    tree = {"a.txt": "a", "src/b.txt": "b"}
+    assert write_tree(project, tree) == {"written": 2, "skipped": 0, "stale": []}
+    mtime = os.stat(os.path.join(project, "a.txt")).st_mtime_ns
+
+    assert write_tree(project, tree, incremental=True) == {"written": 0, "skipped": 2, "stale": []}
+    assert os.stat(os.path.join(project, "a.txt")).st_mtime_ns == mtime
+
+
+def test_plain_run_rewrites_everything(project):
+    tree = {"a.txt": "a"}
+    write_tree(project, tree)
+    assert write_tree(project, tree)["written"] == 1
+
+
+def test_incremental_run_rewrites_edited_and_missing_files(project):
+    write_tree(project, {"a.txt": "a", "b.txt": "b"})
+    with open(os.path.join(project, "a.txt"), "w") as f:
+        f.write("edited")
+    os.unlink(os.path.join(project, "b.txt"))
+
+    report = write_tree(project, {"a.txt": "a", "b.txt": "b"}, incremental=True)
+    assert report["written"] == 2
+    assert read(project, "a.txt") == b"a" and read(project, "b.txt") == b"b"
+
+
+def test_same_size_edit_is_caught_without_the_manifest(project):
+    write_tree(project, {"a.txt": "a"})
+    os.unlink(os.path.join(project, MANIFEST_NAME))
+    with open(os.path.join(project, "a.txt"), "w") as f:
+        f.write("z")
+
+    assert write_tree(project, {"a.txt": "a"}, incremental=True)["written"] == 1
+
+
+@pytest.mark.parametrize("incremental", [False, True])
+def test_stale_files_are_reported_until_deleted(project, incremental):
+    write_tree(project, {"a.txt": "a", "old.txt": "old"})
+
+    # Reported on every run, plain or incremental, and kept in the manifest
+    for _ in range(2):
+        report = write_tree(project, {"a.txt": "a"}, incremental=incremental)
+        assert report["stale"] == ["old.txt"]
+        assert "old.txt" in load_manifest(project)
+    assert read(project, "old.txt") == b"old"
+
+    os.unlink(os.path.join(project, "old.txt"))
+    assert write_tree(project, {"a.txt": "a"}, incremental=incremental)["stale"] == []
+    assert sorted(load_manifest(project)) == ["a.txt"]
+
+
+def test_thread_pool_writes_the_same_tree(project):
+    tree = {f"d{i % 3}/f{i}.txt": str(i) for i in range(50)}
+    assert write_tree(project, tree, workers=4)["written"] == 50
+    assert write_tree(project, tree, incremental=True, workers=4)["skipped"] == 50
+    assert sorted(load_manifest(project)) == sorted(tree)
@@ -0,0 +1,59 @@
+# Placeholder filters and the compiled renderer (template_engine.py).
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from template_engine import compile_template, parse_template, render_template  # noqa: E402
+
+HOSTILE = '</h1><script>alert("x")</script>{x} & \'y\''
+
+
+def test_html_escapes_markup_but_not_quotes():
+    assert render_template("<p>{{ v|html }}</p>", {"v": HOSTILE}) == (
+        "<p>&lt;/h1&gt;&lt;script&gt;alert(\"x\")&lt;/script&gt;{x} &amp; 'y'</p>"
+    )
+
+
+def test_attr_escapes_quotes():
+    out = render_template('<meta content="{{ v|attr }}" />', {"v": HOSTILE})
+    assert '"x"' not in out and "'y'" not in out
+    assert "&quot;x&quot;" in out and "&#x27;y&#x27;" in out
+
+
+def test_jsx_escapes_braces():
+    out = render_template("<h1>{{ v|jsx }}</h1>", {"v": HOSTILE})
+    assert "{" not in out and "}" not in out
+    assert "&#123;x&#125;" in out and "&lt;script&gt;" in out
+
+
+def test_json_renders_a_literal_of_any_value():
+    assert render_template("const a = {{ v|json }};", {"v": HOSTILE}) == "const a = " + (
+        '"</h1><script>alert(\\"x\\")</script>{x} & \'y\'"' + ";"
+    )
+    assert render_template("const m = {{ v|json }};", {"v": ["meds", "profile"]}) == 'const m = ["meds", "profile"];'
+
+
+@pytest.mark.parametrize("kind", ["raw", "html", "attr", "jsx"])
+def test_text_filters_reject_non_strings(kind):
+    with pytest.raises(TypeError):
+        render_template(f"{{{{ v|{kind} }}}}", {"v": 1})
+
+
+def test_unknown_filter_is_rejected_at_parse_time():
+    with pytest.raises(ValueError, match="Unknown placeholder type"):
+        parse_template("{{ v|sql }}")
+
+
+def test_jsx_expressions_are_literal_text():
+    source = "<div style={{ color: 'red' }}>{{ name|jsx }}</div>"
+    assert render_template(source, {"name": "Ann"}) == "<div style={{ color: 'red' }}>Ann</div>"
+
+
+def test_compiled_templates_are_cached_by_source():
+    render = compile_template("Hi {{ name|html }}")
+    assert compile_template("Hi {{ name|html }}") is render
+    assert render.fields == (("name", "html"),)
+    assert compile_template("no placeholders").fields == ()
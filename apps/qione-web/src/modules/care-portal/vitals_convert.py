@@ -0,0 +1,172 @@
+# Parse existing qihealth.vitals readings into the typed columns.
+#
+#   python vitals_convert.py --dsn postgresql://localhost/care
+#   python vitals_convert.py --dry-run              # count what would convert / quarantine
+#   python vitals_convert.py --refresh-rollups      # then rebuild vitals_rollups
+#
+# New readings are parsed on write by the vitals_parse trigger (schema.sql);
+# this converts the rows written before it. Rows are read in primary-key
+# order, --batch rows at a time, and each batch is one short transaction, so
+# the run never holds a long lock or snapshot and can be stopped and restarted
+# at will: a restart skips rows that already have typed values or a
+# quarantine entry. A reading that does not parse is recorded in vitals_quarantine with
+# the reason and left as it is; it never stops the run.
+#
+# parse_vital() must agree with vital_metrics() in SQL; both are driven by
+# VITAL_METRICS, VITAL_RANGES and VITAL_VALUE_PATTERN in care_schema.py.
+import argparse
+import os
+import re
+import sys
+import time
+from collections import Counter
+
+import care_schema
+from gen_data_layer import vital_metric_names
+
+VALUE = re.compile(care_schema.VITAL_VALUE_PATTERN, re.IGNORECASE | re.ASCII)
+METRICS = vital_metric_names()
+FIRST_ID = "00000000-0000-0000-0000-000000000000"
+
+
+def parse_vital(vital_type, value):
+    # Returns ({metric: "number"}, None) or (None, reason)
+    if value is None or not value.strip():
+        return None, "empty"
+    names = care_schema.VITAL_METRICS.get(vital_type)
+    if names is None:
+        return None, "unknown type"
+    match = VALUE.match(value)
+    numbers = [n for n in match.groups() if n is not None] if match else []
+    if len(numbers) != len(names):
+        return None, "unparseable"
+    for name, number in zip(names, numbers):
+        lo, hi = care_schema.VITAL_RANGES[name]
+        if not lo <= float(number) <= hi:
+            return None, "out of range"
+    return dict(zip(names, numbers)), None
+
+
+def array_literal(items):
+    # Postgres array text, so None-only columns and both drivers behave the same
+    quoted = ("NULL" if item is None else '"' + item.replace("\\", "\\\\").replace('"', '\\"') + '"' for item in items)
+    return "{" + ",".join(quoted) + "}"
+
+
+def _connect(dsn):
+    try:
+        import psycopg
+    except ImportError:
+        try:
+            import psycopg2 as psycopg
+        except ImportError:
+            raise SystemExit("vitals_convert needs psycopg or psycopg2") from None
+    return psycopg.connect(dsn)
+
+
+def _pending_sql(schema):
+    untyped = " and ".join(f"v.{m} is null" for m in METRICS)
+    return (
+        f"select v.id::text, v.type, v.value from {schema}.vitals v "
+        f"where v.id > %s::uuid and {untyped} "
+        f"and not exists (select 1 from {schema}.vitals_quarantine q where q.vital_id = v.id) "
+        "order by v.id limit %s"
+    )
+
+
+def _update_sql(schema):
+    assignments = ", ".join(f"{m} = b.{m}" for m in METRICS)
+    arrays = ", ".join(["%s::uuid[]"] + ["%s::numeric[]"] * len(METRICS))
+    return (
+        f"update {schema}.vitals v set {assignments} "
+        f"from unnest({arrays}) as b(id, {', '.join(METRICS)}) where v.id = b.id"
+    )
+
+
+def _quarantine_sql(schema):
+    return (
+        f"insert into {schema}.vitals_quarantine (vital_id, type, value, reason) "
+        "select * from unnest(%s::uuid[], %s::text[], %s::text[], %s::text[]) "
+        "on conflict (vital_id) do nothing"
+    )
+
+
+def convert(dsn, batch=5000, dry_run=False, schema=care_schema.SCHEMA, progress=None):
+    conn = _connect(dsn)
+    pending, update, quarantine = _pending_sql(schema), _update_sql(schema), _quarantine_sql(schema)
+    reasons = Counter()
+    scanned = converted = 0
+    last_id = FIRST_ID
+    started = time.perf_counter()
+    try:
+        while True:
+            with conn.cursor() as cur:
+                cur.execute(pending, (last_id, batch))
+                rows = cur.fetchall()
+            if not rows:
+                break
+            last_id = rows[-1][0]
+            typed = [[] for _ in range(len(METRICS) + 1)]
+            bad = [[], [], [], []]
+            for row_id, vital_type, value in rows:
+                metrics, reason = parse_vital(vital_type, value)
+                if reason:
+                    reasons[reason] += 1
+                    for column, item in zip(bad, (row_id, vital_type, value, reason)):
+                        column.append(item)
+                else:
+                    typed[0].append(row_id)
+                    for column, name in zip(typed[1:], METRICS):
+                        column.append(metrics.get(name))
+            if not dry_run:
+                with conn.cursor() as cur:
+                    # The rollups are rebuilt once at the end, not per batch
+                    cur.execute("set local qihealth.skip_rollups = 'on'")
+                    if typed[0]:
+                        cur.execute(update, [array_literal(column) for column in typed])
+                    if bad[0]:
+                        cur.execute(quarantine, [array_literal(column) for column in bad])
+                conn.commit()
+            else:
+                conn.rollback()
+            scanned += len(rows)
+            converted += len(typed[0])
+            if progress:
+                rate = scanned / max(time.perf_counter() - started, 1e-9)
+                progress(f"  {scanned:>11,} rows  {converted:,} converted  {sum(reasons.values()):,} quarantined  {rate:,.0f} rows/s")
+    finally:
+        conn.close()
+    return {
+        "scanned": scanned,
+        "converted": converted,
+        "quarantined": dict(sorted(reasons.items())),
+        "seconds": round(time.perf_counter() - started, 2),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Parse vitals.value into the typed columns in streamed batches.")
+    parser.add_argument("--dsn", default=None, help="connection string (default: $DATABASE_URL)")
+    parser.add_argument("--batch", type=int, default=5000, help="rows per transaction (default: 5000)")
+    parser.add_argument("--dry-run", action="store_true", help="parse and report without writing")
+    parser.add_argument("--refresh-rollups", action="store_true", help="run rollup_backfill.py when done")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 4, help="parallel chunks for --refresh-rollups")
+    args = parser.parse_args(argv)
+
+    dsn = args.dsn or os.environ.get("DATABASE_URL")
+    if not dsn:
+        parser.error("--dsn or DATABASE_URL is required")
+    report = convert(dsn, args.batch, args.dry_run, progress=print)
+    quarantined = ", ".join(f"{reason}: {count:,}" for reason, count in report["quarantined"].items()) or "none"
+    print(f"{report['converted']:,} of {report['scanned']:,} rows converted in {report['seconds']}s; quarantined: {quarantined}")
+
+    if args.refresh_rollups and not args.dry_run and report["scanned"]:
+        import rollup_backfill
+
+        rollups = rollup_backfill.backfill(dsn, jobs=args.jobs, progress=print)
+        print(f"{rollups['rollup_rows']:,} rollup rows rebuilt in {rollups['seconds']}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
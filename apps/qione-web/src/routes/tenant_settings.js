@@ -19,8 +19,16 @@ function MembersTab({ tenantId }) {
         setErr(null);
         setLoading(true);
         try {
-            const out = await apiGet(`/api/tenants/${tenantId}/members`);
-            setMembers(out.members ?? []);
+            // The route pages (default 200); follow next_cursor to the end
+            const all = [];
+            let cursor = null;
+            do {
+                const query = cursor ? `?cursor=${encodeURIComponent(cursor)}` : "";
+                const out = await apiGet(`/api/tenants/${tenantId}/members${query}`);
+                all.push(...(out.members ?? []));
+                cursor = out.next_cursor ?? null;
+            } while (cursor);
+            setMembers(all);
         }
         catch (e) {
             setErr(e.message);
@@ -59,8 +59,16 @@ function MembersTab({ tenantId }: { tenantId: string }) {
         setErr(null);
         setLoading(true);
         try {
-            const out = await apiGet(`/api/tenants/${tenantId}/members`);
-            setMembers(out.members ?? []);
+            // The route pages (default 200); follow next_cursor to the end
+            const all: Member[] = [];
+            let cursor: string | null = null;
+            do {
+                const query: string = cursor ? `?cursor=${encodeURIComponent(cursor)}` : "";
+                const out = await apiGet(`/api/tenants/${tenantId}/members${query}`);
+                all.push(...(out.members ?? []));
+                cursor = out.next_cursor ?? null;
+            } while (cursor);
+            setMembers(all);
         } catch (e: any) {
             setErr(e.message);
         } finally {
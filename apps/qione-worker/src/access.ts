@@ -0,0 +1,62 @@
+// Resolved permissions per (tenant, user), cached in the isolate.
+//
+// One resolve_member_access RPC returns the caller's membership and access
+// level for every enabled module of the tenant; every access check in the
+// request (and in the next requests within ACCESS_TTL_MS) is answered from
+// that. Routes that change members, roles, role access or enabled modules call
+// invalidateTenant() so this isolate sees the change at once; other isolates
+// pick it up when their entry expires.
+
+import type { SupabaseClient } from "@supabase/supabase-js";
+
+export type AccessLevel = "none" | "read" | "write" | "admin";
+export type ResolvedAccess = { member: boolean; modules: Record<string, AccessLevel> };
+
+export const ACCESS_TTL_MS = 15_000;
+const MAX_ENTRIES = 5_000;
+
+const RANK: Record<AccessLevel, number> = { none: 0, read: 1, write: 2, admin: 3 };
+
+const cache = new Map<string, { expires: number; access: Promise<ResolvedAccess> }>();
+
+export async function resolveAccess(sb: SupabaseClient, tenantId: string, userId: string) {
+    const key = `${tenantId}:${userId}`;
+    const now = Date.now();
+    const hit = cache.get(key);
+    if (hit && hit.expires > now) return hit.access;
+
+    // Concurrent requests for the same key share one RPC
+    const access = (async () => {
+        const { data, error } = await sb.rpc("resolve_member_access", { p_tenant: tenantId, p_user: userId });
+        if (error) throw new Error(error.message);
+        return data as ResolvedAccess;
+    })();
+    cache.delete(key);
+    cache.set(key, { expires: now + ACCESS_TTL_MS, access });
+    access.catch(() => cache.get(key)?.access === access && cache.delete(key));
+
+    // Oldest entries go first (Map keeps insertion order)
+    while (cache.size > MAX_ENTRIES) cache.delete(cache.keys().next().value!);
+    return access;
+}
+
+export async function hasModuleAccess(
+    sb: SupabaseClient,
+    tenantId: string,
+    userId: string,
+    moduleKey: string,
+    min: Exclude<AccessLevel, "none">
+) {
+    const access = await resolveAccess(sb, tenantId, userId);
+    return RANK[access.modules[moduleKey] ?? "none"] >= RANK[min];
+}
+
+export async function isTenantMember(sb: SupabaseClient, tenantId: string, userId: string) {
+    return (await resolveAccess(sb, tenantId, userId)).member;
+}
+
+export function invalidateTenant(tenantId: string) {
+    for (const key of cache.keys()) {
+        if (key.startsWith(`${tenantId}:`)) cache.delete(key);
+    }
+}
@@ -0,0 +1,137 @@
+// Local verification of Supabase access tokens, so a request does not need a
+// round trip to /auth/v1/user before it can be served.
+//
+// HS256 tokens (legacy projects) are checked against SUPABASE_JWT_SECRET;
+// ES256/RS256 tokens against the project's JWKS, fetched once per isolate and
+// refreshed every JWKS_TTL_MS or when an unknown key id shows up; keys imported
+// from a key set are dropped along with it. A token that cannot be checked
+// locally (HS256 without the secret configured) returns undefined and the
+// caller falls back to the auth endpoint.
+//
+// Like any JWT check, a token stays valid until it expires even if its
+// session was signed out; Supabase access tokens are short-lived.
+
+export type Caller = { id: string; email?: string };
+
+type JwtHeader = { alg?: string; kid?: string };
+type JwtClaims = { sub?: string; email?: string; role?: string; exp?: number; nbf?: number };
+
+const JWKS_TTL_MS = 10 * 60 * 1000;
+const CLOCK_SKEW_S = 30;
+
+type KeySet = {
+    url: string;
+    fetchedAt: number;
+    keys: (JsonWebKey & { kid?: string })[];
+    imported: Map<string, CryptoKey>;
+};
+
+let jwks: KeySet | null = null;
+const hmacKeys = new Map<string, CryptoKey>();
+
+function base64UrlDecode(s: string): Uint8Array {
+    const b64 = s.replace(/-/g, "+").replace(/_/g, "/") + "=".repeat((4 - (s.length % 4)) % 4);
+    const bin = atob(b64);
+    const out = new Uint8Array(bin.length);
+    for (let i = 0; i < bin.length; i++) out[i] = bin.charCodeAt(i);
+    return out;
+}
+
+function decodeJson<T>(part: string): T {
+    return JSON.parse(new TextDecoder().decode(base64UrlDecode(part))) as T;
+}
+
+async function hmacKey(secret: string) {
+    const cached = hmacKeys.get(secret);
+    if (cached) return cached;
+    const key = await crypto.subtle.importKey(
+        "raw",
+        new TextEncoder().encode(secret),
+        { name: "HMAC", hash: "SHA-256" },
+        false,
+        ["verify"]
+    );
+    hmacKeys.set(secret, key);
+    return key;
+}
+
+async function jwksKey(supabaseUrl: string, header: JwtHeader) {
+    const url = `${supabaseUrl}/auth/v1/.well-known/jwks.json`;
+    const find = (set: KeySet) => set.keys.find((k) => (header.kid ? k.kid === header.kid : true));
+    let set = jwks;
+    if (!set || set.url !== url || Date.now() - set.fetchedAt > JWKS_TTL_MS || !find(set)) {
+        let body: { keys?: (JsonWebKey & { kid?: string })[] };
+        try {
+            const res = await fetch(url);
+            if (!res.ok) return null;
+            body = await res.json();
+        } catch {
+            return null;
+        }
+        set = jwks = { url, fetchedAt: Date.now(), keys: body.keys ?? [], imported: new Map() };
+    }
+
+    const id = `${header.alg}:${header.kid ?? ""}`;
+    const cached = set.imported.get(id);
+    if (cached) return cached;
+    const jwk = find(set);
+    if (!jwk) return null;
+
+    const algorithm =
+        header.alg === "ES256"
+            ? { name: "ECDSA", namedCurve: "P-256" }
+            : { name: "RSASSA-PKCS1-v1_5", hash: "SHA-256" };
+    const key = await crypto.subtle.importKey("jwk", jwk, algorithm, false, ["verify"]);
+    set.imported.set(id, key);
+    return key;
+}
+
+// Returns the caller for a valid token, null for an invalid or expired one
+// (including a malformed signature or a key that does not fit its alg), and
+// undefined when the token cannot be checked locally
+export async function verifyAccessToken(
+    env: { SUPABASE_URL: string; SUPABASE_JWT_SECRET?: string },
+    token: string
+): Promise<Caller | null | undefined> {
+    const parts = token.split(".");
+    if (parts.length !== 3) return null;
+
+    let header: JwtHeader;
+    let claims: JwtClaims;
+    let signature: Uint8Array;
+    try {
+        header = decodeJson<JwtHeader>(parts[0]);
+        claims = decodeJson<JwtClaims>(parts[1]);
+        signature = base64UrlDecode(parts[2]);
+    } catch {
+        return null;
+    }
+
+    const data = new TextEncoder().encode(`${parts[0]}.${parts[1]}`);
+    let valid: boolean;
+    try {
+        if (header.alg === "HS256") {
+            if (!env.SUPABASE_JWT_SECRET) return undefined;
+            valid = await crypto.subtle.verify("HMAC", await hmacKey(env.SUPABASE_JWT_SECRET), signature, data);
+        } else if (header.alg === "ES256" || header.alg === "RS256") {
+            const key = await jwksKey(env.SUPABASE_URL, header);
+            if (!key) return undefined;
+            const algorithm =
+                header.alg === "ES256" ? { name: "ECDSA", hash: "SHA-256" } : { name: "RSASSA-PKCS1-v1_5" };
+            valid = await crypto.subtle.verify(algorithm, key, signature, data);
+        } else {
+            return null;
+        }
+    } catch {
+        return null;
+    }
+    if (!valid) return null;
+
+    const now = Math.floor(Date.now() / 1000);
+    if (typeof claims.exp !== "number" || claims.exp + CLOCK_SKEW_S < now) return null;
+    if (typeof claims.nbf === "number" && claims.nbf - CLOCK_SKEW_S > now) return null;
+    // anon and service_role keys are JWTs too, but carry no user
+    if (claims.role !== "authenticated" || !claims.sub) return null;
+
+    return { id: claims.sub, email: claims.email };
+}
@@ -1,9 +1,14 @@
 import { createClient, SupabaseClient } from "@supabase/supabase-js";
+import { hasModuleAccess, invalidateTenant, isTenantMember } from "./access";
+import { verifyAccessToken } from "./auth";
+import { invalidateMembers, isMemberCursor, listMembers, MEMBERS_PAGE_MAX } from "./members";
+import { plan, PlanError, PlanMode } from "./settle";
 
 type Env = {
     SUPABASE_URL: string;
     SUPABASE_ANON_KEY: string;
     SUPABASE_SERVICE_ROLE_KEY: string; // secret
+    SUPABASE_JWT_SECRET?: string; // secret; only for projects still signing with HS256
     SUPABASE_REDIRECT_TO?: string;
 };
 
@@ -41,6 +46,9 @@ function getBearer(req: Request): string | null {
 }
 
 async function getCallerUser(env: Env, accessToken: string) {
+    const local = await verifyAccessToken(env, accessToken);
+    if (local !== undefined) return local;
+
     const url = `${env.SUPABASE_URL}/auth/v1/user`;
     const res = await fetch(url, {
         headers: {
@@ -60,20 +68,13 @@ function sbService(env: Env): SupabaseClient {
 }
 
 async function assertTenantAdmin(sb: SupabaseClient, tenantId: string, userId: string) {
-    const { data, error } = await sb.rpc("has_module_access", {
-        p_tenant: tenantId,
-        p_module: "qione_admin",
-        p_user: userId,
-        p_min: "admin",
-    });
-    if (error) throw new Error(error.message);
-    if (data !== true) throw new Error("Not authorized (admin required).");
+    if (!(await hasModuleAccess(sb, tenantId, userId, "qione_admin", "admin"))) {
+        throw new Error("Not authorized (admin required).");
+    }
 }
 
 async function assertTenantMember(sb: SupabaseClient, tenantId: string, userId: string) {
-    const { data, error } = await sb.rpc("is_tenant_member", { p_tenant: tenantId, p_user: userId });
-    if (error) throw new Error(error.message);
-    if (data !== true) throw new Error("Not authorized (member required).");
+    if (!(await isTenantMember(sb, tenantId, userId))) throw new Error("Not authorized (member required).");
 }
 
 async function ensureRole(sb: SupabaseClient, tenantId: string, name: string, rank = 50) {
@@ -174,39 +175,14 @@ export default {
                 const type = body.type ?? "home";
                 if (!name) return json({ error: "name required" }, 400, cors);
 
-                const { data: t, error: e1 } = await sb
-                    .from("tenants")
-                    .insert({ name, type, created_by: caller.id })
-                    .select("id")
-                    .single();
-                if (e1) throw new Error(e1.message);
-
-                const tenantId = t.id as string;
-
-                // Create default roles
-                const ownerRoleId = await ensureRole(sb, tenantId, "Owner", 1);
-                const memberRoleId = await ensureRole(sb, tenantId, "Member", 50);
-                const viewerRoleId = await ensureRole(sb, tenantId, "Viewer", 90);
-
-                // Add caller as active + Owner role
-                await addMember(sb, tenantId, caller.id, "Owner", "active");
-                await assignRole(sb, tenantId, caller.id, ownerRoleId);
-
-                // Enable core modules by default
-                await enableModules(sb, tenantId, ["qione_admin", "qihome"], true);
-
-                // Role access defaults:
-                // Owner admin on admin + qihome
-                await setRoleAccess(sb, tenantId, "qione_admin", ownerRoleId, "admin");
-                await setRoleAccess(sb, tenantId, "qihome", ownerRoleId, "admin");
-
-                // Member: no admin panel, but write qihome
-                await setRoleAccess(sb, tenantId, "qione_admin", memberRoleId, "none");
-                await setRoleAccess(sb, tenantId, "qihome", memberRoleId, "write");
-
-                // Viewer: read-only qihome
-                await setRoleAccess(sb, tenantId, "qione_admin", viewerRoleId, "none");
-                await setRoleAccess(sb, tenantId, "qihome", viewerRoleId, "read");
+                // Tenant, default roles, owner membership, modules and role
+                // access in one transaction (supabase/migrations/006)
+                const { data: tenantId, error } = await sb.rpc("bootstrap_tenant", {
+                    p_name: name,
+                    p_type: type,
+                    p_owner: caller.id,
+                });
+                if (error) throw new Error(error.message);
 
                 return json({ tenant_id: tenantId }, 200, cors);
             }
@@ -219,23 +195,15 @@ export default {
                 const tenantId = membersMatch[1];
                 await assertTenantAdmin(sb, tenantId, caller.id);
 
-                const { data: mem, error } = await sb
-                    .from("tenant_members")
-                    .select("tenant_id,user_id,status,display_name,joined_at")
-                    .eq("tenant_id", tenantId)
-                    .order("joined_at", { ascending: true });
+                // One page of members with their emails in one query
+                // (supabase/migrations/007); ?limit= (max 1000) and ?cursor=
+                // from the previous page's next_cursor
+                const limit = Math.min(Math.max(Number(url.searchParams.get("limit")) || 200, 1), MEMBERS_PAGE_MAX);
+                const cursor = url.searchParams.get("cursor");
+                if (cursor !== null && !isMemberCursor(cursor)) return json({ error: "invalid cursor" }, 400, cors);
+                const page = await listMembers(sb, tenantId, limit, cursor);
 
-                if (error) throw new Error(error.message);
-
-                // Enrich with email using admin API
-                const enriched = await Promise.all(
-                    (mem ?? []).map(async (m) => {
-                        const { data: u } = await sb.auth.admin.getUserById(m.user_id);
-                        return { ...m, email: u.user?.email ?? null };
-                    })
-                );
-
-                return json({ members: enriched }, 200, cors);
+                return json(page, 200, cors);
             }
 
             // --------------------
@@ -269,6 +237,8 @@ export default {
                     const roleId = await findRoleIdByName(sb, tenantId, body.role_name.trim());
                     await assignRole(sb, tenantId, invitedUserId, roleId);
                 }
+                invalidateTenant(tenantId);
+                invalidateMembers(tenantId);
 
                 return json({ ok: true, invited_user_id: invitedUserId, email, status: "invited" }, 200, cors);
             }
@@ -302,6 +272,8 @@ export default {
                         .eq("tenant_id", tenantId)
                         .eq("user_id", caller.id);
                     if (upErr) throw new Error(upErr.message);
+                    invalidateTenant(tenantId);
+                    invalidateMembers(tenantId);
                 }
 
                 return json({ ok: true, status: "active" }, 200, cors);
@@ -339,6 +311,7 @@ export default {
                 if (typeof body.is_enabled !== "boolean") throw new Error("is_enabled required");
 
                 await enableModules(sb, tenantId, [body.module_key], body.is_enabled);
+                invalidateTenant(tenantId);
                 return json({ ok: true }, 200, cors);
             }
 
@@ -405,9 +378,51 @@ export default {
                 if (!body.access) throw new Error("access required");
 
                 await setRoleAccess(sb, tenantId, body.module_key, body.role_id, body.access);
+                invalidateTenant(tenantId);
                 return json({ ok: true }, 200, cors);
             }
 
+            // --------------------
+            // GET /api/tenants/:tenantId/qihome/settlement?mode=auto|greedy|exact
+            // --------------------
+            const settleMatch = path.match(/^\/api\/tenants\/([0-9a-fA-F-]{36})\/qihome\/settlement$/);
+            if (settleMatch && req.method === "GET") {
+                const tenantId = settleMatch[1];
+                if (!(await hasModuleAccess(sb, tenantId, caller.id, "qihome", "read"))) {
+                    return json({ error: "Not authorized (qihome read required)." }, 403, cors);
+                }
+
+                const mode = (url.searchParams.get("mode") ?? "auto") as PlanMode;
+                if (!["auto", "greedy", "exact"].includes(mode)) return json({ error: "mode must be auto, greedy or exact" }, 400, cors);
+
+                // Plans are cached per ledger version; any expense, share,
+                // settlement or membership write bumps the version
+                const { data: state, error: e1 } = await sb.rpc("qihome_settlement_state", { p_tenant: tenantId });
+                if (e1) throw new Error(e1.message);
+                const { version, balances } = state;
+                if (state.cached && state.plans[mode]) {
+                    return json({ tenant_id: tenantId, version, balances, cached: true, ...state.plans[mode] }, 200, cors);
+                }
+
+                let result;
+                try {
+                    result = plan(balances, mode);
+                } catch (e) {
+                    if (e instanceof PlanError) return json({ error: e.message }, 400, cors);
+                    throw e;
+                }
+                const { error: e2 } = await sb.rpc("qihome_store_settlement_plan", {
+                    p_tenant: tenantId,
+                    p_version: version,
+                    p_balances: balances,
+                    p_mode: mode,
+                    p_plan: result,
+                });
+                if (e2) throw new Error(e2.message);
+
+                return json({ tenant_id: tenantId, version, balances, cached: false, ...result }, 200, cors);
+            }
+
             return json({ error: "Not found" }, 404, cors);
         } catch (e: any) {
             return json({ error: e?.message ?? "Server error" }, 500, corsHeaders(req));
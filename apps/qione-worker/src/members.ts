@@ -0,0 +1,58 @@
+// Tenant member pages (with emails) from list_tenant_members, cached in the
+// isolate per (tenant, page) for MEMBERS_TTL_MS. Routes that add or change
+// members call invalidateMembers() so this isolate sees the change at once.
+
+import type { SupabaseClient } from "@supabase/supabase-js";
+
+export type MemberRow = {
+    tenant_id: string;
+    user_id: string;
+    status: "active" | "invited" | "disabled";
+    display_name: string | null;
+    joined_at: string;
+    email: string | null;
+};
+export type MemberPage = { members: MemberRow[]; next_cursor: string | null };
+
+export const MEMBERS_TTL_MS = 30_000;
+export const MEMBERS_PAGE_MAX = 1000;
+const MAX_ENTRIES = 1_000;
+
+// "<joined_at>|<user_id>" as list_tenant_members writes next_cursor; anything
+// else would fail its ::timestamptz/::uuid casts
+const CURSOR = /^\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}(\.\d{1,6})?(Z|[+-]\d{2}(:\d{2})?)\|[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}$/;
+
+export function isMemberCursor(cursor: string) {
+    return CURSOR.test(cursor) && !Number.isNaN(Date.parse(cursor.slice(0, cursor.indexOf("|"))));
+}
+
+const cache = new Map<string, { expires: number; page: Promise<MemberPage> }>();
+
+export async function listMembers(sb: SupabaseClient, tenantId: string, limit: number, cursor: string | null) {
+    const key = `${tenantId}:${limit}:${cursor ?? ""}`;
+    const now = Date.now();
+    const hit = cache.get(key);
+    if (hit && hit.expires > now) return hit.page;
+
+    const page = (async () => {
+        const { data, error } = await sb.rpc("list_tenant_members", {
+            p_tenant: tenantId,
+            p_limit: limit,
+            p_cursor: cursor,
+        });
+        if (error) throw new Error(error.message);
+        return data as MemberPage;
+    })();
+    cache.delete(key);
+    cache.set(key, { expires: now + MEMBERS_TTL_MS, page });
+    page.catch(() => cache.get(key)?.page === page && cache.delete(key));
+
+    while (cache.size > MAX_ENTRIES) cache.delete(cache.keys().next().value!);
+    return page;
+}
+
+export function invalidateMembers(tenantId: string) {
+    for (const key of cache.keys()) {
+        if (key.startsWith(`${tenantId}:`)) cache.delete(key);
+    }
+}
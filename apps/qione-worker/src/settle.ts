@@ -0,0 +1,183 @@
+// QiHome settlement planner: the transfers that settle a household's net
+// balances (v_qihome_member_balances.net_cents, positive = owes).
+// tools/settlement.py is the reference implementation and benchmark; both give
+// identical plans for the same input, so change them together.
+
+export type Balance = { user_id: string; net_cents: number };
+export type Transfer = { from_user: string; to_user: string; amount_cents: number };
+export type PlanMode = "auto" | "greedy" | "exact";
+export type Plan = { mode: "greedy" | "exact"; transfers: Transfer[]; unsettled_cents: number };
+
+// auto uses exact up to EXACT_AUTO members with a balance; exact refuses above EXACT_MAX
+export const EXACT_AUTO = 12;
+export const EXACT_MAX = 18;
+
+export class PlanError extends Error {}
+
+type Entry = { user: string; cents: number };
+
+function ledger(balances: Balance[]): Entry[] {
+    return balances
+        .filter((b) => Number(b.net_cents) !== 0)
+        .map((b) => ({ user: String(b.user_id), cents: Number(b.net_cents) }))
+        .sort((a, b) => (a.user < b.user ? -1 : a.user > b.user ? 1 : 0));
+}
+
+// Max-heap on cents; ties go to the smaller user id
+class Heap {
+    private items: Entry[] = [];
+
+    constructor(entries: Entry[]) {
+        for (const e of entries) this.push(e);
+    }
+
+    get size() {
+        return this.items.length;
+    }
+
+    private before(a: Entry, b: Entry) {
+        return a.cents > b.cents || (a.cents === b.cents && a.user < b.user);
+    }
+
+    push(e: Entry) {
+        const items = this.items;
+        items.push(e);
+        let i = items.length - 1;
+        while (i > 0) {
+            const parent = (i - 1) >> 1;
+            if (!this.before(items[i], items[parent])) break;
+            [items[i], items[parent]] = [items[parent], items[i]];
+            i = parent;
+        }
+    }
+
+    pop(): Entry {
+        const items = this.items;
+        const top = items[0];
+        const last = items.pop()!;
+        if (items.length) {
+            items[0] = last;
+            let i = 0;
+            for (;;) {
+                const l = 2 * i + 1;
+                const r = l + 1;
+                let best = i;
+                if (l < items.length && this.before(items[l], items[best])) best = l;
+                if (r < items.length && this.before(items[r], items[best])) best = r;
+                if (best === i) break;
+                [items[i], items[best]] = [items[best], items[i]];
+                i = best;
+            }
+        }
+        return top;
+    }
+}
+
+function greedyEntries(entries: Entry[]): Transfer[] {
+    const transfers: Transfer[] = [];
+
+    // Equal and opposite balances settle in one transfer each
+    const creditors = new Map<number, string[]>();
+    for (const { user, cents } of entries) {
+        if (cents < 0) {
+            const list = creditors.get(-cents);
+            if (list) list.push(user);
+            else creditors.set(-cents, [user]);
+        }
+    }
+    const paired = new Set<string>();
+    for (const { user, cents } of entries) {
+        const list = cents > 0 ? creditors.get(cents) : undefined;
+        if (list && list.length) {
+            const creditor = list.shift()!;
+            transfers.push({ from_user: user, to_user: creditor, amount_cents: cents });
+            paired.add(user).add(creditor);
+        }
+    }
+
+    // Largest debtor pays largest creditor
+    const debts = new Heap(entries.filter((e) => e.cents > 0 && !paired.has(e.user)));
+    const credits = new Heap(
+        entries.filter((e) => e.cents < 0 && !paired.has(e.user)).map((e) => ({ user: e.user, cents: -e.cents }))
+    );
+    while (debts.size && credits.size) {
+        const debt = debts.pop();
+        const credit = credits.pop();
+        const amount = Math.min(debt.cents, credit.cents);
+        transfers.push({ from_user: debt.user, to_user: credit.user, amount_cents: amount });
+        if (debt.cents > amount) debts.push({ user: debt.user, cents: debt.cents - amount });
+        if (credit.cents > amount) credits.push({ user: credit.user, cents: credit.cents - amount });
+    }
+    return transfers;
+}
+
+export function greedy(balances: Balance[]): Transfer[] {
+    return greedyEntries(ledger(balances));
+}
+
+// Fewest transfers: n minus the most zero-sum groups the members split into
+export function exact(balances: Balance[]): Transfer[] {
+    const entries = ledger(balances);
+    const n = entries.length;
+    if (n > EXACT_MAX) throw new PlanError(`exact mode handles at most ${EXACT_MAX} members with a balance, got ${n}`);
+    const size = 1 << n;
+    const bit = (low: number) => 31 - Math.clz32(low);
+
+    const sums = new Float64Array(size);
+    for (let mask = 1; mask < size; mask++) {
+        const low = mask & -mask;
+        sums[mask] = sums[mask ^ low] + entries[bit(low)].cents;
+    }
+
+    const groups = new Uint8Array(size);
+    for (let mask = 1; mask < size; mask++) {
+        let best = 0;
+        for (let rest = mask; rest; rest &= rest - 1) {
+            const g = groups[mask ^ (rest & -rest)];
+            if (g > best) best = g;
+        }
+        groups[mask] = best + (sums[mask] === 0 ? 1 : 0);
+    }
+
+    const order: number[] = [];
+    for (let mask = size - 1; mask; ) {
+        const target = groups[mask] - (sums[mask] === 0 ? 1 : 0);
+        let low = 0;
+        for (let rest = mask; rest; rest &= rest - 1) {
+            low = rest & -rest;
+            if (groups[mask ^ low] === target) break;
+        }
+        order.push(bit(low));
+        mask ^= low;
+    }
+    order.reverse();
+
+    const transfers: Transfer[] = [];
+    let group: Entry[] = [];
+    let total = 0;
+    for (const index of order) {
+        group.push(entries[index]);
+        total += entries[index].cents;
+        if (total === 0) {
+            transfers.push(...greedyEntries(group.sort((a, b) => (a.user < b.user ? -1 : 1))));
+            group = [];
+        }
+    }
+    if (group.length) transfers.push(...greedyEntries(group.sort((a, b) => (a.user < b.user ? -1 : 1))));
+    return transfers;
+}
+
+export function plan(balances: Balance[], mode: PlanMode = "auto"): Plan {
+    const resolved = mode === "auto" ? (ledger(balances).length <= EXACT_AUTO ? "exact" : "greedy") : mode;
+    if (resolved !== "greedy" && resolved !== "exact") throw new PlanError(`unknown mode ${mode}`);
+    const transfers = resolved === "greedy" ? greedy(balances) : exact(balances);
+
+    const paid = new Map<string, number>();
+    for (const t of transfers) {
+        paid.set(t.from_user, (paid.get(t.from_user) ?? 0) + t.amount_cents);
+        paid.set(t.to_user, (paid.get(t.to_user) ?? 0) - t.amount_cents);
+    }
+    // Nonzero only when shares do not add up to the expenses they split
+    const unsettled = ledger(balances).reduce((acc, e) => acc + Math.abs(e.cents - (paid.get(e.user) ?? 0)), 0);
+    return { mode: resolved, transfers, unsettled_cents: unsettled };
+}
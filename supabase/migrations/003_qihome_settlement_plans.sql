@@ -0,0 +1,190 @@
+-- QiHome settlement plans: who pays whom, cached per ledger version
+-- The Worker (GET /api/tenants/:tenantId/qihome/settlement) computes the
+-- transfers from v_qihome_member_balances and stores them here; any change to
+-- expenses, shares, settlements or membership bumps the tenant's ledger
+-- version, which makes the cached plan stale without touching it.
+begin;
+
+-- =========
+-- Ledger version (bumped by triggers)
+-- =========
+create table if not exists qione.qihome_ledger_versions (
+  tenant_id uuid primary key references qione.tenants(id) on delete cascade,
+  version bigint not null default 0,
+  changed_at timestamptz not null default now()
+);
+
+-- Cached balances and plans, valid while version = qihome_ledger_versions.version
+-- plans: { "<mode>": { "mode": "greedy" | "exact", "transfers": [...] } }
+create table if not exists qione.qihome_settlement_cache (
+  tenant_id uuid primary key references qione.tenants(id) on delete cascade,
+  version bigint not null,
+  balances jsonb not null,
+  plans jsonb not null default '{}'::jsonb,
+  computed_at timestamptz not null default now()
+);
+
+create or replace function qione.qihome_bump_ledger(p_tenants uuid[])
+returns void
+language sql
+security definer
+set search_path = qione
+as $$
+  -- Sorted so concurrent writers lock version rows in the same order; a tenant
+  -- being deleted (cascading into its members and expenses) is skipped
+  insert into qione.qihome_ledger_versions as v (tenant_id, version)
+  select d.t, 1
+  from (select distinct unnest(p_tenants) as t) d
+  where exists (select 1 from qione.tenants tn where tn.id = d.t)
+  order by d.t
+  on conflict (tenant_id) do update set version = v.version + 1, changed_at = now();
+$$;
+
+-- Statement-level: one bump per tenant per statement, however many rows it wrote
+create or replace function qione.qihome_touch_ledger()
+returns trigger
+language plpgsql
+security definer
+set search_path = qione
+as $$
+begin
+  if tg_op <> 'DELETE' then
+    perform qione.qihome_bump_ledger(array(select tenant_id from new_rows));
+  end if;
+  if tg_op <> 'INSERT' then
+    perform qione.qihome_bump_ledger(array(select tenant_id from old_rows));
+  end if;
+  return null;
+end;
+$$;
+
+-- Shares carry no tenant_id; a share deleted by its expense's cascade is
+-- already covered by the expense trigger
+create or replace function qione.qihome_touch_ledger_shares()
+returns trigger
+language plpgsql
+security definer
+set search_path = qione
+as $$
+begin
+  if tg_op <> 'DELETE' then
+    perform qione.qihome_bump_ledger(array(
+      select e.tenant_id from new_rows s join qione.qihome_expenses e on e.id = s.expense_id));
+  end if;
+  if tg_op <> 'INSERT' then
+    perform qione.qihome_bump_ledger(array(
+      select e.tenant_id from old_rows s join qione.qihome_expenses e on e.id = s.expense_id));
+  end if;
+  return null;
+end;
+$$;
+
+drop trigger if exists qihome_expenses_ledger_ins on qione.qihome_expenses;
+create trigger qihome_expenses_ledger_ins after insert on qione.qihome_expenses
+  referencing new table as new_rows for each statement execute function qione.qihome_touch_ledger();
+drop trigger if exists qihome_expenses_ledger_upd on qione.qihome_expenses;
+create trigger qihome_expenses_ledger_upd after update on qione.qihome_expenses
+  referencing old table as old_rows new table as new_rows for each statement execute function qione.qihome_touch_ledger();
+drop trigger if exists qihome_expenses_ledger_del on qione.qihome_expenses;
+create trigger qihome_expenses_ledger_del after delete on qione.qihome_expenses
+  referencing old table as old_rows for each statement execute function qione.qihome_touch_ledger();
+
+drop trigger if exists qihome_shares_ledger_ins on qione.qihome_expense_shares;
+create trigger qihome_shares_ledger_ins after insert on qione.qihome_expense_shares
+  referencing new table as new_rows for each statement execute function qione.qihome_touch_ledger_shares();
+drop trigger if exists qihome_shares_ledger_upd on qione.qihome_expense_shares;
+create trigger qihome_shares_ledger_upd after update on qione.qihome_expense_shares
+  referencing old table as old_rows new table as new_rows for each statement execute function qione.qihome_touch_ledger_shares();
+drop trigger if exists qihome_shares_ledger_del on qione.qihome_expense_shares;
+create trigger qihome_shares_ledger_del after delete on qione.qihome_expense_shares
+  referencing old table as old_rows for each statement execute function qione.qihome_touch_ledger_shares();
+
+drop trigger if exists qihome_settlements_ledger_ins on qione.qihome_settlements;
+create trigger qihome_settlements_ledger_ins after insert on qione.qihome_settlements
+  referencing new table as new_rows for each statement execute function qione.qihome_touch_ledger();
+drop trigger if exists qihome_settlements_ledger_upd on qione.qihome_settlements;
+create trigger qihome_settlements_ledger_upd after update on qione.qihome_settlements
+  referencing old table as old_rows new table as new_rows for each statement execute function qione.qihome_touch_ledger();
+drop trigger if exists qihome_settlements_ledger_del on qione.qihome_settlements;
+create trigger qihome_settlements_ledger_del after delete on qione.qihome_settlements
+  referencing old table as old_rows for each statement execute function qione.qihome_touch_ledger();
+
+-- Balances only list active members, so membership changes count too
+drop trigger if exists tenant_members_ledger_ins on qione.tenant_members;
+create trigger tenant_members_ledger_ins after insert on qione.tenant_members
+  referencing new table as new_rows for each statement execute function qione.qihome_touch_ledger();
+drop trigger if exists tenant_members_ledger_upd on qione.tenant_members;
+create trigger tenant_members_ledger_upd after update on qione.tenant_members
+  referencing old table as old_rows new table as new_rows for each statement execute function qione.qihome_touch_ledger();
+drop trigger if exists tenant_members_ledger_del on qione.tenant_members;
+create trigger tenant_members_ledger_del after delete on qione.tenant_members
+  referencing old table as old_rows for each statement execute function qione.qihome_touch_ledger();
+
+-- =========
+-- Worker RPCs (service role only)
+-- =========
+
+-- Current version plus either the fresh cache or the balances to compute from,
+-- read in one statement so the version and the balances agree
+create or replace function qione.qihome_settlement_state(p_tenant uuid)
+returns jsonb
+language sql
+stable
+security definer
+set search_path = qione
+as $$
+  with v as (
+    select coalesce((select version from qione.qihome_ledger_versions where tenant_id = p_tenant), 0) as version
+  ),
+  c as (
+    select c.* from qione.qihome_settlement_cache c, v
+    where c.tenant_id = p_tenant and c.version = v.version
+  )
+  select jsonb_build_object(
+    'version', v.version,
+    'cached', exists (select 1 from c),
+    'plans', coalesce((select plans from c), '{}'::jsonb),
+    'balances', coalesce(
+      (select balances from c),
+      (select coalesce(jsonb_agg(jsonb_build_object('user_id', b.user_id, 'net_cents', b.net_cents) order by b.user_id), '[]'::jsonb)
+         from qione.v_qihome_member_balances b
+        where b.tenant_id = p_tenant)
+    )
+  )
+  from v;
+$$;
+
+-- Stores one plan computed at p_version; a plan for an older version than the
+-- cached one is ignored, a newer version replaces the cached plans
+create or replace function qione.qihome_store_settlement_plan(
+  p_tenant uuid, p_version bigint, p_balances jsonb, p_mode text, p_plan jsonb
+)
+returns void
+language sql
+security definer
+set search_path = qione
+as $$
+  insert into qione.qihome_settlement_cache as c (tenant_id, version, balances, plans)
+  values (p_tenant, p_version, p_balances, jsonb_build_object(p_mode, p_plan))
+  on conflict (tenant_id) do update set
+    version = excluded.version,
+    balances = excluded.balances,
+    plans = case when c.version = excluded.version then c.plans || excluded.plans else excluded.plans end,
+    computed_at = now()
+  where c.version <= excluded.version;
+$$;
+
+-- Server-side only: the worker calls these with the service role key
+grant usage on schema qione to service_role;
+revoke execute on function qione.qihome_bump_ledger(uuid[]) from public, anon, authenticated;
+grant execute on function qione.qihome_bump_ledger(uuid[]) to service_role;
+revoke execute on function qione.qihome_settlement_state(uuid) from public, anon, authenticated;
+grant execute on function qione.qihome_settlement_state(uuid) to service_role;
+revoke execute on function qione.qihome_store_settlement_plan(uuid, bigint, jsonb, text, jsonb) from public, anon, authenticated;
+grant execute on function qione.qihome_store_settlement_plan(uuid, bigint, jsonb, text, jsonb) to service_role;
+
+-- No policies: only the service role and the functions above touch these
+alter table qione.qihome_ledger_versions enable row level security;
+alter table qione.qihome_settlement_cache enable row level security;
+
+commit;
@@ -0,0 +1,317 @@
+-- QiHome balances kept in a table instead of re-aggregated on every read
+-- qione.qihome_balances holds each member's running totals, updated by
+-- triggers on expenses, shares and settlements in the same transaction as the
+-- write. v_qihome_member_balances now reads it, so a balance read costs
+-- O(members) rather than O(ledger history).
+-- qihome_balance_drift() recomputes from the ledger and reports differences;
+-- tools/verify_balances.py runs it per tenant and can repair.
+begin;
+
+-- =========
+-- Balance table
+-- =========
+create table if not exists qione.qihome_balances (
+  tenant_id uuid not null references qione.tenants(id) on delete cascade,
+  user_id uuid not null,
+  shares_owed bigint not null default 0,
+  paid_total bigint not null default 0,
+  settlements_sent bigint not null default 0,
+  settlements_received bigint not null default 0,
+  updated_at timestamptz not null default now(),
+  primary key (tenant_id, user_id)
+);
+
+-- The ledger aggregated from scratch (the old view body), for one tenant or all
+create or replace function qione.qihome_recompute_balances(p_tenant uuid default null)
+returns table (
+  tenant_id uuid, user_id uuid,
+  shares_owed bigint, paid_total bigint, settlements_sent bigint, settlements_received bigint
+)
+language sql
+stable
+security definer
+set search_path = qione
+as $$
+  select d.tenant_id, d.user_id,
+         sum(d.shares)::bigint, sum(d.paid)::bigint, sum(d.sent)::bigint, sum(d.received)::bigint
+  from (
+    select e.tenant_id, s.user_id, s.share_cents as shares, 0 as paid, 0 as sent, 0 as received
+    from qione.qihome_expense_shares s
+    join qione.qihome_expenses e on e.id = s.expense_id
+    where p_tenant is null or e.tenant_id = p_tenant
+    union all
+    select e.tenant_id, e.paid_by, 0, e.amount_cents, 0, 0
+    from qione.qihome_expenses e
+    where p_tenant is null or e.tenant_id = p_tenant
+    union all
+    select st.tenant_id, st.from_user, 0, 0, st.amount_cents, 0
+    from qione.qihome_settlements st
+    where p_tenant is null or st.tenant_id = p_tenant
+    union all
+    select st.tenant_id, st.to_user, 0, 0, 0, st.amount_cents
+    from qione.qihome_settlements st
+    where p_tenant is null or st.tenant_id = p_tenant
+  ) d
+  group by d.tenant_id, d.user_id;
+$$;
+
+-- =========
+-- Incremental maintenance
+-- =========
+
+-- Adds a statement's deltas (qihome_balances rows; updated_at is ignored).
+-- One sorted upsert per statement, so concurrent writers lock balance rows in
+-- the same order; a tenant being deleted is skipped.
+create or replace function qione.qihome_add_balances(p_deltas qione.qihome_balances[])
+returns void
+language sql
+security definer
+set search_path = qione
+as $$
+  insert into qione.qihome_balances as b
+    (tenant_id, user_id, shares_owed, paid_total, settlements_sent, settlements_received)
+  select d.tenant_id, d.user_id,
+         sum(d.shares_owed), sum(d.paid_total), sum(d.settlements_sent), sum(d.settlements_received)
+  from unnest(p_deltas) d
+  where exists (select 1 from qione.tenants t where t.id = d.tenant_id)
+  group by d.tenant_id, d.user_id
+  having sum(d.shares_owed) <> 0 or sum(d.paid_total) <> 0
+      or sum(d.settlements_sent) <> 0 or sum(d.settlements_received) <> 0
+  order by d.tenant_id, d.user_id
+  on conflict (tenant_id, user_id) do update set
+    shares_owed = b.shares_owed + excluded.shares_owed,
+    paid_total = b.paid_total + excluded.paid_total,
+    settlements_sent = b.settlements_sent + excluded.settlements_sent,
+    settlements_received = b.settlements_received + excluded.settlements_received,
+    updated_at = now();
+$$;
+
+-- Expense inserts and updates; an update that moves an expense to another
+-- tenant moves its shares with it
+create or replace function qione.qihome_expenses_balances()
+returns trigger
+language plpgsql
+security definer
+set search_path = qione
+as $$
+declare
+  d qione.qihome_balances[];
+begin
+  d := array(
+    select row(n.tenant_id, n.paid_by, 0, n.amount_cents, 0, 0, null)::qione.qihome_balances from new_rows n);
+  if tg_op = 'UPDATE' then
+    d := d || array(
+      select row(o.tenant_id, o.paid_by, 0, -o.amount_cents, 0, 0, null)::qione.qihome_balances from old_rows o);
+    d := d || array(
+      select row(t.tenant_id, s.user_id, t.sign * s.share_cents, 0, 0, 0, null)::qione.qihome_balances
+      from old_rows o
+      join new_rows n on n.id = o.id and n.tenant_id <> o.tenant_id
+      join qione.qihome_expense_shares s on s.expense_id = n.id
+      cross join lateral (values (n.tenant_id, 1), (o.tenant_id, -1)) t(tenant_id, sign));
+  end if;
+  perform qione.qihome_add_balances(d);
+  return null;
+end;
+$$;
+
+-- Expense deletes, row by row before the delete: the shares are still there
+-- to subtract, and are gone by the time the cascade's triggers could look up
+-- their expense
+create or replace function qione.qihome_expense_delete_balances()
+returns trigger
+language plpgsql
+security definer
+set search_path = qione
+as $$
+begin
+  perform qione.qihome_add_balances(
+    array[row(old.tenant_id, old.paid_by, 0, -old.amount_cents, 0, 0, null)::qione.qihome_balances]
+    || array(
+      select row(old.tenant_id, s.user_id, -s.share_cents, 0, 0, 0, null)::qione.qihome_balances
+      from qione.qihome_expense_shares s
+      where s.expense_id = old.id));
+  return old;
+end;
+$$;
+
+-- Shares whose expense no longer exists were settled by the expense delete
+create or replace function qione.qihome_shares_balances()
+returns trigger
+language plpgsql
+security definer
+set search_path = qione
+as $$
+declare
+  d qione.qihome_balances[] := '{}';
+begin
+  if tg_op <> 'DELETE' then
+    d := d || array(
+      select row(e.tenant_id, n.user_id, n.share_cents, 0, 0, 0, null)::qione.qihome_balances
+      from new_rows n join qione.qihome_expenses e on e.id = n.expense_id);
+  end if;
+  if tg_op <> 'INSERT' then
+    d := d || array(
+      select row(e.tenant_id, o.user_id, -o.share_cents, 0, 0, 0, null)::qione.qihome_balances
+      from old_rows o join qione.qihome_expenses e on e.id = o.expense_id);
+  end if;
+  perform qione.qihome_add_balances(d);
+  return null;
+end;
+$$;
+
+create or replace function qione.qihome_settlements_balances()
+returns trigger
+language plpgsql
+security definer
+set search_path = qione
+as $$
+declare
+  d qione.qihome_balances[] := '{}';
+begin
+  if tg_op <> 'DELETE' then
+    d := d || array(
+      select row(n.tenant_id, p.user_id, 0, 0, p.sent, p.received, null)::qione.qihome_balances
+      from new_rows n
+      cross join lateral (values (n.from_user, n.amount_cents, 0), (n.to_user, 0, n.amount_cents)) p(user_id, sent, received));
+  end if;
+  if tg_op <> 'INSERT' then
+    d := d || array(
+      select row(o.tenant_id, p.user_id, 0, 0, -p.sent, -p.received, null)::qione.qihome_balances
+      from old_rows o
+      cross join lateral (values (o.from_user, o.amount_cents, 0), (o.to_user, 0, o.amount_cents)) p(user_id, sent, received));
+  end if;
+  perform qione.qihome_add_balances(d);
+  return null;
+end;
+$$;
+
+drop trigger if exists qihome_expenses_balance_ins on qione.qihome_expenses;
+create trigger qihome_expenses_balance_ins after insert on qione.qihome_expenses
+  referencing new table as new_rows for each statement execute function qione.qihome_expenses_balances();
+drop trigger if exists qihome_expenses_balance_upd on qione.qihome_expenses;
+create trigger qihome_expenses_balance_upd after update on qione.qihome_expenses
+  referencing old table as old_rows new table as new_rows for each statement execute function qione.qihome_expenses_balances();
+drop trigger if exists qihome_expenses_balance_del on qione.qihome_expenses;
+create trigger qihome_expenses_balance_del before delete on qione.qihome_expenses
+  for each row execute function qione.qihome_expense_delete_balances();
+
+drop trigger if exists qihome_shares_balance_ins on qione.qihome_expense_shares;
+create trigger qihome_shares_balance_ins after insert on qione.qihome_expense_shares
+  referencing new table as new_rows for each statement execute function qione.qihome_shares_balances();
+drop trigger if exists qihome_shares_balance_upd on qione.qihome_expense_shares;
+create trigger qihome_shares_balance_upd after update on qione.qihome_expense_shares
+  referencing old table as old_rows new table as new_rows for each statement execute function qione.qihome_shares_balances();
+drop trigger if exists qihome_shares_balance_del on qione.qihome_expense_shares;
+create trigger qihome_shares_balance_del after delete on qione.qihome_expense_shares
+  referencing old table as old_rows for each statement execute function qione.qihome_shares_balances();
+
+drop trigger if exists qihome_settlements_balance_ins on qione.qihome_settlements;
+create trigger qihome_settlements_balance_ins after insert on qione.qihome_settlements
+  referencing new table as new_rows for each statement execute function qione.qihome_settlements_balances();
+drop trigger if exists qihome_settlements_balance_upd on qione.qihome_settlements;
+create trigger qihome_settlements_balance_upd after update on qione.qihome_settlements
+  referencing old table as old_rows new table as new_rows for each statement execute function qione.qihome_settlements_balances();
+drop trigger if exists qihome_settlements_balance_del on qione.qihome_settlements;
+create trigger qihome_settlements_balance_del after delete on qione.qihome_settlements
+  referencing old table as old_rows for each statement execute function qione.qihome_settlements_balances();
+
+-- =========
+-- Verification and repair
+-- =========
+
+-- One row per stored total that differs from the ledger
+create or replace function qione.qihome_balance_drift(p_tenant uuid default null)
+returns table (tenant_id uuid, user_id uuid, field text, stored bigint, expected bigint)
+language sql
+stable
+security definer
+set search_path = qione
+as $$
+  select coalesce(b.tenant_id, r.tenant_id), coalesce(b.user_id, r.user_id), f.field, f.stored, f.expected
+  from (select * from qione.qihome_balances x where p_tenant is null or x.tenant_id = p_tenant) b
+  full join qione.qihome_recompute_balances(p_tenant) r
+    on r.tenant_id = b.tenant_id and r.user_id = b.user_id
+  cross join lateral (values
+    ('shares_owed', coalesce(b.shares_owed, 0), coalesce(r.shares_owed, 0)),
+    ('paid_total', coalesce(b.paid_total, 0), coalesce(r.paid_total, 0)),
+    ('settlements_sent', coalesce(b.settlements_sent, 0), coalesce(r.settlements_sent, 0)),
+    ('settlements_received', coalesce(b.settlements_received, 0), coalesce(r.settlements_received, 0))
+  ) f(field, stored, expected)
+  where f.stored <> f.expected
+  order by 1, 2, 3;
+$$;
+
+-- Rewrites a tenant's balances (all tenants when null) from the ledger.
+-- Ledger writes are blocked for the duration so none lands between the
+-- recompute and the rewrite. Returns the number of balance rows written.
+create or replace function qione.qihome_repair_balances(p_tenant uuid default null)
+returns integer
+language plpgsql
+security definer
+set search_path = qione
+as $$
+declare
+  written integer;
+begin
+  lock table qione.qihome_expenses, qione.qihome_expense_shares, qione.qihome_settlements in share mode;
+
+  delete from qione.qihome_balances b where p_tenant is null or b.tenant_id = p_tenant;
+  insert into qione.qihome_balances
+    (tenant_id, user_id, shares_owed, paid_total, settlements_sent, settlements_received)
+  select r.tenant_id, r.user_id, r.shares_owed, r.paid_total, r.settlements_sent, r.settlements_received
+  from qione.qihome_recompute_balances(p_tenant) r
+  order by r.tenant_id, r.user_id;
+  get diagnostics written = row_count;
+
+  -- Cached settlement plans were computed from the old balances
+  perform qione.qihome_bump_ledger(array(
+    select t.id from qione.tenants t where p_tenant is null or t.id = p_tenant));
+  return written;
+end;
+$$;
+
+revoke execute on function qione.qihome_recompute_balances(uuid) from public, anon, authenticated;
+grant execute on function qione.qihome_recompute_balances(uuid) to service_role;
+revoke execute on function qione.qihome_add_balances(qione.qihome_balances[]) from public, anon, authenticated;
+grant execute on function qione.qihome_add_balances(qione.qihome_balances[]) to service_role;
+revoke execute on function qione.qihome_balance_drift(uuid) from public, anon, authenticated;
+grant execute on function qione.qihome_balance_drift(uuid) to service_role;
+revoke execute on function qione.qihome_repair_balances(uuid) from public, anon, authenticated;
+grant execute on function qione.qihome_repair_balances(uuid) to service_role;
+
+-- Initial fill from the existing ledger
+select qione.qihome_repair_balances(null);
+
+-- =========
+-- Balance view, now O(members)
+-- Same columns as before; members with no ledger rows read as zero
+-- =========
+create or replace view qione.v_qihome_member_balances as
+select
+  m.tenant_id,
+  m.user_id,
+  coalesce(b.shares_owed, 0) as shares_owed,
+  coalesce(b.paid_total, 0) as paid_total,
+  coalesce(b.settlements_sent, 0) as settlements_sent,
+  coalesce(b.settlements_received, 0) as settlements_received,
+  (coalesce(b.shares_owed, 0)
+   - coalesce(b.paid_total, 0)
+   + coalesce(b.settlements_sent, 0)
+   - coalesce(b.settlements_received, 0)) as net_cents
+from qione.tenant_members m
+left join qione.qihome_balances b on b.tenant_id = m.tenant_id and b.user_id = m.user_id
+where m.status = 'active';
+
+-- =========
+-- RLS: readable like the ledger; written only by the functions above
+-- =========
+alter table qione.qihome_balances enable row level security;
+
+drop policy if exists "qihome_balances_read" on qione.qihome_balances;
+create policy "qihome_balances_read"
+on qione.qihome_balances
+for select
+to authenticated
+using (qione.has_module_access(tenant_id, 'qihome', auth.uid(), 'read'));
+
+commit;
@@ -0,0 +1,58 @@
+-- Everything the Worker needs to authorize a caller in one call
+-- resolve_member_access(tenant, user) returns the caller's membership and
+-- access level for every module enabled in the tenant, with the same rules
+-- as module_access_level(), so one RPC replaces an is_tenant_member /
+-- has_module_access call per check. The Worker caches the result briefly
+-- (apps/qione-worker/src/access.ts).
+begin;
+
+-- { "member": bool, "modules": { "<module_key>": "none" | "read" | "write" | "admin" } }
+create or replace function qione.resolve_member_access(p_tenant uuid, p_user uuid)
+returns jsonb
+language sql
+stable
+security definer
+set search_path = qione
+as $$
+  with member as (
+    select qione.is_tenant_member(p_tenant, p_user) as ok
+  ),
+  levels as (
+    select
+      tm.module_key,
+      mma.assigned,
+      max(case mra.access when 'read' then 1 when 'write' then 2 when 'admin' then 3 else 0 end) as lv
+    from qione.tenant_modules tm
+    left join qione.member_module_assignments mma
+      on mma.tenant_id = tm.tenant_id and mma.user_id = p_user and mma.module_key = tm.module_key
+    left join qione.member_roles mr
+      on mr.tenant_id = tm.tenant_id and mr.user_id = p_user
+    left join qione.module_role_access mra
+      on mra.tenant_id = mr.tenant_id and mra.role_id = mr.role_id and mra.module_key = tm.module_key
+    where tm.tenant_id = p_tenant
+      and tm.is_enabled
+    group by tm.module_key, mma.assigned
+  )
+  select jsonb_build_object(
+    'member', member.ok,
+    'modules', case when member.ok then coalesce((
+      select jsonb_object_agg(l.module_key,
+        case
+          when l.assigned = false then 'none'
+          when l.lv = 3 then 'admin'
+          when l.lv = 2 then 'write'
+          when l.lv = 1 then 'read'
+          -- explicit assignment without a role mapping reads by default
+          when l.assigned then 'read'
+          else 'none'
+        end)
+      from levels l), '{}'::jsonb)
+    else '{}'::jsonb end
+  )
+  from member;
+$$;
+
+revoke execute on function qione.resolve_member_access(uuid, uuid) from public, anon, authenticated;
+grant execute on function qione.resolve_member_access(uuid, uuid) to service_role;
+
+commit;
@@ -0,0 +1,141 @@
+-- Tenant bootstrap in one call
+-- bootstrap_tenant() creates a tenant with its roles, owner membership,
+-- enabled modules and role access from a declarative spec, in one statement
+-- and so one transaction; bootstrap_tenants() does the same for many tenants
+-- at once (migrations, imports). The Worker's POST /api/bootstrap is a single
+-- RPC to it.
+begin;
+
+-- The defaults POST /api/bootstrap has always applied:
+--   roles       name + rank
+--   owner_role  role given to the owner
+--   modules     module keys enabled for the tenant
+--   access      role name -> module key -> none/read/write/admin; the key "*"
+--               stands for every qione.modules row not listed for that role
+create or replace function qione.default_tenant_spec()
+returns jsonb
+language sql
+immutable
+as $$
+  select '{
+    "roles": [
+      {"name": "Owner", "rank": 1},
+      {"name": "Member", "rank": 50},
+      {"name": "Viewer", "rank": 90}
+    ],
+    "owner_role": "Owner",
+    "owner_display_name": "Owner",
+    "modules": ["qione_admin", "qihome"],
+    "access": {
+      "Owner": {"qione_admin": "admin", "qihome": "admin"},
+      "Member": {"qione_admin": "none", "qihome": "write"},
+      "Viewer": {"qione_admin": "none", "qihome": "read"}
+    }
+  }'::jsonb;
+$$;
+
+-- p_tenants: [{"name", "type" (default home), "owner" (user id), "display_name"}]
+-- Returns each new tenant id with its 1-based position in p_tenants.
+create or replace function qione.bootstrap_tenants(p_tenants jsonb, p_spec jsonb default null)
+returns table (ord bigint, tenant_id uuid)
+language plpgsql
+security definer
+set search_path = qione
+as $$
+#variable_conflict use_column
+declare
+  spec jsonb := coalesce(p_spec, qione.default_tenant_spec());
+begin
+  if jsonb_typeof(p_tenants) is distinct from 'array' then
+    raise exception 'bootstrap_tenants: p_tenants must be a JSON array';
+  end if;
+  if exists (
+    select 1 from jsonb_array_elements(p_tenants) e
+    where coalesce(btrim(e->>'name'), '') = '' or e->>'owner' is null
+  ) then
+    raise exception 'bootstrap_tenants: every tenant needs a name and an owner';
+  end if;
+  if not exists (
+    select 1 from jsonb_array_elements(spec->'roles') r where r->>'name' = spec->>'owner_role'
+  ) then
+    raise exception 'bootstrap_tenants: owner_role % is not one of the spec roles', spec->>'owner_role';
+  end if;
+
+  -- Ids are generated up front so every insert below can reference them in
+  -- the same statement; foreign keys are checked at its end
+  return query
+  with t as materialized (
+    select gen_random_uuid() as id, e.ord,
+           btrim(e.doc->>'name') as name,
+           coalesce(e.doc->>'type', 'home') as type,
+           (e.doc->>'owner')::uuid as owner,
+           coalesce(e.doc->>'display_name', spec->>'owner_display_name') as display_name
+    from jsonb_array_elements(p_tenants) with ordinality as e(doc, ord)
+  ),
+  r as materialized (
+    select gen_random_uuid() as id, t.id as tenant_id, x->>'name' as name, coalesce((x->>'rank')::int, 100) as rank
+    from t cross join jsonb_array_elements(spec->'roles') x
+  ),
+  ins_tenants as (
+    insert into qione.tenants (id, name, type, created_by)
+    select t.id, t.name, t.type, t.owner from t
+  ),
+  ins_roles as (
+    insert into qione.roles (id, tenant_id, name, rank)
+    select r.id, r.tenant_id, r.name, r.rank from r
+  ),
+  ins_members as (
+    insert into qione.tenant_members (tenant_id, user_id, status, display_name)
+    select t.id, t.owner, 'active', t.display_name from t
+  ),
+  ins_member_roles as (
+    insert into qione.member_roles (tenant_id, user_id, role_id)
+    select t.id, t.owner, r.id
+    from t join r on r.tenant_id = t.id and r.name = spec->>'owner_role'
+  ),
+  ins_modules as (
+    insert into qione.tenant_modules (tenant_id, module_key, is_enabled, settings)
+    select t.id, m.key, true, '{}'::jsonb
+    from t cross join jsonb_array_elements_text(spec->'modules') m(key)
+  ),
+  ins_access as (
+    insert into qione.module_role_access (tenant_id, module_key, role_id, access)
+    select r.tenant_id, a.module_key, r.id, a.access
+    from r
+    cross join lateral (
+      select e.key as module_key, e.value as access
+      from jsonb_each_text(coalesce(spec->'access'->r.name, '{}'::jsonb)) e
+      where e.key <> '*'
+      union all
+      select m.key, spec->'access'->r.name->>'*'
+      from qione.modules m
+      where spec->'access'->r.name ? '*'
+        and not (spec->'access'->r.name ? m.key)
+    ) a
+  )
+  select t.ord, t.id from t order by t.ord;
+end;
+$$;
+
+create or replace function qione.bootstrap_tenant(
+  p_name text, p_type text, p_owner uuid, p_spec jsonb default null, p_display_name text default null
+)
+returns uuid
+language sql
+security definer
+set search_path = qione
+as $$
+  select b.tenant_id
+  from qione.bootstrap_tenants(
+    jsonb_build_array(jsonb_strip_nulls(jsonb_build_object(
+      'name', p_name, 'type', p_type, 'owner', p_owner, 'display_name', p_display_name))),
+    p_spec
+  ) b;
+$$;
+
+revoke execute on function qione.bootstrap_tenants(jsonb, jsonb) from public, anon, authenticated;
+grant execute on function qione.bootstrap_tenants(jsonb, jsonb) to service_role;
+revoke execute on function qione.bootstrap_tenant(text, text, uuid, jsonb, text) from public, anon, authenticated;
+grant execute on function qione.bootstrap_tenant(text, text, uuid, jsonb, text) to service_role;
+
+commit;
@@ -0,0 +1,56 @@
+-- Tenant member listing with emails in one query
+-- list_tenant_members() joins tenant_members to auth.users for one page of
+-- members, so the Worker no longer calls the admin API once per member.
+-- Pages follow (joined_at, user_id); next_cursor is null on the last page.
+begin;
+
+create index if not exists tenant_members_tenant_joined_idx
+  on qione.tenant_members (tenant_id, joined_at, user_id);
+
+-- { "members": [{tenant_id, user_id, status, display_name, joined_at, email}],
+--   "next_cursor": "<joined_at>|<user_id>" | null }
+create or replace function qione.list_tenant_members(
+  p_tenant uuid, p_limit int default 200, p_cursor text default null
+)
+returns jsonb
+language sql
+stable
+security definer
+set search_path = qione
+as $$
+  with lim as (
+    select least(greatest(coalesce(p_limit, 200), 1), 1000) as n
+  ),
+  page as (
+    select tm.tenant_id, tm.user_id, tm.status, tm.display_name, tm.joined_at, u.email
+    from qione.tenant_members tm
+    left join auth.users u on u.id = tm.user_id
+    where tm.tenant_id = p_tenant
+      and (p_cursor is null
+           or (tm.joined_at, tm.user_id)
+              > (split_part(p_cursor, '|', 1)::timestamptz, split_part(p_cursor, '|', 2)::uuid))
+    order by tm.joined_at, tm.user_id
+    limit (select n from lim) + 1
+  ),
+  numbered as (
+    select p.*, row_number() over (order by p.joined_at, p.user_id) as n from page p
+  )
+  select jsonb_build_object(
+    'members', coalesce((
+      select jsonb_agg(to_jsonb(x) - 'n' order by x.n)
+      from numbered x
+      where x.n <= (select n from lim)
+    ), '[]'::jsonb),
+    'next_cursor', (
+      select to_jsonb(x.joined_at)#>>'{}' || '|' || x.user_id
+      from numbered x
+      where x.n = (select n from lim)
+        and exists (select 1 from numbered y where y.n > x.n)
+    )
+  );
+$$;
+
+revoke execute on function qione.list_tenant_members(uuid, int, text) from public, anon, authenticated;
+grant execute on function qione.list_tenant_members(uuid, int, text) to service_role;
+
+commit;
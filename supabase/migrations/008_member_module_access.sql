@@ -0,0 +1,269 @@
+-- Effective module access, precomputed
+-- qione.member_module_access holds module_access_level() for every active
+-- member x enabled module, kept current by triggers on everything that feeds
+-- it (memberships, member roles, role access, assignments, tenant modules).
+-- v_launcher_modules, has_module_access() and resolve_member_access() read
+-- it instead of re-walking the role tables per row.
+-- module_access_level() stays as the from-scratch definition; the triggers
+-- must agree with it (tools/bench_launcher_access.py checks both).
+begin;
+
+create table if not exists qione.member_module_access (
+  tenant_id uuid not null,
+  user_id uuid not null,
+  module_key text not null references qione.modules(key) on delete cascade,
+  access text not null check (access in ('none','read','write','admin')),
+  primary key (tenant_id, user_id, module_key),
+  foreign key (tenant_id, user_id) references qione.tenant_members(tenant_id, user_id) on delete cascade
+);
+
+-- Recomputes the rows of one tenant, or of some of its members, in one
+-- statement that writes only rows whose level changed. Refreshes of one
+-- tenant are serialized (advisory lock held to commit) so each sees the role
+-- changes committed before it.
+create or replace function qione.refresh_member_access(p_tenant uuid, p_users uuid[] default null)
+returns void
+language plpgsql
+security definer
+set search_path = qione
+as $$
+begin
+  perform pg_advisory_xact_lock(hashtext('qione.member_module_access'), hashtext(p_tenant::text));
+
+  with members as (
+    select tm.user_id from qione.tenant_members tm
+    where tm.tenant_id = p_tenant and tm.status = 'active'
+      and (p_users is null or tm.user_id = any(p_users))
+  ),
+  mods as (
+    select tmod.module_key from qione.tenant_modules tmod
+    where tmod.tenant_id = p_tenant and tmod.is_enabled
+  ),
+  role_levels as (
+    select mr.user_id, mra.module_key,
+           max(case mra.access when 'read' then 1 when 'write' then 2 when 'admin' then 3 else 0 end) as lv
+    from qione.member_roles mr
+    join qione.module_role_access mra on mra.tenant_id = mr.tenant_id and mra.role_id = mr.role_id
+    where mr.tenant_id = p_tenant
+      and (p_users is null or mr.user_id = any(p_users))
+    group by mr.user_id, mra.module_key
+  ),
+  levels as materialized (
+    select m.user_id, d.module_key,
+      case
+        when mma.assigned = false then 'none'
+        when rl.lv = 3 then 'admin'
+        when rl.lv = 2 then 'write'
+        when rl.lv = 1 then 'read'
+        -- explicit assignment without a role mapping reads by default
+        when mma.assigned then 'read'
+        else 'none'
+      end as access
+    from members m
+    cross join mods d
+    left join role_levels rl on rl.user_id = m.user_id and rl.module_key = d.module_key
+    left join qione.member_module_assignments mma
+      on mma.tenant_id = p_tenant and mma.user_id = m.user_id and mma.module_key = d.module_key
+  ),
+  stale as (
+    delete from qione.member_module_access a
+    where a.tenant_id = p_tenant
+      and (p_users is null or a.user_id = any(p_users))
+      and not exists (select 1 from levels l where l.user_id = a.user_id and l.module_key = a.module_key)
+  )
+  insert into qione.member_module_access as a (tenant_id, user_id, module_key, access)
+  select p_tenant, l.user_id, l.module_key, l.access
+  from levels l
+  order by l.user_id, l.module_key
+  on conflict (tenant_id, user_id, module_key) do update set access = excluded.access
+  where a.access is distinct from excluded.access;
+end;
+$$;
+
+-- Refreshes (tenant, user) pairs; a null user refreshes the whole tenant
+create or replace function qione.refresh_member_access_pairs(p_tenants uuid[], p_users uuid[])
+returns void
+language plpgsql
+security definer
+set search_path = qione
+as $$
+declare
+  t record;
+begin
+  for t in
+    select p.tenant_id, bool_or(p.user_id is null) as whole, array_agg(distinct p.user_id) as users
+    from unnest(p_tenants, p_users) as p(tenant_id, user_id)
+    where exists (select 1 from qione.tenants tn where tn.id = p.tenant_id)
+    group by p.tenant_id
+    order by p.tenant_id
+  loop
+    perform qione.refresh_member_access(t.tenant_id, case when t.whole then null else t.users end);
+  end loop;
+end;
+$$;
+
+-- Statement-level triggers: the changed rows name the (tenant, user) pairs
+-- to refresh. TG_ARGV[0] says how:
+--   user  rows carry tenant_id and user_id (tenant_members, member_roles,
+--         member_module_assignments)
+--   role  rows carry tenant_id and role_id; refresh the role's holders
+--         (module_role_access)
+--   tenant  refresh every member (tenant_modules)
+create or replace function qione.member_access_touch()
+returns trigger
+language plpgsql
+security definer
+set search_path = qione
+as $$
+declare
+  tenants uuid[] := '{}';
+  users uuid[] := '{}';
+  rows_json jsonb := '[]'::jsonb;
+begin
+  if tg_op <> 'DELETE' then
+    rows_json := rows_json || coalesce((select jsonb_agg(to_jsonb(n)) from new_rows n), '[]'::jsonb);
+  end if;
+  if tg_op <> 'INSERT' then
+    rows_json := rows_json || coalesce((select jsonb_agg(to_jsonb(o)) from old_rows o), '[]'::jsonb);
+  end if;
+
+  if tg_argv[0] = 'user' then
+    select array_agg((r->>'tenant_id')::uuid), array_agg((r->>'user_id')::uuid)
+      into tenants, users
+    from jsonb_array_elements(rows_json) r;
+  elsif tg_argv[0] = 'role' then
+    select array_agg(mr.tenant_id), array_agg(mr.user_id)
+      into tenants, users
+    from qione.member_roles mr
+    where (mr.tenant_id, mr.role_id) in (
+      select (r->>'tenant_id')::uuid, (r->>'role_id')::uuid from jsonb_array_elements(rows_json) r
+    );
+  else
+    select array_agg((r->>'tenant_id')::uuid), array_agg(null::uuid)
+      into tenants, users
+    from jsonb_array_elements(rows_json) r;
+  end if;
+
+  if tenants is not null then
+    perform qione.refresh_member_access_pairs(tenants, users);
+  end if;
+  return null;
+end;
+$$;
+
+drop trigger if exists tenant_members_access_ins on qione.tenant_members;
+create trigger tenant_members_access_ins after insert on qione.tenant_members
+  referencing new table as new_rows for each statement execute function qione.member_access_touch('user');
+drop trigger if exists tenant_members_access_upd on qione.tenant_members;
+create trigger tenant_members_access_upd after update on qione.tenant_members
+  referencing old table as old_rows new table as new_rows for each statement execute function qione.member_access_touch('user');
+
+drop trigger if exists member_roles_access_ins on qione.member_roles;
+create trigger member_roles_access_ins after insert on qione.member_roles
+  referencing new table as new_rows for each statement execute function qione.member_access_touch('user');
+drop trigger if exists member_roles_access_upd on qione.member_roles;
+create trigger member_roles_access_upd after update on qione.member_roles
+  referencing old table as old_rows new table as new_rows for each statement execute function qione.member_access_touch('user');
+drop trigger if exists member_roles_access_del on qione.member_roles;
+create trigger member_roles_access_del after delete on qione.member_roles
+  referencing old table as old_rows for each statement execute function qione.member_access_touch('user');
+
+drop trigger if exists member_module_assignments_access_ins on qione.member_module_assignments;
+create trigger member_module_assignments_access_ins after insert on qione.member_module_assignments
+  referencing new table as new_rows for each statement execute function qione.member_access_touch('user');
+drop trigger if exists member_module_assignments_access_upd on qione.member_module_assignments;
+create trigger member_module_assignments_access_upd after update on qione.member_module_assignments
+  referencing old table as old_rows new table as new_rows for each statement execute function qione.member_access_touch('user');
+drop trigger if exists member_module_assignments_access_del on qione.member_module_assignments;
+create trigger member_module_assignments_access_del after delete on qione.member_module_assignments
+  referencing old table as old_rows for each statement execute function qione.member_access_touch('user');
+
+drop trigger if exists module_role_access_access_ins on qione.module_role_access;
+create trigger module_role_access_access_ins after insert on qione.module_role_access
+  referencing new table as new_rows for each statement execute function qione.member_access_touch('role');
+drop trigger if exists module_role_access_access_upd on qione.module_role_access;
+create trigger module_role_access_access_upd after update on qione.module_role_access
+  referencing old table as old_rows new table as new_rows for each statement execute function qione.member_access_touch('role');
+drop trigger if exists module_role_access_access_del on qione.module_role_access;
+create trigger module_role_access_access_del after delete on qione.module_role_access
+  referencing old table as old_rows for each statement execute function qione.member_access_touch('role');
+
+drop trigger if exists tenant_modules_access_ins on qione.tenant_modules;
+create trigger tenant_modules_access_ins after insert on qione.tenant_modules
+  referencing new table as new_rows for each statement execute function qione.member_access_touch('tenant');
+drop trigger if exists tenant_modules_access_upd on qione.tenant_modules;
+create trigger tenant_modules_access_upd after update on qione.tenant_modules
+  referencing old table as old_rows new table as new_rows for each statement execute function qione.member_access_touch('tenant');
+drop trigger if exists tenant_modules_access_del on qione.tenant_modules;
+create trigger tenant_modules_access_del after delete on qione.tenant_modules
+  referencing old table as old_rows for each statement execute function qione.member_access_touch('tenant');
+
+-- Member deletes need no trigger: the foreign key cascades their rows away
+
+-- Initial fill
+select qione.refresh_member_access(t.id) from qione.tenants t order by t.id;
+
+-- =========
+-- Readers
+-- =========
+
+create or replace function qione.has_module_access(p_tenant uuid, p_module text, p_user uuid, p_min text)
+returns boolean
+language sql
+stable
+security definer
+set search_path = qione
+as $$
+  select coalesce((
+    select case a.access when 'read' then 1 when 'write' then 2 when 'admin' then 3 else 0 end
+    from qione.member_module_access a
+    where a.tenant_id = p_tenant and a.user_id = p_user and a.module_key = p_module
+  ), 0) >= case p_min when 'read' then 1 when 'write' then 2 when 'admin' then 3 else 999 end;
+$$;
+
+create or replace function qione.resolve_member_access(p_tenant uuid, p_user uuid)
+returns jsonb
+language sql
+stable
+security definer
+set search_path = qione
+as $$
+  select jsonb_build_object(
+    'member', qione.is_tenant_member(p_tenant, p_user),
+    'modules', coalesce((
+      select jsonb_object_agg(a.module_key, a.access)
+      from qione.member_module_access a
+      where a.tenant_id = p_tenant and a.user_id = p_user
+    ), '{}'::jsonb)
+  );
+$$;
+
+create or replace view qione.v_launcher_modules as
+select
+  a.tenant_id,
+  a.user_id,
+  m.key as module_key,
+  m.name,
+  m.description,
+  m.icon,
+  m.route,
+  a.access as access_level
+from qione.member_module_access a
+join qione.modules m on m.key = a.module_key and m.is_active = true;
+
+-- Internal; the triggers and the functions above are the only writers
+revoke execute on function qione.refresh_member_access(uuid, uuid[]) from public, anon, authenticated;
+grant execute on function qione.refresh_member_access(uuid, uuid[]) to service_role;
+revoke execute on function qione.refresh_member_access_pairs(uuid[], uuid[]) from public, anon, authenticated;
+grant execute on function qione.refresh_member_access_pairs(uuid[], uuid[]) to service_role;
+
+alter table qione.member_module_access enable row level security;
+
+drop policy if exists "member_module_access_select_own" on qione.member_module_access;
+create policy "member_module_access_select_own"
+on qione.member_module_access
+for select
+to authenticated
+using (user_id = auth.uid());
+
+commit;
@@ -0,0 +1,204 @@
+# Launcher and permission checks: precomputed member_module_access vs. the
+# per-row module_access_level() calls the launcher view used to make.
+#
+#   legacy    the pre-008 v_launcher_modules body and has_module_access
+#             (module_access_level per member x module)
+#   table     v_launcher_modules / has_module_access as of migration 008
+#
+# Seeds one tenant with --members members (auth.users rows included),
+# --modules modules, four roles and a sprinkling of per-member assignments,
+# then times:
+#   launcher-user    one member's launcher, --repeat members
+#   launcher-tenant  every member's launcher
+#   check            has_module_access for --repeat (member, module) pairs
+#   role-change      one role's access changed (trigger refresh of its holders)
+# and checks that both give the same levels. Everything runs in one
+# transaction that is rolled back, so the database is left as it was.
+#
+#   python tools/bench_launcher_access.py --dsn postgresql://localhost/postgres --members 10000 --modules 20
+import argparse
+import json
+import os
+import sys
+import time
+
+LEGACY_LAUNCHER = """
+select tm.tenant_id, tm.user_id, m.key as module_key, m.name, m.description, m.icon, m.route,
+       qione.module_access_level(tm.tenant_id, m.key, tm.user_id) as access_level
+from qione.tenant_members tm
+join qione.tenant_modules tenm on tenm.tenant_id = tm.tenant_id and tenm.is_enabled = true
+join qione.modules m on m.key = tenm.module_key and m.is_active = true
+where tm.status = 'active'
+"""
+
+LEGACY_CHECK = """
+select (case qione.module_access_level(%s, %s, %s)
+          when 'read' then 1 when 'write' then 2 when 'admin' then 3 else 0 end) >= 1
+"""
+
+ROLES = (("Owner", 1, "admin"), ("Member", 50, "write"), ("Viewer", 90, "read"), ("Guest", 99, "none"))
+
+
+def _connect(dsn):
+    try:
+        import psycopg
+    except ImportError:
+        try:
+            import psycopg2 as psycopg
+        except ImportError:
+            raise SystemExit("bench_launcher_access needs psycopg or psycopg2") from None
+    return psycopg.connect(dsn)
+
+
+def seed(cur, members, modules):
+    cur.execute(
+        "insert into qione.modules (key, name, route) "
+        "select 'bench_' || g, 'Bench ' || g, '/bench/' || g from generate_series(1, %s) g",
+        (modules,),
+    )
+    cur.execute(
+        "insert into auth.users (id, email, aud, role) "
+        "select gen_random_uuid(), 'bench' || g || '@example.test', 'authenticated', 'authenticated' "
+        "from generate_series(1, %s) g returning id",
+        (members,),
+    )
+    users = [row[0] for row in cur.fetchall()]
+    cur.execute(
+        "insert into qione.tenants (name, type, created_by) values ('Launcher bench', 'business', %s) returning id",
+        (users[0],),
+    )
+    tenant = cur.fetchone()[0]
+    cur.execute(
+        "insert into qione.tenant_members (tenant_id, user_id, status) "
+        "select %s, u, case when mod(o, 50) = 0 then 'invited' else 'active' end "
+        "from unnest(%s::uuid[]) with ordinality as x(u, o)",
+        (tenant, users),
+    )
+    cur.execute(
+        "insert into qione.tenant_modules (tenant_id, module_key, is_enabled) "
+        "select %s, key, key <> 'bench_1' from qione.modules where key like 'bench\\_%%'",
+        (tenant,),
+    )
+    for name, rank, access in ROLES:
+        cur.execute(
+            "insert into qione.roles (tenant_id, name, rank) values (%s, %s, %s) returning id", (tenant, name, rank)
+        )
+        role = cur.fetchone()[0]
+        cur.execute(
+            "insert into qione.module_role_access (tenant_id, module_key, role_id, access) "
+            "select %s, key, %s, case when mod(length(key), 2) = 0 and %s = 'admin' then 'write' else %s end "
+            "from qione.modules where key like 'bench\\_%%'",
+            (tenant, role, access, access),
+        )
+    # Spread members over the roles (some hold two), plus assignment overrides
+    cur.execute(
+        "insert into qione.member_roles (tenant_id, user_id, role_id) "
+        "select %s, x.u, r.id from unnest(%s::uuid[]) with ordinality as x(u, o) "
+        "join qione.roles r on r.tenant_id = %s "
+        " and (r.rank = (array[1, 50, 90, 99])[1 + mod(x.o, 4)::int] or (mod(x.o, 7) = 0 and r.rank = 90))",
+        (tenant, users, tenant),
+    )
+    cur.execute(
+        "insert into qione.member_module_assignments (tenant_id, user_id, module_key, assigned) "
+        "select %s, x.u, 'bench_' || (1 + mod(x.o, %s)), mod(x.o, 3) <> 0 "
+        "from unnest(%s::uuid[]) with ordinality as x(u, o) where mod(x.o, 11) = 0",
+        (tenant, modules, users),
+    )
+    cur.execute("analyze qione.member_module_access")
+    return tenant, users
+
+
+def _timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, (time.perf_counter() - start) * 1000
+
+
+def run(dsn, members, modules, repeat):
+    conn = _connect(dsn)
+    report = {"members": members, "modules": modules}
+    try:
+        with conn.cursor() as cur:
+            (tenant, users), ms = _timed(lambda: seed(cur, members, modules))
+            report["seed_ms"] = round(ms, 1)
+            sample = users[:: max(1, len(users) // repeat)][:repeat]
+
+            def launcher_user(sql):
+                for user in sample:
+                    cur.execute(f"select * from ({sql}) v where v.tenant_id = %s and v.user_id = %s", (tenant, user))
+                    cur.fetchall()
+
+            def launcher_tenant(sql):
+                cur.execute(
+                    f"select module_key, access_level, user_id::text from ({sql}) v where v.tenant_id = %s", (tenant,)
+                )
+                return {(r[2], r[0]): r[1] for r in cur.fetchall()}
+
+            def check(sql):
+                for i, user in enumerate(sample):
+                    cur.execute(sql, (tenant, f"bench_{1 + i % modules}", user))
+                    cur.fetchone()
+
+            table = "select * from qione.v_launcher_modules"
+            table_check = "select qione.has_module_access(%s, %s, %s, 'read')"
+            for name, sql, check_sql in (("legacy", LEGACY_LAUNCHER, LEGACY_CHECK), ("table", table, table_check)):
+                _, user_ms = _timed(lambda: launcher_user(sql))
+                levels, tenant_ms = _timed(lambda: launcher_tenant(sql))
+                _, check_ms = _timed(lambda: check(check_sql))
+                report[name] = {
+                    "launcher_user_ms": round(user_ms / len(sample), 3),
+                    "launcher_tenant_ms": round(tenant_ms, 1),
+                    "check_ms": round(check_ms / len(sample), 3),
+                    "rows": len(levels),
+                }
+                report[f"_{name}_levels"] = levels
+
+            report["mismatches"] = sum(
+                1 for key, level in report.pop("_legacy_levels").items() if report["_table_levels"].get(key) != level
+            ) + abs(report["legacy"]["rows"] - report["table"]["rows"])
+            report.pop("_table_levels")
+
+            _, ms = _timed(
+                lambda: cur.execute(
+                    "update qione.module_role_access set access = 'read' "
+                    "where tenant_id = %s and role_id = (select id from qione.roles where tenant_id = %s and name = 'Member')",
+                    (tenant, tenant),
+                )
+            )
+            report["role_change_ms"] = round(ms, 1)
+    finally:
+        conn.rollback()
+        conn.close()
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark launcher access: precomputed table vs. per-row function.")
+    parser.add_argument("--dsn", default=None, help="connection string (default: $DATABASE_URL)")
+    parser.add_argument("--members", type=int, default=10000)
+    parser.add_argument("--modules", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=200, help="members sampled for per-user timings")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args(argv)
+
+    dsn = args.dsn or os.environ.get("DATABASE_URL")
+    if not dsn:
+        parser.error("--dsn or DATABASE_URL is required")
+    report = run(dsn, args.members, args.modules, args.repeat)
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return 0
+    print(f"{report['members']:,} members x {report['modules']} modules (seeded in {report['seed_ms']:,} ms)")
+    print(f"{'':>8} {'launcher/user':>14} {'launcher/tenant':>16} {'check':>10}")
+    for name in ("legacy", "table"):
+        row = report[name]
+        print(
+            f"{name:>8} {row['launcher_user_ms']:>11.3f} ms {row['launcher_tenant_ms']:>13,.1f} ms"
+            f" {row['check_ms']:>7.3f} ms"
+        )
+    print(f"role change refresh: {report['role_change_ms']:,} ms; level mismatches: {report['mismatches']}")
+    return 1 if report["mismatches"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
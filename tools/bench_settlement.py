@@ -0,0 +1,92 @@
+# Settlement plans at 2 to 200 members: transfer count and time per plan.
+#
+#   pairwise  every debtor pays every creditor a proportional part (what a
+#             client left to work it out from net balances ends up showing)
+#   greedy    settlement.greedy
+#   exact     settlement.exact, up to EXACT_MAX members with a balance
+#
+# Balances come from simulated households: --expenses per member, each paid
+# by one member and split evenly across a random subset.
+#
+#   python tools/bench_settlement.py --sizes 2,5,10,15,50,200 --repeat 20
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from settlement import EXACT_MAX, exact, greedy  # noqa: E402
+
+
+def household(members, expenses_per_member, seed):
+    rng = random.Random(f"{seed}:{members}")
+    users = [f"{i:08x}-0000-4000-8000-{rng.getrandbits(48):012x}" for i in range(members)]
+    net = dict.fromkeys(users, 0)
+    for _ in range(members * expenses_per_member):
+        payer = rng.choice(users)
+        amount = rng.randint(500, 20000)
+        split = rng.sample(users, rng.randint(1, min(members, 6)))
+        share, remainder = divmod(amount, len(split))
+        net[payer] -= amount
+        for i, user in enumerate(split):
+            net[user] += share + (1 if i < remainder else 0)
+    return [{"user_id": user, "net_cents": cents} for user, cents in net.items()]
+
+
+def pairwise(balances):
+    debtors = [(b["user_id"], b["net_cents"]) for b in balances if b["net_cents"] > 0]
+    creditors = [(b["user_id"], -b["net_cents"]) for b in balances if b["net_cents"] < 0]
+    owed = sum(c for _, c in creditors)
+    return [(d, c, debt * credit // owed) for d, debt in debtors for c, credit in creditors]
+
+
+def _time(fn, balances, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        transfers = fn(balances)
+    return transfers, (time.perf_counter() - start) / repeat * 1e6
+
+
+def run(sizes, repeat, expenses_per_member=20, seed=42):
+    report = {}
+    for members in sizes:
+        balances = household(members, expenses_per_member, seed)
+        active = sum(1 for b in balances if b["net_cents"])
+        row = {"members": members, "with_balance": active}
+        for name, fn in (("pairwise", pairwise), ("greedy", greedy), ("exact", exact)):
+            if name == "exact" and active > EXACT_MAX:
+                continue
+            transfers, us = _time(fn, balances, 1 if name == "exact" else repeat)
+            row[name] = {"transfers": len(transfers), "us": round(us, 1)}
+        report[str(members)] = row
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark settlement planning by household size.")
+    parser.add_argument("--sizes", default="2,3,5,8,10,12,15,20,50,100,200")
+    parser.add_argument("--repeat", type=int, default=50, help="runs per pairwise/greedy timing")
+    parser.add_argument("--expenses", type=int, default=20, help="expenses per member")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args(argv)
+
+    report = run([int(s) for s in args.sizes.split(",") if s], args.repeat, args.expenses, args.seed)
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return 0
+    print(f"{'members':>7} {'pairwise':>14} {'greedy':>18} {'exact':>20}")
+    for row in report.values():
+        cells = []
+        for name in ("pairwise", "greedy", "exact"):
+            cell = row.get(name)
+            cells.append(f"{cell['transfers']:>5} in {cell['us']:>9,.1f} us" if cell else "-")
+        print(f"{row['members']:>7} {cells[0]:>14} {cells[1]:>18} {cells[2]:>20}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,712 @@
+# Index advisor: the queries the apps actually run vs. the indexes the schema has.
+#
+# Query shapes come from three places:
+#   client  Supabase query-builder chains in apps/**/*.{js,jsx,ts,tsx}:
+#           .from("t") with .eq/.in/.match/.is/.not/.gt.../.order/.limit/
+#           .range/.single after it, .schema("s") before it, and helpers such
+#           as `selectVitals = () => supabase.from("vitals").select(...)`
+#           followed through their call sites. A file's default schema is the
+#           db.schema of the nearest createClient(), else public.
+#   sql     SQL string literals (pool.query("SELECT ... WHERE ... ORDER BY
+#           ... LIMIT n")) on a single table; pg clients use public.
+#   policy  row level security policies whose USING clause reads tenant_id;
+#           every query through PostgREST on those tables is per tenant.
+#
+# Each shape becomes a candidate index: equality columns (tenant_id first),
+# then the ORDER BY columns, or the first range column when there is no
+# ORDER BY; IS [NOT] NULL and boolean tests become a partial-index WHERE.
+# Candidates already served by the primary key or an index with the same
+# leading columns are dropped, as are ones that are a prefix of another.
+#
+# Tables and indexes are read with tools/schema_snapshot.py: the snapshot,
+# supabase/migrations and the *.sql files under apps/ by default. The
+# snapshot has no index data, so with --dsn the live indexes are read from
+# pg_index instead, and each candidate is checked: EXPLAIN a representative
+# query (filter values taken from the table's most common row), create the
+# index, ANALYZE, EXPLAIN again, roll back. Run that against a local or
+# staging copy with realistic data; it holds a SHARE lock per table while it
+# runs and the planner ignores any index on a near-empty table.
+#
+#   python tools/index_advisor.py
+#   python tools/index_advisor.py --schemas qione --sql > supabase/migrations/009_query_indexes.sql
+#   python tools/index_advisor.py --dsn postgresql://localhost/postgres --json
+import argparse
+import glob
+import json
+import os
+import re
+import sys
+
+from schema_snapshot import FORMAT, SnapshotError, load, qname, quote, split_statements, split_top
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SOURCE_EXTS = (".js", ".jsx", ".ts", ".tsx", ".mjs")
+SKIP_DIRS = {"node_modules", "dist", "build", "public", ".wrangler", ".git"}
+
+# Filters PostgREST can use an index for, by builder method
+EQ_METHODS = {"eq", "in"}
+RANGE_METHODS = {"gt", "gte", "lt", "lte"}
+WRITE_METHODS = {"insert", "upsert"}
+
+DEFAULT_LIMIT = 50
+
+
+def _connect(dsn):
+    try:
+        import psycopg
+    except ImportError:
+        try:
+            import psycopg2 as psycopg
+        except ImportError:
+            raise SystemExit("index_advisor needs psycopg or psycopg2") from None
+    return psycopg.connect(dsn)
+
+
+# =========
+# JavaScript scanning
+# =========
+
+def strip_comments(text):
+    # Blanks // and /* */ comments, keeping strings and line numbers intact
+    out, i, n = [], 0, len(text)
+    while i < n:
+        c = text[i]
+        if c == "/" and text.startswith("//", i):
+            j = text.find("\n", i)
+            i = n if j < 0 else j
+        elif c == "/" and text.startswith("/*", i):
+            j = text.find("*/", i + 2)
+            j = n if j < 0 else j + 2
+            out.append(re.sub(r"[^\n]", " ", text[i:j]))
+            i = j
+        elif c in "'\"`":
+            j = i + 1
+            while j < n and text[j] != c:
+                j += 2 if text[j] == "\\" else 1
+            out.append(text[i:j + 1])
+            i = j + 1
+        else:
+            out.append(c)
+            i += 1
+    return "".join(out)
+
+
+def _args(text, start):
+    # (raw argument text, end) for the call whose "(" is at text[start]
+    depth, j, n = 0, start, len(text)
+    while j < n:
+        c = text[j]
+        if c in "'\"`":
+            k = j + 1
+            while k < n and text[k] != c:
+                k += 2 if text[k] == "\\" else 1
+            j = k
+        elif c in "([{":
+            depth += 1
+        elif c in ")]}":
+            depth -= 1
+            if depth == 0:
+                return text[start + 1:j], j + 1
+        j += 1
+    return text[start + 1:], n
+
+
+def _literal(arg):
+    # A JS literal as Python (strings, numbers, booleans, null), else None
+    # with the raw text kept for identifiers and expressions
+    arg = arg.strip()
+    if len(arg) >= 2 and arg[0] in "'\"`" and arg[-1] == arg[0] and "${" not in arg:
+        return True, arg[1:-1]
+    if re.fullmatch(r"-?\d+(\.\d+)?", arg):
+        return True, float(arg) if "." in arg else int(arg)
+    if arg in ("true", "false", "null"):
+        return True, {"true": True, "false": False, "null": None}[arg]
+    return False, arg
+
+
+def _object_keys(arg):
+    # {a: x, "b": y} -> {"a": (literal?, value)}
+    arg = arg.strip()
+    if not (arg.startswith("{") and arg.endswith("}")):
+        return {}
+    out = {}
+    for item in split_top(arg[1:-1]):
+        key, sep, value = item.partition(":")
+        if sep:
+            out[key.strip().strip("'\"")] = _literal(value)
+    return out
+
+
+def _chain(text, pos):
+    # [(method, [args])] for .method(...) calls starting at text[pos]
+    calls = []
+    while True:
+        m = re.compile(r"\s*(?:\?)?\.\s*(\w+)\s*(?:<[^>()]*>)?\s*\(").match(text, pos)
+        if not m:
+            return calls
+        raw, pos = _args(text, m.end() - 1)
+        calls.append((m.group(1), split_top(raw)))
+
+
+def source_files(roots):
+    files = []
+    for root in roots:
+        for dirpath, dirnames, filenames in os.walk(root):
+            dirnames[:] = sorted(d for d in dirnames if d not in SKIP_DIRS)
+            names = set(filenames)
+            for name in sorted(filenames):
+                stem, ext = os.path.splitext(name)
+                if ext not in SOURCE_EXTS or name.endswith(".d.ts"):
+                    continue
+                # qione-web keeps compiled .js next to each .ts/.tsx; read the source once
+                if ext == ".js" and (f"{stem}.ts" in names or f"{stem}.tsx" in names):
+                    continue
+                files.append(os.path.join(dirpath, name))
+    return files
+
+
+def client_schemas(texts):
+    # path -> db.schema of the createClient() it makes, for files that make one
+    clients = {}
+    for path, text in texts.items():
+        for m in re.finditer(r"\bcreateClient\s*(?:<[^>()]*>)?\s*\(", text):
+            raw, _ = _args(text, m.end() - 1)
+            schema = re.search(r"\bdb\s*:\s*\{[^}]*\bschema\s*:\s*['\"](\w+)['\"]", raw)
+            clients[path] = schema.group(1) if schema else "public"
+    return clients
+
+
+def default_schema(path, clients):
+    best, best_len = "public", -1
+    for client, schema in clients.items():
+        common = len(os.path.commonpath([os.path.dirname(path), os.path.dirname(client)]))
+        if common > best_len:
+            best, best_len = schema, common
+    return best
+
+
+def _line(text, pos):
+    return text.count("\n", 0, pos) + 1
+
+
+def _shape(table, schema, origin, via):
+    return {"table": table, "schema": schema, "eq": [], "range": [], "preds": [], "order": [], "limit": None,
+            "origin": origin, "via": via}
+
+
+def _apply_calls(shape, calls):
+    # Folds builder calls into shape; False when the chain only writes rows
+    for method, args in calls:
+        values = [_literal(a) for a in args]
+        column = values[0][1] if values and values[0][0] and isinstance(values[0][1], str) else None
+        if method in WRITE_METHODS:
+            return False
+        if method == "match" and args:
+            for key, (is_literal, value) in _object_keys(args[0]).items():
+                _add_eq(shape, key, is_literal, value)
+        elif column is None:
+            if method == "limit" and values and values[0][0]:
+                shape["limit"] = values[0][1]
+            elif method in ("single", "maybeSingle"):
+                shape["limit"] = 1
+            elif method == "range" and len(values) == 2 and all(v[0] for v in values):
+                shape["limit"] = values[1][1] - values[0][1] + 1
+        elif method in EQ_METHODS and len(values) > 1:
+            _add_eq(shape, column, *values[1])
+        elif method in RANGE_METHODS:
+            shape["range"].append(column)
+        elif method == "is" and len(values) > 1:
+            _add_eq(shape, column, *values[1])
+        elif method == "not" and len(values) > 2 and values[1] == (True, "is"):
+            value = values[2][1]
+            shape["preds"].append(f"{quote(column)} is not {'null' if value is None else str(value).lower()}")
+        elif method == "order":
+            options = _object_keys(args[1]) if len(args) > 1 else {}
+            shape["order"].append((column, options.get("ascending", (True, True))[1] is False))
+    return True
+
+
+def _add_eq(shape, column, is_literal, value):
+    # Constant null and boolean tests go in the partial-index WHERE
+    if is_literal and value is None:
+        shape["preds"].append(f"{quote(column)} is null")
+    elif is_literal and isinstance(value, bool):
+        shape["preds"].append(quote(column) if value else f"not {quote(column)}")
+    elif column not in shape["eq"]:
+        shape["eq"].append(column)
+
+
+HELPER = re.compile(r"(?:const|let|var)\s+(\w+)\s*=\s*(?:async\s*)?\([^()]*\)\s*=>\s*$")
+
+
+def client_shapes(texts, clients):
+    shapes, helpers = [], {}
+    from_call = re.compile(r"\.\s*from\s*\(\s*(['\"`])([\w.]+)\1\s*\)")
+    for path, text in texts.items():
+        schema = default_schema(path, clients)
+        for m in from_call.finditer(text):
+            head = text[max(0, m.start() - 300):m.start()]
+            explicit = re.search(r"\.\s*schema\s*\(\s*['\"`](\w+)['\"`]\s*\)\s*$", head)
+            start = head[: explicit.start()] if explicit else head
+            table_schema = explicit.group(1) if explicit else schema
+            calls = _chain(text, m.end())
+            base = re.search(r"([\w.]+)\s*$", start)
+            helper = HELPER.search(start[: base.start()] if base else start)
+            if helper:
+                helpers[helper.group(1)] = (path, table_schema, m.group(2), calls)
+                continue
+            shape = _shape(m.group(2), table_schema, f"{os.path.relpath(path, ROOT)}:{_line(text, m.start())}", "client")
+            if _apply_calls(shape, calls):
+                shapes.append(shape)
+    for path, text in texts.items():
+        for name, (hpath, schema, table, head_calls) in helpers.items():
+            for m in re.finditer(rf"(?<![\w.]){name}\s*\(\s*\)", text):
+                if hpath == path and text[max(0, m.start() - 80):m.start()].rstrip().endswith(("=", "=>")):
+                    continue
+                shape = _shape(table, schema, f"{os.path.relpath(path, ROOT)}:{_line(text, m.start())}", "client")
+                if _apply_calls(shape, head_calls + _chain(text, m.end())):
+                    shapes.append(shape)
+    return shapes
+
+
+# =========
+# SQL in strings and policies
+# =========
+
+SQL_STRING = re.compile(r"(['\"`])\s*((?:select|update|delete)\b(?:(?!\1)[^\\]|\\.)*)\1", re.I | re.S)
+SQL_NAME = r'(?:"[^"]+"|[a-z_][\w$]*)(?:\.(?:"[^"]+"|[a-z_][\w$]*))?'
+
+
+def parse_sql_shape(sql, origin, schema="public"):
+    # Shape of a single-table SELECT/UPDATE/DELETE, else None
+    sql = re.sub(r"\s+", " ", sql.strip().rstrip(";"))
+    lowered = sql.lower()
+    if re.search(r"\bjoin\b|\bunion\b|\(\s*select\b", lowered):
+        return None
+    m = re.match(
+        rf"(?:select .*? from|delete from|update) ({SQL_NAME})"
+        r"(?:\s+(?:as\s+)?(?!(?:where|order|limit|set|returning|group|for)\b)\w+)?(?= |$)",
+        sql,
+        re.I,
+    )
+    if not m or m.group(1).lower() in ("set", "where"):
+        return None
+    name = m.group(1).replace('"', "")
+    table_schema, _, table = name.rpartition(".")
+    shape = _shape(table, table_schema or schema, origin, "sql")
+    clauses = re.split(r"\b(where|order by|limit|returning|group by|offset|for update)\b", sql[m.end():], flags=re.I)
+    parts = dict(zip((c.lower() for c in clauses[1::2]), clauses[2::2]))
+    where = parts.get("where", "")
+    if where and not re.search(r"\bor\b", where, re.I):
+        for cond in re.split(r"\band\b", where, flags=re.I):
+            cond = cond.strip()
+            if c := re.fullmatch(r"(\w+) is (not )?null", cond, re.I):
+                shape["preds"].append(f"{c.group(1).lower()} is {'not ' if c.group(2) else ''}null")
+            elif c := re.fullmatch(r"(\w+) = (true|false)", cond, re.I):
+                _add_eq(shape, c.group(1).lower(), True, c.group(2).lower() == "true")
+            elif c := re.fullmatch(r"(\w+) = ('(?:[^']|'')*')", cond, re.I):
+                # a constant in the query text: a partial index fits it
+                shape["preds"].append(f"{c.group(1).lower()} = {c.group(2)}")
+            elif c := re.fullmatch(r"(\w+) (?:=|in\b|= any\b)\s*(.+)", cond, re.I):
+                _add_eq(shape, c.group(1).lower(), False, c.group(2))
+            elif c := re.fullmatch(r"(\w+) (?:<|<=|>|>=|between\b) .+", cond, re.I):
+                shape["range"].append(c.group(1).lower())
+    for item in split_top(parts.get("order by", "")):
+        o = re.fullmatch(r"(\w+)(?: (asc|desc))?(?: nulls (?:first|last))?", item.strip(), re.I)
+        if o:
+            shape["order"].append((o.group(1).lower(), (o.group(2) or "").lower() == "desc"))
+    limit = re.match(r"\s*(\d+)", parts.get("limit", ""))
+    if limit:
+        shape["limit"] = int(limit.group(1))
+    return shape
+
+
+def sql_shapes(texts):
+    shapes = []
+    for path, text in texts.items():
+        for m in SQL_STRING.finditer(text):
+            origin = f"{os.path.relpath(path, ROOT)}:{_line(text, m.start())}"
+            shape = parse_sql_shape(m.group(2), origin)
+            if shape:
+                shapes.append(shape)
+    return shapes
+
+
+def policy_shapes(sql_paths):
+    # Per-tenant policies: every read through PostgREST is a tenant_id lookup
+    shapes = []
+    for path in sql_paths:
+        with open(path, "r", encoding="utf-8") as f:
+            statements = split_statements(f.read())
+        for stmt in statements:
+            m = re.match(rf'create policy ("[^"]+"|\w+) on ({SQL_NAME}) (.*)$', stmt, re.I)
+            if not m or not re.search(r"\b(using|with check)\b.*\btenant_id\b", m.group(3), re.I):
+                continue
+            table_schema, _, table = m.group(2).replace('"', "").rpartition(".")
+            shape = _shape(table, table_schema or "public", f"{os.path.relpath(path, ROOT)} policy {m.group(1)}", "policy")
+            shape["eq"].append("tenant_id")
+            shapes.append(shape)
+    return shapes
+
+
+# =========
+# Schema
+# =========
+
+def default_schema_sources():
+    sources = [os.path.join(ROOT, "supabase", "schema_snapshot.json"), os.path.join(ROOT, "supabase", "migrations")]
+    app_sql = glob.glob(os.path.join(ROOT, "apps", "**", "*.sql"), recursive=True)
+    # Files that create the tables first, then the ones that alter and index them
+    app_sql.sort(key=lambda p: ("schema" not in os.path.basename(p), p))
+    return [p for p in sources if os.path.exists(p)] + [p for p in app_sql if "node_modules" not in p]
+
+
+def load_schema(sources):
+    # Later sources replace earlier ones table by table; known holds the
+    # tables whose indexes the source recorded
+    tables, known = {}, set()
+    for source in sources:
+        model = load(source)
+        tables.update(model["tables"])
+        if model.get("indexes_known", True):
+            known.update(model["tables"])
+        else:
+            known.difference_update(model["tables"])
+    return {"format": FORMAT, "tables": tables}, known
+
+
+def resolve(shape, tables):
+    # "schema.table" for a shape; when none of the schema sources describe
+    # that schema, a unique table of that name elsewhere
+    name = f"{shape['schema']}.{shape['table']}"
+    if name in tables:
+        return name
+    if any(t.startswith(f"{shape['schema']}.") for t in tables):
+        return None
+    matches = [t for t in tables if t.split(".", 1)[1] == shape["table"]]
+    return matches[0] if len(matches) == 1 else None
+
+
+# =========
+# Recommendations
+# =========
+
+def candidate(shape, table):
+    # (columns, predicate) for a shape, columns as [(name, desc)]
+    known = table["columns"]
+    eq = [c for c in shape["eq"] if c in known]
+    if "tenant_id" in eq:
+        eq.remove("tenant_id")
+        eq.insert(0, "tenant_id")
+    columns = [(c, False) for c in eq]
+    order = [(c, desc) for c, desc in shape["order"] if c in known and c not in eq]
+    if order:
+        columns += order
+    elif shape["range"] and shape["range"][0] in known and shape["range"][0] not in eq:
+        columns.append((shape["range"][0], False))
+    preds = sorted(set(p for p in shape["preds"] if re.sub(r"^not ", "", p).split(" ")[0].strip('"') in known))
+    if not columns:
+        return None
+    return columns, " and ".join(preds) or None
+
+
+def served(columns, predicate, eq_count, table):
+    # The pk or an existing index leads with these columns (equality part in
+    # any order); a partial index only counts for the same predicate
+    names = [c for c, _ in columns]
+    existing = [(table["pk"], None)] + [(ix[1], ix[3]) for ix in table["indexes"]]
+    for lead, where in existing:
+        lead = [re.sub(r"\s+(asc|desc).*$", "", c, flags=re.I) for c in lead]
+        if where and (predicate is None or _norm_pred(where) != _norm_pred(predicate)):
+            continue
+        if len(lead) < len(names):
+            # a unique key on the equality columns alone already returns one row
+            if lead and set(lead) <= set(names[:eq_count]) and lead == table["pk"]:
+                return True
+            continue
+        if set(lead[:eq_count]) == set(names[:eq_count]) and lead[eq_count:len(names)] == names[eq_count:]:
+            return True
+    return False
+
+
+def _norm_pred(pred):
+    return re.sub(r"[()\s\"]+", " ", pred.lower()).strip()
+
+
+def _index_name(table, columns, predicate):
+    short = table.split(".")[1]
+    parts = [short] + [c for c, _ in columns]
+    if predicate:
+        parts += ["where", re.sub(r"\W+", "_", predicate.lower()).strip("_")]
+    return "_".join(parts + ["idx"])[:63]
+
+
+def recommend(shapes, tables, known):
+    recs, unresolved = {}, []
+    for shape in shapes:
+        name = resolve(shape, tables)
+        table = tables.get(name) if name else None
+        if table is None or table.get("view"):
+            unresolved.append(shape)
+            continue
+        cand = candidate(shape, table)
+        if cand is None:
+            continue
+        columns, predicate = cand
+        eq_count = sum(1 for c in shape["eq"] if c in table["columns"])
+        if served(columns, predicate, eq_count, table):
+            continue
+        key = (name, tuple(columns), predicate)
+        rec = recs.setdefault(key, {
+            "table": name, "columns": columns, "where": predicate, "eq_count": eq_count,
+            "name": _index_name(name, columns, predicate), "shapes": [],
+            "indexes_known": name in known, "limit": shape["limit"],
+        })
+        rec["shapes"].append(shape)
+        rec["limit"] = rec["limit"] or shape["limit"]
+    # An index whose columns lead another one with the same predicate is redundant
+    out = []
+    for rec in recs.values():
+        wider = [
+            o for o in recs.values()
+            if o is not rec and o["table"] == rec["table"] and o["where"] == rec["where"]
+            and len(o["columns"]) > len(rec["columns"])
+            and [c for c, _ in o["columns"][: len(rec["columns"])]] == [c for c, _ in rec["columns"]]
+        ]
+        if wider:
+            wider[0]["shapes"].extend(rec["shapes"])
+        else:
+            out.append(rec)
+    return sorted(out, key=lambda r: (r["table"], r["name"])), unresolved
+
+
+def index_sql(rec):
+    cols = ", ".join(quote(c) + (" desc" if desc else "") for c, desc in rec["columns"])
+    sql = f"create index if not exists {quote(rec['name'])} on {qname(rec['table'])} ({cols})"
+    return sql + (f" where {rec['where']};" if rec["where"] else ";")
+
+
+def migration_sql(recs):
+    out = ["-- Indexes for the app's query shapes (tools/index_advisor.py); review before applying", "begin;"]
+    for schema in sorted({r["table"].split(".")[0] for r in recs}):
+        out += ["", "-- =========", f"-- {schema}", "-- ========="]
+        for rec in (r for r in recs if r["table"].startswith(f"{schema}.")):
+            out.append(f"-- {', '.join(s['origin'] for s in rec['shapes'][:3])}")
+            out.append(index_sql(rec))
+    out += ["", "commit;"]
+    return "\n".join(out) + "\n"
+
+
+# =========
+# Verification
+# =========
+
+LIVE_INDEXES = """
+select n.nspname || '.' || c.relname, i.relname, x.indisunique,
+       pg_get_expr(x.indpred, x.indrelid),
+       array(select pg_get_indexdef(x.indexrelid, k, true) from generate_series(1, x.indnkeyatts) k order by k)
+from pg_index x
+join pg_class i on i.oid = x.indexrelid
+join pg_class c on c.oid = x.indrelid
+join pg_namespace n on n.oid = c.relnamespace
+where n.nspname || '.' || c.relname = any(%s)
+"""
+
+
+def live_indexes(cur, tables, names):
+    # Replaces the loaded indexes of names with what the database has
+    cur.execute(LIVE_INDEXES, (list(names),))
+    found = {name: [] for name in names}
+    for table, index, unique, where, columns in cur.fetchall():
+        found.setdefault(table, []).append([index, list(columns), bool(unique), where])
+    for name, indexes in found.items():
+        if name in tables:
+            tables[name]["indexes"] = indexes
+    cur.execute(
+        "select n.nspname || '.' || c.relname from pg_class c join pg_namespace n on n.oid = c.relnamespace "
+        "where n.nspname || '.' || c.relname = any(%s) and c.relkind in ('r', 'p')",
+        (list(names),),
+    )
+    return {row[0] for row in cur.fetchall()}
+
+
+def _plan(cur, sql):
+    cur.execute(f"explain (format json) {sql}")
+    raw = cur.fetchone()[0]
+    plan = (json.loads(raw) if isinstance(raw, str) else raw)[0]["Plan"]
+    nodes, stack = [], [plan]
+    while stack:
+        node = stack.pop()
+        nodes.append(node["Node Type"] + (f" using {node['Index Name']}" if node.get("Index Name") else ""))
+        stack.extend(node.get("Plans", []))
+    return {"cost": plan["Total Cost"], "nodes": nodes}
+
+
+def probe_query(cur, rec):
+    # A query of the recommendation's shape, with filter values from the
+    # table's most common row; None when no row matches the predicate
+    table, columns, where = qname(rec["table"]), rec["columns"], rec["where"]
+    eq = [c for c, _ in columns[: rec["eq_count"]]]
+    rest = columns[rec["eq_count"]:]
+    conds = [where] if where else []
+    if eq:
+        cur.execute(
+            f"select {', '.join(f'quote_literal({quote(c)})' for c in eq)} from {table}"
+            f" where {' and '.join(conds + [f'{quote(c)} is not null' for c in eq])}"
+            f" group by {', '.join(quote(c) for c in eq)} order by count(*) desc limit 1"
+        )
+        row = cur.fetchone()
+        if row is None:
+            return None
+        conds += [f"{quote(c)} = {v}" for c, v in zip(eq, row)]
+    else:
+        cur.execute(f"select 1 from {table}{' where ' + where if where else ''} limit 1")
+        if cur.fetchone() is None:
+            return None
+    ordered = any(s["order"] for s in rec["shapes"])
+    sql = f"select * from {table}"
+    if not ordered and rest:
+        # range column: the upper half of its values
+        column = quote(rest[0][0])
+        cur.execute(f"select quote_literal(percentile_disc(0.5) within group (order by {column})) from {table}")
+        conds.append(f"{column} >= {cur.fetchone()[0]}")
+    if conds:
+        sql += " where " + " and ".join(conds)
+    if ordered and rest:
+        sql += " order by " + ", ".join(quote(c) + (" desc" if d else "") for c, d in rest)
+    return sql + f" limit {rec['limit'] or DEFAULT_LIMIT}"
+
+
+def verify(dsn, recs, tables):
+    conn = _connect(dsn)
+    try:
+        with conn.cursor() as cur:
+            present = live_indexes(cur, tables, {r["table"] for r in recs})
+            conn.rollback()
+            for rec in recs:
+                table = tables[rec["table"]]
+                if rec["table"] not in present:
+                    rec["status"] = "no such table"
+                    continue
+                if served(rec["columns"], rec["where"], rec["eq_count"], table):
+                    rec["status"] = "exists"
+                    continue
+                try:
+                    sql = probe_query(cur, rec)
+                    if sql is None:
+                        rec["status"] = "no data"
+                        continue
+                    rec["query"] = sql
+                    rec["before"] = _plan(cur, sql)
+                    cur.execute(index_sql(rec).replace("if not exists ", ""))
+                    cur.execute(f"analyze {qname(rec['table'])}")
+                    rec["after"] = _plan(cur, sql)
+                    used = any(rec["name"] in node for node in rec["after"]["nodes"])
+                    better = rec["after"]["cost"] < rec["before"]["cost"]
+                    rec["status"] = "verified" if used and better else "unused"
+                except Exception as e:
+                    rec["status"] = f"error: {str(e).strip().splitlines()[0]}"
+                finally:
+                    conn.rollback()
+    finally:
+        conn.close()
+
+
+# =========
+# CLI
+# =========
+
+def analyze(roots, schema_sources):
+    texts = {}
+    for path in source_files(roots):
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            texts[path] = strip_comments(f.read())
+    model, known = load_schema(schema_sources)
+    sql_paths = []
+    for source in schema_sources:
+        if os.path.isdir(source):
+            sql_paths += sorted(glob.glob(os.path.join(source, "*.sql")))
+        elif source.endswith(".sql"):
+            sql_paths.append(source)
+    shapes = client_shapes(texts, client_schemas(texts)) + sql_shapes(texts) + policy_shapes(sql_paths)
+    recs, unresolved = recommend(shapes, model["tables"], known)
+    return model, shapes, recs, unresolved
+
+
+def _describe(rec):
+    cols = ", ".join(c + (" desc" if d else "") for c, d in rec["columns"])
+    return f"{rec['table']} ({cols}){' where ' + rec['where'] if rec['where'] else ''}"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Recommend indexes from the app's query shapes.")
+    parser.add_argument("roots", nargs="*", help="source directories to scan (default: apps)")
+    parser.add_argument("--schema", action="append", help="schema source for schema_snapshot.py, repeatable "
+                        "(default: the snapshot, supabase/migrations and apps/**/*.sql)")
+    parser.add_argument("--schemas", help="comma-separated schemas to recommend for (e.g. qione for a migration)")
+    parser.add_argument("--dsn", default=None, help="verify against this database (default: $DATABASE_URL if set)")
+    parser.add_argument("--no-verify", action="store_true", help="do not connect even if DATABASE_URL is set")
+    parser.add_argument("--sql", action="store_true", help="print the recommendations as a migration")
+    parser.add_argument("--shapes", action="store_true", help="also list every query shape found")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args(argv)
+
+    roots = args.roots or [os.path.join(ROOT, "apps")]
+    try:
+        model, shapes, recs, unresolved = analyze(roots, args.schema or default_schema_sources())
+    except (OSError, SnapshotError, json.JSONDecodeError) as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 2
+
+    if args.schemas:
+        wanted = set(args.schemas.split(","))
+        recs = [r for r in recs if r["table"].split(".")[0] in wanted]
+
+    dsn = None if args.no_verify else args.dsn or os.environ.get("DATABASE_URL")
+    if dsn:
+        verify(dsn, recs, model["tables"])
+        recs = [r for r in recs if r["status"] != "exists"]
+
+    if args.sql:
+        keep = [r for r in recs if r.get("status", "verified") == "verified"]
+        sys.stdout.write(migration_sql(keep))
+        return 0
+    if args.json:
+        report = {
+            "recommendations": [
+                {**{k: v for k, v in r.items() if k != "shapes"}, "ddl": index_sql(r),
+                 "origins": [s["origin"] for s in r["shapes"]]}
+                for r in recs
+            ],
+            "unresolved": [{"table": f"{s['schema']}.{s['table']}", "origin": s["origin"]} for s in unresolved],
+        }
+        if args.shapes:
+            report["shapes"] = shapes
+        print(json.dumps(report, indent=2, default=str))
+        return 0
+
+    if args.shapes:
+        for s in shapes:
+            order = ", ".join(c + (" desc" if d else "") for c, d in s["order"])
+            print(f"{s['via']:>6} {s['schema']}.{s['table']}: eq={s['eq']} range={s['range']} preds={s['preds']} "
+                  f"order=[{order}] limit={s['limit']}  ({s['origin']})")
+        print()
+    for rec in recs:
+        status = rec.get("status") or ("missing" if rec["indexes_known"] else "not in schema files; verify with --dsn")
+        print(f"{_describe(rec)}: {status}")
+        if "before" in rec:
+            print(f"    cost {rec['before']['cost']:,.2f} -> {rec['after']['cost']:,.2f}; "
+                  f"plan {' / '.join(rec['after']['nodes'])}")
+        for shape in rec["shapes"]:
+            print(f"    {shape['via']}: {shape['origin']}")
+    for shape in unresolved:
+        name = resolve(shape, model["tables"])
+        problem = "a view; index its tables" if name else "table not found in the schema sources"
+        print(f"{shape['schema']}.{shape['table']}: {problem} ({shape['origin']})")
+    print(f"{len(shapes)} query shapes, {len(recs)} recommendations")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
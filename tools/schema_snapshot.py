@@ -0,0 +1,814 @@
+# Load, diff and plan migrations from schema snapshots.
+#
+#   python tools/schema_snapshot.py load supabase/schema_snapshot.json -o snapshot.compact.json
+#   python tools/schema_snapshot.py lint supabase/migrations
+#   python tools/schema_snapshot.py diff supabase/schema_snapshot.json supabase/migrations
+#   python tools/schema_snapshot.py plan supabase/schema_snapshot.json supabase/migrations > candidate.sql
+#
+# A SOURCE is any of:
+#   - a schema snapshot: the introspection JSON, bare or wrapped the way
+#     supabase/schema_snapshot.json is (a list holding one object whose
+#     "schema_introspection_json" is the JSON as a string)
+#   - a compact file written by `load -o`
+#   - a .sql file, or a directory whose *.sql files are applied in name order
+#     (supabase/migrations); the parser follows create/alter/drop table,
+#     create index and views, and skips function bodies
+# Columns, primary keys, foreign keys and indexes are compared; check
+# constraints, triggers, policies and functions are not. The current
+# introspection query records no indexes, so index drift is only reported
+# when the current side is SQL or a snapshot that has them.
+#
+# Snapshots are normalized while they are parsed: every column, key and table
+# object becomes a small list the moment the JSON decoder builds it, and the
+# wrapped string is decoded and dropped inside the same pass, so the verbose
+# tree never exists in memory. The compact form is a table index keyed by
+# "schema.table"; loading it back is a plain json.load.
+#
+#   diff A B  what B has that A lacks or differs in (A = current, B = wanted)
+#   lint      foreign keys with no index leading on their columns, and *_id
+#             columns that look like references but have no foreign key
+#   plan A B  candidate migration SQL taking A to B, plus the lint fixes for
+#             B; drops are written commented out
+#
+# Supabase-managed schemas (auth, storage, ...) are left out unless
+# --all-schemas; when one side is SQL, only the schemas it defines are
+# compared, since migrations describe part of the database.
+import argparse
+import functools
+import glob
+import json
+import os
+import re
+import sys
+import time
+
+FORMAT = "qione-schema/1"
+
+MANAGED_SCHEMAS = frozenset(
+    {
+        "auth", "cron", "extensions", "graphql", "graphql_public", "net", "pgbouncer", "pgsodium",
+        "realtime", "storage", "supabase_functions", "supabase_migrations", "vault",
+    }
+)
+
+# pg_constraint confdeltype codes, as the snapshot stores them
+ON_DELETE = {"cascade": "c", "set null": "n", "set default": "d", "restrict": "r", "no action": "a"}
+ON_DELETE_SQL = {code: words for words, code in ON_DELETE.items()}
+
+TYPE_ALIASES = {
+    "int": "integer", "int4": "integer", "int8": "bigint", "int2": "smallint",
+    "serial": "integer", "serial4": "integer", "bigserial": "bigint", "serial8": "bigint", "smallserial": "smallint",
+    "bool": "boolean", "float8": "double precision", "float": "double precision", "float4": "real",
+    "decimal": "numeric", "varchar": "character varying", "char": "character", "bpchar": "character",
+    "timestamptz": "timestamp with time zone", "timestamp": "timestamp without time zone",
+    "timetz": "time with time zone", "time": "time without time zone",
+}
+
+COLUMN_KEYWORDS = ("not", "null", "default", "primary", "unique", "references", "check", "constraint",
+                   "generated", "collate")
+
+
+class SnapshotError(ValueError):
+    pass
+
+
+# =========
+# Normalization
+# =========
+
+# Both are called per column, on a small vocabulary; cache the results
+@functools.lru_cache(maxsize=4096)
+def normalize_type(sql_type):
+    t = re.sub(r"\s+", " ", sql_type.strip().lower())
+    array = ""
+    while t.endswith("[]"):
+        array += "[]"
+        t = t[:-2].rstrip()
+    m = re.match(r"^(.*?)\s*(\(\s*[\d\s,]+\))?(\s+with(?:out)? time zone)?$", t)
+    base, args, zone = m.group(1), m.group(2) or "", m.group(3) or ""
+    if args:
+        args = "(" + ",".join(a.strip() for a in args[1:-1].split(",")) + ")"
+    if zone:
+        # timestamp(3) with time zone keeps the precision after the base name
+        return f"{base}{args}{zone}{array}"
+    alias = TYPE_ALIASES.get(base, base)
+    if alias.startswith(("timestamp ", "time ")) and args:
+        head, _, tail = alias.partition(" ")
+        return f"{head}{args} {tail}{array}"
+    return f"{alias}{args}{array}"
+
+
+@functools.lru_cache(maxsize=4096)
+def normalize_default(default):
+    if default is None:
+        return None
+    d = default.strip()
+    if d.lower().startswith("nextval("):
+        return "<serial>"
+    # 'x'::text -> 'x'; keep the literal's case, lowercase the rest
+    d = re.sub(r"('(?:[^']|'')*')::[\w.\" ]+?(\[\])?(?=$|[\s,)])", r"\1", d)
+    parts = re.split(r"('(?:[^']|'')*')", d)
+    d = "".join(p if i % 2 else p.lower() for i, p in enumerate(parts))
+    d = re.sub(r"\s+", " ", d)
+    if d in ("current_timestamp", "now()", "transaction_timestamp()"):
+        return "now()"
+    if d.startswith("(") and d.endswith(")") and d.count("(") == 1:
+        d = d[1:-1]
+    return d
+
+
+def _table(columns=None, pk=None, fks=None, indexes=None, view=False):
+    table = {"columns": columns or {}, "pk": pk or [], "fks": fks or [], "indexes": indexes or []}
+    if view:
+        table["view"] = True
+    return table
+
+
+# =========
+# Loading snapshots
+# =========
+
+def _snapshot_hook(obj):
+    # Called by the decoder for every object, innermost first
+    if "ordinal" in obj and "type" in obj and "name" in obj:
+        return ("col", obj["name"], [normalize_type(obj["type"]), bool(obj.get("nullable", True)),
+                                     normalize_default(obj.get("default"))])
+    if "ref_table" in obj:
+        return ("fk", [list(obj["columns"]), f"{obj.get('ref_schema') or 'public'}.{obj['ref_table']}",
+                       list(obj.get("ref_columns") or []), obj.get("on_delete") or "a"])
+    if "name" in obj and isinstance(obj.get("columns"), list) and "primary_key" in obj:
+        columns = {c[1]: c[2] for c in obj["columns"] if isinstance(c, tuple) and c[0] == "col"}
+        fks = [f[1] for f in obj.get("foreign_keys") or [] if isinstance(f, tuple)]
+        indexes = [
+            [i.get("name"), list(i.get("columns") or []), bool(i.get("unique")), i.get("where")]
+            for i in obj.get("indexes") or []
+            if isinstance(i, dict)
+        ]
+        # The introspection lists views with the tables; they have no key
+        view = not obj.get("primary_key") and obj["name"].startswith("v_")
+        table = _table(columns, list(obj.get("primary_key") or []), fks, indexes, view)
+        return ("table", obj["name"], table, "indexes" in obj)
+    if "schema" in obj and "tables" in obj:
+        return ("schema", obj["schema"], [t for t in obj["tables"] or [] if isinstance(t, tuple)])
+    if "schemas" in obj:
+        tables, indexes_known = {}, False
+        for entry in obj["schemas"] or []:
+            if isinstance(entry, tuple) and entry[0] == "schema":
+                for _, name, table, has_indexes in entry[2]:
+                    tables[f"{entry[1]}.{name}"] = table
+                    indexes_known = indexes_known or has_indexes
+        return {"format": FORMAT, "generated_at": obj.get("generated_at"), "tables": tables,
+                "indexes_known": indexes_known}
+    if "schema_introspection_json" in obj:
+        return json.loads(obj["schema_introspection_json"], object_hook=_snapshot_hook)
+    return obj
+
+
+def load_json(path):
+    with open(path, "r", encoding="utf-8") as f:
+        text = f.read()
+    if '"format"' in text[:200] and FORMAT in text[:200]:
+        model = json.loads(text)
+    else:
+        model = json.loads(text, object_hook=_snapshot_hook)
+    del text
+    if isinstance(model, list):
+        models = [m for m in model if isinstance(m, dict) and m.get("format") == FORMAT]
+        if len(models) != 1:
+            raise SnapshotError(f"{path}: expected one schema_introspection_json object, found {len(models)}")
+        model = models[0]
+    if not isinstance(model, dict) or model.get("format") != FORMAT:
+        raise SnapshotError(f"{path}: not a schema snapshot or compact file")
+    model["source"] = path
+    return model
+
+
+# =========
+# Loading SQL
+# =========
+
+def split_statements(sql):
+    # Statements with comments removed; quoted strings, quoted identifiers
+    # and dollar-quoted bodies are kept whole
+    statements, buf, i, n = [], [], 0, len(sql)
+    while i < n:
+        c = sql[i]
+        if c == "-" and sql.startswith("--", i):
+            j = sql.find("\n", i)
+            i = n if j < 0 else j
+        elif c == "/" and sql.startswith("/*", i):
+            j = sql.find("*/", i + 2)
+            i = n if j < 0 else j + 2
+            buf.append(" ")
+        elif c in "'\"":
+            j = i + 1
+            while j < n:
+                if sql[j] == c:
+                    if j + 1 < n and sql[j + 1] == c:
+                        j += 2
+                        continue
+                    break
+                j += 1
+            buf.append(sql[i:j + 1])
+            i = j + 1
+        elif c == "$" and (m := re.match(r"\$[A-Za-z_]*\$", sql[i:i + 64])):
+            tag = m.group(0)
+            j = sql.find(tag, i + len(tag))
+            j = n if j < 0 else j + len(tag)
+            buf.append(sql[i:j])
+            i = j
+        elif c == ";":
+            statements.append("".join(buf).strip())
+            buf = []
+            i += 1
+        else:
+            buf.append(c)
+            i += 1
+    tail = "".join(buf).strip()
+    if tail:
+        statements.append(tail)
+    return [re.sub(r"\s+", " ", s) for s in statements if s]
+
+
+def split_top(text, sep=","):
+    # Split on sep outside parentheses and quotes
+    parts, depth, buf, quote = [], 0, [], None
+    for c in text:
+        if quote:
+            buf.append(c)
+            if c == quote:
+                quote = None
+            continue
+        if c in "'\"":
+            quote = c
+        elif c == "(":
+            depth += 1
+        elif c == ")":
+            depth -= 1
+        elif c == sep and depth == 0:
+            parts.append("".join(buf).strip())
+            buf = []
+            continue
+        buf.append(c)
+    if "".join(buf).strip():
+        parts.append("".join(buf).strip())
+    return parts
+
+
+def _paren(text, start):
+    # (content, end) of the parenthesized group opening at text[start]
+    depth, quote = 0, None
+    for j in range(start, len(text)):
+        c = text[j]
+        if quote:
+            if c == quote:
+                quote = None
+        elif c in "'\"":
+            quote = c
+        elif c == "(":
+            depth += 1
+        elif c == ")":
+            depth -= 1
+            if depth == 0:
+                return text[start + 1:j], j + 1
+    raise SnapshotError(f"unbalanced parentheses: {text[start:start + 80]}")
+
+
+def _ident(name):
+    return name.strip().strip('"')
+
+
+def _qualified(name):
+    parts = [_ident(p) for p in name.split(".")]
+    return ".".join(parts) if len(parts) == 2 else f"public.{parts[0]}"
+
+
+def _columns_list(text):
+    return [_ident(c) for c in split_top(text)]
+
+
+NAME = r'(?:"[^"]+"|[\w$]+)(?:\.(?:"[^"]+"|[\w$]+))?'
+
+
+def _references(text):
+    m = re.search(rf"\breferences\s+({NAME})\s*(?:\(([^)]*)\))?(.*)$", text, re.I)
+    if not m:
+        return None
+    on_delete = re.search(r"\bon delete (cascade|set null|set default|restrict|no action)", m.group(3), re.I)
+    return (_qualified(m.group(1)), _columns_list(m.group(2)) if m.group(2) else ["id"],
+            ON_DELETE[on_delete.group(1).lower()] if on_delete else "a")
+
+
+def _column_def(text):
+    # (name, [type, nullable, default], inline pk, inline unique, inline fk)
+    m = re.match(r'("[^"]+"|[\w$]+)\s+(.*)$', text)
+    name, rest = _ident(m.group(1)), m.group(2)
+    words, type_end = rest.split(" "), 0
+    depth = 0
+    for k, word in enumerate(words):
+        if depth == 0 and word.lower() in COLUMN_KEYWORDS:
+            break
+        depth += word.count("(") - word.count(")")
+        type_end = k + 1
+    sql_type = " ".join(words[:type_end])
+    tail = " ".join(words[type_end:])
+    default = None
+    dm = re.search(r"\bdefault\s+", tail, re.I)
+    if dm:
+        expr, j, depth = [], dm.end(), 0
+        while j < len(tail):
+            if depth == 0 and re.match(r"(not null|null|primary key|unique|references|check|constraint|generated)\b",
+                                       tail[j:], re.I) and (j == 0 or tail[j - 1] == " "):
+                break
+            if tail[j] == "'":
+                k = tail.index("'", j + 1)
+                while k + 1 < len(tail) and tail[k + 1] == "'":
+                    k = tail.index("'", k + 2)
+                expr.append(tail[j:k + 1])
+                j = k + 1
+                continue
+            depth += {"(": 1, ")": -1}.get(tail[j], 0)
+            expr.append(tail[j])
+            j += 1
+        default = "".join(expr).strip()
+    if normalize_type(sql_type).startswith(("integer", "bigint", "smallint")) and sql_type.lower().endswith("serial"):
+        default = "nextval(serial)"
+    lowered = tail.lower()
+    nullable = "not null" not in lowered and "primary key" not in lowered
+    return (name, [normalize_type(sql_type), nullable, normalize_default(default)],
+            "primary key" in lowered, bool(re.search(r"\bunique\b", lowered)), _references(tail))
+
+
+def _table_constraint(table, text, table_name):
+    body = re.sub(r"^constraint\s+\S+\s+", "", text, flags=re.I)
+    lowered = body.lower()
+    if lowered.startswith("primary key"):
+        cols, _ = _paren(body, body.index("("))
+        table["pk"] = _columns_list(cols)
+        for col in table["pk"]:
+            if col in table["columns"]:
+                table["columns"][col][1] = False
+    elif lowered.startswith("foreign key"):
+        cols, end = _paren(body, body.index("("))
+        ref = _references(body[end:])
+        if ref:
+            table["fks"].append([_columns_list(cols), ref[0], ref[1], ref[2]])
+    elif lowered.startswith("unique"):
+        cols, _ = _paren(body, body.index("("))
+        columns = _columns_list(cols)
+        table["indexes"].append([f"{table_name.split('.')[1]}_{'_'.join(columns)}_key", columns, True, None])
+    return table
+
+
+def _add_column(table, table_name, text):
+    name, column, pk, unique, fk = _column_def(text)
+    table["columns"][name] = column
+    if pk:
+        table["pk"] = [name]
+    if unique:
+        table["indexes"].append([f"{table_name.split('.')[1]}_{name}_key", [name], True, None])
+    if fk:
+        table["fks"].append([[name], fk[0], fk[1], fk[2]])
+
+
+def _create_table(tables, stmt):
+    m = re.match(rf"create (?:(?:temp|temporary|unlogged) )?table (?:if not exists )?({NAME})\s*\(", stmt, re.I)
+    if not m:
+        return
+    name = _qualified(m.group(1))
+    body, _ = _paren(stmt, m.end() - 1)
+    table = _table()
+    for item in split_top(body):
+        if re.match(r"(constraint|primary key|foreign key|unique|check|exclude)\b", item, re.I):
+            _table_constraint(table, item, name)
+        else:
+            _add_column(table, name, item)
+    if "if not exists" in stmt[:m.end()].lower() and name in tables:
+        return
+    tables[name] = table
+
+
+def _alter_table(tables, stmt):
+    m = re.match(rf"alter table (?:if exists )?(?:only )?({NAME}) (.*)$", stmt, re.I)
+    if not m:
+        return
+    name = _qualified(m.group(1))
+    table = tables.get(name)
+    if table is None:
+        return
+    for action in split_top(m.group(2)):
+        lowered = action.lower()
+        if lowered.startswith("add column") or (lowered.startswith("add ") and not re.match(
+                r"add (constraint|primary key|foreign key|unique|check|exclude)\b", lowered)):
+            text = re.sub(r"^add (?:column )?(?:if not exists )?", "", action, flags=re.I)
+            if _ident(text.split(" ")[0]) not in table["columns"] or "if not exists" not in lowered:
+                _add_column(table, name, text)
+        elif lowered.startswith("add "):
+            _table_constraint(table, action[4:].strip(), name)
+        elif lowered.startswith("drop column"):
+            column = _ident(re.sub(r"^drop column (?:if exists )?", "", action, flags=re.I).split(" ")[0])
+            table["columns"].pop(column, None)
+            table["fks"] = [fk for fk in table["fks"] if column not in fk[0]]
+            table["indexes"] = [ix for ix in table["indexes"] if column not in ix[1]]
+        elif lowered.startswith("alter column") or lowered.startswith("alter "):
+            am = re.match(r'alter (?:column )?("[^"]+"|[\w$]+) (.*)$', action, re.I)
+            column = table["columns"].get(_ident(am.group(1))) if am else None
+            if column is None:
+                continue
+            op = am.group(2)
+            if re.match(r"(set data )?type ", op, re.I):
+                column[0] = normalize_type(re.split(r"\busing\b", re.sub(r"^(set data )?type ", "", op, flags=re.I),
+                                                    flags=re.I)[0])
+            elif op.lower() == "set not null":
+                column[1] = False
+            elif op.lower() == "drop not null":
+                column[1] = True
+            elif op.lower().startswith("set default "):
+                column[2] = normalize_default(op[12:])
+            elif op.lower() == "drop default":
+                column[2] = None
+        elif lowered.startswith("drop constraint"):
+            constraint = _ident(re.sub(r"^drop constraint (?:if exists )?", "", action, flags=re.I).split(" ")[0])
+            table["indexes"] = [ix for ix in table["indexes"] if ix[0] != constraint]
+        elif lowered.startswith("rename column"):
+            rm = re.match(r'rename column ("[^"]+"|[\w$]+) to ("[^"]+"|[\w$]+)', action, re.I)
+            old, new = _ident(rm.group(1)), _ident(rm.group(2))
+            if old in table["columns"]:
+                table["columns"][new] = table["columns"].pop(old)
+        elif lowered.startswith("rename to"):
+            schema = name.split(".")[0]
+            tables[f"{schema}.{_ident(action[10:])}"] = tables.pop(name)
+            return
+
+
+def _create_index(tables, stmt):
+    m = re.match(
+        rf"create (unique )?index (?:concurrently )?(?:if not exists )?({NAME} )?on (?:only )?({NAME})"
+        r"(?: using \w+)?\s*\(",
+        stmt,
+        re.I,
+    )
+    if not m:
+        return
+    table = tables.get(_qualified(m.group(3)))
+    if table is None:
+        return
+    cols, end = _paren(stmt, m.end() - 1)
+    where = re.search(r"\bwhere (.*)$", stmt[end:], re.I)
+    index_name = _ident(m.group(2).strip().split(".")[-1]) if m.group(2) else None
+    columns = [re.sub(r"\s+(asc|desc)(\s+nulls (first|last))?$", "", _ident(c), flags=re.I) for c in split_top(cols)]
+    if index_name and any(ix[0] == index_name for ix in table["indexes"]):
+        return
+    table["indexes"].append([index_name, columns, bool(m.group(1)), where.group(1).strip() if where else None])
+
+
+def load_sql(paths, tables=None):
+    tables = {} if tables is None else tables
+    for path in paths:
+        with open(path, "r", encoding="utf-8") as f:
+            statements = split_statements(f.read())
+        for stmt in statements:
+            lowered = stmt.lower()
+            if lowered.startswith("create table") or re.match(r"create (temp|temporary|unlogged) table", lowered):
+                _create_table(tables, stmt)
+            elif lowered.startswith("alter table"):
+                _alter_table(tables, stmt)
+            elif re.match(r"create (unique )?index", lowered):
+                _create_index(tables, stmt)
+            elif m := re.match(rf"create (?:or replace )?(?:materialized )?view ({NAME})", stmt, re.I):
+                tables.setdefault(_qualified(m.group(1)), _table(view=True))
+            elif m := re.match(rf"drop (?:table|view|materialized view) (?:if exists )?({NAME})", stmt, re.I):
+                tables.pop(_qualified(m.group(1)), None)
+            elif m := re.match(rf"drop index (?:concurrently )?(?:if exists )?({NAME})", stmt, re.I):
+                index = _ident(m.group(1).split(".")[-1])
+                for table in tables.values():
+                    table["indexes"] = [ix for ix in table["indexes"] if ix[0] != index]
+    return tables
+
+
+def load(source):
+    started = time.perf_counter()
+    if os.path.isdir(source):
+        paths = sorted(glob.glob(os.path.join(source, "*.sql")))
+        model = {"format": FORMAT, "generated_at": None, "tables": load_sql(paths), "sql": True,
+                 "indexes_known": True}
+    elif source.endswith(".sql"):
+        model = {"format": FORMAT, "generated_at": None, "tables": load_sql([source]), "sql": True,
+                 "indexes_known": True}
+    else:
+        model = load_json(source)
+    model["source"] = source
+    model["load_ms"] = round((time.perf_counter() - started) * 1000, 1)
+    return model
+
+
+def write_compact(model, path):
+    out = {k: model[k] for k in ("format", "generated_at", "indexes_known", "tables")}
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(out, f, separators=(",", ":"), sort_keys=True)
+
+
+def schemas_of(model):
+    return {name.split(".")[0] for name in model["tables"]}
+
+
+def select(model, schemas=None, all_schemas=False):
+    return {
+        name: table
+        for name, table in model["tables"].items()
+        if (schemas is None or name.split(".")[0] in schemas)
+        and (all_schemas or schemas is not None or name.split(".")[0] not in MANAGED_SCHEMAS)
+    }
+
+
+# =========
+# Diff and lint
+# =========
+
+def _covered(columns, table):
+    # Some index (or the primary key) leads with exactly these columns
+    wanted = set(columns)
+    leads = [table["pk"]] + [ix[1] for ix in table["indexes"] if not ix[3]]
+    return any(len(lead) >= len(columns) and set(lead[: len(columns)]) == wanted for lead in leads)
+
+
+def diff(a, b, indexes_known=True):
+    # Findings taking tables a (current) to tables b (wanted); indexes are
+    # compared only when a's source records them
+    findings = []
+    for name in sorted(set(a) | set(b)):
+        ta, tb = a.get(name), b.get(name)
+        if ta is None:
+            findings.append({"kind": "table_missing", "table": name})
+            continue
+        if tb is None:
+            findings.append({"kind": "table_extra", "table": name})
+            continue
+        if ta.get("view") or tb.get("view"):
+            continue
+        for column in sorted(set(ta["columns"]) | set(tb["columns"])):
+            ca, cb = ta["columns"].get(column), tb["columns"].get(column)
+            if ca is None:
+                findings.append({"kind": "column_missing", "table": name, "column": column})
+            elif cb is None:
+                findings.append({"kind": "column_extra", "table": name, "column": column})
+            else:
+                for kind, i in (("type_drift", 0), ("nullable_drift", 1), ("default_drift", 2)):
+                    if ca[i] != cb[i] and not (kind == "default_drift" and "<serial>" in (ca[i], cb[i])):
+                        findings.append({"kind": kind, "table": name, "column": column, "current": ca[i], "wanted": cb[i]})
+        if ta["pk"] != tb["pk"] and tb["pk"]:
+            findings.append({"kind": "pk_drift", "table": name, "current": ta["pk"], "wanted": tb["pk"]})
+        fks_a = {(tuple(fk[0]), fk[1], tuple(fk[2])): fk for fk in ta["fks"]}
+        fks_b = {(tuple(fk[0]), fk[1], tuple(fk[2])): fk for fk in tb["fks"]}
+        for key in sorted(set(fks_b) - set(fks_a)):
+            findings.append({"kind": "fk_missing", "table": name, "fk": fks_b[key]})
+        for key in sorted(set(fks_a) - set(fks_b)):
+            findings.append({"kind": "fk_extra", "table": name, "fk": fks_a[key]})
+        for key in sorted(set(fks_a) & set(fks_b)):
+            if fks_a[key][3] != fks_b[key][3]:
+                findings.append({"kind": "fk_drift", "table": name, "fk": fks_b[key], "current": fks_a[key][3]})
+        if not indexes_known:
+            continue
+        idx_a = {(tuple(ix[1]), ix[2], ix[3]) for ix in ta["indexes"]}
+        for ix in tb["indexes"]:
+            if (tuple(ix[1]), ix[2], ix[3]) not in idx_a and not (ix[2] and ix[1] == ta["pk"]):
+                findings.append({"kind": "index_missing", "table": name, "index": ix})
+    return findings
+
+
+def _looks_like_user(column):
+    return column in ("user_id", "created_by", "updated_by", "paid_by", "owner_id") or column.endswith("_user_id")
+
+
+def lint(tables, all_tables=None, indexes_known=True):
+    # Unindexed foreign keys (when the source records indexes), and *_id
+    # columns with no foreign key
+    all_tables = all_tables or tables
+    findings = []
+    for name in sorted(tables):
+        table = tables[name]
+        if table.get("view"):
+            continue
+        for fk in table["fks"]:
+            if indexes_known and not _covered(fk[0], table):
+                findings.append({"kind": "fk_unindexed", "table": name, "fk": fk})
+        referenced = {col for fk in table["fks"] for col in fk[0]}
+        schema = name.split(".")[0]
+        for column, (sql_type, _, _) in sorted(table["columns"].items()):
+            if column in referenced or sql_type != "uuid" or column in table["pk"][:1] and len(table["pk"]) == 1:
+                continue
+            target = None
+            if column.endswith("_id"):
+                stem = column[:-3]
+                for candidate in (f"{schema}.{stem}s", f"{schema}.{stem}es", f"{schema}.{stem}"):
+                    if candidate in all_tables and all_tables[candidate]["pk"] == ["id"] and candidate != name:
+                        target = candidate
+                        break
+            if target is None and _looks_like_user(column) and "auth.users" in all_tables:
+                target = "auth.users"
+            if target:
+                findings.append({"kind": "fk_candidate", "table": name, "fk": [[column], target, ["id"], "a"]})
+    return findings
+
+
+def describe(finding):
+    kind, table = finding["kind"], finding["table"]
+    if kind in ("table_missing", "table_extra"):
+        return f"{table}: table {'missing' if kind == 'table_missing' else 'not in wanted schema'}"
+    if kind in ("column_missing", "column_extra"):
+        return f"{table}.{finding['column']}: column {'missing' if kind == 'column_missing' else 'not in wanted schema'}"
+    if kind.endswith("_drift") and "column" in finding:
+        return f"{table}.{finding['column']}: {kind[:-6]} {finding['current']!r} -> {finding['wanted']!r}"
+    if kind == "pk_drift":
+        return f"{table}: primary key {finding['current']} -> {finding['wanted']}"
+    if kind in ("fk_missing", "fk_extra", "fk_unindexed", "fk_candidate", "fk_drift"):
+        cols, ref, ref_cols, _ = finding["fk"]
+        label = {"fk_missing": "foreign key missing", "fk_extra": "foreign key not in wanted schema",
+                 "fk_unindexed": "foreign key has no index", "fk_candidate": "looks like a reference, no foreign key",
+                 "fk_drift": f"foreign key on delete {ON_DELETE_SQL.get(finding.get('current'), '?')} differs"}[kind]
+        return f"{table}({', '.join(cols)}) -> {ref}({', '.join(ref_cols)}): {label}"
+    if kind == "index_missing":
+        _, cols, unique, where = finding["index"]
+        return f"{table}: {'unique ' if unique else ''}index on ({', '.join(cols)}){' where ' + where if where else ''} missing"
+    return f"{table}: {kind}"
+
+
+# =========
+# SQL generation
+# =========
+
+def quote(name):
+    return name if re.match(r"^[a-z_][a-z0-9_$]*$", name) else '"' + name.replace('"', '""') + '"'
+
+
+def qname(name):
+    return ".".join(quote(p) for p in name.split("."))
+
+
+def _column_sql(column, spec):
+    sql_type, nullable, default = spec
+    parts = [quote(column), sql_type]
+    if not nullable:
+        parts.append("not null")
+    if default is not None and default != "<serial>":
+        parts.append(f"default {default}")
+    return " ".join(parts)
+
+
+def _fk_sql(table, fk, validate=True):
+    cols, ref, ref_cols, on_delete = fk
+    short = table.split(".")[1]
+    constraint = quote(f"{short}_{'_'.join(cols)}_fkey")
+    sql = (f"alter table {qname(table)} add constraint {constraint} foreign key ({', '.join(map(quote, cols))}) "
+           f"references {qname(ref)}({', '.join(map(quote, ref_cols))})")
+    if on_delete and on_delete != "a":
+        sql += f" on delete {ON_DELETE_SQL[on_delete]}"
+    if not validate:
+        # Added without scanning the table; validate separately (takes a lighter lock)
+        return f"{sql} not valid;\nalter table {qname(table)} validate constraint {constraint};"
+    return sql + ";"
+
+
+def _index_sql(table, index):
+    name, cols, unique, where = index
+    short = table.split(".")[1]
+    if not name:
+        name = "_".join([short] + [re.sub(r"\W+", "_", c).strip("_") for c in cols] + ["idx"])
+    sql = f"create {'unique ' if unique else ''}index if not exists {quote(name)} on {qname(table)} ({', '.join(cols)})"
+    return sql + (f" where {where};" if where else ";")
+
+
+def plan(a, b, indexes_known=True):
+    # Candidate migration SQL taking tables a to tables b
+    creates, alters, constraints, indexes, drops = [], [], [], [], []
+    for f in diff(a, b, indexes_known):
+        kind, table = f["kind"], f["table"]
+        if kind == "table_missing":
+            spec = b[table]
+            if spec.get("view"):
+                creates.append(f"-- view {qname(table)} is missing; recreate it from its migration")
+                continue
+            lines = [_column_sql(c, s) for c, s in spec["columns"].items()]
+            if spec["pk"]:
+                lines.append(f"primary key ({', '.join(map(quote, spec['pk']))})")
+            creates.append(f"create table if not exists {qname(table)} (\n  " + ",\n  ".join(lines) + "\n);")
+            constraints.extend(_fk_sql(table, fk) for fk in spec["fks"])
+            indexes.extend(_index_sql(table, ix) for ix in spec["indexes"])
+        elif kind == "table_extra":
+            drops.append(f"-- drop table {qname(table)};")
+        elif kind == "column_missing":
+            spec = b[table]["columns"][f["column"]]
+            alters.append(f"alter table {qname(table)} add column if not exists {_column_sql(f['column'], spec)};")
+        elif kind == "column_extra":
+            drops.append(f"-- alter table {qname(table)} drop column {quote(f['column'])};")
+        elif kind == "type_drift":
+            column = quote(f["column"])
+            alters.append(f"alter table {qname(table)} alter column {column} type {f['wanted']} using {column}::{f['wanted']};")
+        elif kind == "nullable_drift":
+            alters.append(f"alter table {qname(table)} alter column {quote(f['column'])} "
+                          f"{'drop not null' if f['wanted'] else 'set not null'};")
+        elif kind == "default_drift":
+            action = "drop default" if f["wanted"] is None else f"set default {f['wanted']}"
+            alters.append(f"alter table {qname(table)} alter column {quote(f['column'])} {action};")
+        elif kind == "pk_drift":
+            alters.append(f"-- primary key of {qname(table)}: ({', '.join(f['current'])}) -> ({', '.join(f['wanted'])}); "
+                          "needs a hand-written migration")
+        elif kind == "fk_missing":
+            constraints.append(_fk_sql(table, f["fk"], validate=False))
+        elif kind == "fk_drift":
+            constraints.append(f"-- {describe(f)}; drop and re-add:\n-- {_fk_sql(table, f['fk'])}")
+        elif kind == "fk_extra":
+            drops.append(f"-- {describe(f)}")
+        elif kind == "index_missing":
+            indexes.append(_index_sql(table, f["index"]))
+
+    for f in lint(b):
+        if f["kind"] == "fk_unindexed":
+            sql = _index_sql(f["table"], [None, f["fk"][0], False, None])
+            if sql not in indexes:
+                indexes.append(f"{sql}  -- foreign key to {f['fk'][1]}")
+        elif f["kind"] == "fk_candidate":
+            constraints.append(f"-- {describe(f)}\n-- {_fk_sql(f['table'], f['fk'], validate=False)}")
+
+    sections = [("Tables", creates), ("Columns", alters), ("Foreign keys", constraints), ("Indexes", indexes),
+                ("Not applied: drops", drops)]
+    out = ["-- Candidate migration generated by tools/schema_snapshot.py; review before applying", "begin;"]
+    for title, lines in sections:
+        if lines:
+            out += ["", "-- =========", f"-- {title}", "-- =========", *lines]
+    out += ["", "commit;"]
+    return "\n".join(out) + "\n"
+
+
+# =========
+# CLI
+# =========
+
+def _pair(args):
+    a, b = load(args.a), load(args.b)
+    schemas = set(args.schemas.split(",")) if args.schemas else None
+    if schemas is None:
+        sql_sides = [m for m in (a, b) if m.get("sql")]
+        if sql_sides:
+            schemas = set.union(*(schemas_of(m) for m in sql_sides)) - ({"public"} if args.all_schemas else set())
+            schemas = schemas or None
+    return a, b, select(a, schemas, args.all_schemas), select(b, schemas, args.all_schemas)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load, diff and plan migrations from schema snapshots.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("load", help="load a source and print a summary, or write its compact form")
+    p.add_argument("source")
+    p.add_argument("-o", "--output", help="write the compact form here")
+
+    p = sub.add_parser("lint", help="unindexed foreign keys and likely missing foreign keys")
+    p.add_argument("source")
+
+    for command in ("diff", "plan"):
+        p = sub.add_parser(command, help="differences from A to B" if command == "diff" else "candidate SQL from A to B")
+        p.add_argument("a", help="current schema (usually the snapshot)")
+        p.add_argument("b", help="wanted schema (usually supabase/migrations)")
+
+    for p in sub.choices.values():
+        p.add_argument("--schemas", help="comma-separated schemas to include")
+        p.add_argument("--all-schemas", action="store_true", help="include Supabase-managed schemas")
+        p.add_argument("--json", action="store_true", help="print findings as JSON")
+    args = parser.parse_args(argv)
+
+    try:
+        if args.command in ("load", "lint"):
+            model = load(args.source)
+            schemas = set(args.schemas.split(",")) if args.schemas else None
+            tables = select(model, schemas, args.all_schemas)
+            if args.command == "load":
+                if args.output:
+                    write_compact(model, args.output)
+                columns = sum(len(t["columns"]) for t in model["tables"].values())
+                print(f"{args.source}: {len(schemas_of(model))} schemas, {len(model['tables']):,} tables, "
+                      f"{columns:,} columns in {model['load_ms']:,} ms")
+                return 0
+            findings = lint(tables, model["tables"], model.get("indexes_known", True))
+        else:
+            a, b, ta, tb = _pair(args)
+            if args.command == "plan":
+                sys.stdout.write(plan(ta, tb, a.get("indexes_known", True)))
+                return 0
+            findings = diff(ta, tb, a.get("indexes_known", True))
+            findings += lint(tb, b["tables"], b.get("indexes_known", True))
+    except (OSError, SnapshotError, json.JSONDecodeError) as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 2
+
+    if args.json:
+        print(json.dumps(findings, indent=2))
+    else:
+        for finding in findings:
+            print(describe(finding))
+        print(f"{len(findings):,} findings")
+    return 1 if findings else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,168 @@
+# Reference implementation of the QiHome settlement planner.
+#
+# Mirrors apps/qione-worker/src/settle.ts, which serves the plans: given each
+# member's net balance (v_qihome_member_balances.net_cents, positive = owes),
+# list the transfers that settle everyone up. Both produce identical plans for
+# the same input; keep them in step.
+#
+#   greedy  matches equal debts and credits first, then repeatedly has the
+#           largest debtor pay the largest creditor: at most n - 1 transfers,
+#           O(n log n)
+#   exact   the fewest transfers possible: n minus the largest number of
+#           groups whose balances sum to zero, found by a subset DP over
+#           2^n states, so only for small groups (EXACT_MAX members)
+#   auto    exact up to EXACT_AUTO members, greedy above
+#
+#   python tools/settlement.py balances.json [--mode exact]
+#
+# balances.json is a list of {"user_id", "net_cents"} rows; the plan is
+# printed as JSON.
+import argparse
+import heapq
+import json
+import sys
+
+EXACT_AUTO = 12
+EXACT_MAX = 18
+
+
+class PlanError(ValueError):
+    pass
+
+
+def _ledger(balances):
+    # [(user_id, cents)] with zero balances dropped, in user_id order
+    return sorted((str(b["user_id"]), int(b["net_cents"])) for b in balances if int(b["net_cents"]))
+
+
+def greedy(balances):
+    ledger = _ledger(balances)
+    transfers = []
+
+    # Equal and opposite balances settle in one transfer each
+    creditors = {}
+    for user, cents in ledger:
+        if cents < 0:
+            creditors.setdefault(-cents, []).append(user)
+    paired = set()
+    for user, cents in ledger:
+        if cents > 0 and creditors.get(cents):
+            creditor = creditors[cents].pop(0)
+            transfers.append((user, creditor, cents))
+            paired.update((user, creditor))
+
+    # Largest debtor pays largest creditor; ties go to the smaller user id
+    debts = [(-cents, user) for user, cents in ledger if cents > 0 and user not in paired]
+    credits = [(cents, user) for user, cents in ledger if cents < 0 and user not in paired]
+    heapq.heapify(debts)
+    heapq.heapify(credits)
+    while debts and credits:
+        debt, debtor = heapq.heappop(debts)
+        credit, creditor = heapq.heappop(credits)
+        amount = min(-debt, -credit)
+        transfers.append((debtor, creditor, amount))
+        if -debt > amount:
+            heapq.heappush(debts, (debt + amount, debtor))
+        if -credit > amount:
+            heapq.heappush(credits, (credit + amount, creditor))
+    return transfers
+
+
+def exact(balances):
+    ledger = _ledger(balances)
+    n = len(ledger)
+    if n > EXACT_MAX:
+        raise PlanError(f"exact mode handles at most {EXACT_MAX} members with a balance, got {n}")
+    amounts = [cents for _, cents in ledger]
+    size = 1 << n
+
+    # sums[mask]: total balance of the members in mask
+    sums = [0] * size
+    for mask in range(1, size):
+        low = mask & -mask
+        sums[mask] = sums[mask ^ low] + amounts[low.bit_length() - 1]
+
+    # groups[mask]: most zero-sum groups mask can be split into (a nonzero
+    # remainder, from unbalanced input, counts as none)
+    groups = [0] * size
+    for mask in range(1, size):
+        best = 0
+        rest = mask
+        while rest:
+            low = rest & -rest
+            rest ^= low
+            if groups[mask ^ low] > best:
+                best = groups[mask ^ low]
+        groups[mask] = best + (sums[mask] == 0)
+
+    # Peel members off the full set along the DP; every zero-sum point
+    # closes a group
+    order = []
+    mask = size - 1
+    while mask:
+        target = groups[mask] - (sums[mask] == 0)
+        rest = mask
+        while rest:
+            low = rest & -rest
+            rest ^= low
+            if groups[mask ^ low] == target:
+                break
+        order.append(low.bit_length() - 1)
+        mask ^= low
+    order.reverse()
+
+    transfers = []
+    group = []
+    total = 0
+    for index in order:
+        group.append(ledger[index])
+        total += ledger[index][1]
+        if total == 0:
+            transfers += greedy([{"user_id": u, "net_cents": c} for u, c in group])
+            group = []
+    if group:
+        transfers += greedy([{"user_id": u, "net_cents": c} for u, c in group])
+    return transfers
+
+
+def plan(balances, mode="auto"):
+    # Returns {"mode", "transfers": [{"from_user", "to_user", "amount_cents"}], "unsettled_cents"}
+    if mode == "auto":
+        mode = "exact" if len(_ledger(balances)) <= EXACT_AUTO else "greedy"
+    if mode not in ("greedy", "exact"):
+        raise PlanError(f"unknown mode {mode!r}")
+    transfers = greedy(balances) if mode == "greedy" else exact(balances)
+    paid = {}
+    for debtor, creditor, amount in transfers:
+        paid[debtor] = paid.get(debtor, 0) + amount
+        paid[creditor] = paid.get(creditor, 0) - amount
+    return {
+        "mode": mode,
+        "transfers": [{"from_user": d, "to_user": c, "amount_cents": a} for d, c, a in transfers],
+        # Nonzero only when shares do not add up to the expenses they split
+        "unsettled_cents": sum(abs(cents - paid.get(user, 0)) for user, cents in _ledger(balances)),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Plan the transfers that settle a QiHome ledger.")
+    parser.add_argument("balances", help="JSON list of {user_id, net_cents}; - for stdin")
+    parser.add_argument("--mode", choices=("auto", "greedy", "exact"), default="auto")
+    args = parser.parse_args(argv)
+
+    if args.balances == "-":
+        balances = json.load(sys.stdin)
+    else:
+        with open(args.balances, "r", encoding="utf-8") as f:
+            balances = json.load(f)
+    try:
+        result = plan(balances, args.mode)
+    except PlanError as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 2
+    print(json.dumps(result, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,98 @@
+# Settlement plans (tools/settlement.py): every plan settles the ledger, and
+# exact mode matches a brute-force optimum on small groups.
+import os
+import random
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from settlement import EXACT_MAX, PlanError, exact, greedy, plan  # noqa: E402
+
+
+def ledger(amounts):
+    return [{"user_id": f"u{i:02d}", "net_cents": cents} for i, cents in enumerate(amounts)]
+
+
+def balanced(rng, n):
+    # n nonzero balances summing to zero, with repeated values so that
+    # several zero-sum groups are common
+    while True:
+        amounts = [rng.choice([-300, -200, -100, 100, 200, 300]) for _ in range(n - 1)]
+        amounts.append(-sum(amounts))
+        if all(amounts):
+            return amounts
+
+
+def partitions(items):
+    if not items:
+        yield []
+        return
+    first, rest = items[0], items[1:]
+    for part in partitions(rest):
+        for i in range(len(part)):
+            yield part[:i] + [[first] + part[i]] + part[i + 1:]
+        yield [[first]] + part
+
+
+def fewest_transfers(amounts):
+    # A group of k members settles in k - 1 transfers and no fewer, so the
+    # optimum is n minus the most zero-sum groups in any partition
+    best = max(sum(1 for block in part if sum(block) == 0) for part in partitions(list(amounts)))
+    return len(amounts) - best
+
+
+def settled(amounts, transfers):
+    paid = [0] * len(amounts)
+    for debtor, creditor, amount in transfers:
+        assert amount > 0
+        paid[int(debtor[1:])] += amount
+        paid[int(creditor[1:])] -= amount
+    return paid == amounts
+
+
+@pytest.mark.parametrize("n", range(2, 8))
+def test_exact_matches_brute_force(n):
+    rng = random.Random(n)
+    for _ in range(30):
+        amounts = balanced(rng, n)
+        transfers = exact(ledger(amounts))
+        assert settled(amounts, transfers)
+        assert len(transfers) == fewest_transfers(amounts), amounts
+
+
+@pytest.mark.parametrize("n", range(2, 8))
+def test_greedy_settles_within_n_minus_one(n):
+    rng = random.Random(100 + n)
+    for _ in range(30):
+        amounts = balanced(rng, n)
+        transfers = greedy(ledger(amounts))
+        assert settled(amounts, transfers)
+        assert fewest_transfers(amounts) <= len(transfers) <= n - 1
+
+
+def test_exact_beats_greedy_on_split_groups():
+    # {+3, +4, -7} and {+11, -5, -6} settle in two transfers each; largest
+    # first, greedy has +11 pay -7 and mixes the groups
+    amounts = [300, 400, -700, 1100, -500, -600]
+    assert len(greedy(ledger(amounts))) == 5
+    assert len(exact(ledger(amounts))) == fewest_transfers(amounts) == 4
+
+
+def test_plan_reports_unsettled_cents_for_unbalanced_input():
+    assert plan(ledger([300, -200, -100]), "exact")["unsettled_cents"] == 0
+    assert plan(ledger([300, -200]), "greedy")["unsettled_cents"] == 100
+
+
+def test_zero_balances_need_no_transfers():
+    assert plan(ledger([0, 0]))["transfers"] == []
+
+
+def test_auto_switches_to_greedy_above_the_exact_limit():
+    amounts = [100] * 10 + [-100] * 10
+    assert plan(ledger(amounts))["mode"] == "greedy"
+    with pytest.raises(PlanError):
+        exact(ledger(amounts[: EXACT_MAX + 1] + [-sum(amounts[: EXACT_MAX + 1])]))
+    with pytest.raises(PlanError):
+        plan(ledger(amounts), "fastest")
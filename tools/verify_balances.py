@@ -0,0 +1,86 @@
+# Check qione.qihome_balances against the ledger it is maintained from.
+#
+#   python tools/verify_balances.py --dsn postgresql://localhost/postgres
+#   python tools/verify_balances.py --tenant <uuid>     # one tenant
+#   python tools/verify_balances.py --repair            # rewrite drifting tenants
+#
+# The balances are kept by triggers (supabase/migrations/004); this recomputes
+# every tenant from its expenses, shares and settlements with
+# qihome_balance_drift() and lists each stored total that disagrees. Tenants
+# are checked one query at a time, so the job never holds a long snapshot and
+# can run on a schedule against production. Exits 1 when drift remains.
+import argparse
+import os
+import sys
+
+
+def _connect(dsn):
+    try:
+        import psycopg
+    except ImportError:
+        try:
+            import psycopg2 as psycopg
+        except ImportError:
+            raise SystemExit("verify_balances needs psycopg or psycopg2") from None
+    return psycopg.connect(dsn)
+
+
+def _tenants(conn, tenant):
+    if tenant:
+        return [tenant]
+    with conn.cursor() as cur:
+        cur.execute("select id::text from qione.tenants order by id")
+        rows = [row[0] for row in cur.fetchall()]
+    conn.rollback()
+    return rows
+
+
+def verify(dsn, tenant=None, repair=False, progress=None):
+    # Returns {"tenants", "drifted": {tenant: [(user_id, field, stored, expected)]}, "repaired"}
+    conn = _connect(dsn)
+    drifted = {}
+    repaired = []
+    try:
+        tenants = _tenants(conn, tenant)
+        for tenant_id in tenants:
+            with conn.cursor() as cur:
+                cur.execute(
+                    "select user_id::text, field, stored, expected from qione.qihome_balance_drift(%s::uuid)",
+                    (tenant_id,),
+                )
+                rows = cur.fetchall()
+            conn.rollback()
+            if not rows:
+                continue
+            drifted[tenant_id] = rows
+            if progress:
+                for user_id, field, stored, expected in rows:
+                    progress(f"  {tenant_id} {user_id} {field}: stored {stored:,}, ledger {expected:,}")
+            if repair:
+                with conn.cursor() as cur:
+                    cur.execute("select qione.qihome_repair_balances(%s::uuid)", (tenant_id,))
+                conn.commit()
+                repaired.append(tenant_id)
+    finally:
+        conn.close()
+    return {"tenants": len(tenants), "drifted": drifted, "repaired": repaired}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Recompute QiHome balances from the ledger and report drift.")
+    parser.add_argument("--dsn", default=None, help="connection string (default: $DATABASE_URL)")
+    parser.add_argument("--tenant", default=None, help="check one tenant id")
+    parser.add_argument("--repair", action="store_true", help="rewrite the balances of tenants that drifted")
+    args = parser.parse_args(argv)
+
+    dsn = args.dsn or os.environ.get("DATABASE_URL")
+    if not dsn:
+        parser.error("--dsn or DATABASE_URL is required")
+    report = verify(dsn, args.tenant, args.repair, progress=print)
+    drifted = len(report["drifted"])
+    print(f"{report['tenants']:,} tenants checked, {drifted:,} drifted, {len(report['repaired']):,} repaired")
+    return 1 if drifted > len(report["repaired"]) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())